@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+'''
+Measures how long it takes to build the OptMDFpathway MILP of a random network:
+the creation of the LinearProgram, the assembly of its matrices and the
+construction of the solver object.
+
+usage (from the repository root): python -m benchmarks.lp_benchmark [number of reactions] [solver]
+'''
+import sys
+import time
+
+import cobra
+import numpy
+
+from cnapy.sd_class_interface import Solver
+from cnapy.sd_ci_optmdfpathway import create_optmdfpathway_milp
+
+
+def random_network(num_reactions: int, seed: int = 0) -> cobra.Model:
+    '''irreversible reactions with 2-4 metabolites each from a pool of num_reactions/2 metabolites'''
+    rng = numpy.random.default_rng(seed)
+    model = cobra.Model("random")
+    metabolites = [cobra.Metabolite(f"M{i}", compartment="c") for i in range(max(2, num_reactions // 2))]
+    model.add_metabolites(metabolites)
+    reactions = []
+    for i in range(num_reactions):
+        reaction = cobra.Reaction(f"R{i}", lower_bound=0.0, upper_bound=1000.0)
+        chosen = rng.choice(len(metabolites), size=rng.integers(2, 5), replace=False)
+        reaction.add_metabolites({metabolites[j]: (-1.0 if k % 2 == 0 else 1.0) * rng.integers(1, 3)
+                                  for k, j in enumerate(chosen)})
+        reactions.append(reaction)
+    model.add_reactions(reactions)
+    return model
+
+
+if __name__ == "__main__":
+    num_reactions = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    solver = Solver(sys.argv[2]) if len(sys.argv) > 2 else Solver.GLPK
+    model = random_network(num_reactions)
+    dG0_values = {r.id: {"dG0": float(v), "uncertainty": 0.0}
+                  for r, v in zip(model.reactions, numpy.random.default_rng(1).normal(0, 20, num_reactions))}
+    concentration_values = {"DEFAULT": {"min": 1e-6, "max": 0.02}}
+
+    start = time.perf_counter()
+    lp = create_optmdfpathway_milp(model, dG0_values, concentration_values)
+    lp.set_single_variable_objective("var_B", direction=lp.objective.direction)
+    print(f"LinearProgram creation: {time.perf_counter() - start:.3f} s")
+
+    start = time.perf_counter()
+    solver_input = lp._assemble_solver_input()
+    print(f"matrix assembly: {time.perf_counter() - start:.3f} s "
+          f"({lp.num_variables} variables, {solver_input['A_eq'].shape[0]} equalities, "
+          f"{solver_input['A_ineq'].shape[0]} inequalities, "
+          f"{solver_input['indic_constr'].A.shape[0]} indicator constraints)")
+
+    start = time.perf_counter()
+    lp.construct_solver_object(solver=solver)
+    print(f"construct_solver_object with {solver.value}: {time.perf_counter() - start:.3f} s")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+'''
+Measures the startup time of CNApy: the time to import the application modules
+and the time until the main window is painted for the first time.
+Every run is done in a new Python process. Also lists which of the modules that
+are meant to be loaded on demand have already been imported at the first paint.
+
+usage (from the repository root): python -m benchmarks.startup_benchmark [number of runs]
+'''
+import json
+import statistics
+import subprocess
+import sys
+
+deferred_modules = ["straindesign", "matplotlib.pyplot", "openpyxl", "efmtool_link", "jpype",
+                    "optlang_enumerator.mcs_computation", "PyQt5.QtWebEngineWidgets", "PySide2.QtWebEngineWidgets"]
+
+single_run = '''
+import json, sys, time
+start = time.perf_counter()
+from qtpy.QtCore import QEvent, QObject, QTimer
+import cnapy.application # sets the application attributes
+from qtpy.QtWidgets import QApplication
+from cnapy.appdata import AppData
+from cnapy.gui_elements.main_window import MainWindow
+import_time = time.perf_counter() - start
+
+class FirstPaint(QObject):
+    paint_time = None
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self.paint_time is None:
+            self.paint_time = time.perf_counter() - start
+            QTimer.singleShot(0, QApplication.quit)
+        return False
+
+qapp = QApplication(sys.argv)
+appdata = AppData()
+window = MainWindow(appdata)
+appdata.window = window
+window.recreate_maps()
+first_paint = FirstPaint()
+window.installEventFilter(first_paint)
+window.show()
+qapp.exec_()
+print(json.dumps({"import": import_time, "first paint": first_paint.paint_time,
+                  "loaded": [m for m in DEFERRED if m in sys.modules]}))
+'''
+
+
+def run_once():
+    process = subprocess.run([sys.executable, "-c", single_run.replace("DEFERRED", repr(deferred_modules))],
+                             capture_output=True, text=True)
+    if process.returncode != 0: # e.g. a module that is imported at startup is missing
+        sys.exit("CNApy could not be started:\n" + process.stderr)
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    results = [run_once() for _ in range(runs)]
+    for key in ("import", "first paint"):
+        values = [r[key] for r in results]
+        print(f"{key}: median {statistics.median(values):.3f} s, min {min(values):.3f} s, max {max(values):.3f} s")
+    print("deferred modules loaded at first paint:", ", ".join(results[-1]["loaded"]) or "none")
@@ -14,4 +14,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from cnapy.__main__ import main_cnapy
-main_cnapy()
+
+if __name__ == "__main__": # the strain design worker process imports this as well
+    main_cnapy()
@@ -13,21 +13,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 
-import os
-import site
-from jpype._jvmfinder import getDefaultJVMPath, JVMNotFoundException, JVMNotSupportedException
-try:
-    getDefaultJVMPath()
-except (JVMNotFoundException, JVMNotSupportedException):
-    for path in site.getsitepackages():
-        # in one of these conda puts the JRE
-        os.environ['JAVA_HOME'] = os.path.join(path, 'Library')
-        try:
-            getDefaultJVMPath()
-            break
-        except (JVMNotFoundException, JVMNotSupportedException):
-            pass
-
+# the JVM is only started when it is needed, see cnapy.jvm
 from cnapy.application import Application
 
 def main_cnapy():
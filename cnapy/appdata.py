@@ -1,24 +1,29 @@
 """The application data"""
 import os
 import json
-import gurobipy
 from configparser import ConfigParser
 import pathlib
 import pkg_resources
 from tempfile import TemporaryDirectory
-from typing import List, Set, Dict, Tuple
+from typing import List, Set, Dict, Tuple, Union
 from ast import literal_eval as make_tuple
 from math import isclose
 import appdirs
 from enum import IntEnum
 
 import cobra
-from optlang.symbolics import Zero
 from optlang_enumerator.cobra_cnapy import CNApyModel
 from qtpy.QtCore import Qt, Signal, QObject
 from qtpy.QtGui import QColor
 from qtpy.QtWidgets import QMessageBox
 
+from cnapy.flux_value_store import FluxValueStore
+from cnapy.scenario_batch import add_scenario_reactions, apply_scenario, empty_constraint, read_scenario_file
+from cnapy.thermodynamic_data import ThermodynamicData
+from cnapy.lazy_import import lazy_import
+
+gurobipy = lazy_import("gurobipy") # only needed when an error occurs
+
 # from straindesign.parse_constr import linexprdict2str # indirectly leads to a JVM restart exception?!?
 
 class ModelItemType(IntEnum):
@@ -55,6 +60,8 @@ class AppData(QObject):
         self.work_directory = str(os.path.join(
             pathlib.Path.home(), "CNApy-projects"))
         self.use_results_cache = False
+        self.map_memory_budget = 0 # MB for the scenes of the maps, 0: no limit
+        self.prewarm_jvm = False # start the JVM for efmtool in the background after startup
         self.results_cache_dir: pathlib.Path = pathlib.Path(".")
         self.last_scen_directory = str(os.path.join(
             pathlib.Path.home(), "CNApy-projects"))
@@ -164,56 +171,12 @@ class AppData(QObject):
         parser.set('cnapy-config', 'abs_tol', str(self.abs_tol))
         parser.set('cnapy-config', 'use_results_cache', str(self.use_results_cache))
         parser.set('cnapy-config', 'results_cache_directory', str(self.results_cache_dir))
+        parser.set('cnapy-config', 'map_memory_budget', str(self.map_memory_budget))
+        parser.set('cnapy-config', 'prewarm_jvm', str(self.prewarm_jvm))
         parser.set('cnapy-config', 'recent_cna_files', str(self.recent_cna_files))
         parser.write(fp)
         fp.close()
 
-    def compute_color_onoff(self, value: Tuple[float, float]):
-        (vl, vh) = value
-        vl = round(vl, self.rounding)
-        vh = round(vh, self.rounding)
-        if vl < 0.0:
-            return QColor.fromRgb(0, 255, 0)
-        elif vh > 0.0:
-            return QColor.fromRgb(0, 255, 0)
-        else:
-            return QColor.fromRgb(255, 0, 0)
-
-    def compute_color_heat(self, value: Tuple[float, float], low, high):
-        (vl, vh) = value
-        vl = round(vl, self.rounding)
-        vh = round(vh, self.rounding)
-        mean = my_mean((vl, vh))
-        if mean > 0.0:
-            if high == 0.0:
-                h = 255
-            else:
-                h = mean * 255 / high
-            return QColor.fromRgbF(255-h, 255, 255 - h)
-        else:
-            if low == 0.0:
-                h = 255
-            else:
-                h = mean * 255 / low
-            return QColor.fromRgbF(255, 255 - h, 255 - h)
-
-    def low_and_high(self) -> Tuple[int, int]:
-        low = 0
-        high = 0
-        for value in self.project.scen_values.values():
-            mean = my_mean(value)
-            if mean < low:
-                low = mean
-            if mean > high:
-                high = mean
-        for value in self.project.comp_values.values():
-            mean = my_mean(value)
-            if mean < low:
-                low = mean
-            if mean > high:
-                high = mean
-        return (low, high)
-
     def unsaved_scenario_changes(self):
         self.project.scen_values.has_unsaved_changes = True
         self.unsavedScenarioChanges.emit()
@@ -221,7 +184,7 @@ class AppData(QObject):
     unsavedScenarioChanges = Signal()
 
 class Scenario(Dict[str, Tuple[float, float]]):
-    empty_constraint = (None, "", "")
+    empty_constraint = empty_constraint
 
     # cannot do this because of the import problem
     # @staticmethod
@@ -251,100 +214,34 @@ class Scenario(Dict[str, Tuple[float, float]]):
         self.has_unsaved_changes = False
 
     def load(self, filename: str, appdata: AppData, merge=False) -> Tuple[List[str], List, List]:
-        unknown_ids: List(str)= []
-        incompatible_constraints = []
-        skipped_scenario_reactions = []
+        '''
+        Loads a scenario file, when merging only its flux values and pinned reactions are added.
+        Returns the unknown reaction IDs, the incompatible constraints and the skipped scenario reactions.
+        '''
         if not merge:
             self.clear()
-        with open(filename, 'r') as fp:
-            if filename.endswith('scen'): # CNApy scenario
-                self.file_name = filename
-                json_dict = json.load(fp)
-                if {'fluxes', 'pinned_reactions', 'description', 'objective_direction',
-                     'objective_coefficients', 'use_scenario_objective', 'version'}.issubset(json_dict.keys()):
-                    flux_values = json_dict['fluxes']
-                    for reac_id in json_dict['pinned_reactions']:
-                        if reac_id in appdata.project.cobra_py_model.reactions:
-                            self.pinned_reactions.add(reac_id)
-                        else:
-                            unknown_ids.append(reac_id)
-                    if not merge:
-                        self.description = json_dict['description']
-                        self.objective_direction = json_dict['objective_direction']
-                        all_reaction_ids = set(appdata.project.cobra_py_model.reactions.list_attr("id"))
-                        if json_dict['version'] > 1:
-                            self.reactions = json_dict['reactions']
-                            for reac_id in self.reactions:
-                                if reac_id in all_reaction_ids:
-                                    skipped_scenario_reactions.append(reac_id)
-                            for reac_id in skipped_scenario_reactions:
-                                del self.reactions[reac_id]
-                            self.constraints = []
-                            all_reaction_ids.update(self.reactions)
-                            for constr in json_dict['constraints']:
-                                if constr[0] is None:
-                                    self.constraints.append(Scenario.empty_constraint)
-                                elif set(constr[0].keys()).issubset(all_reaction_ids):
-                                    self.constraints.append(constr)
-                                else:
-                                    incompatible_constraints.append(constr)
-                        for reac_id, val in json_dict['objective_coefficients'].items():
-                            if reac_id in all_reaction_ids:
-                                self.objective_coefficients[reac_id] = val
-                            else:
-                                unknown_ids.append(reac_id)
-                        self.use_scenario_objective = json_dict['use_scenario_objective']
-                        self.version = 2
-                else:
-                    flux_values = json_dict
-            elif filename.endswith('val'): # CellNetAnalyzer scenario
-                self.file_name = ""
-                flux_values = dict()
-                for line in fp:
-                    line = line.strip()
-                    if len(line) > 0 and not line.startswith("##"):
-                        try:
-                            reac_id, val = line.split()
-                            val = float(val)
-                            flux_values[reac_id] = (val, val)
-                        except:
-                            print("Could not parse line ", line)
-
-        reactions = []
-        scen_values = []
-        for reac_id, val in flux_values.items():
-            found_reac_id = False
-            if reac_id in appdata.project.cobra_py_model.reactions:
-                found_reac_id = True
-            elif reac_id.startswith("R_"):
-                reac_id = reac_id[2:]
-                if reac_id in appdata.project.cobra_py_model.reactions:
-                    found_reac_id = True
-            if found_reac_id:
-                reactions.append(reac_id)
-                scen_values.append(val)
-            else:
-                unknown_ids.append(reac_id)
-        appdata.scen_values_set_multiple(reactions, scen_values)
-
-        return unknown_ids, incompatible_constraints, skipped_scenario_reactions
+        scenario = read_scenario_file(filename, set(appdata.project.cobra_py_model.reactions.list_attr("id")))
+        self.file_name = filename if filename.endswith('scen') else ""
+        self.pinned_reactions.update(scenario.pinned_reactions)
+        if merge or not scenario.full_scenario:
+            incompatible_constraints = []
+            skipped_scenario_reactions = []
+        else:
+            self.description = scenario.description
+            self.objective_direction = scenario.objective_direction
+            self.reactions = scenario.reactions
+            self.constraints = scenario.constraints
+            self.objective_coefficients = scenario.objective_coefficients
+            self.use_scenario_objective = scenario.use_scenario_objective
+            self.version = 2
+            incompatible_constraints = scenario.incompatible_constraints
+            skipped_scenario_reactions = scenario.skipped_reactions
+        appdata.scen_values_set_multiple(list(scenario.keys()), list(scenario.values()))
+
+        return scenario.unknown_ids, incompatible_constraints, skipped_scenario_reactions
 
     def add_scenario_reactions_to_model(self, model: cobra.Model):
-        if len(self.reactions) > 0:
-            scenario_metabolites = set()
-            for metabolites,_,_ in self.reactions.values():
-                scenario_metabolites.update(metabolites.keys())
-            scenario_metabolites = scenario_metabolites.difference(model.metabolites.list_attr("id"))
-            model.add_metabolites([cobra.Metabolite(met_id) for met_id in scenario_metabolites])
-            for reac_id,(metabolites,lb,ub) in self.reactions.items():
-                if reac_id in model.reactions: # overwrite existing reaction
-                    reaction = model.reactions.get_by_id(reac_id)
-                    reaction.subtract_metabolites(reaction.metabolites, combine=True) # remove current metabolites
-                else:
-                    reaction = cobra.Reaction(reac_id, lower_bound=lb, upper_bound=ub)
-                    model.add_reactions([reaction])
-                reaction.add_metabolites(metabolites)
-                reaction.set_hash_value()
+        add_scenario_reactions(model, self.reactions)
 
     def clear_flux_values(self):
         super().clear()
@@ -390,60 +287,39 @@ class ProjectData:
         self.scen_values: Scenario = Scenario()
         self.clipboard: Dict[str, Tuple[float, float]] = {}
         self.solution: cobra.Solution = None
-        self.comp_values: Dict[str, Tuple[float, float]] = {}
+        self.comp_values: FluxValueStore = FluxValueStore()
         self.comp_values_type = 0 # 0: simple flux vector, 1: bounds/FVA result
-        self.fva_values: Dict[str, Tuple[float, float]] = {} # store FVA results persistently
-        self.conc_values: Dict[str, float] = {} # Metabolite concentrations
-        self.df_values: Dict[str, float] = {} # Driving forces
+        self.fva_values: FluxValueStore = FluxValueStore() # store FVA results persistently
+        # Metabolite concentrations and driving forces, (min, max) after a thermodynamic variability analysis
+        self.conc_values: Dict[str, Union[float, Tuple[float, float]]] = {}
+        self.df_values: Dict[str, Union[float, Tuple[float, float]]] = {}
+        # dG'° values and concentration ranges parsed from the annotations
+        self.thermodynamic_data = ThermodynamicData()
         self.modes = []
         self.meta_data = {}
+        self.archive_name = "" # project file from which the model was last loaded or into which it was saved
+        # whether the model is unchanged since then, see MainWindow.unsaved_changes
+        self.archive_model_is_current = False
+
+    # comp_values and fva_values are always kept as FluxValueStore, assigned dictionaries are converted
+    @property
+    def comp_values(self) -> FluxValueStore:
+        return self._comp_values
+
+    @comp_values.setter
+    def comp_values(self, values: Dict[str, Tuple[float, float]]):
+        self._comp_values = values if isinstance(values, FluxValueStore) else FluxValueStore(values)
+
+    @property
+    def fva_values(self) -> FluxValueStore:
+        return self._fva_values
+
+    @fva_values.setter
+    def fva_values(self, values: Dict[str, Tuple[float, float]]):
+        self._fva_values = values if isinstance(values, FluxValueStore) else FluxValueStore(values)
 
     def load_scenario_into_model(self, model: cobra.Model):
-        for x in self.scen_values:
-            try:
-                y = model.reactions.get_by_id(x)
-            except KeyError:
-                print('reaction', x, 'not found!')
-            else:
-                y.bounds = self.scen_values[x]
-                y.set_hash_value()
-
-        self.scen_values.add_scenario_reactions_to_model(model)
-
-        if self.scen_values.use_scenario_objective:
-            model.objective = model.problem.Objective(
-                Zero, direction=self.scen_values.objective_direction)
-            for reac_id, coeff in self.scen_values.objective_coefficients.items():
-                try:
-                    reaction: cobra.Reaction = model.reactions.get_by_id(reac_id)
-                except KeyError:
-                    print('reaction', reac_id, 'not found!')
-                else:
-                    model.objective.set_linear_coefficients(
-                        {reaction.forward_variable: coeff, reaction.reverse_variable: -coeff})
-
-        for (expression, constraint_type, rhs) in self.scen_values.constraints:
-            if constraint_type == '=':
-                lb = rhs
-                ub = rhs
-            elif constraint_type == '<=':
-                lb = None
-                ub = rhs
-            elif constraint_type == '>=':
-                lb = rhs
-                ub = None
-            else:
-                print("Skipping constraint of unknown type", constraint_type)
-                continue
-            try:
-                reactions = model.reactions.get_by_any(list(expression))
-            except KeyError:
-                print("Skipping constraint containing a reaction that is not in the model:", expression)
-                continue
-            constr = model.problem.Constraint(Zero, lb=lb, ub=ub)
-            model.add_cons_vars(constr)
-            for (reaction, coeff) in zip(reactions, expression.values()):
-                constr.set_linear_coefficients({reaction.forward_variable: coeff, reaction.reverse_variable: -coeff})
+        apply_scenario(model, self.scen_values)
 
     def collect_default_scenario_values(self) -> Tuple[List[str], List[Tuple[float, float]]]:
         reactions = []
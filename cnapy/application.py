@@ -23,7 +23,7 @@ from configparser import NoOptionError, NoSectionError
 from pathlib import Path
 
 import cobra
-from qtpy.QtCore import Qt, QLocale
+from qtpy.QtCore import Qt, QLocale, QTimer
 from qtpy.QtGui import QColor, QFont
 from qtpy.QtWidgets import QApplication
 from qtpy.QtWidgets import QMessageBox
@@ -37,10 +37,15 @@ if hasattr(Qt, 'AA_EnableHighDpiScaling'):
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
 if hasattr(Qt, 'AA_UseHighDpiPixmaps'):
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
+# allows to import QtWebEngineWidgets after the QApplication has been created
+# so that it is only loaded when the first Escher map is opened
+if hasattr(Qt, 'AA_ShareOpenGLContexts'):
+    QApplication.setAttribute(Qt.AA_ShareOpenGLContexts, True)
 
 from cnapy.appdata import AppData
 from cnapy.gui_elements.main_window import MainWindow
 import cnapy.utils as utils
+from cnapy import jvm
 
 def excepthook(cls, exception, tb):
     output = io.StringIO()
@@ -92,6 +97,10 @@ class Application:
             cobra.Configuration().processes = 1
         self.read_cobrapy_config()
 
+        if self.appdata.prewarm_jvm:
+            # when the event loop is idle after the window has been shown
+            QTimer.singleShot(0, jvm.prewarm_in_background)
+
         # Execute application
         self.qapp.aboutToQuit.connect(
             self.window.centralWidget().shutdown_kernel)
@@ -206,6 +215,10 @@ class Application:
                     'use_results_cache', fallback=self.appdata.use_results_cache)
             self.appdata.results_cache_dir = Path(config_parser.get('cnapy-config',
                     'results_cache_directory', fallback=self.appdata.results_cache_dir))
+            self.appdata.map_memory_budget = config_parser.getint('cnapy-config',
+                    'map_memory_budget', fallback=self.appdata.map_memory_budget)
+            self.appdata.prewarm_jvm = config_parser.getboolean('cnapy-config',
+                    'prewarm_jvm', fallback=self.appdata.prewarm_jvm)
 
         except NoSectionError:
             print("Could not find section cnapy-config in cnapy-config.txt")
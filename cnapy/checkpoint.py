@@ -0,0 +1,86 @@
+"""Checkpoints of long running enumerations so that they can be resumed"""
+import hashlib
+import os
+import pickle
+import time
+from tempfile import mkstemp
+from typing import Dict, List, Optional
+
+checkpoint_format_version = 1
+
+
+def checkpoint_filename(project_name: str, work_directory: str, kind: str) -> str:
+    '''the checkpoint file is placed next to the project file, kind is e.g. "mcs"'''
+    if project_name.endswith(".cna"):
+        return project_name[:-4] + "." + kind + "-checkpoint"
+    return os.path.join(work_directory, "unsaved-project." + kind + "-checkpoint")
+
+
+def setup_fingerprint(model_fingerprint: str, setup) -> str:
+    '''
+    identifies the problem that is being enumerated, model_fingerprint is from
+    cnapy.model_snapshot.model_fingerprint and the setup must be picklable
+    '''
+    sha = hashlib.sha256(model_fingerprint.encode())
+    sha.update(pickle.dumps(setup, protocol=pickle.HIGHEST_PROTOCOL))
+    return sha.hexdigest()
+
+
+class Checkpoint:
+    '''
+    Collects the entries (e.g. the cut sets found so far) of an enumeration
+    and writes them to a file at most every interval seconds. The state holds further
+    information that is needed to resume, it is replaced with every update.
+    '''
+
+    def __init__(self, filename: str, fingerprint: str, entries: List = None, state: Dict = None,
+                 interval: float = 30.0):
+        self.filename = filename
+        self.fingerprint = fingerprint
+        self.entries = [] if entries is None else list(entries)
+        self.state = {} if state is None else dict(state)
+        self.interval = interval
+        self.last_write = time.monotonic()
+        self.written = len(self.entries)
+
+    def add(self, entries: List, state: Dict = None):
+        self.entries += entries
+        if state is not None:
+            self.state.update(state)
+        if time.monotonic() - self.last_write >= self.interval:
+            self.write()
+
+    def write(self):
+        '''writes the checkpoint if there are entries that have not been written yet'''
+        if self.written == len(self.entries):
+            return
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        (fd, tmp_filename) = mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                pickle.dump({"format version": checkpoint_format_version,
+                             "fingerprint": self.fingerprint,
+                             "entries": self.entries,
+                             "state": self.state}, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_filename, self.filename)
+        except BaseException:
+            os.remove(tmp_filename)
+            raise
+        self.last_write = time.monotonic()
+        self.written = len(self.entries)
+
+    def remove(self):
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    @staticmethod
+    def load(filename: str, fingerprint: str) -> Optional["Checkpoint"]:
+        '''returns the checkpoint if it exists and belongs to the same problem, otherwise None'''
+        try:
+            with open(filename, 'rb') as fp:
+                data = pickle.load(fp)
+            if data.get("format version") != checkpoint_format_version or data.get("fingerprint") != fingerprint:
+                return None
+            return Checkpoint(filename, fingerprint, data["entries"], data["state"])
+        except Exception: # a missing or unreadable checkpoint is simply ignored
+            return None
@@ -0,0 +1,81 @@
+"""Vectorized mapping of flux values to colors"""
+from typing import Dict, List, Tuple
+import numpy
+from qtpy.QtGui import QColor
+
+from cnapy.appdata import AppData, my_mean
+
+
+class FluxColorMapper:
+    '''
+    Computes the colors for the on/off and heat map coloring of many reactions at once.
+    Scenario values take precedence over computed values. The value range of the
+    computed values is only recomputed when they have changed, the colors come from
+    precomputed lookup tables.
+    '''
+    heat_levels = 256
+
+    def __init__(self, appdata: AppData):
+        self.appdata = appdata
+        self.on_color = QColor.fromRgb(0, 255, 0)
+        self.off_color = QColor.fromRgb(255, 0, 0)
+        # index i corresponds to an intensity of i/(heat_levels-1) relative to the range limit
+        self.positive_heat_colors = [QColor.fromRgbF(1 - i/(self.heat_levels-1), 1, 1 - i/(self.heat_levels-1))
+                                     for i in range(self.heat_levels)]
+        self.negative_heat_colors = [QColor.fromRgbF(1, 1 - i/(self.heat_levels-1), 1 - i/(self.heat_levels-1))
+                                     for i in range(self.heat_levels)]
+        self._comp_range_key = None
+        self._comp_range = (0.0, 0.0)
+
+    def _comp_values_range(self) -> Tuple[float, float]:
+        comp_values = self.appdata.project.comp_values
+        key = (id(comp_values), comp_values.version)
+        if key != self._comp_range_key:
+            means = comp_values.means()
+            if len(means) > 0:
+                self._comp_range = (min(0.0, float(means.min())), max(0.0, float(means.max())))
+            else:
+                self._comp_range = (0.0, 0.0)
+            self._comp_range_key = key
+        return self._comp_range
+
+    def value_range(self) -> Tuple[float, float]:
+        '''lowest and highest mean flux value, always includes 0'''
+        (low, high) = self._comp_values_range()
+        for value in self.appdata.project.scen_values.values(): # usually only few values
+            mean = my_mean(value)
+            if mean < low:
+                low = mean
+            if mean > high:
+                high = mean
+        return (low, high)
+
+    def _values(self, reac_ids: List[str]) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        (lower, upper, mask) = self.appdata.project.comp_values.lookup(reac_ids)
+        scen_values = self.appdata.project.scen_values
+        if len(scen_values) > 0:
+            for i, reac_id in enumerate(reac_ids):
+                value = scen_values.get(reac_id, None)
+                if value is not None:
+                    (lower[i], upper[i]) = value
+                    mask[i] = True
+        return (numpy.round(lower, self.appdata.rounding), numpy.round(upper, self.appdata.rounding), mask)
+
+    def onoff_colors(self, reac_ids: List[str]) -> Dict[str, QColor]:
+        '''on/off colors of those reactions that have a value'''
+        (lower, upper, mask) = self._values(reac_ids)
+        active = (lower < 0.0) | (upper > 0.0)
+        return {reac_ids[i]: self.on_color if active[i] else self.off_color for i in numpy.flatnonzero(mask)}
+
+    def heat_colors(self, reac_ids: List[str], low=None, high=None) -> Dict[str, QColor]:
+        '''heat map colors of those reactions that have a value'''
+        if low is None or high is None:
+            (low, high) = self.value_range()
+        (lower, upper, mask) = self._values(reac_ids)
+        mean = (lower + upper)/2
+        positive = mean > 0.0
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            level = numpy.where(positive, mean/high if high != 0.0 else 1.0, mean/low if low != 0.0 else 1.0)
+        level = numpy.rint(numpy.clip(numpy.nan_to_num(level), 0.0, 1.0)*(self.heat_levels-1)).astype(int)
+        return {reac_ids[i]: self.positive_heat_colors[level[i]] if positive[i] else self.negative_heat_colors[level[i]]
+                for i in numpy.flatnonzero(mask)}
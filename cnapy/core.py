@@ -10,16 +10,25 @@ from cobra.util.array import create_stoichiometric_matrix
 from cobra.core.dictlist import DictList
 from optlang.symbolics import Zero, Add
 
-import efmtool_link.efmtool4cobra as efmtool4cobra
-import efmtool_link.efmtool_extern as efmtool_extern
+from cnapy import jvm
+from cnapy.lazy_import import lazy_import
 from cnapy.flux_vector_container import FluxVectorMemmap, FluxVectorContainer
 from cnapy.appdata import Scenario
 
+# importing these starts the JVM, therefore this is only done in efm_computation
+efmtool4cobra = lazy_import("efmtool_link.efmtool4cobra")
+efmtool_extern = lazy_import("efmtool_link.efmtool_extern")
+
 organic_elements = ['C', 'O', 'H', 'N', 'P', 'S']
 
 
 def efm_computation(model: cobra.Model, scen_values: Dict[str, Tuple[float, float]], constraints: bool,
                     print_progress_function=print, abort_callback=None):
+    if not jvm.is_started():
+        print_progress_function("Starting Java VM...")
+    startup_time = jvm.start_jvm()
+    if startup_time > 0:
+        print_progress_function("Java VM started in {:.2f} s".format(startup_time))
     stdf = create_stoichiometric_matrix(
         model, array_type='DataFrame')
     reversible, irrev_backwards_idx = efmtool4cobra.get_reversibility(
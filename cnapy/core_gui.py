@@ -1,4 +1,3 @@
-import gurobipy
 import io
 import traceback
 import cobra
@@ -0,0 +1,152 @@
+"""Columnar storage of flux values"""
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, List, Tuple
+import numpy
+
+
+class FluxValueStore(MutableMapping):
+    '''
+    Stores (lower, upper) flux value pairs of reactions in two float64 arrays
+    that are aligned with a reaction index; a presence mask marks which reactions
+    currently have a value. Can be used like a Dict[str, Tuple[float, float]],
+    the arrays allow vectorized assignment and evaluation.
+    The reaction index only grows, clear() and deletions only reset the mask
+    so that repeated assignments of solver results reuse the same positions.
+    The version is incremented with every modification and can be used to
+    cache results derived from the values.
+    '''
+
+    def __init__(self, values=None):
+        self.reac_id: List[str] = [] # position -> reaction ID
+        self.index: Dict[str, int] = {} # reaction ID -> position
+        self._lower = numpy.zeros(0)
+        self._upper = numpy.zeros(0)
+        self._present = numpy.zeros(0, dtype=bool)
+        self._num_present = 0
+        self._positions_cache = ([], numpy.zeros(0, dtype=int))
+        self.version = 0
+        if values is not None:
+            self.update(values)
+
+    @property
+    def lower(self) -> numpy.ndarray:
+        return self._lower[:len(self.reac_id)]
+
+    @property
+    def upper(self) -> numpy.ndarray:
+        return self._upper[:len(self.reac_id)]
+
+    @property
+    def present(self) -> numpy.ndarray:
+        return self._present[:len(self.reac_id)]
+
+    def _reserve(self, size: int):
+        capacity = len(self._present)
+        if size > capacity:
+            capacity = max(size, 2*capacity, 16)
+            self._lower = numpy.resize(self._lower, capacity)
+            self._upper = numpy.resize(self._upper, capacity)
+            present = numpy.zeros(capacity, dtype=bool)
+            present[:len(self._present)] = self._present
+            self._present = present
+
+    def _position(self, reac_id: str) -> int:
+        pos = self.index.get(reac_id, None)
+        if pos is None:
+            pos = len(self.reac_id)
+            self._reserve(pos + 1)
+            self.index[reac_id] = pos
+            self.reac_id.append(reac_id)
+            self._present[pos] = False
+        return pos
+
+    def positions(self, reac_ids: Iterable[str]) -> numpy.ndarray:
+        '''positions of the reactions in the arrays, unknown reactions are added to the index'''
+        reac_ids = list(reac_ids)
+        cached_ids, cached_positions = self._positions_cache
+        if reac_ids == cached_ids: # usually the case for repeated solver results
+            return cached_positions
+        positions = numpy.fromiter((self._position(r) for r in reac_ids), dtype=int, count=len(reac_ids))
+        self._positions_cache = (reac_ids, positions)
+        return positions
+
+    def set_values(self, reac_ids: Iterable[str], lower, upper=None):
+        '''vectorized assignment, if upper is None the lower values are used for both'''
+        positions = self.positions(reac_ids)
+        self._lower[positions] = lower
+        self._upper[positions] = lower if upper is None else upper
+        self._present[positions] = True
+        self._num_present = int(numpy.count_nonzero(self.present))
+        self.version += 1
+
+    def lookup(self, reac_ids: List[str]) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        '''lower and upper values of the given reactions and a mask which of them have a value'''
+        positions = numpy.fromiter((self.index.get(r, -1) for r in reac_ids), dtype=int, count=len(reac_ids))
+        known = positions >= 0
+        mask = numpy.zeros(len(reac_ids), dtype=bool)
+        mask[known] = self._present[positions[known]]
+        positions[~mask] = 0
+        if len(self.reac_id) == 0: # nothing to index into
+            return numpy.zeros(len(reac_ids)), numpy.zeros(len(reac_ids)), mask
+        return self._lower[positions], self._upper[positions], mask
+
+    def arrays(self) -> Tuple[List[str], numpy.ndarray, numpy.ndarray]:
+        '''reaction IDs and the lower and upper values of all reactions that have a value'''
+        mask = self.present
+        return [self.reac_id[i] for i in numpy.flatnonzero(mask)], self.lower[mask], self.upper[mask]
+
+    def means(self) -> numpy.ndarray:
+        mask = self.present
+        return (self.lower[mask] + self.upper[mask])/2
+
+    def __getitem__(self, reac_id: str) -> Tuple[float, float]:
+        pos = self.index[reac_id]
+        if not self._present[pos]:
+            raise KeyError(reac_id)
+        return (float(self._lower[pos]), float(self._upper[pos]))
+
+    def __setitem__(self, reac_id: str, value: Tuple[float, float]):
+        (vl, vu) = value
+        pos = self._position(reac_id)
+        self._lower[pos] = vl
+        self._upper[pos] = vu
+        if not self._present[pos]:
+            self._present[pos] = True
+            self._num_present += 1
+        self.version += 1
+
+    def __delitem__(self, reac_id: str):
+        pos = self.index[reac_id]
+        if not self._present[pos]:
+            raise KeyError(reac_id)
+        self._present[pos] = False
+        self._num_present -= 1
+        self.version += 1
+
+    def __contains__(self, reac_id) -> bool:
+        pos = self.index.get(reac_id, None)
+        return pos is not None and bool(self._present[pos])
+
+    def __iter__(self):
+        return (self.reac_id[i] for i in numpy.flatnonzero(self.present))
+
+    def __len__(self) -> int:
+        return self._num_present
+
+    def __repr__(self) -> str:
+        return "FluxValueStore("+repr(dict(self.items()))+")"
+
+    def clear(self):
+        self._present[:] = False
+        self._num_present = 0
+        self.version += 1
+
+    def copy(self) -> "FluxValueStore":
+        other = FluxValueStore()
+        other.reac_id = self.reac_id.copy()
+        other.index = self.index.copy()
+        other._lower = self._lower.copy()
+        other._upper = self._upper.copy()
+        other._present = self._present.copy()
+        other._num_present = self._num_present
+        return other
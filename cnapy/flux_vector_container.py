@@ -1,5 +1,6 @@
 import os
 import numpy
+import scipy.sparse
 from qtpy.QtWidgets import QMessageBox
 
 
@@ -86,3 +87,124 @@ class FluxVectorMemmap(FluxVectorContainer):
 
     def __del__(self):
         del self.fv_mat  # lose the reference to the memmap so that the later implicit deletion of the temporary directory can proceed without problems
+
+
+class IncrementalFluxVectorContainer(FluxVectorContainer):
+    '''
+    A container to which flux vectors can be appended while a computation is still running.
+    Each vector is stored as its sparse support; the matrix fv_mat is assembled when it is needed.
+    '''
+
+    def __init__(self, reac_id):
+        self._support = [] # column indices of the non-zero entries of each vector
+        self._values = [] # the corresponding values
+        self._fv_mat = None
+        super().__init__(None, reac_id=reac_id)
+
+    @property
+    def fv_mat(self):
+        if self._fv_mat is None or self._fv_mat.shape[0] < len(self._support):
+            if len(self._support) > 0:
+                indices = numpy.concatenate(self._support)
+                data = numpy.concatenate(self._values)
+            else:
+                indices = numpy.zeros(0, dtype=numpy.int64)
+                data = numpy.zeros(0)
+            indptr = numpy.zeros(len(self._support) + 1, dtype=numpy.int64)
+            numpy.cumsum([len(s) for s in self._support], out=indptr[1:])
+            self._fv_mat = scipy.sparse.csr_matrix((data, indices, indptr),
+                                                   shape=(len(self._support), len(self.reac_id)))
+        return self._fv_mat
+
+    @fv_mat.setter
+    def fv_mat(self, value):
+        if value is not None: # None is set by FluxVectorContainer.__init__
+            raise AttributeError("The flux vectors can only be changed with append.")
+
+    def append(self, index_sets, value=-1.0):
+        '''adds one vector for each index set which has the given value at these indices'''
+        for index_set in index_sets:
+            self._support.append(numpy.array(index_set, dtype=numpy.int64))
+            self._values.append(numpy.full(len(index_set), value))
+
+    def __len__(self):
+        return len(self._support)
+
+    def __getitem__(self, idx):
+        return {self.reac_id[i]: float(v) for i, v in zip(self._support[idx], self._values[idx])}
+
+    def is_integer_vector_rounded(self, idx, decimals=0):
+        return all(round(val, decimals).is_integer() for val in self._values[idx])
+
+    def clear(self):
+        self._support = []
+        self._values = []
+        self._fv_mat = None
+        self.reac_id = []
+        self.irreversible = numpy.array(0)
+        self.unbounded = numpy.array(0)
+
+
+class ThermodynamicPathwayContainer(IncrementalFluxVectorContainer):
+    '''
+    Flux vectors of thermodynamically feasible pathways (e.g. from OptMDFpathway) to which
+    pathways can be appended while the enumeration is still running. The MDF and the driving
+    forces of the reactions with a dG'° are kept for each pathway.
+    '''
+
+    def __init__(self, reac_id):
+        self.mdf = []
+        self.driving_forces = [] # for each pathway a dictionary reaction ID -> driving force in kJ/mol
+        super().__init__(reac_id)
+
+    def append_pathway(self, fluxes, mdf, driving_forces, zero_tolerance=1e-9):
+        '''fluxes are aligned with reac_id, smaller absolute values are treated as zero'''
+        fluxes = numpy.asarray(fluxes, dtype=float)
+        support = numpy.flatnonzero(numpy.abs(fluxes) > zero_tolerance)
+        self._support.append(support)
+        self._values.append(fluxes[support])
+        self.mdf.append(mdf)
+        self.driving_forces.append(driving_forces)
+
+    def save(self, fname):
+        # the driving forces are saved as matrix like the fluxes, NaN where a reaction has no dG'°
+        df_mat = numpy.full((len(self), len(self.reac_id)), numpy.nan)
+        reac_index = {reac_id: i for i, reac_id in enumerate(self.reac_id)}
+        for row, driving_forces in enumerate(self.driving_forces):
+            for reac_id, driving_force in driving_forces.items():
+                df_mat[row, reac_index[reac_id]] = driving_force
+        numpy.savez_compressed(fname, fv_mat=self.fv_mat, reac_id=self.reac_id, irreversible=self.irreversible,
+                               unbounded=self.unbounded, mdf=numpy.array(self.mdf), df_mat=df_mat)
+
+    def clear(self):
+        super().clear()
+        self.mdf = []
+        self.driving_forces = []
+
+
+class ScenarioResultContainer(FluxVectorContainer):
+    '''
+    Shows a ScenarioResultTable of cnapy.scenario_batch in the mode navigator, each scenario is one mode.
+    For FVA the modes contain the reactions that can carry flux, flux_ranges gives their minima and maxima.
+    Scenarios without result are empty modes.
+    '''
+
+    def __init__(self, table):
+        self.table = table
+        if table.maximum is table.minimum:
+            fv_mat = numpy.nan_to_num(table.fluxes, nan=0.0)
+        else:
+            fv_mat = numpy.nan_to_num(numpy.where(table.maximum != 0, table.maximum, table.minimum), nan=0.0)
+        super().__init__(fv_mat, reac_id=table.reac_id)
+
+    def flux_ranges(self, idx):
+        '''reaction ID -> (minimum, maximum) of the reactions in mode idx'''
+        return {self.reac_id[i]: (float(self.table.minimum[idx, i]), float(self.table.maximum[idx, i]))
+                for i in numpy.flatnonzero(self.fv_mat[idx, :])}
+
+    def save(self, fname):
+        self.table.save(fname)
+
+    def clear(self):
+        super().clear()
+        self.table = None
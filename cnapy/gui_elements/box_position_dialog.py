@@ -75,5 +75,5 @@ class BoxPositionDialog(QDialog):
         self.map.appdata.project.maps[self.map.name]["boxes"][self.reaction_box.id][0] = x_float
         self.map.appdata.project.maps[self.map.name]["boxes"][self.reaction_box.id][1] = y_float
         self.map.update_reaction(self.reaction_box.id, self.reaction_box.id)
-        self.map.central_widget.parent.unsaved_changes()
+        self.map.central_widget.parent.unsaved_changes(model_changed=False)
         self.accept()
@@ -6,20 +6,25 @@ import cobra
 from qtconsole.inprocess import QtInProcessKernelManager
 from qtconsole.rich_jupyter_widget import RichJupyterWidget
 from qtpy.QtCore import Qt, Signal, Slot, QSignalBlocker
-from qtpy.QtGui import QColor, QBrush
+from qtpy.QtGui import QColor
 from qtpy.QtWidgets import (QCheckBox, QDialog, QHBoxLayout, QLabel, QLineEdit, QPushButton, QSplitter,
                             QTabWidget, QVBoxLayout, QWidget, QAction, QApplication, QComboBox, QFrame)
 
 from cnapy.appdata import AppData, CnaMap, ModelItemType, parse_scenario
+from cnapy.color_mapping import FluxColorMapper
+from cnapy.flux_vector_container import ScenarioResultContainer, ThermodynamicPathwayContainer
 from cnapy.gui_elements.map_view import MapView
-from cnapy.gui_elements.escher_map_view import EscherMapView
 from cnapy.gui_elements.metabolite_list import MetaboliteList
 from cnapy.gui_elements.gene_list import GeneList
 from cnapy.gui_elements.mode_navigator import ModeNavigator
 from cnapy.gui_elements.model_info import ModelInfo
 from cnapy.gui_elements.scenario_tab import ScenarioTab
 from cnapy.gui_elements.reactions_list import ReactionList, ReactionListColumn
-from cnapy.utils import SignalThrottler
+from cnapy.utils import SignalThrottler, UpdateScheduler, UpdateScope
+from cnapy.lazy_import import lazy_import
+
+# QtWebEngine is only loaded when the first Escher map is created
+escher_map_view = lazy_import("cnapy.gui_elements.escher_map_view")
 
 class ModelTabIndex(IntEnum):
     Reactions = 0
@@ -35,6 +40,7 @@ class CentralWidget(QWidget):
         QWidget.__init__(self)
         self.parent = parent
         self.appdata: AppData = parent.appdata
+        self.color_mapper = FluxColorMapper(self.appdata)
         self.map_counter = 0
 
         searchbar_layout = QHBoxLayout()
@@ -66,6 +72,10 @@ class CentralWidget(QWidget):
         self.throttler = SignalThrottler(300)
         self.searchbar.textChanged.connect(self.throttler.throttle)
         self.throttler.triggered.connect(self.update_selected)
+
+        # use schedule_update to collect several update requests into one update per frame
+        self.update_scheduler = UpdateScheduler()
+        self.update_scheduler.flushed.connect(self.perform_update)
         self.search_annotations.clicked.connect(self.update_selected)
 
         self.tabs = QTabWidget()
@@ -108,6 +118,8 @@ class CentralWidget(QWidget):
         self.console = RichJupyterWidget()
         self.console.kernel_manager = kernel_manager
         self.console.kernel_client = self.kernel_client
+        # the model may have been changed in the console without any notification
+        self.console.executed.connect(self.console_executed)
 
         self.splitter = QSplitter()
         self.splitter2 = QSplitter()
@@ -157,7 +169,7 @@ class CentralWidget(QWidget):
         self.scenario_tab.scenarioChanged.connect(self.parent.update_scenario_file_name)
         self.map_tabs.tabCloseRequested.connect(self.delete_map)
         self.mode_navigator.changedCurrentMode.connect(self.update_mode)
-        self.mode_navigator.modeNavigatorClosed.connect(self.update)
+        self.mode_navigator.modeNavigatorClosed.connect(self.schedule_update)
         self.mode_navigator.reaction_participation_button.clicked.connect(self.reaction_participation)
 
         self.update()
@@ -176,6 +188,7 @@ class CentralWidget(QWidget):
 
     def handle_changed_reaction(self, previous_id: str, reaction: cobra.Reaction):
         self.parent.unsaved_changes()
+        self.appdata.project.thermodynamic_data.invalidate()
         reaction_has_box = False
         for mmap in self.appdata.project.maps:
             if previous_id in self.appdata.project.maps[mmap]["boxes"].keys():
@@ -184,14 +197,22 @@ class CentralWidget(QWidget):
                 reaction_has_box = True
         if reaction_has_box:
             self.update_reaction_on_maps(previous_id, reaction.id)
+        self.model_elements_changed_on_escher_maps(reactions=(previous_id, reaction.id),
+                                                   metabolites=[m.id for m in reaction.metabolites],
+                                                   genes=[g.id for g in reaction.genes])
         self.update_item_in_history(previous_id, reaction.id, reaction.name, ModelItemType.Reaction)
 
     def handle_deleted_reaction(self, reaction: cobra.Reaction):
+        # orphaned metabolites and genes are removed together with the reaction
+        self.model_elements_changed_on_escher_maps(reactions=(reaction.id,),
+                                                   metabolites=[m.id for m in reaction.metabolites],
+                                                   genes=[g.id for g in reaction.genes])
         self.appdata.project.cobra_py_model.remove_reactions(
             [reaction], remove_orphans=True)
         self.appdata.project.scen_values.pop(reaction.id, None)
         self.appdata.project.scen_values.objective_coefficients.pop(reaction.id, None)
         self.remove_top_item_history_entry()
+        self.appdata.project.thermodynamic_data.invalidate()
 
         self.parent.unsaved_changes()
         for mmap in self.appdata.project.maps:
@@ -205,12 +226,18 @@ class CentralWidget(QWidget):
     @Slot(cobra.Metabolite, object, str)
     def handle_changed_metabolite(self, metabolite: cobra.Metabolite, affected_reactions, previous_id: str):
         self.parent.unsaved_changes()
+        self.appdata.project.thermodynamic_data.invalidate()
         for reaction in affected_reactions:
             self.update_reaction_on_maps(reaction.id, reaction.id)
+        self.model_elements_changed_on_escher_maps(reactions=[r.id for r in affected_reactions],
+                                                   metabolites=(previous_id, metabolite.id))
         self.update_item_in_history(previous_id, metabolite.id, metabolite.name, ModelItemType.Metabolite)
 
     def handle_changed_gene(self, previous_id: str, gene: cobra.Gene):
         self.parent.unsaved_changes()
+        # the gene rules of the reactions change with the gene ID
+        self.model_elements_changed_on_escher_maps(reactions=[r.id for r in gene.reactions],
+                                                   genes=(previous_id, gene.id))
         # TODO update only relevant reaction boxes on maps
         self.update_maps()
         self.update_item_in_history(previous_id, gene.id, gene.name, ModelItemType.Gene)
@@ -226,6 +253,10 @@ class CentralWidget(QWidget):
         if self.appdata.auto_fba:
             self.parent.fba()
 
+    @Slot(object)
+    def console_executed(self, _message):
+        self.appdata.project.archive_model_is_current = False
+
     def shutdown_kernel(self):
         self.console.kernel_client.stop_channels()
         self.console.kernel_manager.shutdown_kernel()
@@ -247,7 +278,7 @@ class CentralWidget(QWidget):
     @Slot(str)
     def set_scen_value(self, reaction: str):
         self.appdata.set_comp_value_as_scen_value(reaction)
-        self.update()
+        self.schedule_update(UpdateScope.Values)
 
     def update_reaction_value(self, reaction: str, value: str, update_reaction_list=True):
         if value == "":
@@ -259,11 +290,11 @@ class CentralWidget(QWidget):
             self.reaction_list.update(rebuild=False)
 
     def update_reaction_maps(self, _reaction: str):
-        self.parent.unsaved_changes()
+        self.parent.unsaved_changes(model_changed=False)
         self.reaction_list.reaction_mask.update_state()
 
     def handle_mapChanged(self, _reaction: str):
-        self.parent.unsaved_changes()
+        self.parent.unsaved_changes(model_changed=False)
 
     def tabs_changed(self, idx):
         if idx == ModelTabIndex.Reactions:
@@ -287,7 +318,7 @@ class CentralWidget(QWidget):
         mmap.reactionAdded.connect(self.update_reaction_maps)
         mmap.mapChanged.connect(self.handle_mapChanged)
 
-    def connect_escher_map_view_signals(self, mmap: EscherMapView):
+    def connect_escher_map_view_signals(self, mmap):
         mmap.cnapy_bridge.reactionValueChanged.connect(self.update_reaction_value)
         mmap.cnapy_bridge.switchToReactionMask.connect(self.switch_to_reaction)
         mmap.cnapy_bridge.jumpToMetabolite.connect(self.jump_to_metabolite)
@@ -305,9 +336,9 @@ class CentralWidget(QWidget):
         m = CnaMap(name)
         self.appdata.project.maps[name] = m
         if escher:
-            mmap: EscherMapView = EscherMapView(self, name)
+            mmap = escher_map_view.EscherMapView(self, name)
             self.connect_escher_map_view_signals(mmap)
-            self.appdata.project.maps[name][EscherMapView] = mmap
+            self.appdata.project.maps[name][escher_map_view.EscherMapView] = mmap
             self.appdata.project.maps[name]['view'] = 'escher'
             self.appdata.project.maps[name]['pos'] = '{"x":0,"y":0}'
             self.appdata.project.maps[name]['zoom'] = '1'
@@ -321,7 +352,7 @@ class CentralWidget(QWidget):
             idx = self.map_tabs.addTab(mmap, m["name"])
             self.update_maps() # only update mmap?
         self.map_tabs.setCurrentIndex(idx)
-        self.parent.unsaved_changes()
+        self.parent.unsaved_changes(model_changed=False)
 
         return name, idx
 
@@ -370,18 +401,20 @@ class CentralWidget(QWidget):
 
         if map_idx >= 0:
             m = self.map_tabs.widget(map_idx)
-            if isinstance(m, EscherMapView):
-                m.update_selected(string)
-            else:
+            if isinstance(m, MapView):
                 m.update_selected(found_reaction_ids)
+            else: # EscherMapView
+                m.update_selected(string)
         QApplication.restoreOverrideCursor()
 
     def update_mode(self):
         if self.mode_navigator.mode_type <= 1:
             if len(self.appdata.project.modes) > self.mode_navigator.current:
                 values = self.appdata.project.modes[self.mode_navigator.current]
-                if self.mode_navigator.mode_type == 0 and not self.appdata.project.modes.is_integer_vector_rounded(
-                    self.mode_navigator.current, self.appdata.rounding):
+                is_pathway = isinstance(self.appdata.project.modes, ThermodynamicPathwayContainer)
+                is_scenario_result = isinstance(self.appdata.project.modes, ScenarioResultContainer)
+                if self.mode_navigator.mode_type == 0 and not is_pathway and not is_scenario_result and \
+                    not self.appdata.project.modes.is_integer_vector_rounded(self.mode_navigator.current, self.appdata.rounding):
                     # normalize non-integer EFM for better display
                     mean = sum(abs(v) for v in values.values())/len(values)
                     for r,v in values.items():
@@ -396,6 +429,14 @@ class CentralWidget(QWidget):
                             values[i] = 0.0 # display KOs as zero flux
                     self.appdata.project.comp_values[i] = (values[i], values[i])
                 self.appdata.project.comp_values_type = 0
+                if is_scenario_result and self.appdata.project.modes.table.method == "fva": # show the flux ranges
+                    for reac_id, flux_range in self.appdata.project.modes.flux_ranges(self.mode_navigator.current).items():
+                        self.appdata.project.comp_values[reac_id] = flux_range
+                    self.appdata.project.comp_values_type = 1
+                if is_pathway: # pathways are shown with the driving forces of their reactions
+                    self.appdata.project.df_values.clear()
+                    for reac_id, driving_force in self.appdata.project.modes.driving_forces[self.mode_navigator.current].items():
+                        self.appdata.project.df_values[reac_id] = round(driving_force, self.appdata.rounding)
 
             self.appdata.modes_coloring = True
             self.update()
@@ -458,18 +499,7 @@ class CentralWidget(QWidget):
                     else:
                         view.reaction_boxes[key].set_color(QColor.fromRgb(255, 255, 255))
                 if self.appdata.window.sd_sols and self.appdata.window.sd_sols.__weakref__: # if dialog exists
-                    self.mode_navigator.current
-                    for i in range(self.appdata.window.sd_sols.sd_table.rowCount()):
-                        if self.mode_navigator.current == int(self.appdata.window.sd_sols.sd_table.item(i,0).text())-1:
-                            self.appdata.window.sd_sols.sd_table.item(i,0).setBackground(QBrush(QColor(230,230,230)))
-                            self.appdata.window.sd_sols.sd_table.item(i,1).setBackground(QBrush(QColor(230,230,230)))
-                            if self.appdata.window.sd_sols.sd_table.columnCount() == 3:
-                                self.appdata.window.sd_sols.sd_table.item(i,2).setBackground(QBrush(QColor(230,230,230)))
-                        else:
-                            self.appdata.window.sd_sols.sd_table.item(i,0).setBackground(QBrush(QColor(255, 255, 255)))
-                            self.appdata.window.sd_sols.sd_table.item(i,1).setBackground(QBrush(QColor(255, 255, 255)))
-                            if self.appdata.window.sd_sols.sd_table.columnCount() == 3:
-                                self.appdata.window.sd_sols.sd_table.item(i,2).setBackground(QBrush(QColor(255, 255, 255)))
+                    self.appdata.window.sd_sols.sd_model.set_current(self.mode_navigator.current)
         self.mode_navigator.current_flux_values = self.appdata.project.comp_values.copy()
 
     def reaction_participation(self):
@@ -479,7 +509,7 @@ class CentralWidget(QWidget):
             relative_participation = numpy.sum(self.appdata.project.modes.fv_mat[self.mode_navigator.selection, :] != 0, axis=0)/self.mode_navigator.num_selected
             if isinstance(relative_participation, numpy.matrix): # numpy.sum returns a matrix with one row when fv_mat is scipy.sparse
                 relative_participation = relative_participation.A1 # flatten into 1D array
-            self.appdata.project.comp_values = {r: (relative_participation[i], relative_participation[i]) for i,r in enumerate(self.appdata.project.modes.reac_id)}
+            self.appdata.project.comp_values.set_values(self.appdata.project.modes.reac_id, relative_participation)
         elif self.appdata.window.centralWidget().mode_navigator.mode_type == 2:
             reacs = self.appdata.project.cobra_py_model.reactions.list_attr('id')
             abund = [0 for _ in reacs]
@@ -489,7 +519,7 @@ class CentralWidget(QWidget):
                         if not numpy.any(numpy.isnan(s[r])) or numpy.all((s[r] == 0)):
                             abund[i] += 1
             relative_participation = [a/self.mode_navigator.num_selected for a in abund]
-            self.appdata.project.comp_values = {r: (p,p) for r,p in zip(reacs,relative_participation)}
+            self.appdata.project.comp_values.set_values(reacs, relative_participation)
         if isinstance(relative_participation, numpy.matrix): # numpy.sum returns a matrix with one row when fv_mat is scipy.sparse
             relative_participation = relative_participation.A1 # flatten into 1D array
         self.appdata.project.comp_values_type = 0
@@ -498,21 +528,37 @@ class CentralWidget(QWidget):
 
     def update(self, rebuild_all_tabs=False):
         # use rebuild_all_tabs=True to rebuild all tabs when the model changes
-        if len(self.appdata.project.modes) == 0:
-            self.mode_navigator.hide()
-            self.mode_navigator.current = 0
-        else:
-            self.mode_navigator.show()
-            self.mode_navigator.update()
+        # a pending scheduled update is covered by this one and therefore dropped
+        self.update_scheduler.take_pending()
+        self.perform_update(UpdateScope.All, rebuild_all_tabs=rebuild_all_tabs)
+
+    @Slot()
+    def schedule_update(self, scope: UpdateScope = UpdateScope.All):
+        # the update is carried out with the next flush of the update scheduler,
+        # requests that arrive before that are merged
+        self.update_scheduler.request(scope)
+
+    @Slot(int)
+    def perform_update(self, scope: int, rebuild_all_tabs=False):
+        if scope & UpdateScope.Modes:
+            if len(self.appdata.project.modes) == 0:
+                self.mode_navigator.hide()
+                self.mode_navigator.current = 0
+            else:
+                self.mode_navigator.show()
+                self.mode_navigator.update()
 
         if rebuild_all_tabs:
+                for idx in range(0, self.map_tabs.count()): # the model has been changed as a whole
+                    if not isinstance(self.map_tabs.widget(idx), MapView): # EscherMapView
+                        self.map_tabs.widget(idx).reset_sent_data()
                 self.reaction_list.update(rebuild=True)
                 self.metabolite_list.update()
                 self.gene_list.update()
                 self.scenario_tab.recreate_scenario_items_needed = True
                 self.scenario_tab.update()
                 self.model_info.update()
-        else:
+        elif scope & UpdateScope.Lists:
             idx = self.tabs.currentIndex()
             if idx == ModelTabIndex.Reactions:
                 self.reaction_list.update()
@@ -525,25 +571,52 @@ class CentralWidget(QWidget):
             elif idx == ModelTabIndex.Model:
                 self.model_info.update()
 
-        idx = self.map_tabs.currentIndex()
-        if idx >= 0:
-            m = self.map_tabs.widget(idx)
-            m.update()
+        if scope & UpdateScope.Maps:
+            idx = self.map_tabs.currentIndex()
+            if idx >= 0:
+                m = self.map_tabs.widget(idx)
+                self.activate_map(m)
+                m.update()
 
-        self.__recolor_map()
+            self.__recolor_map()
 
     def update_map(self, idx):
         m = self.map_tabs.widget(idx)
         if m is not None:
+            self.activate_map(m)
             m.update()
         self.__recolor_map()
 
+    def activate_map(self, m):
+        ''' loads the scene of a map view if necessary and unloads others when the memory budget is exceeded '''
+        if not isinstance(m, MapView):
+            return
+        m.ensure_loaded()
+        budget = self.appdata.map_memory_budget * 1024 * 1024
+        if budget <= 0:
+            return
+        loaded = [self.map_tabs.widget(idx) for idx in range(self.map_tabs.count())]
+        loaded = sorted((v for v in loaded if isinstance(v, MapView) and v.loaded and v is not m),
+                        key=lambda v: v.last_used)
+        used = m.estimated_memory() + sum(v.estimated_memory() for v in loaded)
+        for v in loaded: # least recently used first
+            if used <= budget:
+                break
+            used -= v.estimated_memory()
+            v.unload()
+
     def update_reaction_on_maps(self, old_reaction_id: str, new_reaction_id: str):
         for idx in range(0, self.map_tabs.count()):
             m = self.map_tabs.widget(idx)
             if isinstance(m, MapView): # TODO: what should be done on Escher maps?
                 m.update_reaction(old_reaction_id, new_reaction_id)
 
+    def model_elements_changed_on_escher_maps(self, reactions=(), metabolites=(), genes=()):
+        for idx in range(0, self.map_tabs.count()):
+            m = self.map_tabs.widget(idx)
+            if not isinstance(m, MapView): # EscherMapView
+                m.model_elements_changed(reactions, metabolites, genes)
+
     def delete_reaction_on_maps(self, reation_id: str):
         for idx in range(0, self.map_tabs.count()):
             m = self.map_tabs.widget(idx)
@@ -564,6 +637,7 @@ class CentralWidget(QWidget):
                 m = self.map_tabs.widget(idx)
                 self.map_tabs.setCurrentIndex(idx)
 
+                self.activate_map(m)
                 m.update()
                 m.focus_reaction(reaction)
                 self.__recolor_map()
@@ -580,44 +654,40 @@ class CentralWidget(QWidget):
             self.__set_onoff_reaction_list()
         self.__set_onoff_map()
 
-    def __set_onoff_reaction_list(self):
+    def __set_reaction_list_colors(self, colors_function):
         # do coloring of LB/UB columns in this case?
         view = self.reaction_list
         # block itemChanged while recoloring
         view.reaction_list.blockSignals(True)
         root = view.reaction_list.invisibleRootItem()
-        child_count = root.childCount()
-        for i in range(child_count):
-            item = root.child(i)
-            key = item.text(0)
-            if key in self.appdata.project.scen_values:
-                value = self.appdata.project.scen_values[key]
-                color = self.appdata.compute_color_onoff(value)
-                item.setBackground(ReactionListColumn.Flux, color)
-            elif key in self.appdata.project.comp_values:
-                value = self.appdata.project.comp_values[key]
-                color = self.appdata.compute_color_onoff(value)
+        items = [root.child(i) for i in range(root.childCount())]
+        colors = colors_function([item.text(0) for item in items])
+        for item in items:
+            color = colors.get(item.text(0), None)
+            if color is not None:
                 item.setBackground(ReactionListColumn.Flux, color)
         view.reaction_list.blockSignals(False)
 
-    def __set_onoff_map(self):
+    def __set_map_colors(self, colors_function):
         idx = self.map_tabs.currentIndex()
         if idx < 0:
             return
         name = self.map_tabs.tabText(idx)
         map_view = self.map_tabs.widget(idx)
-        for key in self.appdata.project.maps[name]["boxes"]:
-            if key in self.appdata.project.scen_values:
-                value = self.appdata.project.scen_values[key]
-                color = self.appdata.compute_color_onoff(value)
-                map_view.reaction_boxes[key].set_color(color)
-            elif key in self.appdata.project.comp_values:
-                value = self.appdata.project.comp_values[key]
-                color = self.appdata.compute_color_onoff(value)
-                map_view.reaction_boxes[key].set_color(color)
+        if not map_view.loaded:
+            return
+        colors = colors_function(list(self.appdata.project.maps[name]["boxes"]))
+        for key, color in colors.items():
+            map_view.reaction_boxes[key].set_color(color)
+
+    def __set_onoff_reaction_list(self):
+        self.__set_reaction_list_colors(self.color_mapper.onoff_colors)
+
+    def __set_onoff_map(self):
+        self.__set_map_colors(self.color_mapper.onoff_colors)
 
     def set_heaton(self):
-        (low, high) = self.appdata.low_and_high()
+        (low, high) = self.color_mapper.value_range()
         idx = self.tabs.currentIndex()
         if idx == ModelTabIndex.Reactions and self.appdata.project.comp_values_type == 0:
             self.__set_heaton_reaction_list(low,high)
@@ -625,43 +695,14 @@ class CentralWidget(QWidget):
 
     def __set_heaton_reaction_list(self, low, high):
         # TODO: coloring of LB/UB columns
-        view = self.reaction_list
-        # block itemChanged while recoloring
-        view.reaction_list.blockSignals(True)
-        root = view.reaction_list.invisibleRootItem()
-        child_count = root.childCount()
-        for i in range(child_count):
-            item = root.child(i)
-            key = item.text(0)
-            if key in self.appdata.project.scen_values:
-                value = self.appdata.project.scen_values[key]
-                color = self.appdata.compute_color_heat(value, low, high)
-                item.setBackground(ReactionListColumn.Flux, color)
-            elif key in self.appdata.project.comp_values:
-                value = self.appdata.project.comp_values[key]
-                color = self.appdata.compute_color_heat(value, low, high)
-                item.setBackground(ReactionListColumn.Flux, color)
-        view.reaction_list.blockSignals(False)
+        self.__set_reaction_list_colors(lambda reac_ids: self.color_mapper.heat_colors(reac_ids, low, high))
 
     def set_heaton_map(self):
-        (low, high) = self.appdata.low_and_high()
+        (low, high) = self.color_mapper.value_range()
         self.__set_heaton_map(low, high)
 
     def __set_heaton_map(self, low, high):
-        idx = self.map_tabs.currentIndex()
-        if idx < 0:
-            return
-        name = self.map_tabs.tabText(idx)
-        map_view = self.map_tabs.widget(idx)
-        for key in self.appdata.project.maps[name]["boxes"]:
-            if key in self.appdata.project.scen_values:
-                value = self.appdata.project.scen_values[key]
-                color = self.appdata.compute_color_heat(value, low, high)
-                map_view.reaction_boxes[key].set_color(color)
-            elif key in self.appdata.project.comp_values:
-                value = self.appdata.project.comp_values[key]
-                color = self.appdata.compute_color_heat(value, low, high)
-                map_view.reaction_boxes[key].set_color(color)
+        self.__set_map_colors(lambda reac_ids: self.color_mapper.heat_colors(reac_ids, low, high))
 
     def __recolor_map(self):
         ''' recolor the map based on the activated coloring mode '''
@@ -755,5 +796,5 @@ class ConfirmMapDeleteDialog(QDialog):
         del self.parent.appdata.project.maps[self.name]
         self.parent.map_tabs.removeTab(self.idx)
         self.parent.reaction_list.reaction_mask.update_state()
-        self.parent.parent.unsaved_changes()
+        self.parent.parent.unsaved_changes(model_changed=False)
         self.accept()
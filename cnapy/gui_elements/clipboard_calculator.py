@@ -4,6 +4,7 @@ from qtpy.QtWidgets import (QButtonGroup, QComboBox, QDialog, QHBoxLayout,
                             QVBoxLayout)
 
 from cnapy.appdata import AppData
+from cnapy.utils import UpdateScope
 
 
 class ClipboardCalculator(QDialog):
@@ -112,7 +113,7 @@ class ClipboardCalculator(QDialog):
             self.appdata.project.comp_values[key] = res
 
         self.appdata.project.comp_values_type = 0
-        self.appdata.window.centralWidget().update()
+        self.appdata.window.centralWidget().schedule_update(UpdateScope.Values)
 
     def combine(self, lv, rv):
         (llb, lub) = lv
@@ -140,6 +140,22 @@ class ConfigDialog(QDialog):
         h.addWidget(self.results_cache_directory)
         self.layout.addItem(h)
 
+        h = QHBoxLayout()
+        label = QLabel(
+            "Memory for map contents in MB, least recently used maps are unloaded (0: no limit):")
+        h.addWidget(label)
+        self.map_memory_budget = QLineEdit()
+        self.map_memory_budget.setFixedWidth(100)
+        self.map_memory_budget.setText(str(self.appdata.map_memory_budget))
+        validator = QIntValidator(0, 1000000, self)
+        self.map_memory_budget.setValidator(validator)
+        h.addWidget(self.map_memory_budget)
+        self.layout.addItem(h)
+
+        self.prewarm_jvm = QCheckBox("Start the Java VM for EFM computation in the background after startup")
+        self.prewarm_jvm.setChecked(self.appdata.prewarm_jvm)
+        self.layout.addWidget(self.prewarm_jvm)
+
         l2 = QHBoxLayout()
         self.button = QPushButton("Apply Changes")
         l2.addWidget(self.button)
@@ -268,6 +284,8 @@ class ConfigDialog(QDialog):
         if not self.appdata.results_cache_dir.exists():
             self.use_results_cache.setChecked(False)
         self.appdata.use_results_cache = self.use_results_cache.isChecked()
+        self.appdata.map_memory_budget = int(self.map_memory_budget.text())
+        self.appdata.prewarm_jvm = self.prewarm_jvm.isChecked()
 
         self.appdata.save_cnapy_config()
 
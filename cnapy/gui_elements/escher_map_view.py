@@ -1,6 +1,8 @@
 from pkg_resources import resource_filename
 import os
-from math import isclose
+import json
+from math import copysign, isclose, isfinite
+from typing import Dict, Iterable, Set
 from qtpy.QtCore import Signal, Slot, QUrl, QObject, Qt
 from qtpy.QtWidgets import QFileDialog
 from qtpy.QtWebEngineWidgets import QWebEngineView, QWebEngineProfile, QWebEnginePage
@@ -24,6 +26,25 @@ def save_from_escher(download):
         download.setPath(file_name)
         download.accept()
 
+def _json_bound(bound: float) -> float:
+    # Escher only uses the signs of the bounds, infinite values cannot be represented in JSON
+    return bound if isfinite(bound) else copysign(1e300, bound)
+
+# only the fields that Escher uses are sent to the page
+def _reaction_to_escher(reaction: cobra.Reaction) -> Dict:
+    return {"id": reaction.id, "name": reaction.name, "lower_bound": _json_bound(reaction.lower_bound),
+            "upper_bound": _json_bound(reaction.upper_bound), "gene_reaction_rule": reaction.gene_reaction_rule,
+            "metabolites": {m.id: c for m, c in reaction.metabolites.items()}}
+
+def _metabolite_to_escher(metabolite: cobra.Metabolite) -> Dict:
+    # like in cobra.io.to_json fields without value are left out
+    metabolite_dict = {"id": metabolite.id, "name": metabolite.name, "compartment": metabolite.compartment,
+                       "formula": metabolite.formula, "charge": metabolite.charge}
+    return {key: value for key, value in metabolite_dict.items() if value is not None}
+
+def _gene_to_escher(gene: cobra.Gene) -> Dict:
+    return {"id": gene.id, "name": gene.name}
+
 class EscherMapView(QWebEngineView):
     web_engine_profile: QWebEngineProfile = None #QWebEngineProfile()
     download_directory: str = ""
@@ -47,6 +68,12 @@ class EscherMapView(QWebEngineView):
         self.load(QUrl.fromLocalFile(resource_filename("cnapy", r"data/escher_cnapy.html")))
         self.name: str = name # map name for self.appdata.project.maps
         self.editing_enabled = False
+        # state that has already been sent to the page, used to only send differences
+        self.sent_reaction_data: Dict[str, object] = None
+        self.sent_reaction_data_type: int = None
+        self.model_sent = False
+        # IDs of the reactions, metabolites and genes that have changed since the model was sent
+        self.changed_model_elements: Dict[str, Set[str]] = {"reactions": set(), "metabolites": set(), "genes": set()}
 
     @Slot()
     def initial_setup(self):
@@ -81,26 +108,82 @@ class EscherMapView(QWebEngineView):
         +","+self.appdata.project.maps[self.name]["pos"]+")")
 
     def set_cobra_model(self):
-        self.page().runJavaScript("builder.load_model("+cobra.io.to_json(self.appdata.project.cobra_py_model)+")")
+        # only the changes since the last call are sent to the page
+        model_delta = self.model_delta()
+        if model_delta is not None:
+            self.cnapy_bridge.modelChanged.emit(model_delta)
+
+    def model_elements_changed(self, reactions: Iterable[str] = (), metabolites: Iterable[str] = (),
+                               genes: Iterable[str] = ()):
+        # called with the (also previous) IDs of changed or removed elements, these are sent with the next update
+        self.changed_model_elements["reactions"].update(reactions)
+        self.changed_model_elements["metabolites"].update(metabolites)
+        self.changed_model_elements["genes"].update(genes)
+
+    def model_delta(self) -> str:
+        # returns None if nothing has changed, otherwise a JSON string with either the
+        # complete model (on first call) or the changed/removed reactions, metabolites and genes
+        model: cobra.Model = self.appdata.project.cobra_py_model
+        to_escher = {"reactions": (model.reactions, _reaction_to_escher),
+                     "metabolites": (model.metabolites, _metabolite_to_escher),
+                     "genes": (model.genes, _gene_to_escher)}
+        if not self.model_sent:
+            delta = {"reset": True, "model": {key: [element_to_escher(el) for el in elements]
+                                              for key, (elements, element_to_escher) in to_escher.items()}}
+        else:
+            delta = {"reset": False}
+            for key, (elements, element_to_escher) in to_escher.items():
+                el_ids = self.changed_model_elements[key]
+                if len(el_ids) > 0:
+                    delta[key] = {"changed": [element_to_escher(elements.get_by_id(el_id))
+                                              for el_id in el_ids if el_id in elements],
+                                  "removed": [el_id for el_id in el_ids if el_id not in elements]}
+            if len(delta) == 1:
+                return None
+        self.model_sent = True
+        for el_ids in self.changed_model_elements.values():
+            el_ids.clear()
+        return json.dumps(delta, allow_nan=False)
 
     def visualize_comp_values(self):
-        js_stack = []
-        def set_reaction_data_string(reaction_data):
-            return "builder.set_reaction_data("+reaction_data+")"
-        if len(self.appdata.project.comp_values) == 0:
-            js_stack.append(set_reaction_data_string("null"))
+        # only the reaction values that changed since the last call are sent to the page
+        reaction_data_delta = self.reaction_data_delta()
+        if reaction_data_delta is not None:
+            self.cnapy_bridge.reactionDataChanged.emit(reaction_data_delta)
+
+    def reaction_data_delta(self) -> str:
+        # returns None if nothing has changed, otherwise a JSON string with the changed
+        # and removed reaction values; FVA results are sent as text to display the flux range
+        comp_values = self.appdata.project.comp_values
+        as_text = self.appdata.project.comp_values_type != 0
+        if as_text:
+            reaction_data = {reac_id: self.appdata.format_flux_value(val[0])+
+                                ("" if isclose(val[0], val[1], abs_tol=self.appdata.abs_tol) else ", "+self.appdata.format_flux_value(val[1]))
+                             for reac_id, val in comp_values.items()}
+        else: # non-finite values cannot be represented in JSON and are not shown
+            reaction_data = {reac_id: float(val[0]) if isfinite(val[0]) else None
+                             for reac_id, val in comp_values.items()}
+
+        reset = self.sent_reaction_data is None or self.sent_reaction_data_type != self.appdata.project.comp_values_type
+        if reset:
+            changed = reaction_data
+            removed = []
         else:
-            if self.appdata.project.comp_values_type == 0:
-                 js_stack.append(set_reaction_data_string("["+str({reac_id: val[0]
-                                         for reac_id, val in self.appdata.project.comp_values.items()})+"]"))
-            else: # FVA result, display flux range as text only
-                js_stack.append("let style=builder.map.settings.get('reaction_styles')")
-                js_stack.append("builder.map.settings.set('reaction_styles','text')")
-                js_stack.append(set_reaction_data_string("["+str({reac_id: self.appdata.format_flux_value(val[0])+
-                                        ("" if isclose(val[0], val[1], abs_tol=self.appdata.abs_tol) else ", "+self.appdata.format_flux_value(val[1]))
-                                         for reac_id, val in self.appdata.project.comp_values.items()})+"]"))
-                js_stack.append("builder.settings._options.reaction_styles=style")
-        self.page().runJavaScript("{"+";".join(js_stack)+"}")
+            changed = {reac_id: val for reac_id, val in reaction_data.items()
+                       if reac_id not in self.sent_reaction_data or self.sent_reaction_data[reac_id] != val}
+            removed = [reac_id for reac_id in self.sent_reaction_data if reac_id not in reaction_data]
+            if len(changed) == 0 and len(removed) == 0:
+                return None
+        self.sent_reaction_data = reaction_data
+        self.sent_reaction_data_type = self.appdata.project.comp_values_type
+        return json.dumps({"reset": reset, "as_text": as_text, "changed": changed, "removed": removed})
+
+    def reset_sent_data(self):
+        # forces the complete model and reaction data to be sent with the next update,
+        # e.g. when the page has been (re)loaded or the model has been changed as a whole
+        self.sent_reaction_data = None
+        self.sent_reaction_data_type = None
+        self.model_sent = False
 
     def enable_editing(self, enable: bool):
         enable_str = str(enable).lower()
@@ -189,6 +272,9 @@ class CnapyBridge(QObject):
     reactionValueChanged = Signal(str, str)
     switchToReactionMask = Signal(str)
     jumpToMetabolite = Signal(str)
+    # the following signals are connected on the Javascript side and carry JSON strings
+    reactionDataChanged = Signal(str)
+    modelChanged = Signal(str)
 
     def __init__(self, escher_map: EscherMapView, central_widget):
         QObject.__init__(self)
@@ -223,6 +309,7 @@ class CnapyBridge(QObject):
 
     @Slot()
     def finish_setup(self):
+        self.escher_map.reset_sent_data()
         self.escher_map.finish_setup()
 
     @Slot(str)
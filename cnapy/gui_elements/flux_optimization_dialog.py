@@ -8,7 +8,7 @@ from qtpy.QtWidgets import (QDialog, QHBoxLayout, QLabel, QComboBox,
 
 from cnapy.appdata import AppData
 from cnapy.gui_elements.central_widget import CentralWidget
-from cnapy.utils import QComplReceivLineEdit, QHSeperationLine
+from cnapy.utils import QComplReceivLineEdit, QHSeperationLine, UpdateScope
 from straindesign import fba, linexpr2dict, linexprdict2str, avail_solvers
 from straindesign.names import *
 
@@ -118,4 +118,4 @@ class FluxOptimizationDialog(QDialog):
                 float(sol.fluxes[r]), float(sol.fluxes[r]))
             idx = idx+1
         self.appdata.project.comp_values_type = 0
-        self.central_widget.update()
+        self.central_widget.schedule_update(UpdateScope.Values)
@@ -6,47 +6,57 @@ from tempfile import TemporaryDirectory
 from zipfile import BadZipFile, ZipFile
 import pickle
 import xml.etree.ElementTree as ET
-from cnapy.flux_vector_container import FluxVectorContainer
+from cnapy.flux_vector_container import FluxVectorContainer, ScenarioResultContainer
 from cnapy.core_gui import model_optimization_with_exceptions, except_likely_community_model_error, get_last_exception_string, has_community_error_substring
 import cobra
 from optlang_enumerator.cobra_cnapy import CNApyModel
-from optlang_enumerator.mcs_computation import flux_variability_analysis
 from optlang.symbolics import Zero
 import numpy as np
 import cnapy.resources  # Do not delete this import - it seems to be unused but in fact it provides the menu icons
-import matplotlib.pyplot as plt
 from typing import Any, Dict
-import openpyxl
 
 from qtpy.QtCore import QFileInfo, Qt, Slot, QTimer, QSignalBlocker
 from qtpy.QtGui import QColor, QIcon, QKeySequence
 from qtpy.QtWidgets import (QAction, QActionGroup, QApplication, QFileDialog, QStyle,
                             QMainWindow, QMessageBox, QToolBar, QShortcut, QStatusBar, QLabel)
-from qtpy.QtWebEngineWidgets import QWebEngineView
 
 from cnapy.appdata import AppData, ProjectData, Scenario
+from cnapy.model_snapshot import model_to_bytes, read_project_model
+from cnapy.project_saver import ProjectSaveThread
 from cnapy.gui_elements.about_dialog import AboutDialog
 from cnapy.gui_elements.central_widget import CentralWidget, ModelTabIndex
 from cnapy.gui_elements.clipboard_calculator import ClipboardCalculator
 from cnapy.gui_elements.config_dialog import ConfigDialog
 from cnapy.gui_elements.download_dialog import DownloadDialog
 from cnapy.gui_elements.config_cobrapy_dialog import ConfigCobrapyDialog
-from cnapy.gui_elements.efmtool_dialog import EFMtoolDialog
-from cnapy.gui_elements.flux_feasibility_dialog import FluxFeasibilityDialog
 from cnapy.gui_elements.map_view import MapView
-from cnapy.gui_elements.escher_map_view import EscherMapView
-from cnapy.gui_elements.mcs_dialog import MCSDialog
-from cnapy.gui_elements.strain_design_dialog import SDDialog, SDComputationViewer, SDViewer, SDComputationThread
-from cnapy.gui_elements.plot_space_dialog import PlotSpaceDialog
 from cnapy.gui_elements.in_out_flux_dialog import InOutFluxDialog
 from cnapy.gui_elements.reactions_list import ReactionListColumn
 from cnapy.gui_elements.rename_map_dialog import RenameMapDialog
-from cnapy.gui_elements.yield_optimization_dialog import YieldOptimizationDialog
-from cnapy.gui_elements.flux_optimization_dialog import FluxOptimizationDialog
 from cnapy.gui_elements.configuration_cplex import CplexConfigurationDialog
 from cnapy.gui_elements.configuration_gurobi import GurobiConfigurationDialog
-from cnapy.gui_elements.thermodynamics_dialog import ThermodynamicAnalysisTypes, ThermodynamicDialog
 import cnapy.utils as utils
+from cnapy.utils import UpdateScope
+from cnapy.lazy_import import lazy_import
+from cnapy import jvm
+
+# modules that take long to load (straindesign, efmtool_link and the JVM, matplotlib,
+# QtWebEngine, openpyxl) are only imported when the corresponding feature is used
+efmtool_dialog = lazy_import("cnapy.gui_elements.efmtool_dialog")
+escher_map_view = lazy_import("cnapy.gui_elements.escher_map_view")
+flux_feasibility_dialog = lazy_import("cnapy.gui_elements.flux_feasibility_dialog")
+flux_optimization_dialog = lazy_import("cnapy.gui_elements.flux_optimization_dialog")
+mcs_dialog = lazy_import("cnapy.gui_elements.mcs_dialog")
+plot_space_dialog = lazy_import("cnapy.gui_elements.plot_space_dialog")
+problem_export = lazy_import("cnapy.problem_export")
+scenario_batch = lazy_import("cnapy.scenario_batch")
+scenario_batch_dialog = lazy_import("cnapy.gui_elements.scenario_batch_dialog")
+strain_design_dialog = lazy_import("cnapy.gui_elements.strain_design_dialog")
+thermodynamics_dialog = lazy_import("cnapy.gui_elements.thermodynamics_dialog")
+yield_optimization_dialog = lazy_import("cnapy.gui_elements.yield_optimization_dialog")
+mcs_computation = lazy_import("optlang_enumerator.mcs_computation")
+openpyxl = lazy_import("openpyxl")
+plt = lazy_import("matplotlib.pyplot")
 
 SBML_suffixes = "*.xml *.sbml *.xml.gz *.sbml.gz *.xml.zip *.sbml.zip"
 
@@ -95,6 +105,8 @@ class MainWindow(QMainWindow):
         self.save_project_action.setShortcut("Ctrl+S")
         self.file_menu.addAction(self.save_project_action)
         self.save_project_action.triggered.connect(self.save_project)
+        self.project_save_thread: ProjectSaveThread = None
+        self.save_after_running_save = False
 
         save_as_project_action = QAction("&Save project as...", self)
         save_as_project_action.setShortcut("Ctrl+Shift+S")
@@ -105,6 +117,10 @@ class MainWindow(QMainWindow):
         self.file_menu.addAction(export_sbml_action)
         export_sbml_action.triggered.connect(self.export_sbml)
 
+        export_problem_action = QAction("Export optimization problem of the scenario as MPS/LP...", self)
+        self.file_menu.addAction(export_problem_action)
+        export_problem_action.triggered.connect(self.export_problem)
+
         download_examples = QAction("Download CNApy example projects...", self)
         self.file_menu.addAction(download_examples)
         download_examples.triggered.connect(self.download_examples)
@@ -356,6 +372,14 @@ class MainWindow(QMainWindow):
         self.analysis_menu.addAction(make_scenario_feasible_action)
         self.make_scenario_feasible_dialog = None
 
+        scenario_batch_action = QAction("Evaluate scenario files...", self)
+        scenario_batch_action.triggered.connect(self.evaluate_scenario_files)
+        self.analysis_menu.addAction(scenario_batch_action)
+
+        load_scenario_results_action = QAction("Load scenario results...", self)
+        load_scenario_results_action.triggered.connect(self.load_scenario_results)
+        self.analysis_menu.addAction(load_scenario_results_action)
+
         self.analysis_menu.addSeparator()
 
         self.efm_menu = self.analysis_menu.addMenu("Elementary Flux Modes")
@@ -419,6 +443,10 @@ class MainWindow(QMainWindow):
         bottleneck_action.triggered.connect(self.perform_bottleneck_analysis)
         self.thermodynamic_menu.addAction(bottleneck_action)
 
+        tfva_action = QAction("Thermodynamic variability analysis...", self)
+        tfva_action.triggered.connect(self.perform_thermodynamic_variability_analysis)
+        self.thermodynamic_menu.addAction(tfva_action)
+
         dG0_menu = self.thermodynamic_menu.addMenu("Load dG'° values [in kJ/mol]...")
 
         dG0_json_action = QAction("...as JSON...", self)
@@ -564,7 +592,7 @@ class MainWindow(QMainWindow):
         self.centralWidget().map_tabs.currentChanged.connect(self.on_tab_change)
 
     def closeEvent(self, event):
-        if self.checked_unsaved():
+        if self.checked_unsaved() and self.wait_for_project_saving():
             self.close_project_dialogs()
             # make sure Escher pages are destroyed before their profile
             self.delete_maps()
@@ -596,7 +624,11 @@ class MainWindow(QMainWindow):
                 return False
         return True
 
-    def unsaved_changes(self):
+    def unsaved_changes(self, model_changed=True):
+        # use model_changed=False for changes of the maps or the meta data only, then
+        # the model of the project file can be reused when saving
+        if model_changed:
+            self.appdata.project.archive_model_is_current = False
         if not self.appdata.unsaved:
             self.appdata.unsaved = True
             self.save_project_action.setEnabled(True)
@@ -623,7 +655,7 @@ class MainWindow(QMainWindow):
 
     @Slot()
     def exit_app(self):
-        if self.checked_unsaved():
+        if self.checked_unsaved() and self.wait_for_project_saving():
             # releases the memory map file if this is a FluxVectorMemmap
             self.appdata.project.modes.clear()
             QApplication.quit()
@@ -645,34 +677,48 @@ class MainWindow(QMainWindow):
 
     @Slot()
     def plot_space(self):
-        self.plot_space = PlotSpaceDialog(self.appdata)
+        self.plot_space = plot_space_dialog.PlotSpaceDialog(self.appdata)
         self.plot_space.show()
 
     # Strain design computation and viewing functions
     def strain_design(self):
-        self.sd_dialog = SDDialog(self.appdata)
+        self.sd_dialog = strain_design_dialog.SDDialog(self.appdata)
         self.sd_dialog.show()
 
     @Slot(str)
     def strain_design_with_setup(self, sd_setup):
-        self.sd_dialog = SDDialog(self.appdata, json.loads(sd_setup))
+        self.sd_dialog = strain_design_dialog.SDDialog(self.appdata, json.loads(sd_setup))
         self.sd_dialog.show()
 
     @Slot(str)
     def compute_strain_design(self,sd_setup):
         # launch progress viewer and computation thread
-        self.sd_viewer = SDComputationViewer(self.appdata, sd_setup)
+        self.sd_viewer = strain_design_dialog.SDComputationViewer(self.appdata, sd_setup)
         self.sd_viewer.show_sd_signal.connect(self.show_strain_designs,Qt.QueuedConnection)
-        # connect signals to update progress
-        self.sd_computation = SDComputationThread(self.appdata, sd_setup)
-        self.sd_computation.output_connector.connect(     self.sd_viewer.receive_progress_text,Qt.QueuedConnection)
-        self.sd_computation.finished_computation.connect( self.sd_viewer.conclude_computation, Qt.QueuedConnection)
         self.sd_viewer.cancel_computation.connect(self.terminate_strain_design_computation)
+        self.sd_viewer.resume_computation.connect(self.resume_strain_design_computation)
         # show dialog and launch process
         # self.sd_viewer.exec()
         self.sd_viewer.show()
+        self.start_strain_design_computation(sd_setup, ask_for_resume=True)
+
+    def start_strain_design_computation(self, sd_setup, ask_for_resume: bool):
+        self.sd_computation = strain_design_dialog.SDComputationThread(self.appdata, sd_setup)
+        if self.sd_computation.previous_checkpoint is not None:
+            if not ask_for_resume or QMessageBox.question(self.sd_viewer, "Resume computation",
+                    "A checkpoint of an interrupted computation with this setup exists.\n"
+                    "Do you want to continue from it?") == QMessageBox.Yes:
+                self.sd_computation.resume_from_checkpoint()
+        # connect signals to update progress
+        self.sd_computation.output_connector.connect(     self.sd_viewer.receive_progress_text,Qt.QueuedConnection)
+        self.sd_computation.finished_computation.connect( self.sd_viewer.conclude_computation, Qt.QueuedConnection)
+        self.sd_computation.failed_computation.connect(   self.sd_viewer.computation_failed, Qt.QueuedConnection)
         self.sd_computation.start()
 
+    @Slot()
+    def resume_strain_design_computation(self):
+        self.start_strain_design_computation(self.sd_viewer.sd_setup, ask_for_resume=False)
+
     def open_selected_recent_project(self):
         selected_last_project = self.sender().text()
         if not os.path.exists(selected_last_project):
@@ -698,13 +744,14 @@ class MainWindow(QMainWindow):
 
     @Slot()
     def terminate_strain_design_computation(self):
-        self.sd_computation.output_connector.disconnect()
-        self.sd_computation.finished_computation.disconnect()
-        self.sd_computation.terminate()
+        self.sd_computation.output_connector.disconnect(self.sd_viewer.receive_progress_text)
+        self.sd_computation.finished_computation.disconnect(self.sd_viewer.conclude_computation)
+        self.sd_computation.failed_computation.disconnect(self.sd_viewer.computation_failed)
+        self.sd_computation.kill()
 
     @Slot(bytes)
     def show_strain_designs(self,solutions):
-        self.sd_sols = SDViewer(self.appdata, solutions)
+        self.sd_sols = strain_design_dialog.SDViewer(self.appdata, solutions)
         self.sd_sols.show()
         self.centralWidget().update_mode()
 
@@ -721,12 +768,12 @@ class MainWindow(QMainWindow):
 
     @Slot()
     def optimize_yield(self):
-        dialog = YieldOptimizationDialog(self.appdata, self.centralWidget())
+        dialog = yield_optimization_dialog.YieldOptimizationDialog(self.appdata, self.centralWidget())
         dialog.exec_()
 
     @Slot()
     def optimize_flux(self):
-        dialog = FluxOptimizationDialog(self.appdata, self.centralWidget())
+        dialog = flux_optimization_dialog.FluxOptimizationDialog(self.appdata, self.centralWidget())
         dialog.exec_()
 
     @Slot()
@@ -770,6 +817,31 @@ class MainWindow(QMainWindow):
 
         self.setCursor(Qt.ArrowCursor)
 
+    @Slot()
+    def export_problem(self):
+        '''writes the problem that an FBA with the current scenario solves, e.g. to reproduce it with another solver'''
+        dialog = QFileDialog(self)
+        (filename, selected_filter) = dialog.getSaveFileName(
+            directory=self.appdata.work_directory, filter="MPS (*.mps);;LP (*.lp)")
+        if not filename or len(filename) == 0:
+            return
+        if not filename.lower().endswith((".mps", ".lp")):
+            filename += ".lp" if selected_filter.startswith("LP") else ".mps"
+
+        self.setCursor(Qt.BusyCursor)
+        try:
+            with self.appdata.project.cobra_py_model as model:
+                self.appdata.project.load_scenario_into_model(model)
+                lp = problem_export.linear_program_from_cobra_model(model)
+            name_map_filename = problem_export.write_problem(lp, filename)
+        except ValueError as e:
+            QMessageBox.warning(self, "Cannot export the problem", str(e))
+        else:
+            QMessageBox.information(self, "Problem exported",
+                                    "The problem was written to " + filename + " and the original names of its "
+                                    "variables and constraints to " + name_map_filename + ".")
+        self.setCursor(Qt.ArrowCursor)
+
     @Slot()
     def download_examples(self):
         dialog = DownloadDialog(self.appdata)
@@ -802,7 +874,7 @@ class MainWindow(QMainWindow):
 
         self.recreate_maps()
         self.unsaved_changes()
-        self.centralWidget().update()
+        self.centralWidget().schedule_update(UpdateScope.Maps)
 
     @Slot()
     def merge_scenario(self):
@@ -857,7 +929,7 @@ class MainWindow(QMainWindow):
         if self.appdata.auto_fba:
             self.fba()
         else:
-            self.centralWidget().update()
+            self.centralWidget().schedule_update(UpdateScope.Values)
             self.clear_status_bar()
         self.appdata.last_scen_directory = os.path.dirname(filename)
         self.appdata.project.scen_values.has_unsaved_changes = False
@@ -877,6 +949,26 @@ class MainWindow(QMainWindow):
         self.centralWidget().mode_navigator.set_to_efm()
         self.centralWidget().update_mode()
 
+    @Slot()
+    def load_scenario_results(self):
+        dialog = QFileDialog(self)
+        filename: str = dialog.getOpenFileName(
+            directory=self.appdata.work_directory, filter="*.npz")[0]
+        if not filename or len(filename) == 0 or not os.path.exists(filename):
+            return
+        try:
+            table = scenario_batch.ScenarioResultTable.load(filename)
+        except Exception:
+            QMessageBox.critical(self, "Could not open file",
+                                 "The file does not seem to contain results of evaluated scenario files.")
+            return
+
+        self.appdata.project.modes = ScenarioResultContainer(table)
+        self.centralWidget().mode_navigator.current = 0
+
+        self.centralWidget().mode_navigator.set_to_scenario_results()
+        self.centralWidget().update_mode()
+
     @Slot()
     def load_mcs(self):
         dialog = QFileDialog(self)
@@ -1026,32 +1118,32 @@ class MainWindow(QMainWindow):
         idx = self.centralWidget().map_tabs.currentIndex()
         name = self.centralWidget().map_tabs.tabText(idx)
         self.appdata.project.maps[name]["box-size"] *= 1.1
-        self.unsaved_changes()
-        self.centralWidget().update()
+        self.unsaved_changes(model_changed=False)
+        self.centralWidget().schedule_update(UpdateScope.Maps)
 
     @Slot()
     def dec_box_size(self):
         idx = self.centralWidget().map_tabs.currentIndex()
         name = self.centralWidget().map_tabs.tabText(idx)
         self.appdata.project.maps[name]["box-size"] *= (1/1.1)
-        self.unsaved_changes()
-        self.centralWidget().update()
+        self.unsaved_changes(model_changed=False)
+        self.centralWidget().schedule_update(UpdateScope.Maps)
 
     @Slot()
     def inc_bg_size(self):
         idx = self.centralWidget().map_tabs.currentIndex()
         name = self.centralWidget().map_tabs.tabText(idx)
         self.appdata.project.maps[name]["bg-size"] *= 1.1
-        self.unsaved_changes()
-        self.centralWidget().update()
+        self.unsaved_changes(model_changed=False)
+        self.centralWidget().schedule_update(UpdateScope.Maps)
 
     @Slot()
     def dec_bg_size(self):
         idx = self.centralWidget().map_tabs.currentIndex()
         name = self.centralWidget().map_tabs.tabText(idx)
         self.appdata.project.maps[name]["bg-size"] *= (1/1.1)
-        self.unsaved_changes()
-        self.centralWidget().update()
+        self.unsaved_changes(model_changed=False)
+        self.centralWidget().schedule_update(UpdateScope.Maps)
 
     @Slot()
     def zoom_in(self):
@@ -1072,7 +1164,7 @@ class MainWindow(QMainWindow):
         now_enabled = not self.centralWidget().map_tabs.currentWidget().editing_enabled
         self.centralWidget().map_tabs.currentWidget().enable_editing(now_enabled)
         self.escher_edit_mode_action.setChecked(now_enabled)
-        self.unsaved_changes() # preliminary solution until checking for changes in Escher maps is implemented
+        self.unsaved_changes(model_changed=False) # preliminary solution until checking for changes in Escher maps is implemented
 
     @Slot()
     def focus_search_box(self):
@@ -1117,7 +1209,7 @@ class MainWindow(QMainWindow):
             self.appdata.recreate_scenario_from_history()
             if self.appdata.auto_fba:
                 self.fba()
-            self.centralWidget().update()
+            self.centralWidget().schedule_update(UpdateScope.Values)
 
     def redo_scenario_edit(self):
         ''' redo last undo of scenario history '''
@@ -1127,7 +1219,7 @@ class MainWindow(QMainWindow):
             self.appdata.recreate_scenario_from_history()
             if self.appdata.auto_fba:
                 self.fba()
-            self.centralWidget().update()
+            self.centralWidget().schedule_update(UpdateScope.Values)
 
     def clear_scenario(self):
         self.appdata.scen_values_clear()
@@ -1136,7 +1228,7 @@ class MainWindow(QMainWindow):
         self.central_widget.tabs.widget(ModelTabIndex.Scenario).recreate_scenario_items_needed = True
         if self.appdata.auto_fba:
             self.fba()
-        self.centralWidget().update()
+        self.centralWidget().schedule_update(UpdateScope.Values)
 
     def clear_all(self):
         self.appdata.scen_values_clear()
@@ -1148,7 +1240,7 @@ class MainWindow(QMainWindow):
         self.appdata.project.df_values.clear()
         self.appdata.project.high = 0
         self.appdata.project.low = 0
-        self.centralWidget().update()
+        self.centralWidget().schedule_update(UpdateScope.Values)
         self.clear_status_bar()
 
     def load_default_scenario(self):
@@ -1164,7 +1256,7 @@ class MainWindow(QMainWindow):
         if self.appdata.auto_fba:
             self.fba()
         else:
-            self.centralWidget().update()
+            self.centralWidget().schedule_update(UpdateScope.Values)
             self.clear_status_bar()
 
     @Slot()
@@ -1174,6 +1266,7 @@ class MainWindow(QMainWindow):
             self.recreate_maps()
 
     def new_project_unchecked(self):
+        self.wait_for_project_saving()
         self.appdata.project = ProjectData()
         self.delete_maps()
 
@@ -1216,6 +1309,7 @@ class MainWindow(QMainWindow):
             self.setCursor(Qt.ArrowCursor)
 
     def open_project(self, filename):
+        self.wait_for_project_saving()
         self.close_project_dialogs()
         temp_dir = TemporaryDirectory()
 
@@ -1248,8 +1342,7 @@ class MainWindow(QMainWindow):
                     meta_data = json.load(fp)
 
                 try:
-                    cobra_py_model = CNApyModel.read_sbml_model(
-                        temp_dir.name + "/model.sbml")
+                    cobra_py_model = read_project_model(temp_dir.name)
                 except cobra.io.sbml.CobraSBMLError:
                     exstr = get_last_exception_string()
                     QMessageBox.warning(
@@ -1259,6 +1352,8 @@ class MainWindow(QMainWindow):
                 self.appdata.project.maps = maps
                 self.appdata.project.meta_data = meta_data
                 self.appdata.project.cobra_py_model = cobra_py_model
+                self.appdata.project.archive_name = filename
+                self.appdata.project.archive_model_is_current = True
                 self.set_current_filename(filename)
                 self.recreate_maps()
                 self.centralWidget().mode_navigator.clear()
@@ -1320,6 +1415,7 @@ class MainWindow(QMainWindow):
     def close_project_dialogs(self):
         '''closes modeless dialogs'''
         if self.mcs_dialog is not None:
+            self.mcs_dialog.abort_computation()
             self.mcs_dialog.close()
             self.mcs_dialog = None
         if self.sd_dialog:
@@ -1332,7 +1428,11 @@ class MainWindow(QMainWindow):
 
     def save_sbml(self, filename):
         '''Save model as SBML'''
+        self.fix_undefined_compartments()
+        cobra.io.write_sbml_model(
+            self.appdata.project.cobra_py_model, filename)
 
+    def fix_undefined_compartments(self):
         # cleanup to work around cobrapy not setting a default compartment
         # remove unused species - > cleanup disabled for now because of issues
         # with prune_unused_metabolites
@@ -1359,15 +1459,12 @@ class MainWindow(QMainWindow):
 
         self.appdata.project.cobra_py_model = clean_model
 
-        cobra.io.write_sbml_model(
-            self.appdata.project.cobra_py_model, filename)
-
     @Slot()
     def save_project(self):
         escher_map_count: int = 0
         semaphore = [0] # list with one integer to emulate pass by reference
         for i in range(len(self.centralWidget().map_tabs)):
-            if isinstance(self.centralWidget().map_tabs.widget(i), EscherMapView):
+            if not isinstance(self.centralWidget().map_tabs.widget(i), MapView): # EscherMapView
                 self.centralWidget().map_tabs.widget(i).retrieve_map_data(semaphore=semaphore)
                 self.centralWidget().map_tabs.widget(i).retrieve_pos_and_zoom(semaphore=semaphore)
                 escher_map_count += 1
@@ -1392,57 +1489,78 @@ class MainWindow(QMainWindow):
 
     @Slot()
     def continue_save_project(self):
-        ''' Save the project '''
-        tmp_dir = TemporaryDirectory().name
+        ''' Save the project, the files are written in the background '''
+        if self.project_save_thread is not None: # save again when the running save has finished
+            self.save_after_running_save = True
+            return
         filename: str = self.appdata.project.name
 
-        self.setCursor(Qt.BusyCursor)
         try:
-            self.save_sbml(tmp_dir + "model.sbml")
-        except ValueError:
+            self.fix_undefined_compartments()
+            model_bytes = model_to_bytes(self.appdata.project.cobra_py_model)
+        except Exception:
             exstr = get_last_exception_string()
             utils.show_unknown_error_box(exstr)
-
             return
 
-        svg_files = {}
+        backgrounds = {}
+        maps = {}
         count = 1
         for name, m in self.appdata.project.maps.items():
             arc_name = "map" + str(count) + ".svg"
-            svg_files[m["background"]] = arc_name
-            m["background"] = arc_name
+            backgrounds[arc_name] = m["background"]
+            maps[name] = dict(m, background=arc_name)
             count += 1
 
         # Save maps information
         # also contains the Escher map JSONs
-        with open(tmp_dir + "box_positions.json", 'w') as fp:
-            json.dump(self.appdata.project.maps, fp, skipkeys=True)
+        maps_json = json.dumps(maps, skipkeys=True)
 
         # Save meta data
         self.appdata.project.meta_data["format version"] = self.appdata.format_version
-        with open(tmp_dir + "meta.json", 'w') as fp:
-            json.dump(self.appdata.project.meta_data, fp)
-
-        with ZipFile(filename, 'w') as zip_obj:
-            zip_obj.write(tmp_dir + "model.sbml", arcname="model.sbml")
-            zip_obj.write(tmp_dir + "box_positions.json",
-                          arcname="box_positions.json")
-            zip_obj.write(tmp_dir + "meta.json", arcname="meta.json")
-            for name, m in svg_files.items():
-                zip_obj.write(name, arcname=m)
-
-        # put svgs into temporary directory and update references
-        with ZipFile(filename, 'r') as zip_ref:
-            # TODO: currently saves default background for Escher maps, this is not needed
-            zip_ref.extractall(self.appdata.temp_dir.name)
-            count = 1
-            for name, m in self.appdata.project.maps.items():
-                m["background"] = self.appdata.temp_dir.name + \
-                    "/map" + str(count) + ".svg"
-                count += 1
-
+        meta_json = json.dumps(self.appdata.project.meta_data)
+
+        # TODO: currently saves default background for Escher maps, this is not needed
+        self.project_save_thread = ProjectSaveThread(filename, model_bytes, maps_json, meta_json, backgrounds,
+            self.appdata.temp_dir, self.appdata.project.archive_name, self.appdata.project.archive_model_is_current)
+        # the new archive will contain the current model, later changes reset this in unsaved_changes
+        self.appdata.project.archive_model_is_current = True
+        self.project_save_thread.finished.connect(self.project_saving_finished)
         self.nounsaved_changes()
+        self.statusBar().showMessage("Saving project...")
+        self.project_save_thread.start()
+
+    @Slot()
+    def project_saving_finished(self):
+        thread = self.project_save_thread
+        if thread is None: # already handled in wait_for_project_saving
+            return
+        self.project_save_thread = None
+        if thread.error is None:
+            self.appdata.project.archive_name = thread.filename
+            # backgrounds that were copied into the temporary directory
+            for m in self.appdata.project.maps.values():
+                m["background"] = thread.copied_backgrounds.get(m["background"], m["background"])
+            self.statusBar().showMessage("Project saved.", 3000)
+        else:
+            self.statusBar().clearMessage()
+            self.unsaved_changes()
+            utils.show_unknown_error_box(thread.error)
+        if self.save_after_running_save:
+            self.save_after_running_save = False
+            self.save_project()
+
+    def wait_for_project_saving(self) -> bool:
+        ''' blocks until a running save has finished, returns False if it failed '''
+        if self.project_save_thread is None:
+            return True
+        self.setCursor(Qt.BusyCursor)
+        self.project_save_thread.wait()
         self.setCursor(Qt.ArrowCursor)
+        self.save_after_running_save = False
+        success = self.project_save_thread.error is None
+        self.project_saving_finished()
+        return success
 
     @Slot()
     def save_project_as(self):
@@ -1459,13 +1577,13 @@ class MainWindow(QMainWindow):
         self.delete_maps()
         for name, mmap in self.appdata.project.maps.items():
             if mmap.get("view", "cnapy") == "cnapy":
+                # the scene is only built when the map is shown
                 mmap = MapView(self.appdata, self.centralWidget(), name)
-                mmap.show()
                 self.centralWidget().connect_map_view_signals(mmap)
             elif mmap["view"] == "escher":
-                mmap = EscherMapView(self.centralWidget(), name)
+                mmap = escher_map_view.EscherMapView(self.centralWidget(), name)
                 self.centralWidget().connect_escher_map_view_signals(mmap)
-                self.appdata.project.maps[name][EscherMapView] = mmap
+                self.appdata.project.maps[name][escher_map_view.EscherMapView] = mmap
             else:
                 raise ValueError("Unknown map type "+mmap["view"])
             self.centralWidget().map_tabs.addTab(mmap, name)
@@ -1519,13 +1637,13 @@ class MainWindow(QMainWindow):
                 "Paste clipboard does not work as no clipboard was created yet. Store values to a clipboard first to solve this problem."
             )
             return
-        self.centralWidget().update()
+        self.centralWidget().schedule_update(UpdateScope.Values)
 
     @Slot()
     def clipboard_arithmetics(self):
         dialog = ClipboardCalculator(self.appdata)
         dialog.exec_()
-        self.centralWidget().update()
+        self.centralWidget().schedule_update(UpdateScope.Values)
 
     def add_values_to_scenario(self):
         self.appdata.scen_values_set_multiple(list(self.appdata.project.comp_values.keys()),
@@ -1533,7 +1651,7 @@ class MainWindow(QMainWindow):
         self.appdata.project.comp_values.clear()
         if self.appdata.auto_fba:
             self.fba()
-        self.centralWidget().update()
+        self.centralWidget().schedule_update(UpdateScope.Values)
 
     def set_model_bounds_to_scenario(self):
         for reaction in self.appdata.project.cobra_py_model.reactions:
@@ -1541,7 +1659,7 @@ class MainWindow(QMainWindow):
                 (vl, vu) = self.appdata.project.scen_values[reaction.id]
                 reaction.lower_bound = vl
                 reaction.upper_bound = vu
-        self.centralWidget().update()
+        self.centralWidget().schedule_update(UpdateScope.Values)
 
     @Slot()
     def pin_scenario_reactions(self):
@@ -1556,7 +1674,7 @@ class MainWindow(QMainWindow):
             else:
                 if 'cnapy-default' in reaction.annotation.keys():
                     reaction.annotation.pop('cnapy-default')
-        self.centralWidget().update()
+        self.centralWidget().schedule_update(UpdateScope.Lists)
         self.unsaved_changes()
 
     def auto_fba(self):
@@ -1580,8 +1698,8 @@ class MainWindow(QMainWindow):
                 if self.appdata.project.solution.status == 'optimal':
                     display_text = "Optimal solution with objective value "+self.appdata.format_flux_value(self.appdata.project.solution.objective_value)
                     self.set_status_optimal()
-                    for r, v in self.appdata.project.solution.fluxes.items():
-                        self.appdata.project.comp_values[r] = (v, v)
+                    fluxes = self.appdata.project.solution.fluxes
+                    self.appdata.project.comp_values.set_values(fluxes.index, fluxes.values)
                 elif self.appdata.project.solution.status == 'infeasible':
                     display_text = "No solution, the current scenario is infeasible"
                     self.set_status_infeasible()
@@ -1596,11 +1714,11 @@ class MainWindow(QMainWindow):
             self.solver_status_display.setText(display_text)
             self.appdata.project.comp_values_type = 0
         if update:
-            self.centralWidget().update()
+            self.centralWidget().schedule_update(UpdateScope.Values)
 
     def make_scenario_feasible(self):
         if self.make_scenario_feasible_dialog is None:
-            self.make_scenario_feasible_dialog = FluxFeasibilityDialog(self)
+            self.make_scenario_feasible_dialog = flux_feasibility_dialog.FluxFeasibilityDialog(self)
         else:
             self.make_scenario_feasible_dialog.modified_scenario = None
             self.make_scenario_feasible_dialog.bm_reac_id_select.set_wordlist(self.appdata.project.cobra_py_model.reactions.list_attr("id"))
@@ -1639,10 +1757,7 @@ class MainWindow(QMainWindow):
                     utils.show_unknown_error_box(exstr)
             else:
                 if solution.status == 'optimal':
-                    soldict = solution.fluxes.to_dict()
-                    for i in soldict:
-                        self.appdata.project.comp_values[i] = (
-                            soldict[i], soldict[i])
+                    self.appdata.project.comp_values.set_values(solution.fluxes.index, solution.fluxes.values)
                     display_text = "Optimal solution with objective value "+ \
                         self.appdata.format_flux_value(solution.objective_value)
                     self.set_status_optimal()
@@ -1654,7 +1769,7 @@ class MainWindow(QMainWindow):
                 self.centralWidget().console._append_plain_text("\n"+display_text, before_prompt=True)
                 self.solver_status_display.setText(display_text)
                 self.appdata.project.comp_values_type = 0
-                self.centralWidget().update()
+                self.centralWidget().schedule_update(UpdateScope.Values)
 
     def execute_print_model_stats(self):
         if len(self.appdata.project.cobra_py_model.reactions) > 0:
@@ -1765,11 +1880,11 @@ class MainWindow(QMainWindow):
         self.in_out_fluxes(metabolite, soldict)
 
     def show_model_bounds(self):
-        for reaction in self.appdata.project.cobra_py_model.reactions:
-            self.appdata.project.comp_values[reaction.id] = (
-                reaction.lower_bound, reaction.upper_bound)
+        reactions = self.appdata.project.cobra_py_model.reactions
+        self.appdata.project.comp_values.set_values(reactions.list_attr("id"),
+            reactions.list_attr("lower_bound"), reactions.list_attr("upper_bound"))
         self.appdata.project.comp_values_type = 1
-        self.centralWidget().update()
+        self.centralWidget().schedule_update(UpdateScope.Values)
 
     def fva(self, fraction_of_optimum=0.0, zero_objective_with_zero_fraction_of_optimum=True):
         self.setCursor(Qt.BusyCursor)
@@ -1802,7 +1917,8 @@ class MainWindow(QMainWindow):
             else:
                 fva_hash = None
             try:
-                solution = flux_variability_analysis(model, fraction_of_optimum=fraction_of_optimum,
+                jvm.start_jvm() # mcs_computation starts the JVM when it is imported
+                solution = mcs_computation.flux_variability_analysis(model, fraction_of_optimum=fraction_of_optimum,
                     results_cache_dir=self.appdata.results_cache_dir if self.appdata.use_results_cache else None,
                     fva_hash= fva_hash,
                     print_func=lambda *txt: self.statusBar().showMessage(' '.join(list(txt))))
@@ -1818,15 +1934,12 @@ class MainWindow(QMainWindow):
                     print(exstr)
                     utils.show_unknown_error_box(exstr)
             else:
-                minimum = solution.minimum.to_dict()
-                maximum = solution.maximum.to_dict()
-                for i in minimum:
-                    self.appdata.project.comp_values[i] = (
-                        minimum[i], maximum[i])
+                self.appdata.project.comp_values.set_values(solution.index,
+                    solution.minimum.values, solution.maximum.values)
                 self.appdata.project.fva_values = self.appdata.project.comp_values.copy()
                 self.appdata.project.comp_values_type = 1
 
-        self.centralWidget().update()
+        self.centralWidget().schedule_update(UpdateScope.Values)
         self.setCursor(Qt.ArrowCursor)
 
     # def efm(self):
@@ -1968,13 +2081,18 @@ class MainWindow(QMainWindow):
 
 
     def efmtool(self):
-        self.efmtool_dialog = EFMtoolDialog(
+        self.efmtool_dialog = efmtool_dialog.EFMtoolDialog(
             self.appdata, self.centralWidget())
         self.efmtool_dialog.exec_()
 
+    def evaluate_scenario_files(self):
+        dialog = scenario_batch_dialog.ScenarioBatchDialog(self.appdata, self.centralWidget())
+        dialog.exec_()
+
     def mcs(self):
         if self.mcs_dialog is None:
-            self.mcs_dialog = MCSDialog(self.appdata, self.centralWidget())
+            jvm.start_jvm() # mcs_computation starts the JVM when it is imported
+            self.mcs_dialog = mcs_dialog.MCSDialog(self.appdata, self.centralWidget())
         self.mcs_dialog.show()
 
     def set_onoff(self):
@@ -2069,33 +2187,43 @@ class MainWindow(QMainWindow):
     @Slot()
     def perform_optmdfpathway(self):
         # Has to be in self to keep computation thread
-        self.optmdfpathway_dialog = ThermodynamicDialog(
+        self.optmdfpathway_dialog = thermodynamics_dialog.ThermodynamicDialog(
             self.appdata,
             self.centralWidget(),
-            analysis_type=ThermodynamicAnalysisTypes.OPTMDFPATHWAY
+            analysis_type=thermodynamics_dialog.ThermodynamicAnalysisTypes.OPTMDFPATHWAY
         )
         self.optmdfpathway_dialog.exec_()
 
     @Slot()
     def perform_thermodynamic_fba(self):
         # Has to be in self to keep computation thread
-        self.thermodynamic_fba_dialog = ThermodynamicDialog(
+        self.thermodynamic_fba_dialog = thermodynamics_dialog.ThermodynamicDialog(
             self.appdata,
             self.centralWidget(),
-            analysis_type=ThermodynamicAnalysisTypes.THERMODYNAMIC_FBA
+            analysis_type=thermodynamics_dialog.ThermodynamicAnalysisTypes.THERMODYNAMIC_FBA
         )
         self.thermodynamic_fba_dialog.exec_()
 
     @Slot()
     def perform_bottleneck_analysis(self):
         # Has to be in self to keep computation thread
-        self.bottleneck_dialog = ThermodynamicDialog(
+        self.bottleneck_dialog = thermodynamics_dialog.ThermodynamicDialog(
             self.appdata,
             self.centralWidget(),
-            analysis_type=ThermodynamicAnalysisTypes.BOTTLENECK_ANALYSIS
+            analysis_type=thermodynamics_dialog.ThermodynamicAnalysisTypes.BOTTLENECK_ANALYSIS
         )
         self.bottleneck_dialog.exec_()
 
+    @Slot()
+    def perform_thermodynamic_variability_analysis(self):
+        # Has to be in self to keep computation thread
+        self.tfva_dialog = thermodynamics_dialog.ThermodynamicDialog(
+            self.appdata,
+            self.centralWidget(),
+            analysis_type=thermodynamics_dialog.ThermodynamicAnalysisTypes.VARIABILITY_ANALYSIS
+        )
+        self.tfva_dialog.exec_()
+
     def _load_json(self) -> Dict[Any, Any]:
         dialog = QFileDialog(self)
         filename: str = dialog.getOpenFileName(
@@ -2127,42 +2255,15 @@ class MainWindow(QMainWindow):
         return ws
 
     def _set_concentrations(self, concentrations):
-        for metabolite in self.appdata.project.cobra_py_model.metabolites:
-            if "Cmin" in metabolite.annotation:
-                del(metabolite.annotation["Cmin"])
-            if "Cmax" in metabolite.annotation:
-                del(metabolite.annotation["Cmax"])
-            if metabolite.id not in concentrations.keys():
-                if "DEFAULT" in concentrations.keys():
-                    lb = concentrations["DEFAULT"]["min"]
-                    ub = concentrations["DEFAULT"]["max"]
-                else:
-                    continue
-            else:
-                lb = concentrations[metabolite.id]["min"]
-                ub = concentrations[metabolite.id]["max"]
-
-            metabolite.annotation["Cmin"] = lb
-            metabolite.annotation["Cmax"] = ub
-        self.centralWidget().update()
+        self.appdata.project.thermodynamic_data.set_concentrations(
+            self.appdata.project.cobra_py_model, concentrations)
+        self.centralWidget().schedule_update(UpdateScope.Lists)
         self.unsaved_changes()
 
     def _set_dG0s(self, dG0s):
-        for reaction in self.appdata.project.cobra_py_model.reactions:
-            if "dG0" in reaction.annotation:
-                del(reaction.annotation["dG0"])
-            if "dG0_uncertainty" in reaction.annotation:
-                del(reaction.annotation["dG0_uncertainty"])
-
-        reaction_ids = [x.id for x in self.appdata.project.cobra_py_model.reactions]
-        for reaction_id in dG0s.keys():
-            if reaction_id not in reaction_ids:
-                continue
-            reaction = self.appdata.project.cobra_py_model.reactions.get_by_id(reaction_id)
-            reaction.annotation["dG0"] = dG0s[reaction_id]["dG0"]
-            if "uncertainty" in dG0s[reaction_id].keys():
-                reaction.annotation["dG0_uncertainty"] = dG0s[reaction_id]["uncertainty"]
-        self.centralWidget().update()
+        self.appdata.project.thermodynamic_data.set_dG0s(
+            self.appdata.project.cobra_py_model, dG0s)
+        self.centralWidget().schedule_update(UpdateScope.Lists)
         self.unsaved_changes()
 
     def load_concentrations_json(self):
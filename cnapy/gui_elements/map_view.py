@@ -1,5 +1,7 @@
 """The PyNetAnalyzer map view"""
 import math
+import os
+import time
 from ast import literal_eval as make_tuple
 from math import isclose
 import pkg_resources
@@ -18,10 +20,17 @@ from cnapy.gui_elements.box_position_dialog import BoxPositionDialog
 
 INCREASE_FACTOR = 1.1
 DECREASE_FACTOR = 1/INCREASE_FACTOR
+# rough memory use of a loaded scene, used for the map memory budget
+SVG_MEMORY_FACTOR = 4 # times the size of the SVG file
+BOX_MEMORY = 20000 # bytes per reaction box
 
 
 class MapView(QGraphicsView):
-    """A map of reaction boxes"""
+    """
+    A map of reaction boxes.
+    The scene with the background and the boxes is only built when the map is
+    shown for the first time and can be unloaded again to save memory.
+    """
 
     def __init__(self, appdata: AppData, central_widget, name: str):
         self.scene: QGraphicsScene = QGraphicsScene()
@@ -41,6 +50,8 @@ class MapView(QGraphicsView):
         self.previous_point = None
         self.select = False
         self.select_start = None
+        self.loaded = False
+        self.last_used = 0.0
 
         # initial scale
         self._zoom = self.appdata.project.maps[self.name]["zoom"]
@@ -55,16 +66,46 @@ class MapView(QGraphicsView):
         self.horizontalScrollBar().valueChanged.connect(self.on_hbar_change)
         self.verticalScrollBar().valueChanged.connect(self.on_vbar_change)
 
-        self.rebuild_scene()
-        self.update()
+    def ensure_loaded(self):
+        self.last_used = time.monotonic()
+        if not self.loaded:
+            pos = self.appdata.project.maps[self.name]["pos"]
+            self.rebuild_scene()
+            # restore the position which may have been changed while the scene was built
+            self.appdata.project.maps[self.name]["pos"] = pos
+            self.update()
+
+    def unload(self):
+        ''' removes the scene contents, they are rebuilt when the map is needed again '''
+        self.loaded = False
+        self.scene.clear()
+        self.background = None
+        self.reaction_boxes.clear()
+
+    def estimated_memory(self) -> int:
+        if not self.loaded:
+            return 0
+        try:
+            svg_size = os.path.getsize(self.appdata.project.maps[self.name]["background"])
+        except OSError:
+            svg_size = 0
+        return SVG_MEMORY_FACTOR * svg_size + BOX_MEMORY * len(self.reaction_boxes)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        idx = self.central_widget.map_tabs.indexOf(self)
+        if not self.loaded and idx >= 0: # update_map also applies the current coloring
+            self.central_widget.update_map(idx)
 
     def on_hbar_change(self, x):
-        self.appdata.project.maps[self.name]["pos"] = (
-            x, self.verticalScrollBar().value())
+        if self.loaded:
+            self.appdata.project.maps[self.name]["pos"] = (
+                x, self.verticalScrollBar().value())
 
     def on_vbar_change(self, y):
-        self.appdata.project.maps[self.name]["pos"] = (
-            self.horizontalScrollBar().value(), y)
+        if self.loaded:
+            self.appdata.project.maps[self.name]["pos"] = (
+                self.horizontalScrollBar().value(), y)
 
     def dragEnterEvent(self, event: QGraphicsSceneDragDropEvent):
         self.previous_point = self.mapToScene(event.pos())
@@ -124,6 +165,7 @@ class MapView(QGraphicsView):
                 self.zoom_out()
 
     def fit(self):
+        self.ensure_loaded()
         self.fitInView(self.scene.sceneRect(), Qt.KeepAspectRatio)
 
     def zoom_in(self):
@@ -220,6 +262,7 @@ class MapView(QGraphicsView):
 
 
     def focus_reaction(self, reaction: str):
+        self.ensure_loaded()
         x = self.appdata.project.maps[self.name]["boxes"][reaction][0]
         y = self.appdata.project.maps[self.name]["boxes"][reaction][1]
         self.centerOn(x, y)
@@ -235,6 +278,7 @@ class MapView(QGraphicsView):
             self.scale(INCREASE_FACTOR, INCREASE_FACTOR)
 
     def highlight_reaction(self, string):
+        self.ensure_loaded()
         treffer = self.reaction_boxes[string]
         treffer.item.setHidden(False)
         treffer.item.setFocus()
@@ -256,6 +300,7 @@ class MapView(QGraphicsView):
         self.scene.addItem(self.background)
 
     def rebuild_scene(self):
+        self.loaded = True
         self.scene.clear()
         self.background = None
 
@@ -310,6 +355,8 @@ class MapView(QGraphicsView):
             print(f"Failed to add reaction box for {new_reaction_id} on map {self.name}")
 
     def update(self):
+        if not self.loaded:
+            return
         for item in self.scene.items():
             if isinstance(item, QGraphicsSvgItem):
                 item.setScale(
@@ -353,7 +400,7 @@ class MapView(QGraphicsView):
     def remove_box(self, reaction: str):
         self.delete_box(reaction)
         del self.appdata.project.maps[self.name]["boxes"][reaction]
-        del self.reaction_boxes[reaction]
+        self.reaction_boxes.pop(reaction, None)
         self.update()
         self.reactionRemoved.emit(reaction)
 
@@ -1,7 +1,6 @@
 """The dialog for calculating minimal cut sets"""
 
 import io
-import scipy
 
 from qtpy.QtCore import Qt, Slot
 from qtpy.QtWidgets import (QButtonGroup, QCheckBox, QComboBox, QCompleter,
@@ -14,8 +13,12 @@ from cobra.util.solver import interface_to_str
 from cnapy.appdata import AppData
 import cnapy.utils as utils
 from cnapy.utils import QComplReceivLineEdit
-from cnapy.flux_vector_container import FluxVectorContainer
-from cnapy.core_gui import except_likely_community_model_error, get_last_exception_string, has_community_error_substring
+from cnapy.flux_vector_container import IncrementalFluxVectorContainer
+from cnapy.core_gui import except_likely_community_model_error, has_community_error_substring
+from cnapy.model_snapshot import model_to_bytes, model_fingerprint
+from cnapy.process_thread import ProcessThread
+from cnapy.checkpoint import Checkpoint, checkpoint_filename, setup_fingerprint
+import cnapy.worker_process as worker_process
 
 
 class MCSDialog(QDialog):
@@ -27,6 +30,7 @@ class MCSDialog(QDialog):
 
         self.appdata = appdata
         self.central_widget = central_widget
+        self.mcs_computation = None
         self.out = io.StringIO()
         self.err = io.StringIO()
 
@@ -181,6 +185,9 @@ class MCSDialog(QDialog):
         buttons = QHBoxLayout()
         self.compute_mcs = QPushButton("Compute MCS")
         buttons.addWidget(self.compute_mcs)
+        self.resume_mcs = QPushButton("Resume from checkpoint")
+        self.resume_mcs.setToolTip("Continue an interrupted computation with the same setup")
+        buttons.addWidget(self.resume_mcs)
         self.cancel = QPushButton("Close")
         buttons.addWidget(self.cancel)
         self.layout.addItem(buttons)
@@ -196,6 +203,7 @@ class MCSDialog(QDialog):
         # Connecting the signal
         self.cancel.clicked.connect(self.reject)
         self.compute_mcs.clicked.connect(self.compute)
+        self.resume_mcs.clicked.connect(self.resume_computation)
 
         self.central_widget.broadcastReactionID.connect(self.receive_input)
 
@@ -265,9 +273,15 @@ class MCSDialog(QDialog):
         self.desired_list.removeRow(i-1)
 
     def compute(self):
+        self.check_and_compute(resume=False)
+
+    def resume_computation(self):
+        self.check_and_compute(resume=True)
+
+    def check_and_compute(self, resume: bool):
         mcs_equation_errors = self.check_for_mcs_equation_errors()
         if mcs_equation_errors == "":
-            self.compute_optlang()
+            self.compute_optlang(resume)
         else:
             QMessageBox.warning(
                 self,
@@ -278,7 +292,7 @@ class MCSDialog(QDialog):
             )
 
 
-    def compute_optlang(self):
+    def compute_optlang(self, resume=False):
         max_mcs_num = float(self.max_solu.text())
         max_mcs_size = int(self.max_size.text())
         timeout = float(self.time_limit.text())
@@ -379,28 +393,106 @@ class MCSDialog(QDialog):
                     )
                     return
 
-            self.setCursor(Qt.BusyCursor)
-            try:
-                mcs, err_val = mcs_computation.compute_mcs(model,
-                                targets=targets, desired=desired, enum_method=enum_method,
-                                max_mcs_size=max_mcs_size, max_mcs_num=max_mcs_num, timeout=timeout,
-                                exclude_boundary_reactions_as_cuts=self.exclude_boundary.isChecked(),
-                                results_cache_dir=self.appdata.results_cache_dir
-                                if self.appdata.use_results_cache else None)
-            except mcs_computation.InfeasibleRegion as e:
-                QMessageBox.warning(self, 'Cannot calculate MCS', str(e))
-                return targets, desired
-            except Exception:
-                exstr = get_last_exception_string()
-                if has_community_error_substring(exstr):
-                    except_likely_community_model_error()
-                    return
-                print(exstr)
-                utils.show_unknown_error_box(exstr)
+            mcs_setup = dict(targets=targets, desired=desired, enum_method=enum_method,
+                             max_mcs_size=max_mcs_size, max_mcs_num=max_mcs_num, timeout=timeout,
+                             exclude_boundary_reactions_as_cuts=self.exclude_boundary.isChecked(),
+                             results_cache_dir=self.appdata.results_cache_dir
+                             if self.appdata.use_results_cache else None)
+            model_bytes = model_to_bytes(model)
+            # the limits (including the maximal cut set size) may be changed when resuming
+            fingerprint = setup_fingerprint(model_fingerprint(model), (targets, desired, enum_method,
+                                                                       self.exclude_boundary.isChecked()))
+
+        filename = checkpoint_filename(self.appdata.project.name, self.appdata.work_directory, "mcs")
+        if resume:
+            self.checkpoint = Checkpoint.load(filename, fingerprint)
+            if self.checkpoint is None:
+                QMessageBox.information(self, 'No checkpoint',
+                                        'There is no checkpoint of an interrupted computation with this setup.')
                 return targets, desired
-            finally:
-                self.setCursor(Qt.ArrowCursor)
+        else:
+            self.checkpoint = Checkpoint(filename, fingerprint)
+        self.resumed_cut_sets = list(self.checkpoint.entries)
+        self.enum_method = enum_method
+
+        # the cut sets are shown in the mode navigator after every round of the enumeration
+        self.mcs_reac_id = reac_id
+        self.cut_sets = IncrementalFluxVectorContainer(reac_id)
+        self.cut_sets_shown = False
+        if len(self.resumed_cut_sets) > 0:
+            self.show_cut_sets(self.resumed_cut_sets)
+        self.mcs_computation = ProcessThread(worker_process.compute_mcs_worker,
+            (model_bytes, mcs_setup, self.resumed_cut_sets, self.checkpoint.state.get("size lower bound", 0)))
+        self.mcs_computation.output_connector.connect(self.receive_progress_text, Qt.QueuedConnection)
+        self.mcs_computation.partial_result.connect(self.receive_cut_sets, Qt.QueuedConnection)
+        self.mcs_computation.finished_computation.connect(self.conclude_computation, Qt.QueuedConnection)
+        self.mcs_computation.failed_computation.connect(self.computation_failed, Qt.QueuedConnection)
+        self.compute_mcs.setText("Stop computation")
+        self.compute_mcs.clicked.disconnect(self.compute)
+        self.compute_mcs.clicked.connect(self.stop_computation)
+        self.resume_mcs.setEnabled(False)
+        self.setCursor(Qt.BusyCursor)
+        self.mcs_computation.start()
+        return targets, desired
+
+    def computation_running(self) -> bool:
+        return self.mcs_computation is not None
+
+    def end_computation(self):
+        self.mcs_computation = None
+        self.setCursor(Qt.ArrowCursor)
+        self.compute_mcs.setText("Compute MCS")
+        self.compute_mcs.clicked.disconnect(self.stop_computation)
+        self.compute_mcs.clicked.connect(self.compute)
+        self.resume_mcs.setEnabled(True)
+
+    def abort_computation(self):
+        if self.computation_running():
+            self.mcs_computation.kill()
+            self.checkpoint.write()
+            self.end_computation()
 
+    @Slot()
+    def stop_computation(self):
+        if self.computation_running():
+            self.abort_computation()
+            if len(self.cut_sets) > 0:
+                QMessageBox.information(self, 'Computation stopped',
+                                        str(len(self.cut_sets))+' cut sets that have been found so far are kept.')
+
+    @Slot(str)
+    def receive_progress_text(self, text):
+        print(text, end='')
+
+    @Slot(object)
+    def receive_cut_sets(self, result):
+        (cut_sets, size_lower_bound) = result
+        self.checkpoint.add(cut_sets, {"size lower bound": size_lower_bound})
+        self.show_cut_sets(cut_sets)
+
+    def show_cut_sets(self, cut_sets):
+        if not self.cut_sets_shown:
+            self.cut_sets_shown = True
+            self.appdata.project.modes = self.cut_sets
+            self.central_widget.mode_navigator.current = 0
+            self.central_widget.mode_navigator.set_to_mcs()
+        elif self.appdata.project.modes is not self.cut_sets or len(self.cut_sets.reac_id) == 0:
+            return # the cut sets have been cleared or replaced in the meantime
+        self.cut_sets.append(cut_sets)
+        self.central_widget.mode_navigator.append_to_selection()
+        if len(self.cut_sets) == len(cut_sets): # show the first cut set
+            self.central_widget.update_mode()
+
+    @Slot(object)
+    def conclude_computation(self, result):
+        (mcs, err_val) = result
+        self.end_computation()
+        self.checkpoint.remove()
+        if len(self.resumed_cut_sets) > 0:
+            resumed = set(self.resumed_cut_sets)
+            mcs = self.resumed_cut_sets + [m for m in mcs if tuple(sorted(m)) not in resumed]
+            if self.enum_method == 3 or self.enum_method == 4: # sorted by size like in compute_mcs
+                mcs = sorted(mcs, key=len)
         print(err_val)
         if err_val == 1:
             QMessageBox.warning(self, "Enumeration stopped abnormally",
@@ -413,14 +505,13 @@ class MCSDialog(QDialog):
         if len(mcs) == 0:
             QMessageBox.information(self, 'No cut sets',
                                           'Cut sets have not been calculated or do not exist.')
-            return targets, desired
-
-        # omcs = [{reac_id[i]: -1.0 for i in m} for m in mcs]
-        omcs = scipy.sparse.lil_matrix((len(mcs), len(reac_id)))
-        for i,m in enumerate(mcs):
-            for j in m:
-                omcs[i, j] = -1.0
-        self.appdata.project.modes = FluxVectorContainer(omcs, reac_id=reac_id)
+            return
+
+        # replaces the cut sets found during the computation because the final ones may be sorted differently
+        cut_sets = IncrementalFluxVectorContainer(self.mcs_reac_id)
+        cut_sets.append(mcs)
+        self.cut_sets = cut_sets
+        self.appdata.project.modes = cut_sets
         self.central_widget.mode_navigator.current = 0
         QMessageBox.information(self, 'Cut sets found',
                                       str(len(mcs))+' Cut sets have been calculated.')
@@ -429,6 +520,17 @@ class MCSDialog(QDialog):
         self.central_widget.update_mode()
         self.accept()
 
+    @Slot(str, str, str)
+    def computation_failed(self, error_type, error_message, exstr):
+        self.end_computation()
+        self.checkpoint.write()
+        if error_type == "InfeasibleRegion":
+            QMessageBox.warning(self, 'Cannot calculate MCS', error_message)
+        elif has_community_error_substring(exstr):
+            except_likely_community_model_error()
+        else:
+            utils.show_unknown_error_box(exstr if len(exstr) > 0 else error_message)
+
     def check_right_mcs_equation(self, equation: str) -> str:
         try:
             float(equation)
@@ -1,13 +1,17 @@
 import numpy
-import matplotlib.pyplot as plt
 
 from qtpy.QtCore import Qt, Signal, Slot, QStringListModel
-from qtpy.QtGui import QIcon, QBrush, QColor
+from qtpy.QtGui import QIcon
 from qtpy.QtWidgets import (QFileDialog, QHBoxLayout, QLabel, QPushButton,
                             QVBoxLayout, QWidget, QCompleter, QLineEdit, QMessageBox, QToolButton)
 
 
-from cnapy.flux_vector_container import FluxVectorContainer
+from cnapy.flux_vector_container import FluxVectorContainer, ScenarioResultContainer, ThermodynamicPathwayContainer
+from cnapy.lazy_import import lazy_import
+from cnapy.sd_results import write_sd_results
+from cnapy.utils import UpdateScope
+
+plt = lazy_import("matplotlib.pyplot")
 
 
 class ModeNavigator(QWidget):
@@ -97,6 +101,13 @@ class ModeNavigator(QWidget):
                     txt = txt + " unbounded"
                 else:
                     txt = txt + " bounded"
+        if isinstance(self.appdata.project.modes, ThermodynamicPathwayContainer) and len(self.appdata.project.modes) > 0:
+            txt = txt + " MDF: " + str(round(self.appdata.project.modes.mdf[self.current], self.appdata.rounding)) + " kJ/mol"
+        if isinstance(self.appdata.project.modes, ScenarioResultContainer) and len(self.appdata.project.modes) > 0:
+            table = self.appdata.project.modes.table
+            txt = txt + " " + table.scenario_names[self.current] + ": " + table.status[self.current]
+            if not numpy.isnan(table.objective_value[self.current]):
+                txt = txt + ", objective value " + str(round(table.objective_value[self.current], self.appdata.rounding))
         self.label.setText(txt)
 
     def save_mcs(self):
@@ -115,6 +126,14 @@ class ModeNavigator(QWidget):
             return
         self.appdata.project.modes.save(filename)
 
+    def save_scenario_results(self):
+        dialog = QFileDialog(self)
+        filename: str = dialog.getSaveFileName(
+            directory=self.appdata.work_directory, filter="*.npz;;*.csv")[0]
+        if not filename or len(filename) == 0:
+            return
+        self.appdata.project.modes.save(filename)
+
     def save_sd(self):
         dialog = QFileDialog(self)
         filename: str = dialog.getSaveFileName(
@@ -123,7 +142,7 @@ class ModeNavigator(QWidget):
             return
         elif len(filename)<=4 or filename[-4:] != '.sds':
             filename += '.sds'
-        self.appdata.project.sd_solutions.save(filename)
+        write_sd_results(filename, self.appdata.project.sd_solutions, self.appdata.project.sd_setup)
 
     def update_completion_list(self):
         reac_id = self.appdata.project.cobra_py_model.reactions.list_attr("id")
@@ -153,6 +172,30 @@ class ModeNavigator(QWidget):
         self.select_all()
         self.update_completion_list()
 
+    def set_to_pathways(self):
+        self.mode_type = 0 # shown like flux vectors
+        self.title.setText("Pathway Navigation")
+        if self.save_button_connection is not None:
+            self.save_button.clicked.disconnect(self.save_button_connection)
+        self.save_button_connection = self.save_button.clicked.connect(self.save_efm)
+        self.save_button.setToolTip("save pathways")
+        self.clear_button.setToolTip("clear pathways")
+        self.apply_button.setVisible(False)
+        self.select_all()
+        self.update_completion_list()
+
+    def set_to_scenario_results(self):
+        self.mode_type = 0 # shown like flux vectors
+        self.title.setText("Scenario Navigation")
+        if self.save_button_connection is not None:
+            self.save_button.clicked.disconnect(self.save_button_connection)
+        self.save_button_connection = self.save_button.clicked.connect(self.save_scenario_results)
+        self.save_button.setToolTip("save scenario results")
+        self.clear_button.setToolTip("clear scenario results")
+        self.apply_button.setVisible(False)
+        self.select_all()
+        self.update_completion_list()
+
     def set_to_strain_design(self):
         self.mode_type = 2
         self.title.setText("Strain Design Navigation")
@@ -211,17 +254,26 @@ class ModeNavigator(QWidget):
         if self.appdata.auto_fba:
             self.central_widget.parent.fba()
         else:
-            self.central_widget.update()
+            self.central_widget.schedule_update(UpdateScope.Values)
 
     def select_all(self):
         self.selection = numpy.ones(len(self.appdata.project.modes), dtype=numpy.bool)
         self.num_selected = len(self.appdata.project.modes)
         self.selector.setText("")
 
+    def append_to_selection(self):
+        '''selects the modes that have been added while a computation is running'''
+        num_new = len(self.appdata.project.modes) - len(self.selection)
+        if num_new > 0:
+            self.selection = numpy.append(self.selection, numpy.ones(num_new, dtype=bool))
+            self.num_selected += num_new
+        self.update()
+
     def reset_selection(self):
         self.selector.accept_signal_input = False
         self.selection[:] = True # select all
         self.num_selected = len(self.appdata.project.modes)
+        self.show_selection_in_sd_viewer()
         self.update()
 
     def apply_selection(self):
@@ -279,21 +331,13 @@ class ModeNavigator(QWidget):
                         s = self.appdata.project.modes[i]
                         if selected and r in s and not numpy.any(numpy.isnan(s[r])) or numpy.all((s[r] == 0)):
                             self.selection[i] = False
-            if self.appdata.window.sd_sols and self.appdata.window.sd_sols.__weakref__: # if dialog exists
-                for i in range(self.appdata.window.sd_sols.sd_table.rowCount()):
-                    r_sd_idx = int(self.appdata.window.sd_sols.sd_table.item(i,0).text())-1
-                    if self.selection[r_sd_idx]:
-                        self.appdata.window.sd_sols.sd_table.item(i,0).setForeground(QBrush(QColor(0, 0, 0)))
-                        self.appdata.window.sd_sols.sd_table.item(i,1).setForeground(QBrush(QColor(0, 0, 0)))
-                        if self.appdata.window.sd_sols.sd_table.columnCount() == 3:
-                            self.appdata.window.sd_sols.sd_table.item(i,2).setForeground(QBrush(QColor(0, 0, 0)))
-                    else:
-                        self.appdata.window.sd_sols.sd_table.item(i,0).setForeground(QBrush(QColor(200, 200, 200)))
-                        self.appdata.window.sd_sols.sd_table.item(i,1).setForeground(QBrush(QColor(200, 200, 200)))
-                        if self.appdata.window.sd_sols.sd_table.columnCount() == 3:
-                            self.appdata.window.sd_sols.sd_table.item(i,2).setForeground(QBrush(QColor(200, 200, 200)))
+        self.show_selection_in_sd_viewer()
         self.num_selected = numpy.sum(self.selection)
 
+    def show_selection_in_sd_viewer(self):
+        if self.mode_type == 2 and self.appdata.window.sd_sols and self.appdata.window.sd_sols.__weakref__: # if dialog exists
+            self.appdata.window.sd_sols.sd_model.set_selection(self.selection)
+
     def size_histogram(self):
         if self.appdata.window.centralWidget().mode_navigator.mode_type <=1:
             sizes = numpy.sum(self.appdata.project.modes.fv_mat[self.selection, :] != 0, axis=1)
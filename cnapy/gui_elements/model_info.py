@@ -3,11 +3,13 @@
 from qtpy.QtCore import Signal, Slot, QSignalBlocker
 from qtpy.QtWidgets import (QLabel, QTextEdit, QVBoxLayout, QWidget, QComboBox, QGroupBox)
 
-from straindesign.parse_constr import linexpr2dict
+from cnapy.lazy_import import lazy_import
 from cnapy.appdata import AppData
 from cnapy.gui_elements.scenario_tab import OptimizationDirection
 from cnapy.utils import QComplReceivLineEdit
 
+parse_constr = lazy_import("straindesign.parse_constr")
+
 class ModelInfo(QWidget):
     """A widget that shows infos about the model"""
 
@@ -65,7 +67,7 @@ class ModelInfo(QWidget):
     @Slot(bool)
     def change_global_objective(self, yes: bool):
         if yes:
-            new_objective = linexpr2dict(self.global_objective.text(),
+            new_objective = parse_constr.linexpr2dict(self.global_objective.text(),
                             self.appdata.project.cobra_py_model.reactions.list_attr("id"))
             if new_objective != self.current_global_objective:
                 for reac_id in self.current_global_objective.keys():
@@ -101,6 +103,6 @@ class ModelInfo(QWidget):
 
     def description_changed(self):
         self.appdata.project.meta_data["description"] = self.description.toPlainText()
-        self.appdata.window.unsaved_changes()
+        self.appdata.window.unsaved_changes(model_changed=False)
 
     globalObjectiveChanged = Signal()
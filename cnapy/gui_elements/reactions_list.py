@@ -17,7 +17,9 @@ from cnapy.gui_elements.annotation_widget import AnnotationWidget
 from cnapy.utils import SignalThrottler, turn_red, turn_white, update_selected
 from cnapy.utils_for_cnapy_api import check_identifiers_org_entry, check_in_identifiers_org
 from cnapy.gui_elements.map_view import validate_value
-from cnapy.gui_elements.escher_map_view import EscherMapView
+from cnapy.lazy_import import lazy_import
+
+escher_map_view = lazy_import("cnapy.gui_elements.escher_map_view")
 
 class ReactionListColumn(IntEnum):
     Id = 0
@@ -210,8 +212,13 @@ class ReactionList(QWidget):
         item.setBackground(ReactionListColumn.Scenario, scen_background_color)
         item.setText(ReactionListColumn.Scenario, scen_text)
         if item.reaction.id in self.appdata.project.df_values.keys():
-            item.setText(ReactionListColumn.DF, str(self.appdata.project.df_values[item.reaction.id]))
-            item.df_val = self.appdata.project.df_values[item.reaction.id]
+            df_value = self.appdata.project.df_values[item.reaction.id]
+            if isinstance(df_value, tuple): # (min, max) of a thermodynamic variability analysis
+                item.setText(ReactionListColumn.DF, str(df_value[0])+", "+str(df_value[1]))
+                item.df_val = df_value[0]
+            else:
+                item.setText(ReactionListColumn.DF, str(df_value))
+                item.df_val = df_value
 
     def set_flux_value(self, item: ReactionListItem):
         key = item.reaction.id
@@ -761,6 +768,7 @@ class ReactionMask(QWidget):
     def delete_selected_annotation(self, identifier_key):
         try:
             del(self.reaction.annotation[identifier_key])
+            self.parent.appdata.project.thermodynamic_data.invalidate()
             self.parent.appdata.window.unsaved_changes()
         except IndexError:
             pass
@@ -958,8 +966,8 @@ class ReactionMask(QWidget):
     def update_state(self):
         self.jump_list.clear()
         for name, mmap in self.parent.appdata.project.maps.items():
-            if EscherMapView in mmap:
-                mmap[EscherMapView].page().runJavaScript("reactionOnMap('"+self.id.text().replace("'", r"\'")+
+            if mmap.get("view", "cnapy") == "escher":
+                mmap[escher_map_view.EscherMapView].page().runJavaScript("reactionOnMap('"+self.id.text().replace("'", r"\'")+
                                                          "','"+name.replace("'", r"\'")+"')",
                     lambda map_name: self.jump_list.add(map_name) if len(map_name) > 0 else print(map_name))
                 # below will not work correctly with multiple Escher maps because of asynchronous execution of the lambda function
@@ -44,5 +44,5 @@ class RenameMapDialog(QDialog):
             self.central_widget.map_tabs.setTabText(self.idx, new_name)
             m = self.central_widget.map_tabs.widget(self.idx)
             m.name = new_name
-            self.central_widget.parent.unsaved_changes()
+            self.central_widget.parent.unsaved_changes(model_changed=False)
         self.accept()
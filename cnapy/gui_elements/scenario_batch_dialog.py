@@ -0,0 +1,181 @@
+"""The dialog for the evaluation of many scenario files"""
+import os
+
+from qtpy.QtCore import Qt, QThread, Signal, Slot
+from qtpy.QtWidgets import (QAbstractItemView, QButtonGroup, QDialog, QFileDialog, QHBoxLayout, QLabel,
+                            QLineEdit, QListWidget, QMessageBox, QPushButton, QRadioButton, QVBoxLayout)
+from qtpy.QtGui import QIntValidator
+
+from cnapy.appdata import AppData
+from cnapy.flux_vector_container import ScenarioResultContainer
+from cnapy.model_snapshot import model_to_bytes
+from cnapy.scenario_batch import (ScenarioResultTable, evaluate_scenarios, read_scenario_file,
+                                  scenario_files, scenario_file_extensions, table_columns)
+
+
+class ScenarioBatchThread(QThread):
+    '''Evaluates the scenarios in a pool of worker processes, see cnapy.scenario_batch'''
+    def __init__(self, model_bytes, scenarios, reac_id, method, max_workers):
+        super().__init__()
+        self.model_bytes = model_bytes
+        self.scenarios = scenarios
+        self.reac_id = reac_id
+        self.method = method
+        self.max_workers = max_workers
+        self.abort = False
+
+    def run(self):
+        results = evaluate_scenarios(self.model_bytes, self.scenarios, self.reac_id, self.method, self.max_workers)
+        try:
+            for part in results:
+                if self.abort:
+                    break
+                self.partial_result.emit(part)
+        except Exception as e:
+            self.failed_evaluation.emit(type(e).__name__+": "+str(e))
+        finally:
+            results.close() # cancels the remaining scenarios
+
+    partial_result = Signal(object) # list of (scenario index, (status, objective value, minimum, maximum))
+    failed_evaluation = Signal(str)
+
+
+class ScenarioBatchDialog(QDialog):
+    '''
+    Evaluates scenario files with FBA, pFBA or FVA and shows the results in the mode navigator.
+    The scenarios are applied to the model without the current scenario.
+    '''
+
+    def __init__(self, appdata: AppData, central_widget):
+        QDialog.__init__(self)
+        self.setWindowTitle("Evaluate scenario files")
+        self.appdata = appdata
+        self.central_widget = central_widget
+        self.thread = None
+        self.table = None
+
+        self.layout = QVBoxLayout()
+        self.layout.addWidget(QLabel("Scenario files (each is applied to the model without the current scenario):"))
+        self.files = QListWidget()
+        self.files.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.layout.addWidget(self.files)
+        l1 = QHBoxLayout()
+        add_files = QPushButton("Add files...")
+        add_files.clicked.connect(self.add_files)
+        l1.addWidget(add_files)
+        add_directory = QPushButton("Add directory...")
+        add_directory.clicked.connect(self.add_directory)
+        l1.addWidget(add_directory)
+        remove = QPushButton("Remove selected")
+        remove.clicked.connect(self.remove_files)
+        l1.addWidget(remove)
+        self.layout.addItem(l1)
+
+        l2 = QHBoxLayout()
+        self.method = QButtonGroup()
+        for i, text in enumerate(("FBA", "pFBA", "FVA")):
+            button = QRadioButton(text)
+            self.method.addButton(button, i)
+            l2.addWidget(button)
+        self.method.button(0).setChecked(True)
+        l2.addWidget(QLabel("Worker processes:"))
+        self.workers = QLineEdit(str(os.cpu_count() or 1))
+        self.workers.setValidator(QIntValidator(1, 1024))
+        l2.addWidget(self.workers)
+        self.layout.addItem(l2)
+
+        self.progress = QLabel("")
+        self.layout.addWidget(self.progress)
+
+        l3 = QHBoxLayout()
+        self.button = QPushButton("Compute")
+        self.button.clicked.connect(self.compute)
+        l3.addWidget(self.button)
+        self.cancel = QPushButton("Close")
+        self.cancel.clicked.connect(self.reject)
+        l3.addWidget(self.cancel)
+        self.layout.addItem(l3)
+        self.setLayout(self.layout)
+
+    @Slot()
+    def add_files(self):
+        filenames = QFileDialog.getOpenFileNames(self, directory=self.appdata.last_scen_directory,
+                                                 filter="*.scen *.val")[0]
+        self.files.addItems(filenames)
+
+    @Slot()
+    def add_directory(self):
+        directory = QFileDialog.getExistingDirectory(self, directory=self.appdata.last_scen_directory)
+        if len(directory) > 0:
+            filenames = scenario_files([directory])
+            if len(filenames) == 0:
+                QMessageBox.information(self, "No scenario files",
+                                        "The directory contains no files ending with " + " or ".join(scenario_file_extensions))
+            self.files.addItems(filenames)
+
+    @Slot()
+    def remove_files(self):
+        for item in self.files.selectedItems():
+            self.files.takeItem(self.files.row(item))
+
+    @Slot()
+    def compute(self):
+        filenames = [self.files.item(i).text() for i in range(self.files.count())]
+        if len(filenames) == 0:
+            return
+        model = self.appdata.project.cobra_py_model
+        reaction_ids = set(model.reactions.list_attr("id"))
+        try:
+            scenarios = [read_scenario_file(filename, reaction_ids) for filename in filenames]
+        except Exception as e:
+            QMessageBox.warning(self, "Cannot read scenario file", type(e).__name__+": "+str(e))
+            return
+        for filename, scenario in zip(filenames, scenarios):
+            if len(scenario.unknown_ids) > 0:
+                print(os.path.basename(filename) + ": skipped unknown reactions", ", ".join(scenario.unknown_ids))
+        method = ("fba", "pfba", "fva")[self.method.checkedId()]
+        reac_id = table_columns(model, scenarios)
+        self.table = ScenarioResultTable([scenario.name for scenario in scenarios], reac_id, method)
+        self.num_evaluated = 0
+        self.progress.setText(f"0/{len(scenarios)} scenarios")
+        self.thread = ScenarioBatchThread(model_to_bytes(model), scenarios, reac_id, method, int(self.workers.text()))
+        self.thread.partial_result.connect(self.receive_results, Qt.QueuedConnection)
+        self.thread.failed_evaluation.connect(self.evaluation_failed, Qt.QueuedConnection)
+        self.thread.finished.connect(self.conclude_evaluation, Qt.QueuedConnection)
+        self.button.setEnabled(False)
+        self.cancel.setText("Cancel")
+        self.cancel.clicked.disconnect()
+        self.cancel.clicked.connect(self.stop)
+        self.setCursor(Qt.BusyCursor)
+        self.thread.start()
+
+    @Slot(object)
+    def receive_results(self, part):
+        for (i, result) in part:
+            self.table.set_result(i, result)
+        self.num_evaluated += len(part)
+        self.progress.setText(f"{self.num_evaluated}/{len(self.table)} scenarios")
+
+    @Slot(str)
+    def evaluation_failed(self, error: str):
+        QMessageBox.warning(self, "Evaluation failed", error)
+
+    @Slot()
+    def stop(self):
+        if self.thread is not None:
+            self.thread.abort = True
+
+    @Slot()
+    def conclude_evaluation(self):
+        self.setCursor(Qt.ArrowCursor)
+        self.thread = None
+        if self.num_evaluated > 0: # scenarios that were not evaluated because of a cancellation remain empty
+            self.appdata.project.modes = ScenarioResultContainer(self.table)
+            self.central_widget.mode_navigator.current = 0
+            self.central_widget.mode_navigator.set_to_scenario_results()
+            self.central_widget.update_mode()
+        self.accept()
+
+    def closeEvent(self, event):
+        self.stop()
+        super().closeEvent(event)
@@ -11,7 +11,9 @@ from qtpy.QtWidgets import (QLabel, QCheckBox, QComboBox, QVBoxLayout, QWidget,
 import cobra
 from cnapy.appdata import AppData, Scenario
 from cnapy.utils import QComplReceivLineEdit, format_scenario_constraint, turn_red, turn_white, BACKGROUND_COLOR
-from straindesign.parse_constr import linexpr2dict, linexprdict2str, lineq2list
+from cnapy.lazy_import import lazy_import
+
+parse_constr = lazy_import("straindesign.parse_constr")
 
 class OptimizationDirection(IntEnum):
     min = 0
@@ -174,7 +176,7 @@ class ScenarioTab(QWidget):
     def recreate_scenario_items(self):
         # assumes that the objective, reactions and constraints are all valid
         with QSignalBlocker(self.scenario_objective):
-            self.scenario_objective.setText(linexprdict2str(self.appdata.project.scen_values.objective_coefficients))
+            self.scenario_objective.setText(parse_constr.linexprdict2str(self.appdata.project.scen_values.objective_coefficients))
         with QSignalBlocker(self.use_scenario_objective):
             self.use_scenario_objective.setChecked(self.appdata.project.scen_values.use_scenario_objective)
         self.use_scenario_objective.setEnabled(True)
@@ -424,7 +426,7 @@ class ScenarioTab(QWidget):
         if row >= 0: # in case this is triggered when nothing is selected
             constraint_edit: QComplReceivLineEdit = self.constraints.cellWidget(row, 0)
             if text_correct:
-                self.appdata.project.scen_values.constraints[row] = lineq2list([constraint_edit.text()],
+                self.appdata.project.scen_values.constraints[row] = parse_constr.lineq2list([constraint_edit.text()],
                     self.reaction_ids.id_list)[0]
             else:
                 self.appdata.project.scen_values.constraints[row] = Scenario.empty_constraint
@@ -442,7 +444,7 @@ class ScenarioTab(QWidget):
         if self.scenario_objective.isModified():
             self.scenario_objective.setModified(False)
             if text_correct:
-                new_objective = linexpr2dict(self.scenario_objective.text(), self.reaction_ids.id_list)
+                new_objective = parse_constr.linexpr2dict(self.scenario_objective.text(), self.reaction_ids.id_list)
                 if new_objective != self.appdata.project.scen_values.objective_coefficients:
                     self.appdata.project.scen_values.objective_coefficients = new_objective
                     self.scenario_changed()
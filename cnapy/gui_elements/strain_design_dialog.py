@@ -1,28 +1,35 @@
 """The dialog for calculating minimal cut sets"""
 
-from contextlib import redirect_stdout, redirect_stderr
 import io
 import json
+import mmap
 import os
-from typing import Dict
+from tempfile import mkstemp
+from typing import Dict, Tuple
 import pickle
-import traceback
-from straindesign import SDModule, lineqlist2str, linexprdict2str, compute_strain_designs, \
-                                    linexpr2dict, select_solver
+from straindesign import SDModule, lineqlist2str, linexprdict2str, \
+                                    linexpr2dict, select_solver, avail_solvers
 from straindesign.names import *
-from straindesign.strainDesignSolutions import SDSolutions
 from random import randint
 from importlib import find_loader as module_exists
-from qtpy.QtCore import Qt, Slot, Signal, QThread
+import re
+import numpy
+from qtpy.QtCore import Qt, Slot, Signal, QThread, QAbstractTableModel, QModelIndex
+from qtpy.QtGui import QBrush, QColor
 from qtpy.QtWidgets import (QButtonGroup, QCheckBox, QComboBox, QCompleter,
                             QDialog, QGroupBox, QHBoxLayout, QHeaderView,
                             QLabel, QLineEdit, QMessageBox, QPushButton, QApplication,
                             QRadioButton, QTableWidget, QVBoxLayout, QSplitter,
-                            QWidget, QFileDialog, QTextEdit, QLayout, QScrollArea)
+                            QWidget, QFileDialog, QTextEdit, QLayout, QScrollArea, QAbstractItemView)
 from cnapy.appdata import AppData
+from cnapy.model_snapshot import model_to_bytes, model_fingerprint
+import cnapy.worker_process as worker_process
+from cnapy.process_thread import ProcessThread
+from cnapy.checkpoint import Checkpoint, checkpoint_filename, setup_fingerprint
+from cnapy.sd_results import read_sd_results, write_sd_results
+from cnapy.sd_validation import validate_strain_designs
 from cnapy.gui_elements.solver_buttons import get_solver_buttons
-from cnapy.utils import QTableCopyable, QComplReceivLineEdit, QTableItem
-import logging
+from cnapy.utils import QTableCopyable, QTableViewCopyable, QComplReceivLineEdit, QTableItem
 
 PROTECT_STR = 'Protect (MCS)'
 SUPPRESS_STR = 'Suppress (MCS)'
@@ -1353,6 +1360,11 @@ class SDComputationViewer(QDialog):
         self.explore.clicked.connect(self.show_sd)
         self.explore.setMaximumWidth(200)
         self.explore.setEnabled(False)
+        self.resume = QPushButton("Resume from checkpoint")
+        self.resume.setToolTip("Continue the interrupted computation with the solutions found so far")
+        self.resume.clicked.connect(self.resume_from_checkpoint)
+        self.resume.setMaximumWidth(200)
+        self.resume.setEnabled(False)
         edit = QPushButton("Cancel && Edit strain design setup")
         edit.clicked.connect(self.open_strain_design_dialog)
         edit.setMaximumWidth(200)
@@ -1360,6 +1372,7 @@ class SDComputationViewer(QDialog):
         cancel.setMaximumWidth(120)
         cancel.clicked.connect(self.cancel)
         buttons_layout.addWidget(self.explore)
+        buttons_layout.addWidget(self.resume)
         buttons_layout.addWidget(edit)
         buttons_layout.addWidget(cancel)
         self.layout.addItem(buttons_layout)
@@ -1367,13 +1380,25 @@ class SDComputationViewer(QDialog):
         self.setLayout(self.layout)
         self.show()
 
-    @Slot(bytes)
-    def conclude_computation(self,results):
-        self.solutions = pickle.loads(results)
+    @Slot(object)
+    def conclude_computation(self,results_file):
+        with open(results_file, 'rb') as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as results:
+            self.solutions = pickle.loads(results)
+        os.remove(results_file)
         self.setCursor(Qt.ArrowCursor)
         if self.solutions.get_num_sols() > 0:
             self.explore.setEnabled(True)
 
+    @Slot(str, str, str)
+    def computation_failed(self, _error_type, _error_message, _traceback):
+        self.resume.setEnabled(True)
+
+    @Slot()
+    def resume_from_checkpoint(self):
+        self.resume.setEnabled(False)
+        self.textbox.append("Resuming from checkpoint:")
+        self.resume_computation.emit()
+
     @Slot(str)
     def receive_progress_text(self,txt):
         txt = txt.strip("\n\t\r ")
@@ -1400,67 +1425,221 @@ class SDComputationViewer(QDialog):
 
     show_sd_signal = Signal(bytes)
     cancel_computation = Signal()
-
-class SDComputationThread(QThread):
+    resume_computation = Signal()
+
+class SDComputationThread(ProcessThread):
+    '''
+    Runs the strain design computation in a separate process so that the GUI stays
+    responsive and the computation can be killed. The results are written to a file
+    whose name is passed with finished_computation. The cost up to which all designs
+    have been found is checkpointed so that an interrupted computation can be resumed
+    from there (see worker_process.strain_design_cost_levels).
+    '''
     def __init__(self, appdata, sd_setup):
-        super().__init__()
         self.appdata = appdata
-        self.abort = False
-        self.sd_setup = json.loads(sd_setup)
-        self.curr_threadID = self.currentThread()
-        self.sd_setup.pop(MODEL_ID)
-        adv = self.sd_setup.pop('advanced')
-        self.gkos = self.sd_setup.pop('gene_kos')
-        if not adv and self.gkos: # ensure that gene-kos are computed, even when the
-            self.sd_setup[GKOCOST] = None # advanced-button wasn't clicked
+        (self.sd_setup, use_scenario) = worker_process.prepare_sd_setup(json.loads(sd_setup))
         # for debugging purposes write computation setup to file
         # with open('sd_computation.json', 'w') as fp:
         #     json.dump(self.sd_setup,fp)
-
-    def run(self):
         with self.appdata.project.cobra_py_model as model:
-            try:
-                with redirect_stdout(self), redirect_stderr(self):
-                    self.curr_threadID = self.currentThread()
-                    logger = logging.getLogger()
-                    handler = logging.StreamHandler(stream=self)
-                    handler.setFormatter(logging.Formatter('%(message)s'))
-                    logger.addHandler(handler)
-                    logger.setLevel('INFO')
-                    if self.sd_setup.pop('use_scenario'):
-                        self.appdata.project.load_scenario_into_model(model)
-                    sd_solutions = compute_strain_designs(model, **self.sd_setup)
-                    self.finished_computation.emit(pickle.dumps(sd_solutions))
-            except Exception as e:
-                tb_str = ''.join(traceback.format_exception(None, e, e.__traceback__))
-                self.write(tb_str)
-                sd_solutions = SDSolutions(model,[],ERROR,self.sd_setup)
-                self.finished_computation.emit(pickle.dumps(([],[],ERROR)))
-
-    def write(self, input):
-        # avoid that other threads use this as an output
-        if self.curr_threadID == self.currentThread():
-            if isinstance(input,str):
-                self.output_connector.emit(input)
-            else:
-                self.output_connector.emit(str(input))
+            if use_scenario:
+                self.appdata.project.load_scenario_into_model(model)
+            model_bytes = model_to_bytes(model)
+            # the limits may be changed when resuming
+            fingerprint = setup_fingerprint(model_fingerprint(model), {k: v for k, v in self.sd_setup.items()
+                                                                       if k not in (MAX_SOLUTIONS, MAX_COST,
+                                                                                    T_LIMIT, SEED)})
+        (fd, self.results_file) = mkstemp(suffix=".sds", dir=self.appdata.temp_dir.name)
+        os.close(fd)
+        filename = checkpoint_filename(self.appdata.project.name, self.appdata.work_directory, "sd")
+        self.previous_checkpoint = Checkpoint.load(filename, fingerprint)
+        self.checkpoint = Checkpoint(filename, fingerprint)
+        super().__init__(worker_process.compute_strain_designs_worker,
+                         (model_bytes, self.sd_setup, self.results_file, 0))
+        self.partial_result.connect(self.add_to_checkpoint)
+        self.finished_computation.connect(self.remove_checkpoint)
+        self.failed_computation.connect(self.write_checkpoint)
+
+    def resume_from_checkpoint(self):
+        '''continues from the previous checkpoint, must be called before start'''
+        self.checkpoint = self.previous_checkpoint
+        self.args = self.args[:-1] + (self.checkpoint.state.get("completed cost", 0),)
+
+    def kill(self):
+        super().kill()
+        self.checkpoint.write()
+
+    @Slot(object)
+    def add_to_checkpoint(self, completed_cost):
+        self.checkpoint.add([completed_cost], {"completed cost": completed_cost})
+        if self.abort: # the computation has been killed in the meantime
+            self.checkpoint.write()
+
+    @Slot(str, str, str)
+    def write_checkpoint(self, _error_type, _error_message, _traceback):
+        self.checkpoint.write()
+
+    @Slot(object)
+    def remove_checkpoint(self, _results_file):
+        self.checkpoint.remove()
+
+class SDValidationThread(QThread):
+    '''Validates the strain designs in a pool of worker processes, see cnapy.sd_validation'''
+    def __init__(self, model_bytes, designs, yield_function):
+        super().__init__()
+        self.model_bytes = model_bytes
+        self.designs = designs
+        self.yield_function = yield_function
+        self.abort = False
 
-    def flush(self):
-        pass
+    def run(self):
+        results = validate_strain_designs(self.model_bytes, self.designs, self.yield_function)
+        try:
+            for part in results:
+                if self.abort:
+                    break
+                self.partial_result.emit(part)
+        except Exception as e:
+            self.failed_validation.emit(type(e).__name__+": "+str(e))
+        finally:
+            results.close() # cancels the remaining designs
+
+    partial_result = Signal(object) # list of (equivalence class, (objective, minimal yield, maximal yield))
+    failed_validation = Signal(str)
+
+def format_interventions(sd: Dict) -> str:
+    '''e.g. "-R1, +R2" for a knock-out of R1 and a knock-in of R2; \u2205 marks a knock-in that is not done'''
+    texts = []
+    for k,v in sd.items():
+        if v > 0:
+            texts.append("+"+k)
+        elif v < 0:
+            texts.append("-"+k)
+        elif v == 0:
+            texts.append(u'\u2205'+k)
+    return ", ".join(texts)
+
+
+class SDTableModel(QAbstractTableModel):
+    '''
+    The strain designs for the table in SDViewer. The intervention sets are only formatted
+    when they are shown and a change of the current design or the selection only repaints
+    the rows of the affected equivalence classes. The rows can be sorted by every column.
+    '''
+    def __init__(self, rsd, gsd, assoc):
+        super().__init__()
+        self.rsd = rsd
+        self.gsd = gsd # None for reaction-based designs, then each row is an equivalence class
+        self.assoc = numpy.array(assoc, dtype=int) # row -> equivalence class (index in rsd)
+        self.rsd_strings = [None] * len(rsd)
+        self.gsd_strings = None if gsd is None else [None] * len(gsd)
+        self.order = numpy.arange(len(self.assoc)) # shown row -> row
+        self.selected = numpy.ones(len(rsd), dtype=bool)
+        self.current = -1
+        if gsd is None:
+            self.headers = ["Equiv. class", "Intervention set"]
+        else:
+            self.headers = ["Equiv. class", "Intervention set", "Reaction-phenotype interventions"]
+        self.num_sd_columns = len(self.headers)
+        self.validation = None
+
+    def reaction_sd_string(self, a: int) -> str:
+        if self.rsd_strings[a] is None:
+            self.rsd_strings[a] = format_interventions(self.rsd[a])
+        return self.rsd_strings[a]
+
+    def gene_sd_string(self, i: int) -> str:
+        if self.gsd_strings[i] is None:
+            self.gsd_strings[i] = format_interventions(self.gsd[i])
+        return self.gsd_strings[i]
+
+    def equivalence_class(self, row: int) -> int:
+        return int(self.assoc[self.order[row]])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.assoc)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def value(self, i: int, column: int):
+        a = self.assoc[i]
+        if column == 0:
+            return int(a) + 1
+        elif column == 1:
+            return self.reaction_sd_string(a) if self.gsd is None else self.gene_sd_string(i)
+        elif column < self.num_sd_columns:
+            return self.reaction_sd_string(a)
+        else:
+            return round(float(self.validation[a, column - self.num_sd_columns]), 6)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        i = self.order[index.row()]
+        if role == Qt.DisplayRole:
+            return self.value(i, index.column())
+        elif role == Qt.ForegroundRole:
+            if not self.selected[self.assoc[i]]:
+                return QBrush(QColor(200, 200, 200))
+        elif role == Qt.BackgroundRole:
+            if self.assoc[i] == self.current:
+                return QBrush(QColor(230, 230, 230))
+        elif role == Qt.TextAlignmentRole and index.column() == 0:
+            return int(Qt.AlignCenter)
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        if column == 0:
+            keys = self.assoc
+        elif column < self.num_sd_columns:
+            keys = numpy.array([self.value(i, column) for i in range(len(self.assoc))], dtype=object)
+        else:
+            keys = self.validation[self.assoc, column - self.num_sd_columns]
+        self.order = numpy.argsort(keys, kind='stable')
+        if order == Qt.DescendingOrder:
+            self.order = self.order[::-1]
+        self.layoutChanged.emit()
+
+    def repaint_classes(self, classes):
+        '''repaints the rows that belong to the given equivalence classes'''
+        rows = numpy.flatnonzero(numpy.isin(self.assoc[self.order], classes))
+        if len(rows) > 0: # the view only repaints the part of this range that is visible
+            self.dataChanged.emit(self.index(int(rows[0]), 0),
+                                  self.index(int(rows[-1]), self.columnCount() - 1))
+
+    def set_current(self, a: int):
+        if a != self.current:
+            previous = self.current
+            self.current = a
+            self.repaint_classes([previous, a])
+
+    def set_selection(self, selection):
+        changed = numpy.flatnonzero(self.selected != selection)
+        self.selected[:] = selection
+        self.repaint_classes(changed)
+
+    def set_validation(self, validation, headers):
+        self.beginResetModel()
+        self.validation = validation
+        self.headers = self.headers[:self.num_sd_columns] + headers
+        self.endResetModel()
 
-    # the output from the strain design computation needs to be passed as a signal because
-    # all Qt widgets must run on the main thread and their methods cannot be safely called
-    # from other threads
-    output_connector = Signal(str)
-    finished_computation = Signal(bytes)
 
 class SDViewer(QDialog):
     """A dialog that shows the results of the strain design computation"""
     def __init__(self, appdata: AppData, solutions):
         super().__init__()
         try:
-            (self.solutions,self.sd_setup) = pickle.loads(solutions)
-        except pickle.UnpicklingError:
+            # the metadata are e.g. the run of cnapy.sd_batch or the validation
+            (self.solutions, self.sd_setup, self.metadata) = read_sd_results(solutions)
+        except (pickle.UnpicklingError, TypeError, ValueError):
             QMessageBox.critical(
                 self,
                 'Could not open file',
@@ -1473,17 +1652,53 @@ class SDViewer(QDialog):
         self.setMinimumWidth(620)
         self.appdata = appdata
         appdata.project.sd_solutions = self.solutions
+        appdata.project.sd_setup = self.sd_setup
 
         self.layout = QVBoxLayout()
 
         if self.solutions.is_gene_sd:
-            self.sd_table = QTableCopyable(0, 3)
+            (rsd,self.assoc,gsd) = self.solutions.get_gene_reac_sd_assoc_mark_no_ki()
         else:
-            self.sd_table = QTableCopyable(0, 2)
+            rsd = self.solutions.get_reaction_sd_mark_no_ki()
+            self.assoc = [i for i in range(len(rsd))]
+            gsd = None
+        self.sd_model = SDTableModel(rsd, gsd, self.assoc)
+        self.sd_table = QTableViewCopyable()
+        self.sd_table.setModel(self.sd_model)
+        self.sd_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.sd_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.sd_table.verticalHeader().setDefaultSectionSize(20)
         self.sd_table.verticalHeader().setVisible(False)
+        self.sd_table.setMinimumWidth(320)
+        self.sd_table.setMinimumHeight(150)
+        self.sd_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Fixed)
+        self.sd_table.horizontalHeader().resizeSection(0, 90)
+        if self.solutions.is_gene_sd:
+            self.sd_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Interactive)
+            self.sd_table.horizontalHeader().resizeSection(1, 250)
+        self.sd_table.horizontalHeader().setStretchLastSection(True)
         self.layout.addWidget(self.sd_table)
 
+        # validation of the designs under the current scenario
+        reac_ids = self.appdata.project.cobra_py_model.reactions.list_attr("id")
+        validation_layout = QHBoxLayout()
+        validation_layout.addWidget(QLabel("Yield (optional):"))
+        self.yield_numerator = QComplReceivLineEdit(self, reac_ids, check=True, reject_empty_string=False)
+        self.yield_numerator.setPlaceholderText("numerator")
+        validation_layout.addWidget(self.yield_numerator)
+        validation_layout.addWidget(QLabel("/"))
+        self.yield_denominator = QComplReceivLineEdit(self, reac_ids, check=True, reject_empty_string=False)
+        self.yield_denominator.setPlaceholderText("denominator")
+        validation_layout.addWidget(self.yield_denominator)
+        self.validate = QPushButton("Validate designs")
+        self.validate.setToolTip("Computes the optimal objective value (FBA) and the yield range (yield FVA)\n"+
+                                 "of every design under the current scenario.")
+        self.validate.clicked.connect(self.validate_designs)
+        validation_layout.addWidget(self.validate)
+        self.layout.addItem(validation_layout)
+        self.validation_thread = None
+        self.validation = None # objective, minimal and maximal yield of each equivalence class
+
         buttons_layout = QHBoxLayout()
         self.savesds = QPushButton("Save solutions")
         self.savesds.clicked.connect(self.savesdsds)
@@ -1503,91 +1718,20 @@ class SDViewer(QDialog):
         buttons_layout.addWidget(self.close)
         self.layout.addItem(buttons_layout)
 
-        if self.solutions.is_gene_sd:
-            (rsd,self.assoc,gsd) = self.solutions.get_gene_reac_sd_assoc_mark_no_ki()
-        else:
-            rsd = self.solutions.get_reaction_sd_mark_no_ki()
-            self.assoc = [i for i in range(len(rsd))]
         itv_bounds = self.solutions.get_reaction_sd_bnds()
-        appdata.project.modes = [itv_bounds[self.assoc.index(i)] for i in set(self.assoc)]
+        first_row = {}
+        for i, a in enumerate(self.assoc):
+            first_row.setdefault(a, i)
+        appdata.project.modes = [itv_bounds[first_row[a]] for a in sorted(first_row)]
         central_widget = appdata.window.centralWidget()
         central_widget.mode_navigator.current = 0
         central_widget.mode_navigator.set_to_strain_design()
         central_widget.update_mode()
 
-        # prepare strain designs
-        if self.solutions.is_gene_sd:
-            self.sd_table.setMinimumWidth(320)
-            self.sd_table.setMinimumHeight(150)
-            self.sd_table.setHorizontalHeaderLabels(["Equiv. class","Intervention set",\
-                                                     "Reaction-phenotype interventions"])
-            self.sd_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Fixed)
-            self.sd_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Interactive)
-            self.sd_table.horizontalHeader().resizeSection(0, 90)
-            self.sd_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
-            self.rsd = ["" for _ in range(len(rsd))]
-            for i,s in enumerate(rsd):
-                for k,v in s.items():
-                    if v > 0:
-                        self.rsd[i] += "+"+k
-                    elif v < 0:
-                        self.rsd[i] += "-"+k
-                    elif v == 0:
-                        self.rsd[i] += u'\u2205'+k
-                    self.rsd[i] += ", "
-                self.rsd[i] = self.rsd[i][0:-2]
-            self.gsd = ["" for _ in range(len(gsd))]
-            for i,s in enumerate(gsd):
-                for k,v in s.items():
-                    if v > 0:
-                        self.gsd[i] += "+"+k
-                    elif v < 0:
-                        self.gsd[i] += "-"+k
-                    elif v == 0:
-                        self.gsd[i] += u'\u2205'+k
-                    self.gsd[i] += ", "
-                self.gsd[i] = self.gsd[i][0:-2]
-            for i,a,g in zip(range(len(self.gsd)), self.assoc, self.gsd):
-                self.sd_table.insertRow(i)
-                item = QTableItem(str(a+1))
-                item.setEditable(False)
-                item.setTextAlignment(Qt.AlignCenter)
-                self.sd_table.setItem(i, 0, item)
-                # set non-editable
-                item = QTableItem(g)
-                item.setEditable(False)
-                self.sd_table.setItem(i, 1, item)
-                item = QTableItem(self.rsd[a])
-                item.setEditable(False)
-                self.sd_table.setItem(i, 2, item)
-        else:
-            self.rsd = ["" for _ in range(len(rsd))]
-            for i,s in enumerate(rsd):
-                for k,v in s.items():
-                    if v > 0:
-                        self.rsd[i] += "+"+k
-                    elif v < 0:
-                        self.rsd[i] += "-"+k
-                    elif v == 0:
-                        self.rsd[i] += u'\u2205'+k
-                    self.rsd[i] += ", "
-                self.rsd[i] = self.rsd[i][0:-2]
-            self.sd_table.setMinimumWidth(320)
-            self.sd_table.setMinimumHeight(150)
-            self.sd_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Fixed)
-            self.sd_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
-            self.sd_table.horizontalHeader().resizeSection(0, 90)
-            self.sd_table.setHorizontalHeaderLabels(["Equiv. class","Intervention set"])
-            for i,s in enumerate(self.rsd):
-                self.sd_table.insertRow(i)
-                item = QTableItem(str(i+1))
-                item.setEditable(False)
-                item.setTextAlignment(Qt.AlignCenter)
-                self.sd_table.setItem(i, 0, item)
-                item = QTableItem(s)
-                item.setEditable(False)
-                self.sd_table.setItem(i, 1, item)
         self.sd_table.doubleClicked.connect(self.clicked_row)
+        self.sd_table.setSortingEnabled(True)
+        self.sd_table.horizontalHeader().setSortIndicator(0, Qt.AscendingOrder)
+        self.load_cached_validation()
         self.setLayout(self.layout)
         self.show()
         if self.solutions.has_complex_regul_itv:
@@ -1596,15 +1740,108 @@ class SDViewer(QDialog):
                                          "regulatory interventions that cannot be shown " +\
                                          "in the network map. Please refer to table.")
     def clicked_row(self,cell):
-        row = cell.row()
-        selection = int(self.sd_table.item(row,0).text())-1
+        selection = self.sd_model.equivalence_class(cell.row())
         self.appdata.window.centralWidget().mode_navigator.current = selection
         self.appdata.window.centralWidget().update_mode()
 
     def closediag(self):
+        self.stop_validation()
         self.deleteLater()
         self.reject()
 
+    def validation_model(self) -> Tuple[bytes, str]:
+        '''the model with the current scenario and its fingerprint'''
+        with self.appdata.project.cobra_py_model as model:
+            self.appdata.project.load_scenario_into_model(model)
+            return (model_to_bytes(model), model_fingerprint(model))
+
+    def load_cached_validation(self):
+        '''shows the validation that was saved with the solutions if it was made under the current scenario'''
+        cached = self.metadata.get("validation")
+        if cached is None:
+            return
+        with self.appdata.project.cobra_py_model as model:
+            self.appdata.project.load_scenario_into_model(model)
+            fingerprint = model_fingerprint(model)
+        if cached["fingerprint"] == setup_fingerprint(fingerprint, (cached["numerator"], cached["denominator"])):
+            self.yield_numerator.setText(cached["numerator"])
+            self.yield_denominator.setText(cached["denominator"])
+            self.validation = cached["values"]
+            self.show_validation()
+
+    @Slot()
+    def validate_designs(self):
+        if self.validation_thread is not None:
+            self.stop_validation()
+            return
+        numerator = self.yield_numerator.text().strip()
+        denominator = self.yield_denominator.text().strip()
+        if (numerator == "") != (denominator == ""):
+            QMessageBox.warning(self, "Incomplete yield", "Please specify both numerator and denominator of the yield.")
+            return
+        if not (self.yield_numerator.is_valid is not False and self.yield_denominator.is_valid is not False):
+            QMessageBox.warning(self, "Invalid yield", "The numerator or denominator of the yield is not valid.")
+            return
+        if numerator == "":
+            yield_function = None
+        else:
+            solver = re.search('('+'|'.join(avail_solvers)+')',
+                               self.appdata.project.cobra_py_model.solver.interface.__name__)
+            yield_function = (numerator, denominator, None if solver is None else solver[0])
+        (model_bytes, fingerprint) = self.validation_model()
+        self.pending_validation = {"fingerprint": setup_fingerprint(fingerprint, (numerator, denominator)),
+                                   "numerator": numerator, "denominator": denominator,
+                                   "values": numpy.full((len(self.appdata.project.modes), 3), numpy.nan)}
+        self.num_validated = 0
+        self.validation_thread = SDValidationThread(model_bytes, list(self.appdata.project.modes), yield_function)
+        self.validation_thread.partial_result.connect(self.receive_validation)
+        self.validation_thread.failed_validation.connect(self.validation_failed)
+        self.validation_thread.finished.connect(self.conclude_validation)
+        self.validate.setText("Stop validation")
+        self.validation_thread.start()
+
+    def stop_validation(self):
+        if self.validation_thread is not None:
+            self.validation_thread.abort = True
+            # the thread is deleted when it has stopped, until then it is owned by the application
+            self.validation_thread.setParent(QApplication.instance())
+            self.validation_thread.finished.connect(self.validation_thread.deleteLater)
+            self.validation_thread.partial_result.disconnect(self.receive_validation)
+            self.validation_thread.failed_validation.disconnect(self.validation_failed)
+            self.validation_thread.finished.disconnect(self.conclude_validation)
+            self.validation_thread = None
+            self.validate.setText("Validate designs")
+
+    @Slot(object)
+    def receive_validation(self, results):
+        for (i, values) in results:
+            self.pending_validation["values"][i] = values
+        self.num_validated += len(results)
+        self.validate.setText("Stop validation ("+str(self.num_validated)+"/"+
+                              str(len(self.pending_validation["values"]))+")")
+
+    @Slot(str)
+    def validation_failed(self, message):
+        self.stop_validation()
+        QMessageBox.warning(self, "Validation failed", message)
+
+    @Slot()
+    def conclude_validation(self):
+        self.validation_thread = None
+        self.validate.setText("Validate designs")
+        self.metadata["validation"] = self.pending_validation
+        self.validation = self.pending_validation["values"]
+        self.show_validation()
+
+    def show_validation(self):
+        '''adds the validation results as columns after the intervention sets'''
+        headers = ["Objective (FBA)"]
+        if self.yield_numerator.text().strip() != "":
+            headers += ["Min. yield", "Max. yield"]
+        self.sd_model.set_validation(self.validation, headers)
+        for j in range(self.sd_model.num_sd_columns, self.sd_model.columnCount()):
+            self.sd_table.horizontalHeader().resizeSection(j, 110)
+
     def savesdtsv(self):
         # open file dialog
         dialog = QFileDialog(self)
@@ -1616,9 +1853,15 @@ class SDViewer(QDialog):
             filename += '.tsv'
         # save strain design list to Excel file
         if self.solutions.is_gene_sd:
-            sd_string = "\n".join(["\t".join([str(a),g,self.rsd[a]]) for a,g in zip(self.assoc, self.gsd)])
+            rows = [[str(a),self.sd_model.gene_sd_string(i),self.sd_model.reaction_sd_string(a)]
+                    for i,a in enumerate(self.assoc)]
         else:
-            sd_string = "\n".join(self.rsd)
+            rows = [[self.sd_model.reaction_sd_string(i)] for i in range(len(self.assoc))]
+        num_validation_columns = self.sd_model.columnCount() - self.sd_model.num_sd_columns
+        if num_validation_columns > 0:
+            for row, a in zip(rows, self.assoc):
+                row += [str(v) for v in self.validation[a][:num_validation_columns]]
+        sd_string = "\n".join("\t".join(row) for row in rows)
         with open(filename,'w') as fs:
             fs.write(sd_string)
 
@@ -1631,7 +1874,8 @@ class SDViewer(QDialog):
             return
         elif len(filename)<=4 or filename[-4:] != '.sds':
             filename += '.sds'
-        self.solutions.save(filename)
+        # the metadata with the validation are attached to the solutions
+        write_sd_results(filename, self.solutions, self.sd_setup)
 
     @Slot()
     def open_strain_design_dialog(self):
@@ -1,14 +1,15 @@
 """The CNApy OptMDFpathway dialog"""
 import cobra
 import cobra.util.solver
-import copy
 import pickle
 from contextlib import redirect_stdout, redirect_stderr
-from numpy import exp
+import traceback
+from numpy import exp, isnan, linspace
 from qtpy.QtCore import Qt, QThread, Signal, Slot
 from qtpy.QtWidgets import (
     QCheckBox,
     QDialog,
+    QFileDialog,
     QHBoxLayout,
     QLabel,
     QLineEdit,
@@ -19,6 +20,7 @@ from qtpy.QtWidgets import (
 )
 
 from cnapy.appdata import AppData
+from cnapy.flux_vector_container import ThermodynamicPathwayContainer
 from cnapy.gui_elements.central_widget import CentralWidget
 from straindesign import avail_solvers
 from straindesign.names import *
@@ -29,8 +31,17 @@ from cnapy.sd_class_interface import (
     Status,
     ObjectiveDirection,
 )
-from cnapy.sd_ci_optmdfpathway import create_optmdfpathway_milp, STANDARD_R, STANDARD_T
-from typing import Dict
+from cnapy.lazy_import import lazy_import
+from cnapy.problem_export import write_problem
+from cnapy.sd_ci_optmdfpathway import (
+    create_optmdfpathway_milp,
+    iterate_minimal_optmdf_sweep,
+    iterate_optmdf_pathways,
+    split_reversible_reactions,
+    STANDARD_R,
+    STANDARD_T,
+)
+from typing import Dict, List, Tuple
 from cobra.util.solver import interface_to_str
 from cnapy.core_gui import model_optimization_with_exceptions
 import re
@@ -38,73 +49,14 @@ from cnapy.gui_elements.solver_buttons import get_solver_buttons
 from straindesign.names import CPLEX, GLPK, GUROBI, SCIP
 from enum import Enum
 
+plt = lazy_import("matplotlib.pyplot")
+
 
 class ThermodynamicAnalysisTypes(Enum):
     OPTMDFPATHWAY = 1
     THERMODYNAMIC_FBA = 2
     BOTTLENECK_ANALYSIS = 3
-
-
-def make_model_irreversible(
-    cobra_model: cobra.Model, forward_id: str = "_FWD", reverse_id: str = "_REV"
-) -> cobra.Model:
-    # Create
-    cobra_reaction_ids = [x.id for x in cobra_model.reactions]
-    for cobra_reaction_id in cobra_reaction_ids:
-        cobra_reaction: cobra.Reaction = cobra_model.reactions.get_by_id(
-            cobra_reaction_id
-        )
-
-        create_forward = False
-        create_reverse = False
-        if cobra_reaction.lower_bound < 0:
-            create_reverse = True
-        elif (cobra_reaction.lower_bound == 0) and (cobra_reaction.upper_bound == 0):
-            create_reverse = True
-            create_forward = True
-        elif cobra_reaction.id.startswith("EX_"):
-            create_reverse = True
-            create_forward = True
-        else:
-            continue
-
-        if cobra_reaction.upper_bound > 0:
-            create_forward = True
-
-        if create_forward:
-            forward_reaction_id = cobra_reaction.id + forward_id
-            forward_reaction = copy.deepcopy(cobra_reaction)
-            forward_reaction.id = forward_reaction_id
-            if cobra_reaction.lower_bound >= 0:
-                forward_reaction.lower_bound = cobra_reaction.lower_bound
-            else:
-                forward_reaction.lower_bound = 0
-            cobra_model.add_reactions([forward_reaction])
-
-        if create_reverse:
-            reverse_reaction_id = cobra_reaction.id + reverse_id
-            reverse_reaction = copy.deepcopy(cobra_reaction)
-            reverse_reaction.id = reverse_reaction_id
-
-            metabolites_to_add = {}
-            for metabolite in reverse_reaction.metabolites:
-                metabolites_to_add[metabolite] = (
-                    reverse_reaction.metabolites[metabolite] * -2
-                )
-            reverse_reaction.add_metabolites(metabolites_to_add)
-
-            if cobra_reaction.upper_bound < 0:
-                reverse_reaction.lower_bound = -cobra_reaction.upper_bound
-            else:
-                reverse_reaction.lower_bound = 0
-            reverse_reaction.upper_bound = -cobra_reaction.lower_bound
-
-            cobra_model.add_reactions([reverse_reaction])
-
-        if create_forward or create_reverse:
-            cobra_model.remove_reactions([cobra_reaction])
-
-    return cobra_model
+    VARIABILITY_ANALYSIS = 4
 
 
 class ComputationViewer(QDialog):
@@ -118,6 +70,9 @@ class ComputationViewer(QDialog):
         self.setMinimumWidth(620)
         self.layout = QVBoxLayout()
 
+        self.progress = QLabel("")
+        self.layout.addWidget(self.progress)
+
         buttons_layout = QHBoxLayout()
         cancel = QPushButton("Cancel")
         cancel.setMaximumWidth(120)
@@ -133,6 +88,10 @@ class ComputationViewer(QDialog):
         self.deleteLater()
         self.accept()
 
+    @Slot(str)
+    def show_progress(self, text: str):
+        self.progress.setText(text)
+
     @Slot()
     def cancel(self):
         self.cancel_computation.emit()
@@ -168,6 +127,117 @@ class ComputationThread(QThread):
     finished_computation = Signal()
 
 
+class VariabilityAnalysisThread(QThread):
+    """Runs the variability analysis of a LinearProgram in worker processes"""
+
+    def __init__(self, linear_program: LinearProgram, varnames: List[str], solver: Solver):
+        QThread.__init__(self)
+        self.linear_program: LinearProgram = linear_program
+        self.varnames = varnames
+        self.solver = solver
+        self.abort = False
+
+    def run(self):
+        results = self.linear_program.iterate_variability_analysis(self.varnames, self.solver)
+        try:
+            for chunk_results in results:
+                if self.abort:
+                    break
+                self.partial_result.emit(chunk_results)
+        except Exception:
+            self.failed_computation.emit(traceback.format_exc())
+            return
+        finally:
+            results.close()
+        if not self.abort:
+            self.finished_computation.emit()
+
+    @Slot()
+    def stop(self):
+        self.abort = True
+
+    partial_result = Signal(object)
+    failed_computation = Signal(str)
+    finished_computation = Signal()
+
+
+class MinimalMDFSweepThread(QThread):
+    """Solves a constructed OptMDFpathway MILP for several minimal MDFs"""
+
+    def __init__(self, linear_program: LinearProgram, minimal_optmdfs: List[float]):
+        QThread.__init__(self)
+        self.linear_program: LinearProgram = linear_program
+        self.minimal_optmdfs = minimal_optmdfs
+        self.abort = False
+
+    def run(self):
+        try:
+            with redirect_stdout(self), redirect_stderr(self):
+                for (minimal_optmdf, result) in iterate_minimal_optmdf_sweep(self.linear_program, self.minimal_optmdfs):
+                    if self.abort:
+                        break
+                    self.partial_result.emit((minimal_optmdf, result))
+        except Exception:
+            self.failed_computation.emit(traceback.format_exc())
+            return
+        if not self.abort:
+            self.finished_computation.emit()
+
+    def write(self, text):
+        # the solver output is passed to the main thread like the results
+        self.output_connector.emit(text)
+
+    def flush(self):
+        pass
+
+    @Slot()
+    def stop(self):
+        self.abort = True
+
+    output_connector = Signal(str)
+    partial_result = Signal(object)
+    failed_computation = Signal(str)
+    finished_computation = Signal()
+
+
+class PathwayEnumerationThread(QThread):
+    """Enumerates the best pathways of a constructed OptMDFpathway MILP"""
+
+    def __init__(self, linear_program: LinearProgram, max_pathways: int):
+        QThread.__init__(self)
+        self.linear_program: LinearProgram = linear_program
+        self.max_pathways = max_pathways
+        self.abort = False
+
+    def run(self):
+        try:
+            with redirect_stdout(self), redirect_stderr(self):
+                for result in iterate_optmdf_pathways(self.linear_program, self.max_pathways):
+                    if self.abort:
+                        break
+                    self.partial_result.emit(result)
+        except Exception:
+            self.failed_computation.emit(traceback.format_exc())
+            return
+        if not self.abort:
+            self.finished_computation.emit()
+
+    def write(self, text):
+        self.output_connector.emit(text)
+
+    def flush(self):
+        pass
+
+    @Slot()
+    def stop(self):
+        self.abort = True
+
+    output_connector = Signal(str)
+    partial_result = Signal(object)
+    failed_computation = Signal(str)
+    finished_computation = Signal()
+
+
 class ThermodynamicDialog(QDialog):
     """A dialog to perform several thermodynamic methods."""
 
@@ -184,6 +254,8 @@ class ThermodynamicDialog(QDialog):
             window_title = "Perform OptMDFpathway bottleneck analysis"
         elif analysis_type == ThermodynamicAnalysisTypes.THERMODYNAMIC_FBA:
             window_title = "Perform thermodynamic FBA"
+        elif analysis_type == ThermodynamicAnalysisTypes.VARIABILITY_ANALYSIS:
+            window_title = "Perform thermodynamic variability analysis"
         self.setWindowTitle(window_title)
 
         self.appdata = appdata
@@ -218,8 +290,18 @@ class ThermodynamicDialog(QDialog):
                 "to reach the given minimal MDF will be shown in the console afterwards."
             )
             self.layout.addWidget(l)
+        elif analysis_type == ThermodynamicAnalysisTypes.VARIABILITY_ANALYSIS:
+            l = QLabel(
+                "Perform thermodynamic variability analysis. Based on OptMDFpathway, the minimal and maximal "
+                "flux of each reaction, driving force of each reaction with a dG'° and concentration of each "
+                "metabolite are calculated at an OptMDF greater than the given value."
+                "\nFor this analysis, dG'° values and metabolite concentration "
+                "ranges have to be given in relevant annotations."
+            )
+            self.layout.addWidget(l)
 
-        if (analysis_type == ThermodynamicAnalysisTypes.BOTTLENECK_ANALYSIS) or (analysis_type == ThermodynamicAnalysisTypes.THERMODYNAMIC_FBA):
+        if analysis_type in (ThermodynamicAnalysisTypes.BOTTLENECK_ANALYSIS, ThermodynamicAnalysisTypes.THERMODYNAMIC_FBA,
+                             ThermodynamicAnalysisTypes.VARIABILITY_ANALYSIS):
             lineedit_text = QLabel("MDF to reach [in kJ/mol]:")
 
             min_mdf_layout = QHBoxLayout()
@@ -230,6 +312,36 @@ class ThermodynamicDialog(QDialog):
             min_mdf_layout.addWidget(self.min_mdf)
             self.layout.addItem(min_mdf_layout)
 
+        if analysis_type in (ThermodynamicAnalysisTypes.BOTTLENECK_ANALYSIS, ThermodynamicAnalysisTypes.THERMODYNAMIC_FBA):
+            sweep_layout = QHBoxLayout()
+            self.sweep = QCheckBox("Sweep the MDF to reach up to [in kJ/mol]:")
+            self.sweep.setToolTip(
+                "Solves the analysis for evenly spaced MDFs between the MDF to reach and this value "
+                "and plots the results against the MDF."
+            )
+            self.sweep_end = QLineEdit()
+            self.sweep_end.setText("10")
+            self.sweep_points = QLineEdit()
+            self.sweep_points.setText("11")
+            sweep_layout.addWidget(self.sweep)
+            sweep_layout.addWidget(self.sweep_end)
+            sweep_layout.addWidget(QLabel("Number of points:"))
+            sweep_layout.addWidget(self.sweep_points)
+            self.layout.addItem(sweep_layout)
+
+        if analysis_type == ThermodynamicAnalysisTypes.OPTMDFPATHWAY:
+            pathways_layout = QHBoxLayout()
+            self.enumerate_pathways = QCheckBox("Enumerate the pathways with the highest MDFs, at most:")
+            self.enumerate_pathways.setToolTip(
+                "Pathways that differ in their reactions with a dG'° are shown in the mode navigator "
+                "from the highest to the lowest MDF while the enumeration continues."
+            )
+            self.max_pathways = QLineEdit()
+            self.max_pathways.setText("10")
+            pathways_layout.addWidget(self.enumerate_pathways)
+            pathways_layout.addWidget(self.max_pathways)
+            self.layout.addItem(pathways_layout)
+
         self.at_objective = QCheckBox(
             "Set optimized value of current objective as lower boundary constraint"
         )
@@ -267,9 +379,16 @@ class ThermodynamicDialog(QDialog):
 
         l3 = QHBoxLayout()
         self.button_optmdf = QPushButton("Compute")
+        self.button_export = QPushButton("Export problem...")
+        self.button_export.setToolTip(
+            "Writes the problem that would be solved as MPS or LP file instead of solving it, "
+            "e.g. to reproduce it with the lp_replay script or another solver."
+        )
         self.cancel = QPushButton("Close")
         l3.addWidget(self.button_optmdf)
+        l3.addWidget(self.button_export)
         l3.addWidget(self.cancel)
+        self.export_filename = None
         self.layout.addItem(l3)
 
         self.setLayout(self.layout)
@@ -277,6 +396,7 @@ class ThermodynamicDialog(QDialog):
         # Connecting the signal
         self.cancel.clicked.connect(self.reject)
         self.button_optmdf.clicked.connect(self.compute_optmdf)
+        self.button_export.clicked.connect(self.export_problem)
 
     def get_solution_from_thread(self, solution) -> None:
         solution = pickle.loads(solution)
@@ -287,27 +407,31 @@ class ThermodynamicDialog(QDialog):
                 "Computational error",
                 "Something went really wrong. The computation could not run.",
             )
-        elif solution.status == Status.INFEASIBLE:
+        elif solution.status == Status.OPTIMAL:
+            self.set_boxes(solution=solution.values, objective_value=solution.objective_value)
+        else:
+            self.warn_about_status(solution.status)
+
+        self.setCursor(Qt.ArrowCursor)
+        self.accept()
+
+    def warn_about_status(self, status: Status) -> None:
+        if status == Status.INFEASIBLE:
             QMessageBox.warning(
                 self, "Infeasible", "No solution exists, the problem is either stoichiometrically or thermodynamically (e.g., the minimal MDF is too high) infeasible"
             )
-        elif solution.status == Status.TIME_LIMIT:
+        elif status == Status.TIME_LIMIT:
             QMessageBox.warning(
                 self,
                 "Time limit hit",
                 "No solution could be calculated as the time limit was hit.",
             )
-        elif solution.status == Status.UNBOUNDED:
+        elif status == Status.UNBOUNDED:
             QMessageBox.warning(
                 self,
                 "Unbounded",
                 "The solution is unbounded (inf) so that no optimization solution can be shown.",
             )
-        elif solution.status == Status.OPTIMAL:
-            self.set_boxes(solution=solution.values, objective_value=solution.objective_value)
-
-        self.setCursor(Qt.ArrowCursor)
-        self.accept()
 
     @Slot()
     def compute_in_thread(
@@ -331,58 +455,255 @@ class ThermodynamicDialog(QDialog):
         self.computation_thread.start()
         self.hide()
 
+    def compute_variability_in_thread(
+        self, linear_program: LinearProgram, varnames: List[str], solver: Solver
+    ) -> None:
+        self.variability_results: Dict[str, Tuple[float, float]] = {}
+        self.num_variability_variables = len(varnames)
+        self.computation_viewer = ComputationViewer()
+        self.computation_viewer.show_progress(f"0/{len(varnames)} variables")
+        self.computation_thread = VariabilityAnalysisThread(linear_program, varnames, solver)
+        self.computation_thread.partial_result.connect(self.receive_variability_results, Qt.QueuedConnection)
+        self.computation_thread.failed_computation.connect(self.computation_failed, Qt.QueuedConnection)
+        self.computation_thread.finished_computation.connect(self.conclude_variability_analysis, Qt.QueuedConnection)
+        self.computation_viewer.cancel_computation.connect(self.computation_thread.stop)
+        self.computation_viewer.show()
+        self.computation_thread.start()
+        self.hide()
+
+    @Slot(object)
+    def receive_variability_results(self, chunk_results: List[Tuple[str, float, float]]):
+        for (varname, min_value, max_value) in chunk_results:
+            self.variability_results[varname] = (min_value, max_value)
+        self.computation_viewer.show_progress(
+            f"{len(self.variability_results)}/{self.num_variability_variables} variables")
+
+    @Slot(str)
+    def receive_progress_text(self, text: str):
+        print(text, end='')
+
+    @Slot(str)
+    def computation_failed(self, error: str):
+        print(error)
+        self.computation_viewer.close_window()
+        self.setCursor(Qt.ArrowCursor)
+        QMessageBox.warning(
+            self,
+            "Computational error",
+            "The computation could not run:\n" + error.strip().splitlines()[-1],
+        )
+        self.reject()
+
+    @Slot()
+    def conclude_variability_analysis(self):
+        self.computation_viewer.close_window()
+        self.setCursor(Qt.ArrowCursor)
+        if any(isnan(min_value) for (min_value, _) in self.variability_results.values()):
+            QMessageBox.warning(
+                self, "Infeasible", "No solution exists, the problem is either stoichiometrically or thermodynamically (e.g., the minimal MDF is too high) infeasible"
+            )
+        else:
+            self.set_variability_boxes(self.variability_results)
+        self.accept()
+
+    def compute_sweep_in_thread(
+        self, linear_program: LinearProgram, minimal_optmdfs: List[float]
+    ) -> None:
+        self.sweep_results: List[Tuple[float, Result]] = []
+        self.num_sweep_points = len(minimal_optmdfs)
+        self.computation_viewer = ComputationViewer()
+        self.computation_viewer.show_progress(f"0/{len(minimal_optmdfs)} MDFs")
+        self.computation_thread = MinimalMDFSweepThread(linear_program, minimal_optmdfs)
+        self.computation_thread.output_connector.connect(self.receive_progress_text, Qt.QueuedConnection)
+        self.computation_thread.partial_result.connect(self.receive_sweep_result, Qt.QueuedConnection)
+        self.computation_thread.failed_computation.connect(self.computation_failed, Qt.QueuedConnection)
+        self.computation_thread.finished_computation.connect(self.conclude_sweep, Qt.QueuedConnection)
+        self.computation_viewer.cancel_computation.connect(self.computation_thread.stop)
+        self.computation_viewer.show()
+        self.computation_thread.start()
+        self.hide()
+
+    @Slot(object)
+    def receive_sweep_result(self, sweep_result: Tuple[float, Result]):
+        self.sweep_results.append(sweep_result)
+        self.computation_viewer.show_progress(f"{len(self.sweep_results)}/{self.num_sweep_points} MDFs")
+
+    @Slot()
+    def conclude_sweep(self):
+        self.computation_viewer.close_window()
+        self.setCursor(Qt.ArrowCursor)
+        results = sorted(self.sweep_results, key=lambda sweep_result: sweep_result[0])
+        if self.analysis_type == ThermodynamicAnalysisTypes.BOTTLENECK_ANALYSIS:
+            value_name = "Number of deactivated bottlenecks"
+            values = [result.values["bottleneck_z_sum"] if result.status == Status.OPTIMAL else float("nan")
+                      for (_, result) in results]
+        else:
+            value_name = "Objective value"
+            values = [result.objective_value if result.status == Status.OPTIMAL else float("nan")
+                      for (_, result) in results]
+        if all(isnan(value) for value in values):
+            QMessageBox.warning(
+                self, "Infeasible", "No solution exists for any of the MDFs, the problem is either stoichiometrically or thermodynamically infeasible"
+            )
+            self.accept()
+            return
+
+        console_text = "print('\\nMDF to reach [kJ/mol]: " + value_name
+        for ((minimal_optmdf, result), value) in zip(results, values):
+            console_text += f"\\n{minimal_optmdf}: " + (str(value) if result.status == Status.OPTIMAL else result.status.name.lower())
+        console_text += "')"
+        self.central_widget.kernel_client.execute(console_text)
+        self.central_widget.show_bottom_of_console()
+
+        _fig, axes = plt.subplots()
+        axes.set_xlabel("MDF to reach [kJ/mol]")
+        axes.set_ylabel(value_name)
+        axes.plot([minimal_optmdf for (minimal_optmdf, _) in results], values, marker="o")
+        plt.show()
+        self.accept()
+
+    def compute_pathways_in_thread(
+        self, linear_program: LinearProgram, max_pathways: int
+    ) -> None:
+        self.pathways = ThermodynamicPathwayContainer(self.irreversible.original_reaction_ids)
+        self.pathways_shown = False
+        self.pathway_status = Status.OPTIMAL
+        self.max_pathways = max_pathways
+        self.computation_viewer = ComputationViewer()
+        self.computation_viewer.show_progress(f"0/{max_pathways} pathways")
+        self.computation_thread = PathwayEnumerationThread(linear_program, max_pathways)
+        self.computation_thread.output_connector.connect(self.receive_progress_text, Qt.QueuedConnection)
+        self.computation_thread.partial_result.connect(self.receive_pathway, Qt.QueuedConnection)
+        self.computation_thread.failed_computation.connect(self.computation_failed, Qt.QueuedConnection)
+        self.computation_thread.finished_computation.connect(self.conclude_pathway_enumeration, Qt.QueuedConnection)
+        self.computation_viewer.cancel_computation.connect(self.computation_thread.stop)
+        self.computation_viewer.show()
+        self.computation_thread.start()
+        self.hide()
+
+    @Slot(object)
+    def receive_pathway(self, result: Result):
+        if result.status != Status.OPTIMAL:
+            self.pathway_status = result.status
+            return
+        fluxes = self.irreversible.combine(
+            [result.values[reac_id] for reac_id in self.irreversible.reaction_ids]
+        )
+        # the pathways are shown in the mode navigator as soon as they are found
+        if not self.pathways_shown:
+            self.pathways_shown = True
+            self.appdata.project.modes = self.pathways
+            self.central_widget.mode_navigator.current = 0
+            self.central_widget.mode_navigator.set_to_pathways()
+        elif self.appdata.project.modes is not self.pathways or len(self.pathways.reac_id) == 0:
+            return # the pathways have been cleared or replaced in the meantime
+        self.pathways.append_pathway(fluxes, result.values["var_B"], self.driving_forces(result.values))
+        self.central_widget.mode_navigator.append_to_selection()
+        if len(self.pathways) == 1: # show the first pathway
+            self.central_widget.update_mode()
+        self.computation_viewer.show_progress(f"{len(self.pathways)}/{self.max_pathways} pathways")
+
+    @Slot()
+    def conclude_pathway_enumeration(self):
+        self.computation_viewer.close_window()
+        self.setCursor(Qt.ArrowCursor)
+        if len(self.pathways) == 0:
+            self.warn_about_status(self.pathway_status)
+            self.accept()
+            return
+
+        console_text = "print('\\nPathway: OptMDF [kJ/mol]"
+        for i, mdf in enumerate(self.pathways.mdf):
+            console_text += f"\\n{i+1}: {mdf}"
+        console_text += "')"
+        self.central_widget.kernel_client.execute(console_text)
+        self.central_widget.show_bottom_of_console()
+        self.accept()
+
+    @Slot()
+    def export_problem(self):
+        (filename, selected_filter) = QFileDialog.getSaveFileName(
+            self, directory=self.appdata.work_directory, filter="MPS (*.mps);;LP (*.lp)")
+        if not filename or len(filename) == 0:
+            return
+        if not filename.lower().endswith((".mps", ".lp")):
+            filename += ".lp" if selected_filter.startswith("LP") else ".mps"
+        self.export_filename = filename
+        try:
+            self.compute_optmdf()
+        finally:
+            self.export_filename = None
+
+    def write_problem_file(self, linear_program: LinearProgram, solver: Solver):
+        # GLPK gets the indicator constraints as big-M constraints, 1000 is the default M of straindesign
+        big_m = 1000.0 if solver == Solver.GLPK else None
+        try:
+            name_map_filename = write_problem(linear_program, self.export_filename, big_m=big_m)
+        except ValueError as e:
+            QMessageBox.warning(self, "Cannot export the problem", str(e))
+        else:
+            QMessageBox.information(
+                self,
+                "Problem exported",
+                f"The problem was written to {self.export_filename} and the original names of its "
+                f"variables and constraints to {name_map_filename}.",
+            )
+        self.setCursor(Qt.ArrowCursor)
+
+    def set_variability_boxes(self, results: Dict[str, Tuple[float, float]]):
+        # write flux ranges into comp_values like an FVA result
+        reac_ids = [reac_id for reac_id in self.irreversible.original_reaction_ids if reac_id in results.keys()]
+        self.appdata.project.comp_values.set_values(
+            reac_ids,
+            [results[reac_id][0] for reac_id in reac_ids],
+            [results[reac_id][1] for reac_id in reac_ids],
+        )
+        self.appdata.project.comp_values_type = 1
+        # the range of a negated driving force is the negated and swapped range
+        min_driving_forces = self.driving_forces({key: value[0] for key, value in results.items()})
+        max_driving_forces = self.driving_forces({key: value[1] for key, value in results.items()})
+        for reac_id in min_driving_forces.keys():
+            (min_df, max_df) = sorted((min_driving_forces[reac_id], max_driving_forces[reac_id]))
+            self.appdata.project.df_values[reac_id] = (
+                round(min_df, self.appdata.rounding),
+                round(max_df, self.appdata.rounding),
+            )
+
+        # Write metabolite concentration ranges
+        for metabolite_id in self.metabolite_ids:
+            var_id = f"x_{metabolite_id}"
+            if var_id in results.keys():
+                (min_x, max_x) = results[var_id]
+                self.appdata.project.conc_values[metabolite_id] = (
+                    round(float(exp(min_x)), 9),
+                    round(float(exp(max_x)), 9),
+                )
+        self.central_widget.update()
+
     @Slot()
     def compute_optmdf(self):
         self.setCursor(Qt.BusyCursor)
 
-        dG0_values: Dict[str, Dict[str, float]] = {}
-        for reaction in self.appdata.project.cobra_py_model.reactions:
-            reaction: cobra.Reaction = reaction
-            if "dG0" in reaction.annotation.keys():
-                dG0_values[reaction.id] = {}
-                dG0_values[reaction.id + self.FWDID] = {}
-                dG0_values[reaction.id + self.REVID] = {}
-                dG0_values[reaction.id]["dG0"] = float(reaction.annotation["dG0"])
-                try:
-                    dG0_values[reaction.id + self.FWDID]["dG0"] = float(
-                        reaction.annotation["dG0"]
-                    )
-                    dG0_values[reaction.id + self.REVID]["dG0"] = -float(
-                        reaction.annotation["dG0"]
-                    )
-                except ValueError:
-                    QMessageBox.warning(
-                        self,
-                        "Wrong dG'° data type",
-                        f"The dG'° given in reaction {reaction.id} is set as {reaction.annotation['dG0']} "
-                        "and does not seem to be a valid number. Please correct this entry.",
-                    )
-                    return
-                if "dG0_uncertainty" in reaction.annotation.keys():
-                    dG0_values[reaction.id]["uncertainty"] = float(
-                        reaction.annotation["dG0_uncertainty"]
-                    )
-                    try:
-                        dG0_values[reaction.id + self.FWDID]["uncertainty"] = float(
-                            reaction.annotation["dG0_uncertainty"]
-                        )
-                        dG0_values[reaction.id + self.REVID]["uncertainty"] = float(
-                            reaction.annotation["dG0_uncertainty"]
-                        )
-                    except ValueError:
-                        QMessageBox.warning(
-                            self,
-                            "Wrong dG'° uncertainty data type",
-                            f"The dG'° uncertainty given in reaction {reaction.id} is set as {reaction.annotation['dG0_uncertainty']} "
-                            "and does not seem to be a valid number. Please correct this entry.",
-                        )
-                        return
-                else:
-                    dG0_values[reaction.id]["uncertainty"] = 0.0
-                    dG0_values[reaction.id + self.FWDID]["uncertainty"] = 0.0
-                    dG0_values[reaction.id + self.REVID]["uncertainty"] = 0.0
+        thermodynamic_data = self.appdata.project.thermodynamic_data
+        thermodynamic_data.update(self.appdata.project.cobra_py_model)
+        if len(thermodynamic_data.invalid_entries) > 0:
+            (annotation, item_id, value) = thermodynamic_data.invalid_entries[0]
+            if annotation.startswith("dG0"):
+                name = "dG'°" if annotation == "dG0" else "dG'° uncertainty"
+                item_text = f"reaction {item_id}"
+            else:
+                name = annotation
+                item_text = f"metabolite {item_id}"
+            QMessageBox.warning(
+                self,
+                f"Wrong {name} data type",
+                f"The {name} given in {item_text} is set as {value} "
+                "and does not seem to be a valid number. Please correct this entry.",
+            )
+            self.setCursor(Qt.ArrowCursor)
+            return
 
-        if dG0_values == {}:
+        if all(isnan(thermodynamic_data.dG0)):
             QMessageBox.warning(
                 self,
                 "No dG'° set",
@@ -394,43 +715,24 @@ class ThermodynamicDialog(QDialog):
                 "values and either type them directly in as 'dG0' annotations or load them as "
                 "JSON or Excel XLSX.",
             )
+            self.setCursor(Qt.ArrowCursor)
             return
 
-        concentration_values: Dict[str, Dict[str, float]] = {}
-        for metabolite in self.appdata.project.cobra_py_model.metabolites:
-            metabolite: cobra.Metabolite = metabolite
-            concentration_values[metabolite.id] = {}
-            for conc_bound in ("Cmin", "Cmax"):
-                if (conc_bound in metabolite.annotation.keys()):
-                    try:
-                        concentration_values[metabolite.id][conc_bound.replace("C", "")] = float(
-                            metabolite.annotation[conc_bound]
-                        )
-                    except ValueError:
-                        QMessageBox.warning(
-                            self,
-                            f"Wrong {conc_bound} data type",
-                            f"The {conc_bound} given in metabolite {metabolite.id} is set as "
-                            f"{metabolite.annotation['Cmin']} and does not seem to be a valid number."
-                            " Please correct this entry so that it becomes a valid number.",
-                        )
-                        return
-                else:
-                    try:
-                        if conc_bound == "Cmin":
-                            bound_value = float(self.max_default_conc.text())
-                        else:
-                            bound_value = float(self.max_default_conc.text())
-                    except ValueError:
-                        QMessageBox.warning(
-                            self,
-                            f"Wrong default {conc_bound} data type",
-                            f"The default {conc_bound} given by you in the dialog is set as "
-                            f"{bound_value} and does not seem to be a valid number."
-                            " Please correct this entry so that it becomes a valid number.",
-                        )
-                        return
-                    concentration_values[metabolite.id][conc_bound.replace("C", "")] = bound_value
+        default_concentrations = []
+        for (conc_bound, line_edit) in (("Cmin", self.min_default_conc), ("Cmax", self.max_default_conc)):
+            try:
+                default_concentrations.append(float(line_edit.text()))
+            except ValueError:
+                QMessageBox.warning(
+                    self,
+                    f"Wrong default {conc_bound} data type",
+                    f"The default {conc_bound} given by you in the dialog is set as "
+                    f"{line_edit.text()} and does not seem to be a valid number."
+                    " Please correct this entry so that it becomes a valid number.",
+                )
+                self.setCursor(Qt.ArrowCursor)
+                return
+        concentration_values = thermodynamic_data.concentration_values(*default_concentrations)
 
         with self.appdata.project.cobra_py_model as model:
             self.appdata.project.load_scenario_into_model(model)
@@ -438,16 +740,10 @@ class ThermodynamicDialog(QDialog):
             if self.at_objective.isChecked():
                 solution = model_optimization_with_exceptions(model)
                 if solution.status == "optimal":
-                    extra_constraint = {}
-                    for (
-                        reaction,
-                        coefficient,
-                    ) in cobra.util.solver.linear_reaction_coefficients(model).items():
-                        if reaction.reversibility:
-                            extra_constraint[reaction.id + self.FWDID] = coefficient
-                            extra_constraint[reaction.id + self.REVID] = -coefficient
-                        else:
-                            extra_constraint[reaction.id] = coefficient
+                    extra_constraint = {
+                        reaction.id: coefficient for (reaction, coefficient)
+                        in cobra.util.solver.linear_reaction_coefficients(model).items()
+                    }
                     extra_constraint["lb"] = solution.objective_value
                     extra_constraints = [extra_constraint]
                 else:
@@ -478,6 +774,19 @@ class ThermodynamicDialog(QDialog):
 
                 extra_constraints.append(extra_constraint)
 
+            # the reversible reactions are split so that each direction gets its own
+            # driving force, the constraints and the objective are then translated to
+            # the irreversible reactions through the index map
+            self.irreversible = split_reversible_reactions(model, self.FWDID, self.REVID)
+            dG0_values = thermodynamic_data.irreversible_dG0_values(self.irreversible)
+            for i, extra_constraint in enumerate(extra_constraints):
+                lhs = {key: value for key, value in extra_constraint.items() if key not in ("lb", "ub")}
+                translated = self.irreversible.translate_lhs(lhs)
+                for bound in ("lb", "ub"):
+                    if bound in extra_constraint.keys():
+                        translated[bound] = extra_constraint[bound]
+                extra_constraints[i] = translated
+
             solver_name = self.solver_buttons["group"].checkedButton().property("name")
             if solver_name == CPLEX:
                 solver = Solver.CPLEX
@@ -503,10 +812,46 @@ class ThermodynamicDialog(QDialog):
                     )
                     return
 
+            max_pathways = None
+            if self.analysis_type == ThermodynamicAnalysisTypes.OPTMDFPATHWAY and self.enumerate_pathways.isChecked():
+                try:
+                    max_pathways = int(self.max_pathways.text())
+                except ValueError:
+                    max_pathways = 0
+                if max_pathways < 1:
+                    QMessageBox.warning(
+                        self,
+                        "Invalid number of pathways",
+                        "The maximal number of pathways has to be a positive integer. Aborting calculation...",
+                    )
+                    self.setCursor(Qt.ArrowCursor)
+                    return
+
+            minimal_optmdfs = None
+            if self.analysis_type in (ThermodynamicAnalysisTypes.BOTTLENECK_ANALYSIS, ThermodynamicAnalysisTypes.THERMODYNAMIC_FBA) \
+                    and self.sweep.isChecked():
+                try:
+                    sweep_end = float(self.sweep_end.text())
+                    num_points = int(self.sweep_points.text())
+                except ValueError:
+                    num_points = 0
+                if num_points < 2:
+                    QMessageBox.warning(
+                        self,
+                        "Invalid MDF sweep",
+                        "The MDF to sweep up to has to be a number and the number of points an integer of at least 2. "
+                        "Aborting calculation...",
+                    )
+                    self.setCursor(Qt.ArrowCursor)
+                    return
+                minimal_optmdfs = [float(value) for value in linspace(minimal_optmdf, sweep_end, num_points)]
+                # the MILP is built for one MDF, the sweep then only changes the right-hand side of its constraint
+                minimal_optmdf = max(minimal_optmdfs)
+
             R = STANDARD_R
             T = STANDARD_T
             optmdfpathway_lp = create_optmdfpathway_milp(
-                cobra_model=model,
+                cobra_model=self.irreversible,
                 dG0_values=dG0_values,
                 concentration_values=concentration_values,
                 extra_constraints=extra_constraints,
@@ -526,59 +871,78 @@ class ThermodynamicDialog(QDialog):
                     {"bottleneck_z_sum": 1},
                     direction=ObjectiveDirection.MIN,
                 )
+            elif self.analysis_type == ThermodynamicAnalysisTypes.VARIABILITY_ANALYSIS:
+                # the objective is set for each variable by the worker processes
+                varnames = []
+                for reac_id in self.irreversible.original_reaction_ids:
+                    lhs = self.irreversible.translate_lhs({reac_id: 1.0})
+                    if list(lhs.keys()) != [reac_id]:
+                        # net flux of a split reaction
+                        optmdfpathway_lp.add_lhs_bound_variable(reac_id, lhs)
+                    varnames.append(reac_id)
+                varnames += [
+                    f"f_var_{reac_id}" for reac_id in self.irreversible.reaction_ids if reac_id in dG0_values.keys()
+                ]
+                varnames += [f"x_{metabolite_id}" for metabolite_id in self.metabolite_ids]
+                if self.export_filename is not None:
+                    self.write_problem_file(optmdfpathway_lp, solver)
+                    return
+                self.compute_variability_in_thread(optmdfpathway_lp, varnames, solver)
+                return
             elif self.analysis_type == ThermodynamicAnalysisTypes.THERMODYNAMIC_FBA:
-                objective_dict = {}
-                for (
-                    reaction,
-                    coefficient,
-                ) in cobra.util.solver.linear_reaction_coefficients(model).items():
-                    if reaction.reversibility:
-                        objective_dict[reaction.id + self.FWDID] = coefficient
-                        objective_dict[reaction.id + self.REVID] = -coefficient
-                    else:
-                        objective_dict[reaction.id] = coefficient
+                objective_dict = self.irreversible.translate_lhs({
+                    reaction.id: coefficient for (reaction, coefficient)
+                    in cobra.util.solver.linear_reaction_coefficients(model).items()
+                })
 
                 optmdfpathway_lp.set_objective(
                     objective_dict,
                     direction=ObjectiveDirection.MIN,
                 )
+            if self.export_filename is not None:
+                self.write_problem_file(optmdfpathway_lp, solver)
+                return
             optmdfpathway_lp.construct_solver_object(
                 solver=solver,
             )
+            if minimal_optmdfs is not None:
+                self.compute_sweep_in_thread(optmdfpathway_lp, minimal_optmdfs)
+                return
+            if max_pathways is not None:
+                self.compute_pathways_in_thread(optmdfpathway_lp, max_pathways)
+                return
             # solution = optmdfpathway_lp.run_solve()
             self.compute_in_thread(
                 linear_program=optmdfpathway_lp,
             )
 
+    def driving_forces(self, values: Dict[str, float]) -> Dict[str, float]:
+        """
+        Driving force of each original reaction with a dG'°, i.e. that of its forward part or
+        the negated one of its reverse part if it can only run backwards.
+        """
+        driving_forces = {}
+        for reac_id, forward_id, reverse_id in zip(
+            self.irreversible.original_reaction_ids, *self.irreversible.directional_ids()
+        ):
+            if forward_id is not None and f"f_var_{forward_id}" in values.keys():
+                driving_forces[reac_id] = values[f"f_var_{forward_id}"]
+            elif reverse_id is not None and f"f_var_{reverse_id}" in values.keys():
+                driving_forces[reac_id] = -values[f"f_var_{reverse_id}"]
+        return driving_forces
+
     def set_boxes(self, solution: Dict[str, float], objective_value: float):
         # Combine FWD and REV flux solutions
-        combined_solution = {}
-        for var_id in solution.keys():
-            if var_id.endswith(self.FWDID):
-                key = var_id.replace(self.FWDID, "")
-                multiplier = 1.0
-            elif var_id.endswith(self.REVID):
-                key = var_id.replace(self.REVID, "")
-                multiplier = -1.0
-            else:
-                key = var_id
-                multiplier = 1.0
-            if key not in combined_solution.keys():
-                combined_solution[key] = 0.0
-            combined_solution[key] += multiplier * solution[var_id]
+        fluxes = self.irreversible.combine(
+            [solution[reac_id] for reac_id in self.irreversible.reaction_ids]
+        )
 
         # write results into comp_values
-        for search_key in self.reac_ids:
-            if search_key in combined_solution.keys():
-                self.appdata.project.comp_values[search_key] = (
-                    float(combined_solution[search_key]),
-                    float(combined_solution[search_key]),
-                )
-            if "f_var_" + search_key in combined_solution.keys():
-                rounded_df = round(
-                    combined_solution["f_var_" + search_key], self.appdata.rounding
-                )
-                self.appdata.project.df_values[search_key] = rounded_df
+        self.appdata.project.comp_values.set_values(
+            self.irreversible.original_reaction_ids, fluxes, fluxes
+        )
+        for reac_id, driving_force in self.driving_forces(solution).items():
+            self.appdata.project.df_values[reac_id] = round(driving_force, self.appdata.rounding)
 
         # Write metabolite concentrations
         for metabolite_id in self.metabolite_ids:
@@ -594,22 +958,21 @@ class ThermodynamicDialog(QDialog):
         # Show OptMDF
         console_text = "print('\\n"
         if self.analysis_type == ThermodynamicAnalysisTypes.OPTMDFPATHWAY:
-            optmdf = combined_solution["var_B"]
+            optmdf = solution["var_B"]
             console_text += f"OptMDF: {optmdf} kJ/mol"
         elif self.analysis_type == ThermodynamicAnalysisTypes.THERMODYNAMIC_FBA:
-            optmdf = combined_solution["var_B"]
+            optmdf = solution["var_B"]
             console_text += f"Reached objective value: {objective_value}"
             console_text += f"\\nReached MDF @ optimum of objective: {optmdf} kJ/mol"
         elif self.analysis_type == ThermodynamicAnalysisTypes.BOTTLENECK_ANALYSIS:
-            bottleneck_z_sum = combined_solution["bottleneck_z_sum"]
+            bottleneck_z_sum = solution["bottleneck_z_sum"]
             console_text += f"Number of deactivated bottlenecks to reach minimal MDF: {bottleneck_z_sum}"
 
-            for key in combined_solution.keys():
-                if key.startswith("bottleneck_z_"):
-                    if key == "bottleneck_z_sum":
-                        continue
-                    if combined_solution[key] > 0.1:
-                        console_text += f"\\n* {key.replace('bottleneck_z_', '')}"
+            for reac_id, forward_id, reverse_id in zip(
+                self.irreversible.original_reaction_ids, *self.irreversible.directional_ids()
+            ):
+                if any(solution.get(f"bottleneck_z_{part_id}", 0.0) > 0.1 for part_id in (forward_id, reverse_id)):
+                    console_text += f"\\n* {reac_id}"
         console_text += "')"
         self.central_widget.kernel_client.execute(console_text)
         self.central_widget.show_bottom_of_console()
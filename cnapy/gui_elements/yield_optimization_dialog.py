@@ -8,7 +8,7 @@ from qtpy.QtWidgets import (QDialog, QHBoxLayout, QLabel, QComboBox,
 
 from cnapy.appdata import AppData
 from cnapy.gui_elements.central_widget import CentralWidget
-from cnapy.utils import QComplReceivLineEdit, QHSeperationLine
+from cnapy.utils import QComplReceivLineEdit, QHSeperationLine, UpdateScope
 from straindesign import yopt, linexpr2dict, linexprdict2str, avail_solvers
 from straindesign.names import *
 
@@ -140,4 +140,4 @@ class YieldOptimizationDialog(QDialog):
                 float(sol.fluxes[r]), float(sol.fluxes[r]))
             idx = idx+1
         self.appdata.project.comp_values_type = 0
-        self.central_widget.update()
\ No newline at end of file
+        self.central_widget.schedule_update(UpdateScope.Values)
\ No newline at end of file
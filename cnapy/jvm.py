@@ -0,0 +1,59 @@
+"""On-demand start of the Java VM that is used by efmtool"""
+import os
+import site
+import threading
+import time
+import traceback
+
+_lock = threading.Lock()
+startup_time = None # seconds it took to start the JVM, None while it has not been started
+
+
+def prepare_java_home():
+    '''sets JAVA_HOME to the JRE of a conda installation if no JVM can be found otherwise'''
+    from jpype._jvmfinder import getDefaultJVMPath, JVMNotFoundException, JVMNotSupportedException
+    try:
+        getDefaultJVMPath()
+    except (JVMNotFoundException, JVMNotSupportedException):
+        for path in site.getsitepackages():
+            # in one of these conda puts the JRE
+            os.environ['JAVA_HOME'] = os.path.join(path, 'Library')
+            try:
+                getDefaultJVMPath()
+                break
+            except (JVMNotFoundException, JVMNotSupportedException):
+                pass
+
+
+def is_started() -> bool:
+    return startup_time is not None
+
+
+def start_jvm() -> float:
+    '''
+    Starts the JVM with efmtool on the class path unless this has already been done.
+    Returns the time spent in this call, i.e. 0 if the JVM was already running
+    and the remaining startup time if it is being started in another thread.
+    '''
+    global startup_time
+    if startup_time is not None:
+        return 0.0
+    start = time.perf_counter()
+    with _lock:
+        if startup_time is None:
+            prepare_java_home()
+            import efmtool_link.efmtool_intern # starts the JVM
+            startup_time = time.perf_counter() - start
+            return startup_time
+    return time.perf_counter() - start
+
+
+def prewarm_in_background():
+    '''starts the JVM in a background thread so that it is ready when efmtool is first used'''
+    def prewarm():
+        try:
+            start_jvm()
+        except Exception:
+            traceback.print_exc()
+    if not is_started():
+        threading.Thread(target=prewarm, daemon=True).start()
@@ -0,0 +1,35 @@
+"""Deferred import of modules that take long to load and are only needed for some features"""
+import importlib
+import sys
+
+
+class LazyModule:
+    '''
+    Stands in for a module which is imported on first attribute access.
+    Works for submodules (e.g. matplotlib.pyplot) without importing the parent package in advance.
+    '''
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        # only called for attributes that are not found in the instance
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self) -> str:
+        return "<lazy module '"+self._name+"'"+(">" if self._module is None else " (imported)>")
+
+
+def lazy_import(name: str):
+    '''returns the module if it has already been imported, otherwise a LazyModule'''
+    module = sys.modules.get(name, None)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+def is_imported(name: str) -> bool:
+    return name in sys.modules
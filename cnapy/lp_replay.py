@@ -0,0 +1,221 @@
+"""
+Solves MPS or LP files, e.g. those written by cnapy.problem_export, with the installed solvers and reports the timings.
+
+usage: python -m cnapy.lp_replay problem1.mps [problem2.lp ...] [-s SOLVER ...] [-r REPEATS] [-t TIME_LIMIT] [-o SUMMARY]
+
+Each problem is read and solved REPEATS times with each of the given solvers (default: all
+installed ones). For every run the status, the objective value and the read and solve times
+are printed; with -o they are also written as JSON so that the runs on a corpus of problems
+can be compared between solver versions. If a problem has a name map, the objective value is
+reported in the direction of the original problem.
+No Qt modules are imported.
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from cnapy.problem_export import read_name_map
+
+replay_solvers = ("cplex", "gurobi", "scip", "glpk")
+
+
+def installed_solvers() -> List[str]:
+    from straindesign import avail_solvers
+    return [solver for solver in replay_solvers if solver in avail_solvers]
+
+
+def _replay_glpk(filename: str, time_limit: float) -> Tuple[float, float, str, float]:
+    import swiglpk as glpk
+    problem = glpk.glp_create_prob()
+    try:
+        start = time.perf_counter()
+        glpk.glp_term_out(glpk.GLP_OFF)
+        if filename.lower().endswith(".mps"):
+            error = glpk.glp_read_mps(problem, glpk.GLP_MPS_FILE, None, filename)
+        else:
+            error = glpk.glp_read_lp(problem, None, filename)
+        if error != 0:
+            raise ValueError("GLPK could not read the file, e.g. because of indicator constraints.")
+        read_time = time.perf_counter() - start
+        start = time.perf_counter()
+        if glpk.glp_get_num_int(problem) > 0:
+            parameters = glpk.glp_iocp()
+            glpk.glp_init_iocp(parameters)
+            parameters.presolve = glpk.GLP_ON
+            if time_limit is not None:
+                parameters.tm_lim = int(time_limit * 1000)
+            result = glpk.glp_intopt(problem, parameters)
+            solve_time = time.perf_counter() - start
+            if result == glpk.GLP_ETMLIM:
+                status = "time_limit"
+            elif result == glpk.GLP_ENOPFS or glpk.glp_mip_status(problem) == glpk.GLP_NOFEAS:
+                status = "infeasible"
+            elif result == glpk.GLP_ENODFS:
+                status = "unbounded"
+            elif glpk.glp_mip_status(problem) == glpk.GLP_OPT:
+                status = "optimal"
+            else:
+                status = "error"
+            objective = glpk.glp_mip_obj_val(problem) if status == "optimal" else math.nan
+        else:
+            parameters = glpk.glp_smcp()
+            glpk.glp_init_smcp(parameters)
+            parameters.presolve = glpk.GLP_ON
+            if time_limit is not None:
+                parameters.tm_lim = int(time_limit * 1000)
+            result = glpk.glp_simplex(problem, parameters)
+            solve_time = time.perf_counter() - start
+            lp_status = glpk.glp_get_status(problem)
+            if result == glpk.GLP_ETMLIM:
+                status = "time_limit"
+            elif result == glpk.GLP_ENOPFS or lp_status in (glpk.GLP_NOFEAS, glpk.GLP_INFEAS):
+                status = "infeasible"
+            elif result == glpk.GLP_ENODFS or lp_status == glpk.GLP_UNBND:
+                status = "unbounded"
+            elif lp_status == glpk.GLP_OPT:
+                status = "optimal"
+            else:
+                status = "error"
+            objective = glpk.glp_get_obj_val(problem) if status == "optimal" else math.nan
+        return (read_time, solve_time, status, objective)
+    finally:
+        glpk.glp_delete_prob(problem)
+
+
+def _replay_gurobi(filename: str, time_limit: float) -> Tuple[float, float, str, float]:
+    import gurobipy
+    with gurobipy.Env(empty=True) as env:
+        env.setParam("OutputFlag", 0)
+        env.start()
+        start = time.perf_counter()
+        with gurobipy.read(filename, env) as model:
+            read_time = time.perf_counter() - start
+            if time_limit is not None:
+                model.Params.TimeLimit = time_limit
+            start = time.perf_counter()
+            model.optimize()
+            solve_time = time.perf_counter() - start
+            status = {gurobipy.GRB.OPTIMAL: "optimal", gurobipy.GRB.INFEASIBLE: "infeasible",
+                      gurobipy.GRB.INF_OR_UNBD: "infeasible_or_unbounded", gurobipy.GRB.UNBOUNDED: "unbounded",
+                      gurobipy.GRB.TIME_LIMIT: "time_limit"}.get(model.Status, "error")
+            objective = model.ObjVal if status == "optimal" else math.nan
+    return (read_time, solve_time, status, objective)
+
+
+def _replay_cplex(filename: str, time_limit: float) -> Tuple[float, float, str, float]:
+    import cplex
+    problem = cplex.Cplex()
+    try:
+        for stream in (problem.set_log_stream, problem.set_results_stream,
+                       problem.set_warning_stream, problem.set_error_stream):
+            stream(None)
+        start = time.perf_counter()
+        problem.read(filename)
+        read_time = time.perf_counter() - start
+        if time_limit is not None:
+            problem.parameters.timelimit.set(time_limit)
+        start = time.perf_counter()
+        problem.solve()
+        solve_time = time.perf_counter() - start
+        status_string = problem.solution.get_status_string().lower()
+        if "optimal" in status_string:
+            status = "optimal"
+        elif "infeasible or unbounded" in status_string:
+            status = "infeasible_or_unbounded"
+        elif "infeasible" in status_string:
+            status = "infeasible"
+        elif "unbounded" in status_string:
+            status = "unbounded"
+        elif "time limit" in status_string:
+            status = "time_limit"
+        else:
+            status = "error"
+        objective = problem.solution.get_objective_value() if status == "optimal" else math.nan
+        return (read_time, solve_time, status, objective)
+    finally:
+        problem.end()
+
+
+def _replay_scip(filename: str, time_limit: float) -> Tuple[float, float, str, float]:
+    import pyscipopt
+    model = pyscipopt.Model()
+    model.hideOutput()
+    start = time.perf_counter()
+    model.readProblem(filename)
+    read_time = time.perf_counter() - start
+    if time_limit is not None:
+        model.setParam("limits/time", time_limit)
+    start = time.perf_counter()
+    model.optimize()
+    solve_time = time.perf_counter() - start
+    status = {"optimal": "optimal", "infeasible": "infeasible", "unbounded": "unbounded",
+              "inforunbd": "infeasible_or_unbounded", "timelimit": "time_limit"}.get(model.getStatus(), "error")
+    objective = model.getObjVal() if status == "optimal" else math.nan
+    return (read_time, solve_time, status, objective)
+
+
+replay_functions = {"glpk": _replay_glpk, "gurobi": _replay_gurobi, "cplex": _replay_cplex, "scip": _replay_scip}
+
+
+def replay(filename: str, solver: str, repeats: int = 1, time_limit: float = None) -> Dict:
+    '''solves the problem file repeats times with the solver and returns the run metadata'''
+    result = {"problem": os.path.abspath(filename), "solver": solver}
+    name_map = read_name_map(filename)
+    try:
+        runs = [replay_functions[solver](filename, time_limit) for _ in range(repeats)]
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = type(e).__name__ + ": " + str(e)
+        return result
+    (_, _, status, objective) = runs[-1]
+    if name_map is not None and name_map.get("objective negated", False):
+        objective = -objective
+    result["status"] = status
+    result["objective value"] = objective
+    result["read times"] = [run[0] for run in runs]
+    result["solve times"] = [run[1] for run in runs]
+    result["median solve time"] = statistics.median(result["solve times"])
+    return result
+
+
+def format_result(result: Dict) -> str:
+    text = os.path.basename(result["problem"]) + " with " + result["solver"] + ": " + str(result["status"])
+    if "objective value" in result and not math.isnan(result["objective value"]):
+        text += ", objective value " + str(result["objective value"])
+    if "median solve time" in result:
+        text += ", solved in {:.3f} s (median of {}), read in {:.3f} s".format(
+            result["median solve time"], len(result["solve times"]), min(result["read times"]))
+    if "error" in result:
+        text += " (" + result["error"] + ")"
+    return text
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m cnapy.lp_replay",
+                                     description="Solves MPS or LP files with the installed solvers and reports the timings.")
+    parser.add_argument("problems", nargs="+", help="problem files (.mps or .lp)")
+    parser.add_argument("-s", "--solvers", nargs="+", choices=replay_solvers,
+                        help="solvers that are used (default: all installed solvers)")
+    parser.add_argument("-r", "--repeats", type=int, default=1, help="number of solves per problem and solver (default: 1)")
+    parser.add_argument("-t", "--time-limit", type=float, default=None, help="time limit of each solve in seconds")
+    parser.add_argument("-o", "--output", default=None, help="JSON file to which the results are written")
+    args = parser.parse_args(argv)
+    solvers = args.solvers if args.solvers is not None else installed_solvers()
+    results = []
+    for problem in args.problems:
+        for solver in solvers:
+            results.append(replay(problem, solver, max(1, args.repeats), args.time_limit))
+            print(format_result(results[-1]), flush=True)
+    if args.output is not None:
+        with open(args.output, 'w') as fp:
+            json.dump({"runs": results}, fp, indent=2, default=str)
+    return 0 if all(r["status"] != "failed" for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
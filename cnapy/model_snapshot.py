@@ -0,0 +1,166 @@
+"""Binary model snapshots that are stored in a project next to the SBML file"""
+import hashlib
+import hmac
+import os
+import pickle
+import secrets
+from typing import Dict, Optional
+
+import appdirs
+import cobra
+from optlang_enumerator.cobra_cnapy import CNApyModel
+
+snapshot_arcname = "model.pickle"
+snapshot_format_version = 3
+snapshot_magic = b"CNApy model snapshot\n"
+# snapshots are signed with this secret key of the user so that only snapshots written by this
+# installation are unpickled, a snapshot in a project file from elsewhere could run arbitrary code
+key_filename = os.path.join(appdirs.user_config_dir("cnapy", roaming=True, appauthor=False), "snapshot-key")
+_keys: Dict[str, bytes] = {}
+
+
+def file_hash(filename: str) -> str:
+    '''SHA-256 of the file content'''
+    sha = hashlib.sha256()
+    with open(filename, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def bytes_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def model_fingerprint(model: cobra.Model) -> str:
+    '''
+    SHA-256 of the model content that is relevant for computations, i.e. the reactions with their
+    bounds, stoichiometry, objective coefficients and gene rules and the additional constraints.
+    Unlike the hash of model_to_bytes it is the same for models that have been loaded separately.
+    '''
+    sha = hashlib.sha256()
+    for r in model.reactions:
+        sha.update(repr((r.id, r.lower_bound, r.upper_bound, r.objective_coefficient, r.gene_reaction_rule,
+                         sorted((m.id, c) for m, c in r.metabolites.items()))).encode())
+    sha.update(model.objective_direction.encode())
+    metabolite_ids = set(model.metabolites.list_attr("id"))
+    for c in model.constraints:
+        if c.name not in metabolite_ids: # e.g. constraints from the scenario
+            coefficients = c.get_linear_coefficients(c.variables)
+            sha.update(repr((c.name, c.lb, c.ub, sorted((v.name, float(k)) for v, k in coefficients.items()))).encode())
+    return sha.hexdigest()
+
+
+def model_to_bytes(model: cobra.Model) -> bytes:
+    '''
+    Pickles the model; repeated calls give the same result as long as the model is not changed.
+    '''
+    # the hash object cannot be pickled, it is recreated in model_from_bytes
+    stoichiometry_hash_object = model._stoichiometry_hash_object
+    model._stoichiometry_hash_object = None
+    try:
+        return pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+    finally:
+        model._stoichiometry_hash_object = stoichiometry_hash_object
+
+
+def model_from_bytes(model_bytes: bytes) -> CNApyModel:
+    model = pickle.loads(model_bytes)
+    if not isinstance(model, cobra.Model):
+        raise TypeError("The data does not contain a COBRApy model.")
+    # same state as after CNApyModel.read_sbml_model
+    model.__class__ = CNApyModel
+    model.set_reaction_hashes()
+    model.set_stoichiometry_hash_object()
+    return model
+
+
+def snapshot_key(create: bool) -> Optional[bytes]:
+    '''
+    The key with which the snapshots are signed, None if it does not exist and create is False.
+    '''
+    key = _keys.get(key_filename)
+    if key is None:
+        try:
+            with open(key_filename, 'rb') as fp:
+                key = fp.read()
+        except FileNotFoundError:
+            if not create:
+                return None
+            os.makedirs(os.path.dirname(key_filename), exist_ok=True)
+            key = secrets.token_bytes(32)
+            try: # only readable by the user
+                fd = os.open(key_filename, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            except FileExistsError: # created in the meantime by another process
+                return snapshot_key(create)
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(key)
+        if len(key) == 0:
+            return None
+        _keys[key_filename] = key
+    return key
+
+
+def _signature(key: bytes, payload: bytes) -> bytes:
+    return hmac.new(key, payload, hashlib.sha256).digest()
+
+
+def signed_payload(data: bytes) -> Optional[bytes]:
+    '''the payload of the snapshot file content if it has been signed with the key of the user, otherwise None'''
+    key = snapshot_key(create=False)
+    signature_start = len(snapshot_magic)
+    payload_start = signature_start + hashlib.sha256().digest_size
+    if key is None or not data.startswith(snapshot_magic) or \
+        not hmac.compare_digest(data[signature_start:payload_start], _signature(key, data[payload_start:])):
+        return None
+    return data[payload_start:]
+
+
+def write_model_snapshot(model_bytes: bytes, sbml_hash: str, filename: str):
+    '''
+    Stores the pickled model together with the hash of the SBML file that was written from it,
+    signed with the key of the user.
+    '''
+    payload = pickle.dumps({"format version": snapshot_format_version,
+                            "cobra version": cobra.__version__,
+                            "sbml hash": sbml_hash,
+                            "model": model_bytes}, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(filename, 'wb') as fp:
+        fp.write(snapshot_magic)
+        fp.write(_signature(snapshot_key(create=True), payload))
+        fp.write(payload)
+
+
+def read_model_snapshot(filename: str, sbml_filename: str) -> Optional[CNApyModel]:
+    '''
+    Returns the model from the snapshot if it was signed with the key of the user and made from
+    the given SBML file with the same COBRApy version, otherwise None; then the SBML file needs
+    to be read. The snapshot is only unpickled after the signature has been checked.
+    '''
+    try:
+        with open(filename, 'rb') as fp:
+            payload = signed_payload(fp.read())
+        if payload is None:
+            return None
+        snapshot = pickle.loads(payload)
+        if snapshot.get("format version") != snapshot_format_version or \
+            snapshot.get("cobra version") != cobra.__version__ or \
+            snapshot.get("sbml hash") != file_hash(sbml_filename):
+            return None
+        return model_from_bytes(snapshot["model"])
+    except Exception: # a snapshot that cannot be read is simply ignored
+        return None
+
+
+def read_project_model(directory: str) -> CNApyModel:
+    '''
+    Reads the model from the extracted content of a project file,
+    from the snapshot if it is valid and otherwise from the SBML file.
+    '''
+    sbml_filename = os.path.join(directory, "model.sbml")
+    model = None
+    if os.path.exists(os.path.join(directory, snapshot_arcname)):
+        model = read_model_snapshot(os.path.join(directory, snapshot_arcname), sbml_filename)
+    if model is None: # no or outdated snapshot
+        model = CNApyModel.read_sbml_model(sbml_filename)
+    return model
@@ -0,0 +1,291 @@
+"""Export of (MI)LPs as MPS or LP files so that they can be reproduced outside of CNApy"""
+import copy
+import json
+import math
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import cobra
+import numpy
+from scipy import sparse
+
+from cnapy.sd_class_interface import ConstraintSense, LinearProgram, ObjectiveDirection
+
+name_map_format_version = 1
+
+
+class ExportedProblem:
+    '''
+    The rows and columns of a LinearProgram as they are passed to the solver, i.e. with
+    >= constraints turned into <= constraints, and the names under which they are written.
+    '''
+
+    def __init__(self, lp: LinearProgram, big_m: Optional[float] = None):
+        # a copy so that the indexes of an already constructed LinearProgram stay as they are
+        lp = copy.copy(lp)
+        solver_input = lp._assemble_solver_input()
+        self.column_names: List[str] = list(lp.active_variables)
+        self.lower_bounds = numpy.array(solver_input["lb"], dtype=float)
+        self.upper_bounds = numpy.array(solver_input["ub"], dtype=float)
+        self.is_binary = numpy.array([vtype == "B" for vtype in solver_input["vtype"]], dtype=bool)
+        self.maximize = lp.objective.direction == ObjectiveDirection.MAX
+        self.objective = numpy.zeros(len(self.column_names))
+        for var_name, coeff in lp.objective.vector.items():
+            if var_name in lp.variable_index: # variables that occur in no constraint are not passed to the solver
+                self.objective[lp.variable_index[var_name]] += coeff
+
+        ineq_names = list(lp.ineq_names)
+        eq_names = list(lp.eq_names)
+        for block in lp.constraint_blocks.values():
+            block_names = [f"{block.name}[{i}]" for i in range(block.matrix.shape[0])]
+            if block.sense == ConstraintSense.EQ:
+                eq_names += block_names
+            else:
+                ineq_names += block_names
+        matrices = [solver_input["A_ineq"], solver_input["A_eq"]]
+        self.row_names: List[str] = ineq_names + eq_names
+        self.row_senses: List[str] = ["L"] * len(ineq_names) + ["E"] * len(eq_names)
+        self.rhs: List[float] = list(solver_input["b_ineq"]) + list(solver_input["b_eq"])
+
+        # (row, binary column, active value) of the rows that are indicator constraints
+        self.indicators: List[Tuple[int, int, int]] = []
+        indic_constr = solver_input["indic_constr"]
+        if indic_constr is not None:
+            indicator_names = list(lp.indicator_constraints.keys())
+            for block in lp.indicator_constraint_blocks.values():
+                indicator_names += [f"{block.name}[{i}]" for i in range(block.matrix.shape[0])]
+            A = sparse.csr_matrix(indic_constr.A)
+            if big_m is None:
+                for i, name in enumerate(indicator_names):
+                    self.indicators.append((len(self.row_names), indic_constr.binv[i], indic_constr.indicval[i]))
+                    self.row_names.append(name)
+                    self.row_senses.append(indic_constr.sense[i])
+                    self.rhs.append(indic_constr.b[i])
+                matrices.append(A)
+            else:
+                # like the translation for solvers without indicator constraints:
+                # a x <= b + M (1 - z) if z = 1 activates the constraint, a x <= b + M z if z = 0 does
+                rows = []
+                for i, name in enumerate(indicator_names):
+                    sign = 1.0 if indic_constr.indicval[i] == 1 else -1.0
+                    directions = (1.0, -1.0) if indic_constr.sense[i] == "E" else (1.0,)
+                    binary_column = sparse.csr_matrix(([sign * big_m], ([0], [indic_constr.binv[i]])),
+                                                      shape=(1, len(self.column_names)))
+                    for direction in directions:
+                        rows.append(A[i, :] * direction + binary_column)
+                        self.row_names.append(name if direction > 0 else name + "[reverse]")
+                        self.row_senses.append("L")
+                        self.rhs.append(direction * indic_constr.b[i] + (big_m if sign > 0 else 0.0))
+                if len(rows) > 0:
+                    matrices.append(sparse.vstack(rows, format="csr"))
+        self.matrix = sparse.vstack(matrices, format="csr")
+        self.file_column_names = file_names(self.column_names)
+        self.file_row_names = file_names(self.row_names, reserved={"obj"})
+
+    def name_map(self, objective_negated: bool) -> Dict:
+        return {"format version": name_map_format_version,
+                "objective sense": "maximize" if self.maximize else "minimize",
+                "objective negated": objective_negated,
+                "columns": dict(zip(self.file_column_names, self.column_names)),
+                "rows": dict(zip(self.file_row_names, self.row_names))}
+
+
+def file_names(names: List[str], reserved=frozenset()) -> List[str]:
+    '''
+    Unique names that are valid in MPS and LP files: only letters, digits, "_" and ".",
+    starting with a letter and not with e/E followed by something that looks like an exponent.
+    '''
+    used = set(reserved)
+    result = []
+    for name in names:
+        base = re.sub(r"[^A-Za-z0-9_.]", "_", name)
+        if len(base) == 0 or not base[0].isalpha() or re.match(r"[eE]([0-9+\-eE]|$)", base):
+            base = "_" + base
+        unique = base
+        count = 1
+        while unique in used:
+            count += 1
+            unique = base + "_" + str(count)
+        used.add(unique)
+        result.append(unique)
+    return result
+
+
+def _number(value: float) -> str:
+    return repr(float(value))
+
+
+def _write_mps(problem: ExportedProblem, fp):
+    '''free MPS that minimizes, a maximization objective is negated because not all readers know OBJSENSE'''
+    objective = -problem.objective if problem.maximize else problem.objective
+    fp.write("NAME CNApy\nROWS\n N  obj\n")
+    for name, sense in zip(problem.file_row_names, problem.row_senses):
+        fp.write(f" {sense}  {name}\n")
+    fp.write("COLUMNS\n")
+    matrix = problem.matrix.tocsc()
+    integer_block = False
+    for j, column_name in enumerate(problem.file_column_names):
+        if problem.is_binary[j] != integer_block:
+            integer_block = problem.is_binary[j]
+            fp.write(f"    MARKER 'MARKER' '{'INTORG' if integer_block else 'INTEND'}'\n")
+        entries = [("obj", objective[j])] if objective[j] != 0.0 else []
+        for k in range(matrix.indptr[j], matrix.indptr[j+1]):
+            entries.append((problem.file_row_names[matrix.indices[k]], matrix.data[k]))
+        if len(entries) == 0: # the column has to occur so that it exists
+            entries.append(("obj", 0.0))
+        for row_name, value in entries:
+            fp.write(f"    {column_name} {row_name} {_number(value)}\n")
+    if integer_block:
+        fp.write("    MARKER 'MARKER' 'INTEND'\n")
+    fp.write("RHS\n")
+    for row_name, rhs in zip(problem.file_row_names, problem.rhs):
+        if rhs != 0.0:
+            fp.write(f"    rhs {row_name} {_number(rhs)}\n")
+    fp.write("BOUNDS\n")
+    for column_name, lb, ub in zip(problem.file_column_names, problem.lower_bounds, problem.upper_bounds):
+        if lb == ub:
+            fp.write(f" FX bnd {column_name} {_number(lb)}\n")
+        elif math.isinf(lb) and math.isinf(ub):
+            fp.write(f" FR bnd {column_name}\n")
+        else:
+            if math.isinf(lb):
+                fp.write(f" MI bnd {column_name}\n")
+            elif lb != 0.0 or ub < 0.0: # some readers set lb to -inf for a negative UP without LO
+                fp.write(f" LO bnd {column_name} {_number(lb)}\n")
+            if not math.isinf(ub):
+                fp.write(f" UP bnd {column_name} {_number(ub)}\n")
+    if len(problem.indicators) > 0:
+        fp.write("INDICATORS\n")
+        for row, column, value in problem.indicators:
+            fp.write(f" IF {problem.file_row_names[row]} {problem.file_column_names[column]} {value}\n")
+    fp.write("ENDATA\n")
+
+
+def _write_terms(fp, terms: List[Tuple[float, str]]):
+    '''linear expression with at most 8 terms per line because LP readers limit the line length'''
+    for i, (value, name) in enumerate(terms):
+        if i > 0 and i % 8 == 0:
+            fp.write("\n   ")
+        fp.write(f" {'-' if value < 0 else '+'} {_number(abs(value))} {name}")
+
+
+def _write_lp(problem: ExportedProblem, fp):
+    '''CPLEX LP format'''
+    fp.write("\\ exported by CNApy\n")
+    fp.write("Maximize\n" if problem.maximize else "Minimize\n")
+    fp.write(" obj:")
+    objective_columns = numpy.flatnonzero(problem.objective)
+    if len(objective_columns) == 0:
+        if len(problem.file_column_names) > 0: # not all readers accept an empty objective
+            _write_terms(fp, [(0.0, problem.file_column_names[0])])
+    else:
+        _write_terms(fp, [(problem.objective[j], problem.file_column_names[j]) for j in objective_columns])
+    fp.write("\nSubject To\n")
+    indicators = {row: (column, value) for row, column, value in problem.indicators}
+    matrix = problem.matrix
+    for i, (row_name, sense, rhs) in enumerate(zip(problem.file_row_names, problem.row_senses, problem.rhs)):
+        terms = [(matrix.data[k], problem.file_column_names[matrix.indices[k]])
+                 for k in range(matrix.indptr[i], matrix.indptr[i+1])]
+        if len(terms) == 0:
+            if rhs < 0.0 or (sense == "E" and rhs != 0.0):
+                raise ValueError(f"The constraint {problem.row_names[i]} without variables cannot be satisfied.")
+            continue
+        fp.write(f" {row_name}:")
+        if i in indicators:
+            (column, value) = indicators[i]
+            fp.write(f" {problem.file_column_names[column]} = {value} ->")
+        _write_terms(fp, terms)
+        fp.write(f" {'=' if sense == 'E' else '<='} {_number(rhs)}\n")
+    fp.write("Bounds\n")
+    for j, (column_name, lb, ub) in enumerate(zip(problem.file_column_names, problem.lower_bounds, problem.upper_bounds)):
+        if problem.is_binary[j]:
+            continue
+        if lb == ub:
+            fp.write(f" {column_name} = {_number(lb)}\n")
+        elif math.isinf(lb) and math.isinf(ub):
+            fp.write(f" {column_name} free\n")
+        else:
+            fp.write(f" {'-infinity' if math.isinf(lb) else _number(lb)} <= {column_name} <= "
+                     f"{'+infinity' if math.isinf(ub) else _number(ub)}\n")
+    binaries = [column_name for column_name, is_binary in zip(problem.file_column_names, problem.is_binary) if is_binary]
+    if len(binaries) > 0:
+        fp.write("Binaries\n")
+        for i in range(0, len(binaries), 8):
+            fp.write(" " + " ".join(binaries[i:i+8]) + "\n")
+    fp.write("End\n")
+
+
+def name_map_filename(filename: str) -> str:
+    # with the extension because the objective of an MPS file may be negated, that of an LP file not
+    return filename + ".names.json"
+
+
+def write_problem(lp: LinearProgram, filename: str, big_m: Optional[float] = None) -> str:
+    '''
+    Writes the problem as it is passed to the solver (including the changes that were made
+    to an already constructed LinearProgram) as MPS or LP file depending on the file extension.
+    The names of the variables and constraints are made valid for these formats, the
+    original names are written to a JSON name map whose filename is returned. Indicator
+    constraints are written as such (INDICATORS section or "->" syntax), which GLPK cannot
+    read, unless big_m is given, then they are written as big-M constraints.
+    '''
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in (".mps", ".lp"):
+        raise ValueError("The problem can only be written as .mps or .lp file.")
+    problem = ExportedProblem(lp, big_m)
+    with open(filename, 'w') as fp:
+        if extension == ".mps":
+            _write_mps(problem, fp)
+        else:
+            _write_lp(problem, fp)
+    map_filename = name_map_filename(filename)
+    with open(map_filename, 'w') as fp:
+        json.dump(problem.name_map(objective_negated=extension == ".mps" and problem.maximize), fp, indent=1)
+    return map_filename
+
+
+def read_name_map(filename: str) -> Optional[Dict]:
+    '''the name map of a problem file written by write_problem, None if there is none'''
+    try:
+        with open(name_map_filename(filename), 'r') as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+
+def linear_program_from_cobra_model(model: cobra.Model) -> LinearProgram:
+    '''
+    The optimization problem of the model's solver interface as LinearProgram, i.e. with the
+    forward and reverse variables of the reactions and all constraints that were added to the
+    model (e.g. from a scenario). A constraint with different finite lower and upper bounds
+    becomes two constraints.
+    '''
+    lp = LinearProgram()
+    for variable in model.solver.variables:
+        if variable.type == "binary":
+            lp.add_binary_variable(variable.name)
+        elif variable.type == "continuous":
+            lp.add_float_variable(variable.name,
+                                  lb=-float("inf") if variable.lb is None else variable.lb,
+                                  ub=float("inf") if variable.ub is None else variable.ub)
+        else:
+            raise ValueError(f"The variable {variable.name} is of type {variable.type} which cannot be exported.")
+    for constraint in model.solver.constraints:
+        lhs = {variable.name: coeff for variable, coeff in
+               constraint.get_linear_coefficients(constraint.variables).items() if coeff != 0.0}
+        if constraint.lb is not None and constraint.lb == constraint.ub:
+            lp.add_constraint(constraint.name, lhs, ConstraintSense.EQ, constraint.lb)
+        else:
+            both = constraint.lb is not None and constraint.ub is not None
+            if constraint.lb is not None:
+                lp.add_constraint(constraint.name + ("_lb" if both else ""), lhs, ConstraintSense.GEQ, constraint.lb)
+            if constraint.ub is not None:
+                lp.add_constraint(constraint.name + ("_ub" if both else ""), lhs, ConstraintSense.LEQ, constraint.ub)
+    objective = model.solver.objective
+    lp.set_objective(
+        {variable.name: coeff for variable, coeff in
+         objective.get_linear_coefficients(objective.variables).items() if coeff != 0.0},
+        direction=ObjectiveDirection.MAX if objective.direction == "max" else ObjectiveDirection.MIN,
+    )
+    return lp
@@ -0,0 +1,72 @@
+"""Running computations from cnapy.worker_process in a separate process"""
+import multiprocessing
+from typing import Callable, Tuple
+
+from qtpy.QtCore import QThread, Signal
+
+import cnapy.worker_process as worker_process
+
+
+class ProcessThread(QThread):
+    '''
+    Starts target(*args, connection) in a new process and turns the messages that
+    it sends through the connection into signals. The GUI stays responsive during
+    the computation and it can be stopped at any time with kill().
+    '''
+
+    def __init__(self, target: Callable, args: Tuple):
+        super().__init__()
+        self.target = target
+        self.args = args
+        self.abort = False
+        self.process = None
+
+    def run(self):
+        if self.abort:
+            return
+        # spawn because forking a process with a running Qt application is not safe
+        context = multiprocessing.get_context("spawn")
+        (receiver, sender) = context.Pipe(duplex=False)
+        self.process = context.Process(target=self.target, args=self.args + (sender,), daemon=True)
+        self.process.start()
+        sender.close() # so that receiving ends when the process has terminated
+        self.args = None
+        concluded = False
+        while True:
+            try:
+                (message, content) = receiver.recv()
+            except EOFError:
+                break
+            if self.abort:
+                continue
+            if message == worker_process.OUTPUT:
+                self.output_connector.emit(content)
+            elif message == worker_process.PARTIAL_RESULT:
+                self.partial_result.emit(content)
+            elif message == worker_process.FINISHED:
+                concluded = True
+                self.finished_computation.emit(content)
+            elif message == worker_process.FAILED:
+                concluded = True
+                (error_type, error_message, traceback) = content
+                self.output_connector.emit(traceback)
+                self.failed_computation.emit(error_type, error_message, traceback)
+        receiver.close()
+        self.process.join()
+        if not concluded and not self.abort:
+            message = "The computation ended unexpectedly (exit code "+str(self.process.exitcode)+")."
+            self.output_connector.emit(message)
+            self.failed_computation.emit("", message, "")
+
+    def kill(self):
+        self.abort = True
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+
+    # the messages from the worker process need to be passed as signals because
+    # all Qt widgets must run on the main thread and their methods cannot be
+    # safely called from other threads
+    output_connector = Signal(str)
+    partial_result = Signal(object)
+    finished_computation = Signal(object)
+    failed_computation = Signal(str, str, str) # exception type name, error message, traceback
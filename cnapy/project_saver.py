@@ -0,0 +1,110 @@
+"""Writing of CNApy projects in a background thread"""
+import os
+import shutil
+import traceback
+from tempfile import TemporaryDirectory, mkstemp
+from typing import Dict, Optional
+from zipfile import ZipFile
+
+import cobra
+from qtpy.QtCore import QThread
+
+from cnapy.model_snapshot import snapshot_arcname, file_hash, model_from_bytes, signed_payload, write_model_snapshot
+
+
+class ProjectSaveThread(QThread):
+    '''
+    Writes a snapshot of the project state into a new archive which then atomically
+    replaces the project file. When the model has not been changed since it was loaded
+    from or saved into the previous archive (model_in_previous_archive), its SBML file
+    and snapshot are copied from there instead of being written again.
+    After the thread has finished, error is None if saving was successful, otherwise
+    it contains the traceback.
+    '''
+
+    def __init__(self, filename: str, model_bytes: bytes, maps_json: str, meta_json: str,
+                 backgrounds: Dict[str, str], temp_dir: TemporaryDirectory,
+                 previous_archive: str, model_in_previous_archive: bool):
+        super().__init__()
+        self.filename = filename
+        self.model_bytes = model_bytes
+        self.maps_json = maps_json
+        self.meta_json = meta_json
+        self.backgrounds = backgrounds # archive name -> file name
+        self.temp_dir = temp_dir # keeps the directory alive while saving
+        self.previous_archive = previous_archive
+        self.model_in_previous_archive = model_in_previous_archive
+        self.copied_backgrounds: Dict[str, str] = {}
+        self.error: Optional[str] = None
+
+    def run(self):
+        try:
+            directory = os.path.dirname(os.path.abspath(self.filename))
+            (fd, tmp_filename) = mkstemp(suffix=".cna", dir=directory)
+            os.close(fd)
+            try:
+                with ZipFile(tmp_filename, 'w') as zip_obj:
+                    if not self.copy_model(zip_obj):
+                        self.write_model(zip_obj)
+                    zip_obj.writestr("box_positions.json", self.maps_json)
+                    zip_obj.writestr("meta.json", self.meta_json)
+                    for arc_name, background in self.backgrounds.items():
+                        zip_obj.write(background, arcname=arc_name)
+                if os.path.exists(self.filename):
+                    shutil.copymode(self.filename, tmp_filename)
+                os.replace(tmp_filename, self.filename)
+            except BaseException:
+                os.remove(tmp_filename)
+                raise
+            self.copied_backgrounds = self.copy_backgrounds_to_temp_dir()
+        except Exception:
+            self.error = traceback.format_exc()
+
+    def copy_model(self, zip_obj: ZipFile) -> bool:
+        '''copies the model files from the previous archive if the model has not changed since then'''
+        if not self.model_in_previous_archive or not os.path.exists(self.previous_archive):
+            return False
+        with ZipFile(self.previous_archive, 'r') as previous:
+            members = previous.namelist()
+            if "model.sbml" not in members:
+                return False
+            with previous.open("model.sbml") as src, zip_obj.open("model.sbml", 'w') as dst:
+                shutil.copyfileobj(src, dst)
+            snapshot = previous.read(snapshot_arcname) if snapshot_arcname in members else None
+            if snapshot is not None and signed_payload(snapshot) is not None:
+                zip_obj.writestr(snapshot_arcname, snapshot)
+            else: # projects saved by older versions or elsewhere
+                with TemporaryDirectory() as work_dir:
+                    previous.extract("model.sbml", work_dir)
+                    self.write_snapshot(os.path.join(work_dir, "model.sbml"), zip_obj, work_dir)
+        return True
+
+    def write_model(self, zip_obj: ZipFile):
+        model = model_from_bytes(self.model_bytes)
+        with TemporaryDirectory() as work_dir:
+            sbml_filename = os.path.join(work_dir, "model.sbml")
+            cobra.io.write_sbml_model(model, sbml_filename)
+            zip_obj.write(sbml_filename, arcname="model.sbml")
+            self.write_snapshot(sbml_filename, zip_obj, work_dir)
+
+    def write_snapshot(self, sbml_filename: str, zip_obj: ZipFile, work_dir: str):
+        try:
+            snapshot_filename = os.path.join(work_dir, snapshot_arcname)
+            write_model_snapshot(self.model_bytes, file_hash(sbml_filename), snapshot_filename)
+            zip_obj.write(snapshot_filename, arcname=snapshot_arcname)
+        except Exception: # the project can still be opened from the SBML file
+            traceback.print_exc()
+
+    def copy_backgrounds_to_temp_dir(self) -> Dict[str, str]:
+        '''
+        copies backgrounds that are not yet in the temporary directory there
+        so that the project does not depend on them anymore, returns old -> new file name
+        '''
+        copied = {}
+        temp_dir = os.path.abspath(self.temp_dir.name)
+        for background in self.backgrounds.values():
+            if background not in copied and not os.path.abspath(background).startswith(temp_dir + os.sep):
+                (fd, copied[background]) = mkstemp(suffix=".svg", dir=temp_dir)
+                os.close(fd)
+                shutil.copyfile(background, copied[background])
+        return copied
@@ -0,0 +1,409 @@
+"""
+Evaluation of many scenario files for the model of a CNApy project.
+
+usage: python -m cnapy.scenario_batch project.cna scenarios [scenarios ...] [-m {fba,pfba,fva}] [-w WORKERS] [-o TABLE]
+
+The scenarios are CNApy (.scen) or CellNetAnalyzer (.val) scenario files or directories that
+contain such files. Each scenario is applied to the model of the project like a scenario that
+is loaded in the GUI and the model is then analyzed with FBA, pFBA or FVA. The scenarios are
+evaluated in a pool of WORKERS processes which receive the model once and only apply the
+scenarios to it. The results are collected in one table with a row for each scenario and a
+column for each reaction that is written as .npz (can be opened in the mode navigator) or .csv.
+No Qt modules are imported.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from typing import Dict, Iterator, List, Set, Tuple
+
+import cobra
+import numpy
+from optlang.symbolics import Zero
+
+from cnapy.model_snapshot import model_from_bytes
+from cnapy.worker_pool import map_chunks
+
+methods = ("fba", "pfba", "fva")
+scenario_file_extensions = (".scen", ".val")
+
+
+# placeholder for a constraint that is being entered in the scenario tab
+empty_constraint = (None, "", "")
+
+
+class ScenarioDiff(Dict[str, Tuple[float, float]]):
+    '''
+    The content of a scenario file: the flux bounds in the dictionary and the scenario
+    reactions, constraints and objective in the same attributes as appdata.Scenario has.
+    What did not fit to the model is listed in unknown_ids, incompatible_constraints and
+    skipped_reactions.
+    '''
+
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+        self.full_scenario = False # a CNApy scenario with objective, reactions and constraints
+        self.description: str = ""
+        self.pinned_reactions: List[str] = []
+        self.objective_coefficients: Dict[str, float] = {}
+        self.objective_direction: str = "max"
+        self.use_scenario_objective: bool = False
+        self.constraints: List = [] # [reaction_id: coefficient dictionary, type, rhs]
+        self.reactions = {} # reaction_id: (coefficient dictionary, lb, ub)
+        self.unknown_ids: List[str] = []
+        self.incompatible_constraints: List = []
+        self.skipped_reactions: List[str] = [] # scenario reactions that are already in the model
+
+
+def read_scenario_file(filename: str, reaction_ids: Set[str]) -> ScenarioDiff:
+    '''
+    Reads a CNApy (.scen) or CellNetAnalyzer (.val) scenario file, this is also used by
+    Scenario.load. Flux values of reactions that are not in reaction_ids are skipped, for
+    .val files the prefix R_ of the reaction IDs is removed if necessary.
+    '''
+    scenario = ScenarioDiff(os.path.splitext(os.path.basename(filename))[0])
+    with open(filename, 'r') as fp:
+        if filename.endswith('scen'): # CNApy scenario
+            json_dict = json.load(fp)
+            if {'fluxes', 'objective_direction', 'objective_coefficients', 'use_scenario_objective',
+                'version'}.issubset(json_dict.keys()):
+                scenario.full_scenario = True
+                flux_values = json_dict['fluxes']
+                for reac_id in json_dict.get('pinned_reactions', []):
+                    if reac_id in reaction_ids:
+                        scenario.pinned_reactions.append(reac_id)
+                    else:
+                        scenario.unknown_ids.append(reac_id)
+                scenario.description = json_dict.get('description', "")
+                scenario.objective_direction = json_dict['objective_direction']
+                all_reaction_ids = set(reaction_ids)
+                if json_dict['version'] > 1:
+                    for reac_id, reaction in json_dict['reactions'].items():
+                        if reac_id in reaction_ids:
+                            scenario.skipped_reactions.append(reac_id)
+                        else:
+                            scenario.reactions[reac_id] = reaction
+                    all_reaction_ids.update(scenario.reactions)
+                    for constr in json_dict['constraints']:
+                        if constr[0] is None:
+                            scenario.constraints.append(empty_constraint)
+                        elif set(constr[0].keys()).issubset(all_reaction_ids):
+                            scenario.constraints.append(constr)
+                        else:
+                            scenario.incompatible_constraints.append(constr)
+                for reac_id, val in json_dict['objective_coefficients'].items():
+                    if reac_id in all_reaction_ids:
+                        scenario.objective_coefficients[reac_id] = val
+                    else:
+                        scenario.unknown_ids.append(reac_id)
+                scenario.use_scenario_objective = json_dict['use_scenario_objective']
+            else:
+                flux_values = json_dict
+        elif filename.endswith('val'): # CellNetAnalyzer scenario
+            flux_values = dict()
+            for line in fp:
+                line = line.strip()
+                if len(line) > 0 and not line.startswith("##"):
+                    try:
+                        reac_id, val = line.split()
+                        val = float(val)
+                        flux_values[reac_id] = (val, val)
+                    except ValueError:
+                        print("Could not parse line ", line)
+        else:
+            raise ValueError("Unknown scenario file type: " + filename)
+
+    for reac_id, val in flux_values.items():
+        if reac_id not in reaction_ids and reac_id.startswith("R_") and reac_id[2:] in reaction_ids:
+            reac_id = reac_id[2:]
+        if reac_id in reaction_ids:
+            scenario[reac_id] = tuple(val)
+        else:
+            scenario.unknown_ids.append(reac_id)
+    return scenario
+
+
+def add_scenario_reactions(model: cobra.Model, scenario_reactions: Dict):
+    '''adds the scenario reactions to the model, existing reactions with the same ID are overwritten'''
+    if len(scenario_reactions) > 0:
+        scenario_metabolites = set()
+        for metabolites,_,_ in scenario_reactions.values():
+            scenario_metabolites.update(metabolites.keys())
+        scenario_metabolites = scenario_metabolites.difference(model.metabolites.list_attr("id"))
+        model.add_metabolites([cobra.Metabolite(met_id) for met_id in scenario_metabolites])
+        for reac_id,(metabolites,lb,ub) in scenario_reactions.items():
+            if reac_id in model.reactions: # overwrite existing reaction
+                reaction = model.reactions.get_by_id(reac_id)
+                reaction.subtract_metabolites(reaction.metabolites, combine=True) # remove current metabolites
+            else:
+                reaction = cobra.Reaction(reac_id, lower_bound=lb, upper_bound=ub)
+                model.add_reactions([reaction])
+            reaction.add_metabolites(metabolites)
+            reaction.set_hash_value()
+
+
+def apply_scenario(model: cobra.Model, scenario):
+    '''
+    Applies the flux bounds, reactions, objective and constraints of the scenario to the model,
+    scenario can be an appdata.Scenario or a ScenarioDiff.
+    Should be called in a with model: context so that the changes are reverted afterwards.
+    '''
+    for x in scenario:
+        try:
+            y = model.reactions.get_by_id(x)
+        except KeyError:
+            print('reaction', x, 'not found!')
+        else:
+            y.bounds = scenario[x]
+            y.set_hash_value()
+
+    add_scenario_reactions(model, scenario.reactions)
+
+    if scenario.use_scenario_objective:
+        model.objective = model.problem.Objective(
+            Zero, direction=scenario.objective_direction)
+        for reac_id, coeff in scenario.objective_coefficients.items():
+            try:
+                reaction: cobra.Reaction = model.reactions.get_by_id(reac_id)
+            except KeyError:
+                print('reaction', reac_id, 'not found!')
+            else:
+                model.objective.set_linear_coefficients(
+                    {reaction.forward_variable: coeff, reaction.reverse_variable: -coeff})
+
+    for (expression, constraint_type, rhs) in scenario.constraints:
+        if expression is None: # empty_constraint
+            continue
+        if constraint_type == '=':
+            lb = rhs
+            ub = rhs
+        elif constraint_type == '<=':
+            lb = None
+            ub = rhs
+        elif constraint_type == '>=':
+            lb = rhs
+            ub = None
+        else:
+            print("Skipping constraint of unknown type", constraint_type)
+            continue
+        try:
+            reactions = model.reactions.get_by_any(list(expression))
+        except KeyError:
+            print("Skipping constraint containing a reaction that is not in the model:", expression)
+            continue
+        constr = model.problem.Constraint(Zero, lb=lb, ub=ub)
+        model.add_cons_vars(constr)
+        for (reaction, coeff) in zip(reactions, expression.values()):
+            constr.set_linear_coefficients({reaction.forward_variable: coeff, reaction.reverse_variable: -coeff})
+
+
+class ScenarioResultTable:
+    '''
+    The results of a batch of scenarios as columns of float64 arrays: one row per scenario and
+    one column per reaction, NaN where a scenario has no result or lacks the reaction.
+    For FBA and pFBA minimum and maximum are the same array, the fluxes.
+    '''
+
+    def __init__(self, scenario_names: List[str], reac_id: List[str], method: str):
+        if method not in methods:
+            raise ValueError("Unknown method " + str(method))
+        self.scenario_names = list(scenario_names)
+        self.reac_id = list(reac_id)
+        self.method = method
+        self.status = [""] * len(self.scenario_names) # empty for scenarios that have not been evaluated
+        self.objective_value = numpy.full(len(self.scenario_names), numpy.nan)
+        self.minimum = numpy.full((len(self.scenario_names), len(self.reac_id)), numpy.nan)
+        self.maximum = self.minimum if method != "fva" else numpy.full_like(self.minimum, numpy.nan)
+
+    def __len__(self):
+        return len(self.scenario_names)
+
+    @property
+    def fluxes(self) -> numpy.ndarray:
+        return self.minimum
+
+    def set_result(self, index: int, result: Tuple[str, float, numpy.ndarray, numpy.ndarray]):
+        (self.status[index], self.objective_value[index], minimum, maximum) = result
+        self.minimum[index, :] = minimum
+        if self.maximum is not self.minimum:
+            self.maximum[index, :] = maximum
+
+    def save(self, filename: str):
+        if filename.lower().endswith(".csv"):
+            self.write_csv(filename)
+            return
+        columns = {"fluxes": self.minimum} if self.maximum is self.minimum else \
+            {"minimum": self.minimum, "maximum": self.maximum}
+        numpy.savez_compressed(filename, scenario_names=self.scenario_names, reac_id=self.reac_id,
+                               method=self.method, status=self.status, objective_value=self.objective_value, **columns)
+
+    @staticmethod
+    def load(filename: str) -> "ScenarioResultTable":
+        data = numpy.load(filename)
+        table = ScenarioResultTable(data["scenario_names"].tolist(), data["reac_id"].tolist(), str(data["method"]))
+        table.status = data["status"].tolist()
+        table.objective_value = data["objective_value"]
+        if "fluxes" in data:
+            table.minimum = table.maximum = data["fluxes"]
+        else:
+            table.minimum = data["minimum"]
+            table.maximum = data["maximum"]
+        return table
+
+    def write_csv(self, filename: str):
+        '''one row per scenario, for FVA with a minimum and a maximum column per reaction'''
+        if self.maximum is self.minimum:
+            reaction_columns = self.reac_id
+            values = self.minimum
+        else:
+            reaction_columns = [reac_id + suffix for reac_id in self.reac_id for suffix in (" min", " max")]
+            values = numpy.empty((len(self), 2*len(self.reac_id)))
+            values[:, 0::2] = self.minimum
+            values[:, 1::2] = self.maximum
+        with open(filename, 'w', newline='') as fp:
+            writer = csv.writer(fp)
+            writer.writerow(["scenario", "status", "objective value"] + reaction_columns)
+            for i, name in enumerate(self.scenario_names):
+                writer.writerow([name, self.status[i], self.objective_value[i]] + values[i, :].tolist())
+
+
+def scenario_files(paths: List[str]) -> List[str]:
+    '''the scenario files in the given order, directories are replaced by the scenario files they contain'''
+    filenames = []
+    for path in paths:
+        if os.path.isdir(path):
+            filenames += sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.lower().endswith(scenario_file_extensions))
+        else:
+            filenames.append(path)
+    return filenames
+
+
+def table_columns(model: cobra.Model, scenarios: List[ScenarioDiff]) -> List[str]:
+    '''the reactions of the model followed by the scenario reactions in the order in which they first occur'''
+    reac_id = model.reactions.list_attr("id")
+    known = set(reac_id)
+    for scenario in scenarios:
+        for scenario_reac_id in scenario.reactions:
+            if scenario_reac_id not in known:
+                known.add(scenario_reac_id)
+                reac_id.append(scenario_reac_id)
+    return reac_id
+
+
+# the state of a worker process, set up once by init_worker
+_model = None
+_column_index: Dict[str, int] = {}
+_method = None
+
+
+def init_worker(model_bytes: bytes, reac_id: List[str], method: str):
+    global _model, _column_index, _method
+    _model = model_from_bytes(model_bytes)
+    _column_index = {r: i for i, r in enumerate(reac_id)}
+    _method = method
+
+
+def evaluate_scenario(model: cobra.Model, scenario: ScenarioDiff, method: str,
+                      column_index: Dict[str, int]) -> Tuple[str, float, numpy.ndarray, numpy.ndarray]:
+    '''
+    Returns the status, the objective value and the minimal and maximal fluxes of the model with the
+    scenario applied, the fluxes are aligned with column_index and NaN where there is no result.
+    '''
+    minimum = numpy.full(len(column_index), numpy.nan)
+    maximum = minimum if method != "fva" else minimum.copy()
+    objective_value = math.nan
+    with model:
+        try:
+            apply_scenario(model, scenario)
+            columns = numpy.fromiter((column_index[r.id] for r in model.reactions), dtype=int, count=len(model.reactions))
+            if method == "fva":
+                # like the FVA in the GUI without objective and with finite bounds
+                model.objective = model.problem.Objective(Zero)
+                for r in model.reactions:
+                    if r.lower_bound == -float('inf'):
+                        r.lower_bound = cobra.Configuration().lower_bound
+                    if r.upper_bound == float('inf'):
+                        r.upper_bound = cobra.Configuration().upper_bound
+                solution = cobra.flux_analysis.flux_variability_analysis(model, fraction_of_optimum=0.0, processes=1)
+                status = "optimal"
+                minimum[columns] = solution.minimum.values
+                maximum[columns] = solution.maximum.values
+            else:
+                solution = cobra.flux_analysis.pfba(model) if method == "pfba" else model.optimize()
+                status = solution.status
+                if status == "optimal":
+                    objective_value = solution.objective_value
+                    minimum[columns] = solution.fluxes.values
+        except cobra.exceptions.Infeasible:
+            status = "infeasible"
+        except Exception as e:
+            status = "failed: " + type(e).__name__ + ": " + str(e)
+    return (status, objective_value, minimum, maximum)
+
+
+def evaluate_chunk(chunk: List[Tuple[int, ScenarioDiff]]) -> List[Tuple[int, Tuple[str, float, numpy.ndarray, numpy.ndarray]]]:
+    return [(i, evaluate_scenario(_model, scenario, _method, _column_index)) for (i, scenario) in chunk]
+
+
+def evaluate_scenarios(model_bytes: bytes, scenarios: List[ScenarioDiff], reac_id: List[str], method: str,
+                       max_workers: int = None) -> Iterator[List[Tuple[int, Tuple[str, float, numpy.ndarray, numpy.ndarray]]]]:
+    '''
+    Evaluates the scenarios in a pool of worker processes, the model should not contain a scenario.
+    Yields lists of (scenario index, result for ScenarioResultTable.set_result) as they are computed.
+    Stopping the iteration cancels the scenarios that have not been started yet.
+    '''
+    return map_chunks(evaluate_chunk, scenarios, max_workers, init_worker, (model_bytes, reac_id, method))
+
+
+def run_batch(project_filename: str, paths: List[str], method: str, max_workers: int) -> ScenarioResultTable:
+    '''evaluates all scenario files of paths with the model of the project'''
+    from cnapy.sd_batch import read_project_model_bytes
+    model_bytes = read_project_model_bytes(project_filename)
+    model = model_from_bytes(model_bytes)
+    filenames = scenario_files(paths)
+    reaction_ids = set(model.reactions.list_attr("id"))
+    scenarios = [read_scenario_file(filename, reaction_ids) for filename in filenames]
+    for filename, scenario in zip(filenames, scenarios):
+        if len(scenario.unknown_ids) > 0:
+            print(os.path.basename(filename) + ": skipped unknown reactions", ", ".join(scenario.unknown_ids))
+    reac_id = table_columns(model, scenarios)
+    del model
+    table = ScenarioResultTable([scenario.name for scenario in scenarios], reac_id, method)
+    if len(scenarios) > 0:
+        for part in evaluate_scenarios(model_bytes, scenarios, reac_id, method, max_workers):
+            for (i, result) in part:
+                table.set_result(i, result)
+                print(format_result(filenames[i], result), flush=True)
+    return table
+
+
+def format_result(filename: str, result: Tuple[str, float, numpy.ndarray, numpy.ndarray]) -> str:
+    (status, objective_value, _, _) = result
+    text = os.path.basename(filename) + ": " + status
+    if not math.isnan(objective_value):
+        text += ", objective value " + str(objective_value)
+    return text
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m cnapy.scenario_batch",
+                                     description="Evaluates scenario files with FBA, pFBA or FVA without the CNApy GUI.")
+    parser.add_argument("project", help="CNApy project (.cna) with the model")
+    parser.add_argument("scenarios", nargs="+", help="scenario files (.scen or .val) or directories with scenario files")
+    parser.add_argument("-m", "--method", choices=methods, default="fba", help="analysis of each scenario (default: fba)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("-o", "--output", default="scenario_results.npz",
+                        help="file for the result table, .npz or .csv (default: scenario_results.npz)")
+    args = parser.parse_args(argv)
+    table = run_batch(args.project, args.scenarios, args.method, args.workers)
+    table.save(args.output)
+    return 0 if not any(status.startswith("failed") for status in table.status) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
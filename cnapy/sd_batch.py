@@ -0,0 +1,140 @@
+"""
+Headless computation of several strain design setups for the model of a CNApy project.
+
+usage: python -m cnapy.sd_batch project.cna setup1.json [setup2.json ...] [-w WORKERS] [-o OUTPUT_DIRECTORY]
+
+The setups are JSON files as saved by the strain design dialog. Each setup is computed in
+its own process, at most WORKERS of them at the same time. For every setup the results are
+written to a .sds file that can be opened in CNApy, the output of the computation to a .log
+file and the run metadata of all setups are collected in batch_summary.json.
+No Qt modules are imported, the scenario of the GUI is not available here so that the
+model is used with the flux bounds that are stored in the project.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import redirect_stdout, redirect_stderr
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from typing import Dict, List
+from zipfile import ZipFile
+
+from cnapy.model_snapshot import model_to_bytes, model_from_bytes, read_project_model
+from cnapy.sd_results import write_sd_results
+from cnapy.worker_pool import iterate_pool
+from cnapy.worker_process import prepare_sd_setup
+
+summary_filename = "batch_summary.json"
+
+
+def read_project_model_bytes(project_filename: str) -> bytes:
+    with TemporaryDirectory() as temp_dir:
+        with ZipFile(project_filename, 'r') as zip_ref:
+            zip_ref.extractall(temp_dir)
+        return model_to_bytes(read_project_model(temp_dir))
+
+
+def results_filenames(setup_filenames: List[str], output_directory: str) -> List[str]:
+    '''one .sds file per setup named after the setup file, made unique if setup files have the same name'''
+    filenames = []
+    for setup_filename in setup_filenames:
+        base = os.path.splitext(os.path.basename(setup_filename))[0]
+        filename = os.path.join(output_directory, base + ".sds")
+        count = 1
+        while filename in filenames:
+            count += 1
+            filename = os.path.join(output_directory, base + "-" + str(count) + ".sds")
+        filenames.append(filename)
+    return filenames
+
+
+def run_job(model_bytes: bytes, setup_filename: str, results_file: str) -> Dict:
+    '''
+    Computes the strain designs of one setup, runs in a worker process.
+    The results are written to results_file as in the GUI (see cnapy.sd_results),
+    the metadata are also returned.
+    '''
+    metadata = {"setup file": os.path.abspath(setup_filename),
+                "results file": os.path.abspath(results_file),
+                "started": datetime.now().isoformat(timespec='seconds')}
+    start = time.perf_counter()
+    with open(os.path.splitext(results_file)[0] + ".log", 'w') as log, redirect_stdout(log), redirect_stderr(log):
+        try:
+            from straindesign import compute_strain_designs, select_solver
+            from straindesign.names import SOLVER
+            with open(setup_filename, 'r') as fp:
+                gui_setup = json.load(fp)
+            (sd_setup, use_scenario) = prepare_sd_setup(gui_setup)
+            if use_scenario:
+                print("The setup uses the scenario which is not available in batch mode, the model bounds are used.")
+            model = model_from_bytes(model_bytes)
+            del model_bytes
+            # resolve the solver here so that the one that is actually used is recorded
+            sd_setup[SOLVER] = select_solver(sd_setup.get(SOLVER), model)
+            metadata["solver"] = sd_setup[SOLVER]
+            solutions = compute_strain_designs(model, **sd_setup)
+            metadata["status"] = solutions.status
+            metadata["number of solutions"] = solutions.get_num_sols()
+            metadata["wall time"] = time.perf_counter() - start
+            write_sd_results(results_file, solutions, gui_setup, {"run": metadata})
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            metadata["status"] = "failed"
+            metadata["error"] = type(e).__name__ + ": " + str(e)
+            metadata["wall time"] = time.perf_counter() - start
+    return metadata
+
+
+def run_batch(project_filename: str, setup_filenames: List[str], output_directory: str,
+              max_workers: int) -> List[Dict]:
+    '''computes all setups and returns their run metadata in the order of setup_filenames'''
+    os.makedirs(output_directory, exist_ok=True)
+    model_bytes = read_project_model_bytes(project_filename)
+    filenames = results_filenames(setup_filenames, output_directory)
+    results = [None] * len(setup_filenames)
+    jobs = [(model_bytes, setup, results_file) for (setup, results_file) in zip(setup_filenames, filenames)]
+    for (i, job) in iterate_pool(run_job, jobs, max_workers):
+        try:
+            results[i] = job.result()
+        except Exception as e: # e.g. the worker process was killed
+            results[i] = {"setup file": os.path.abspath(setup_filenames[i]), "status": "failed",
+                          "error": type(e).__name__ + ": " + str(e)}
+        print(format_result(results[i]), flush=True)
+    summary = {"project": os.path.abspath(project_filename), "runs": results}
+    with open(os.path.join(output_directory, summary_filename), 'w') as fp:
+        json.dump(summary, fp, indent=2, default=str)
+    return results
+
+
+def format_result(result: Dict) -> str:
+    text = os.path.basename(result["setup file"]) + ": " + str(result["status"])
+    if "number of solutions" in result:
+        text += ", " + str(result["number of solutions"]) + " solution(s)"
+    if "wall time" in result:
+        text += ", {:.1f} s".format(result["wall time"])
+    if "solver" in result:
+        text += " with " + result["solver"]
+    if "error" in result:
+        text += " (" + result["error"] + ")"
+    return text
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m cnapy.sd_batch",
+                                     description="Computes strain design setups without the CNApy GUI.")
+    parser.add_argument("project", help="CNApy project (.cna) with the model")
+    parser.add_argument("setups", nargs="+", help="strain design setups (JSON) saved by the strain design dialog")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="maximal number of setups that are computed at the same time (default: number of CPUs)")
+    parser.add_argument("-o", "--output-directory", default=".",
+                        help="directory for the results, logs and " + summary_filename + " (default: current directory)")
+    args = parser.parse_args(argv)
+    results = run_batch(args.project, args.setups, args.output_directory, args.workers)
+    return 0 if all(r["status"] != "failed" for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
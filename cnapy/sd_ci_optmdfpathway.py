@@ -6,12 +6,16 @@ import cobra
 from cnapy.sd_class_interface import (
     BinaryValue,
     ConstraintSense,
-    IndicatorConstraint,
     FloatVariable,
     LinearProgram,
+    Result,
+    Status,
 )
-from numpy import log
-from typing import Any, List, Dict
+from cobra.util.array import create_stoichiometric_matrix
+from dataclasses import dataclass
+from numpy import append, array, cumsum, flatnonzero, log, maximum, ndarray, ones, where, zeros
+from scipy import sparse
+from typing import Any, Iterable, Iterator, List, Dict, Optional, Tuple, Union
 
 
 # CONSTANTS #
@@ -21,6 +25,60 @@ STANDARD_T = 298.15  # K
 """Standard temperature in Kelvin."""
 
 
+# DATACLASS SECTION #
+@dataclass
+class IrreversibleModel:
+    """
+    The reactions of a model after its reversible reactions were split into a forward and a
+    reverse reaction, together with the index map from the original reactions to their parts.
+    """
+
+    reaction_ids: List[str]
+    """IDs of the irreversible reactions, i.e. the columns of stoichiometric_matrix."""
+    lower_bounds: ndarray
+    upper_bounds: ndarray
+    metabolite_ids: List[str]
+    stoichiometric_matrix: sparse.csc_matrix
+    """Rows: metabolites, columns: irreversible reactions."""
+    original_reaction_ids: List[str]
+    forward_index: ndarray
+    """Column of the forward part of each original reaction, -1 if it has none."""
+    reverse_index: ndarray
+    """Column of the reverse part of each original reaction, -1 if it has none."""
+
+    def combine(self, values: ndarray) -> ndarray:
+        """Net values of the original reactions from the values of the irreversible reactions."""
+        # index -1 picks the appended 0 for missing parts
+        padded = append(array(values, dtype=float), 0.0)
+        return padded[self.forward_index] - padded[self.reverse_index]
+
+    def directional_ids(self) -> Tuple[List[Optional[str]], List[Optional[str]]]:
+        """IDs of the forward and of the reverse part of each original reaction, None where a part does not exist."""
+        return (
+            [self.reaction_ids[i] if i >= 0 else None for i in self.forward_index],
+            [self.reaction_ids[i] if i >= 0 else None for i in self.reverse_index],
+        )
+
+    def translate_lhs(self, lhs: Dict[str, float]) -> Dict[str, float]:
+        """
+        Replaces the original reactions in lhs with their forward (coefficient c) and reverse
+        (coefficient -c) parts, all other keys are kept as they are.
+        """
+        positions = {reaction_id: i for i, reaction_id in enumerate(self.original_reaction_ids)}
+        translated: Dict[str, float] = {}
+        for key, coefficient in lhs.items():
+            if key not in positions:
+                translated[key] = coefficient
+                continue
+            forward = self.forward_index[positions[key]]
+            reverse = self.reverse_index[positions[key]]
+            if forward >= 0:
+                translated[self.reaction_ids[forward]] = coefficient
+            if reverse >= 0:
+                translated[self.reaction_ids[reverse]] = -coefficient
+        return translated
+
+
 # PUBLIC FUNCTIONS #
 def get_steady_state_lp_from_cobra_model(
     cobra_model: cobra.Model, extra_constraints: List[Dict[str, float]] = []
@@ -50,6 +108,76 @@ def get_steady_state_lp_from_cobra_model(
             sense=ConstraintSense.EQ,
         )
 
+    _add_extra_constraints(lp, extra_constraints)
+
+    return lp
+
+
+def split_reversible_reactions(
+    cobra_model: cobra.Model, forward_id: str = "_FWD", reverse_id: str = "_REV"
+) -> IrreversibleModel:
+    """
+    Splits the reactions that can run backwards, that are blocked or that are exchange
+    reactions into a forward reaction (ID + forward_id) and a reverse reaction with negated
+    stoichiometry (ID + reverse_id). Works on the stoichiometric matrix and the bound arrays,
+    the model itself is not changed.
+    """
+    original_reaction_ids = [reaction.id for reaction in cobra_model.reactions]
+    lower_bounds = array([reaction.lower_bound for reaction in cobra_model.reactions], dtype=float)
+    upper_bounds = array([reaction.upper_bound for reaction in cobra_model.reactions], dtype=float)
+    is_exchange = array([reaction_id.startswith("EX_") for reaction_id in original_reaction_ids], dtype=bool)
+    is_blocked = (lower_bounds == 0) & (upper_bounds == 0)
+
+    has_reverse = (lower_bounds < 0) | is_blocked | is_exchange
+    has_forward = ~has_reverse | (upper_bounds > 0) | is_blocked | is_exchange
+    # the parts of each reaction are placed where the reaction was, forward before reverse
+    num_parts = has_forward.astype(int) + has_reverse.astype(int)
+    first_part = cumsum(num_parts) - num_parts
+    forward_index = where(has_forward, first_part, -1)
+    reverse_index = where(has_reverse, first_part + has_forward, -1)
+
+    num_irreversible = int(num_parts.sum())
+    source = zeros(num_irreversible, dtype=int)
+    source[forward_index[has_forward]] = flatnonzero(has_forward)
+    source[reverse_index[has_reverse]] = flatnonzero(has_reverse)
+    is_reverse = zeros(num_irreversible, dtype=bool)
+    is_reverse[reverse_index[has_reverse]] = True
+
+    reaction_ids = [
+        original_reaction_ids[i] + (reverse_id if reverse else forward_id) if has_reverse[i] else original_reaction_ids[i]
+        for i, reverse in zip(source, is_reverse)
+    ]
+    irreversible_lower_bounds = where(
+        is_reverse, maximum(-upper_bounds[source], 0.0),
+        where(has_reverse[source], maximum(lower_bounds[source], 0.0), lower_bounds[source]),
+    )
+    irreversible_upper_bounds = where(
+        is_reverse, maximum(-lower_bounds[source], 0.0),
+        where(has_reverse[source], maximum(upper_bounds[source], 0.0), upper_bounds[source]),
+    )
+
+    # Rows: metabolites, columns: reactions
+    stoichiometric_matrix = sparse.csc_matrix(
+        create_stoichiometric_matrix(cobra_model, array_type="lil")
+    )
+    signs = where(is_reverse, -1.0, 1.0)
+    irreversible_matrix = sparse.csc_matrix(stoichiometric_matrix[:, source] @ sparse.diags(signs))
+
+    return IrreversibleModel(
+        reaction_ids=reaction_ids,
+        lower_bounds=irreversible_lower_bounds,
+        upper_bounds=irreversible_upper_bounds,
+        metabolite_ids=[metabolite.id for metabolite in cobra_model.metabolites],
+        stoichiometric_matrix=irreversible_matrix,
+        original_reaction_ids=original_reaction_ids,
+        forward_index=forward_index,
+        reverse_index=reverse_index,
+    )
+
+
+def _add_extra_constraints(
+    lp: LinearProgram, extra_constraints: List[Dict[str, float]]
+) -> None:
     extra_constraint_counter = 0
     for extra_constraint in extra_constraints:
         extra_constraint_lhs: Dict[str, float] = {}
@@ -84,11 +212,9 @@ def get_steady_state_lp_from_cobra_model(
             )
         extra_constraint_counter += 1
 
-    return lp
-
 
 def create_optmdfpathway_milp(
-    cobra_model: cobra.Model,
+    cobra_model: Union[cobra.Model, IrreversibleModel],
     dG0_values: Dict[str, Dict[str, float]],
     concentration_values: Dict[str, Dict[str, float]],
     extra_constraints: List[Dict[str, float]] = [],
@@ -98,94 +224,87 @@ def create_optmdfpathway_milp(
     add_bottleneck_constraints: bool = False,
     minimal_optmdf: float= -float("inf"),
 ) -> LinearProgram:
-    lp = get_steady_state_lp_from_cobra_model(
-        cobra_model=cobra_model,
-        extra_constraints=extra_constraints,
+    """
+    Builds the OptMDFpathway MILP. The steady-state, driving force and indicator constraints
+    are built as sparse blocks directly from the stoichiometric matrix so that no lhs dict is
+    created for each of their rows. The ratio constraints limit c_i/c_j to [h_min, h_max]
+    where c_i and c_j are metabolite IDs. With an IrreversibleModel from split_reversible_reactions
+    the MILP is built for its irreversible reactions, the extra constraints then have to refer
+    to these (see IrreversibleModel.translate_lhs).
+    """
+    lp = LinearProgram()
+
+    if isinstance(cobra_model, IrreversibleModel):
+        reaction_ids = cobra_model.reaction_ids
+        metabolite_ids = cobra_model.metabolite_ids
+        bounds = zip(cobra_model.lower_bounds, cobra_model.upper_bounds)
+        stoichiometric_matrix = cobra_model.stoichiometric_matrix
+    else:
+        reaction_ids: List[str] = [reaction.id for reaction in cobra_model.reactions]
+        metabolite_ids: List[str] = [metabolite.id for metabolite in cobra_model.metabolites]
+        bounds = [(reaction.lower_bound, reaction.upper_bound) for reaction in cobra_model.reactions]
+        # Rows: metabolites, columns: reactions
+        stoichiometric_matrix = sparse.csc_matrix(
+            create_stoichiometric_matrix(cobra_model, array_type="lil")
+        )
+    for reaction_id, (lb, ub) in zip(reaction_ids, bounds):
+        lp.add_float_variable(
+            name=reaction_id,
+            lb=float(lb),
+            ub=float(ub),
+        )
+
+    lp.add_constraint_block(
+        name="Steady-state",
+        variable_names=reaction_ids,
+        matrix=stoichiometric_matrix,
+        rhs=zeros(len(metabolite_ids)),
+        sense=ConstraintSense.EQ,
     )
 
-    # Set metabolite variables
-    for metabolite in cobra_model.metabolites:
-        metabolite: cobra.Metabolite = metabolite
+    _add_extra_constraints(lp, extra_constraints)
 
-        if metabolite.id in concentration_values.keys():
-            concentration_key = metabolite.id
+    # Set metabolite variables
+    x_varnames = [f"x_{metabolite_id}" for metabolite_id in metabolite_ids]
+    for metabolite_id, x_varname in zip(metabolite_ids, x_varnames):
+        if metabolite_id in concentration_values.keys():
+            concentration_key = metabolite_id
         else:
             concentration_key = "DEFAULT"
 
-        lower_concentration = log(concentration_values[concentration_key]["min"])
-        upper_concentration = log(concentration_values[concentration_key]["max"])
-
         lp.add_float_variable(
-            name=f"x_{metabolite.id}",
-            lb=lower_concentration,
-            ub=upper_concentration,
+            name=x_varname,
+            lb=log(concentration_values[concentration_key]["min"]),
+            ub=log(concentration_values[concentration_key]["max"]),
         )
 
     # Set concentration ratio ranges
-    ratio_counter = 0
-    for ratio_constraint in ratio_constraints:
+    for ratio_counter, ratio_constraint in enumerate(ratio_constraints):
         # c_i / c_j <= h_max AND c_i / c_j >= h_min
-        # <=> x_i - x_j <= ln(h_max) AND x_i - x_j >= ln(h_min)
-        # <=> (A) x_i - x_j - ln(h_max) <= 0 AND (B) -x_i + x_j - ln(h_min) <= 0
-        c_i_id = ratio_constraint["c_i"]
-        c_j_id = ratio_constraint["c_j"]
-
-        ln_h_max = log(ratio_constraint["h_max"])
-        ln_h_max_var = FloatVariable(
-            name=f"ln_h_max_{ratio_counter}",
-            lb=ln_h_max,
-            ub=ln_h_max,
-        )
-        ln_h_min = log(ratio_constraint["h_min"])
-        ln_h_min_var = FloatVariable(
-            name=f"ln_h_min_{ratio_counter}",
-            lb=ln_h_min,
-            ub=ln_h_min,
-        )
-
-        # (A) x_i - x_j - ln(h_max) <= 0
+        # <=> (A) x_i - x_j <= ln(h_max) AND (B) x_i - x_j >= ln(h_min)
+        ratio_lhs = {
+            f"x_{ratio_constraint['c_i']}": 1.0,
+            f"x_{ratio_constraint['c_j']}": -1.0,
+        }
         lp.add_constraint(
             name=f"max_ratio_constraint_{ratio_counter}",
-            lhs={
-                c_i_id: 1.0,
-                c_j_id: -1.0,
-                ln_h_max_var: -1.0,
-            },
+            lhs=ratio_lhs,
             sense=ConstraintSense.LEQ,
-            rhs=0,
+            rhs=log(ratio_constraint["h_max"]),
         )
-        # (B) -x_i + x_j - ln(h_min) <= 0
         lp.add_constraint(
             name=f"min_ratio_constraint_{ratio_counter}",
-            lhs={
-                c_i_id: -1.0,
-                c_j_id: +1.0,
-                ln_h_min_var: -1.0,
-            },
-            sense=ConstraintSense.LEQ,
-            rhs=0,
+            lhs=dict(ratio_lhs),
+            sense=ConstraintSense.GEQ,
+            rhs=log(ratio_constraint["h_min"]),
         )
 
-        ratio_counter += 1
-
     # Set reaction driving force constraints
-    var_B = FloatVariable(
-        name=f"var_B",
+    lp.add_float_variable(
+        name="var_B",
         lb=-float("inf"),
         ub=float("inf"),
     )
-    lp.add_existing_float_variable(var_B)
-
-    if add_bottleneck_constraints:
-        bottleneck_z_sum_var_name = "bottleneck_z_sum"
-        lp.add_float_variable(
-            name=bottleneck_z_sum_var_name,
-            lb=-float("inf"),
-            ub=float("inf"),
-        )
-        bottleneck_z_sum_lhs = {
-            bottleneck_z_sum_var_name: -1.0
-        }
 
     if minimal_optmdf > -float("inf"):
         lp.add_constraint(
@@ -197,126 +316,164 @@ def create_optmdfpathway_milp(
             rhs=minimal_optmdf,
         )
 
-    for reaction in cobra_model.reactions:
-        reaction: cobra.Reaction = reaction
-
-        if reaction.id not in dG0_values.keys():
-            continue
-
-        f_varname = f"f_var_{reaction.id}"
-        f_var = FloatVariable(
+    thermodynamic_columns = [
+        column for column, reaction_id in enumerate(reaction_ids) if reaction_id in dG0_values.keys()
+    ]
+    thermodynamic_ids = [reaction_ids[column] for column in thermodynamic_columns]
+    num_thermodynamic = len(thermodynamic_ids)
+    if num_thermodynamic == 0:
+        return lp
+
+    f_varnames = [f"f_var_{reaction_id}" for reaction_id in thermodynamic_ids]
+    dG0_varnames = [f"dG0_{reaction_id}" for reaction_id in thermodynamic_ids]
+    z_varnames = [f"z_var_{reaction_id}" for reaction_id in thermodynamic_ids]
+    for reaction_id, f_varname, dG0_varname, z_varname in zip(
+        thermodynamic_ids, f_varnames, dG0_varnames, z_varnames
+    ):
+        lp.add_float_variable(
             name=f_varname,
             lb=-float("inf"),
             ub=float("inf"),
         )
-        lp.add_existing_float_variable(f_var)
-
-        dG0_value = dG0_values[reaction.id]["dG0"]
-        dG0_uncertainty = abs(dG0_values[reaction.id]["uncertainty"])
-        dG0_var = FloatVariable(
-            name=f"dG0_{reaction.id}",
+        dG0_value = dG0_values[reaction_id]["dG0"]
+        dG0_uncertainty = abs(dG0_values[reaction_id]["uncertainty"])
+        lp.add_float_variable(
+            name=dG0_varname,
             lb=dG0_value - dG0_uncertainty,
             ub=dG0_value + dG0_uncertainty,
         )
-        lp.add_existing_float_variable(dG0_var)
-
-        # e.g.,
-        #     RT * ln(([S]*[T])/([A]²*[B]))
-        # <=> RT*ln([S]) + RT*ln([T]) - 2*RT*ln([A]) - RT*ln([B])
-        f_expression_lhs: Dict[str, float] = {
-            f_varname: -1,
-            dG0_var.name: -1,
-        }
-        for metabolite in reaction.metabolites:
-            stoichiometry = reaction.metabolites[metabolite]
-            f_expression_lhs[f"x_{metabolite.id}"] = (-1) * stoichiometry * R * T
-        lp.add_constraint(
-            name=f"f_var_constraint_{reaction.id}",
-            lhs=f_expression_lhs,
-            sense=ConstraintSense.EQ,
-            rhs=0,
-        )
-
-        z_varname = f"z_var_{reaction.id}"
         lp.add_binary_variable(name=z_varname)
 
-        """
-        ALTERNATIVE BIG M FORMULATION:
-        z_zero_constraint_lhs = {
-            reaction.id: 1.0,
-            z_varname: -M,
-        }
-        z_zero_constraint_rhs = 0.0
-        lp.add_constraint(
-            name=f"z_zero_{reaction.id}",
-            lhs=z_zero_constraint_lhs,
-            sense=ConstraintSense.LEQ,
-            rhs=z_zero_constraint_rhs,
-        )
+    # f_r = -dG0_r - RT * sum_i(N_ir * x_i)
+    # <=> -f_r - dG0_r - RT * sum_i(N_ir * x_i) = 0
+    identity = sparse.identity(num_thermodynamic, format="csr")
+    lp.add_constraint_block(
+        name="f_var_constraints",
+        variable_names=f_varnames + dG0_varnames + x_varnames,
+        matrix=sparse.hstack(
+            [
+                -identity,
+                -identity,
+                (-R * T) * stoichiometric_matrix[:, thermodynamic_columns].T,
+            ]
+        ),
+        rhs=zeros(num_thermodynamic),
+        sense=ConstraintSense.EQ,
+    )
 
-        # z_r = 1 -> f_r >= B == f_r - B >= 0
-        # In Big M form: f_r + (1-z_i)*M >= B
-        # z_one_constraint: pulp.LpConstraint = 0.0
-        # z_one_constraint = var_B <= current_f_variable + (1-current_z_variable)*M
-        z_one_constraint_lhs = {
-            f_varname: 1.0,
-            z_varname: -M,
-            var_B.name: -1.0,
-        }
-        z_one_constraint_rhs = -M
-        lp.add_constraint(
-            name=f"z_one_{reaction.id}",
-            lhs=z_one_constraint_lhs,
-            sense=ConstraintSense.GEQ,
-            rhs=z_one_constraint_rhs,
-        )
-        """
+    # z_r = 0 -> r = 0
+    lp.add_indicator_constraint_block(
+        name="indicator_0",
+        variable_names=thermodynamic_ids,
+        matrix=identity,
+        rhs=zeros(num_thermodynamic),
+        sense=ConstraintSense.EQ,
+        binary_names=z_varnames,
+        binary_value=BinaryValue.ZERO,
+    )
 
-        indicator_0_lhs = {
-            reaction.id: 1,
-        }
-        indicator_0 = IndicatorConstraint(
-            name=f"indicator_0_{reaction.id}",
-            lhs=indicator_0_lhs,
-            rhs=0,
-            sense=ConstraintSense.EQ,
-            binary_name=z_varname,
-            binary_value=BinaryValue.ZERO,
-        )
-        lp.add_existing_indicator_constraint(indicator_constraint=indicator_0)
-
-
-        if add_bottleneck_constraints:
-            bottleneck_z_name = f"bottleneck_z_{reaction.id}"
-            lp.add_binary_variable(bottleneck_z_name)
-            indicator_1_lhs = {
-                "var_B": 1,
-                bottleneck_z_name: -10_000,
-                f_varname: -1,
-            }
-            bottleneck_z_sum_lhs[bottleneck_z_name] = 1.0
-        else:
-            indicator_1_lhs = {
-                "var_B": 1,
-                f_varname: -1,
-            }
-
-        indicator_1 = IndicatorConstraint(
-            name=f"indicator_1_{reaction.id}",
-            lhs=indicator_1_lhs,
-            rhs=0,
-            sense=ConstraintSense.LEQ,
-            binary_name=z_varname,
-            binary_value=BinaryValue.ONE,
-        )
-        lp.add_existing_indicator_constraint(indicator_constraint=indicator_1)
+    # z_r = 1 -> B - f_r <= 0 (or B - f_r - 10000 bottleneck_z_r <= 0)
+    indicator_1_varnames = ["var_B"] + f_varnames
+    indicator_1_matrix = [sparse.csr_matrix(ones((num_thermodynamic, 1))), -identity]
+    if add_bottleneck_constraints:
+        bottleneck_z_varnames = [f"bottleneck_z_{reaction_id}" for reaction_id in thermodynamic_ids]
+        for bottleneck_z_varname in bottleneck_z_varnames:
+            lp.add_binary_variable(bottleneck_z_varname)
+        indicator_1_varnames += bottleneck_z_varnames
+        indicator_1_matrix.append(-10_000 * identity)
+    lp.add_indicator_constraint_block(
+        name="indicator_1",
+        variable_names=indicator_1_varnames,
+        matrix=sparse.hstack(indicator_1_matrix),
+        rhs=zeros(num_thermodynamic),
+        sense=ConstraintSense.LEQ,
+        binary_names=z_varnames,
+        binary_value=BinaryValue.ONE,
+    )
 
     if add_bottleneck_constraints:
-        lp.add_constraint(
+        bottleneck_z_sum_var_name = "bottleneck_z_sum"
+        lp.add_float_variable(
+            name=bottleneck_z_sum_var_name,
+            lb=-float("inf"),
+            ub=float("inf"),
+        )
+        lp.add_constraint_block(
             name="bottleneck_z_sum_constraint",
-            lhs=bottleneck_z_sum_lhs,
+            variable_names=[bottleneck_z_sum_var_name] + bottleneck_z_varnames,
+            matrix=sparse.csr_matrix([[-1.0] + [1.0] * num_thermodynamic]),
+            rhs=[0.0],
             sense=ConstraintSense.EQ,
-            rhs=0,
         )
 
     return lp
+
+
+def iterate_minimal_optmdf_sweep(
+    lp: LinearProgram, minimal_optmdfs: Iterable[float]
+) -> Iterator[Tuple[float, Result]]:
+    """
+    Solves an OptMDFpathway MILP with a "minimal_optmdf" constraint (i.e. one that was created
+    with a finite minimal_optmdf) for each of the given minimal OptMDFs. The solver object is
+    constructed once, only the right-hand side of the constraint is changed between the points.
+    The points are solved in descending order so that the previous optimal solution stays
+    feasible and can be passed to the solver as MIP start. Yields (minimal OptMDF, Result).
+    """
+    for minimal_optmdf in sorted(minimal_optmdfs, reverse=True):
+        lp.set_constraint_rhs("minimal_optmdf", minimal_optmdf)
+        result = lp.run_solve()
+        yield (minimal_optmdf, result)
+        if result.status == Status.OPTIMAL:
+            lp.set_mip_start(result.values)
+
+
+def iterate_optmdf_pathways(
+    lp: LinearProgram, max_pathways: int, flux_tolerance: float = 1e-6
+) -> Iterator[Result]:
+    """
+    Enumerates up to max_pathways different pathways of a constructed OptMDFpathway MILP from
+    the best to the worst objective value (e.g., the MDF). A pathway is identified by its
+    reactions with a dG'° (i.e. with a z_var_ indicator) that carry a flux. After each round,
+    a cut that deactivates at least one of these reactions is added for every found pathway,
+    which also excludes all pathways that contain it. With CPLEX and Gurobi, a round collects
+    the solution pool of the solver, otherwise it is a single solve. The cuts are added to
+    the LinearProgram. Yields the Result of each pathway as soon as its round is finished;
+    if not even one pathway exists, the non-optimal Result of the first round is yielded.
+    """
+    z_varnames = [name for name in lp.binary_variables.keys() if name.startswith("z_var_")]
+    num_pathways = 0
+    num_cuts = 0
+    found_supports = set()
+    while num_pathways < max_pathways:
+        if lp.has_solution_pool():
+            results = lp.run_populate_results(max_pathways - num_pathways)
+        else:
+            results = [lp.run_solve()]
+        if results[0].status != Status.OPTIMAL:
+            if num_pathways == 0:
+                yield results[0]
+            return
+        new_supports = []
+        for result in results:
+            support = tuple(
+                z_varname for z_varname in z_varnames
+                if result.values.get(z_varname[len("z_var_"):], 0.0) > flux_tolerance
+            )
+            # pool solutions can differ in the indicators of reactions without flux only
+            if support in found_supports or num_pathways == max_pathways:
+                continue
+            found_supports.add(support)
+            new_supports.append(support)
+            num_pathways += 1
+            yield result
+        if len(new_supports) == 0 or () in new_supports:
+            # a pathway without thermodynamically constrained reactions cannot be cut off
+            return
+        for support in new_supports:
+            lp.add_constraint(
+                name=f"pathway_cut_{num_cuts}",
+                lhs={z_varname: 1.0 for z_varname in support},
+                sense=ConstraintSense.LEQ,
+                rhs=len(support) - 1,
+            )
+            num_cuts += 1
@@ -5,18 +5,18 @@
 # External packages
 from dataclasses import dataclass
 from enum import Enum
-from os import cpu_count
-from numpy import array_split, linspace
+from math import isinf
+from numpy import arange, asarray, fromiter, linspace, repeat
 
-# import ray
 from scipy import sparse
-from typing import Any, Callable, Dict, List, Tuple, Union
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Union
 
 # from helper import json_write, json_load
 
 # Internal packages
 from straindesign.indicatorConstraints import IndicatorConstraints
 from straindesign.solver_interface import MILP_LP
+from cnapy.worker_pool import map_chunks
 
 
 # ENUMS SECTION #
@@ -212,6 +212,38 @@ class Objective:
     """
 
 
+@dataclass
+class ConstraintBlock:
+    """
+    Several (MI)LP constraints with the same sense given as sparse matrix, e.g. the steady-state
+    constraints of a metabolic network. Blocks avoid a Constraint with an lhs dict for each row.
+    """
+
+    name: str
+    """Identifying name of the constraint block"""
+    variable_names: List[str]
+    """The names of the variables that belong to the columns of the matrix."""
+    matrix: sparse.csr_matrix
+    """The coefficients of the left hand sides, one row per constraint."""
+    rhs: List[float]
+    """The right hand sides of the constraints."""
+    sense: ConstraintSense
+    """Sense of all constraints of the block."""
+
+
+@dataclass
+class IndicatorConstraintBlock(ConstraintBlock):
+    """
+    Several indicator constraints given as sparse matrix, each row is only active if its
+    binary variable has the binary_value of the block.
+    """
+
+    binary_names: List[str]
+    """The names of the binary variables which control the rows of the block."""
+    binary_value: BinaryValue
+    """The value of the binary variables at which the rows must be fulfilled."""
+
+
 @dataclass
 class Result:
     """Contains all relevant information about the result of an optimization."""
@@ -224,6 +256,44 @@ class Result:
     """The single solution variable values as a dict with the variable names as key."""
 
 
+# GLPK HELPER FUNCTIONS SECTION #
+def _glpk_bounds_type(lb: float, ub: float) -> int:
+    from swiglpk import GLP_DB, GLP_FR, GLP_FX, GLP_LO, GLP_UP
+
+    if isinf(lb) and isinf(ub):
+        return GLP_FR
+    elif isinf(ub):
+        return GLP_LO
+    elif isinf(lb):
+        return GLP_UP
+    elif lb == ub:
+        return GLP_FX
+    return GLP_DB
+
+
+def _glpk_arrays(row: Dict[int, float]) -> Tuple[Any, Any]:
+    """The 1-based column and value arrays of a sparse row for GLPK"""
+    from swiglpk import doubleArray, intArray
+
+    columns = intArray(len(row) + 1)
+    values = doubleArray(len(row) + 1)
+    for i, (column, coeff) in enumerate(row.items()):
+        columns[i + 1] = column + 1
+        values[i + 1] = coeff
+    return columns, values
+
+
+def _set_glpk_row_bounds(glpk: Any, solver_row: int, is_eq: bool, rhs: float) -> None:
+    from swiglpk import GLP_FR, GLP_FX, GLP_UP, glp_set_row_bnds
+
+    if is_eq:
+        glp_set_row_bnds(glpk, solver_row, GLP_FX, rhs, rhs)
+    elif isinf(rhs):
+        glp_set_row_bnds(glpk, solver_row, GLP_FR, 0.0, 0.0)
+    else:
+        glp_set_row_bnds(glpk, solver_row, GLP_UP, 0.0, rhs)
+
+
 # MAIN CLASS SECTION #
 class LinearProgram:
     """
@@ -296,9 +366,15 @@ class LinearProgram:
         self.binary_variables: Dict[str, BinaryVariable] = {}
         self.constraints: Dict[str, Constraint] = {}
         self.indicator_constraints: Dict[str, IndicatorConstraint] = {}
+        self.constraint_blocks: Dict[str, ConstraintBlock] = {}
+        self.indicator_constraint_blocks: Dict[str, IndicatorConstraintBlock] = {}
         self.timelimit: int = 30
+        self.eq_names: List[str] = []
         self.ineq_names: List[str] = []
         self.active_variables: List[str] = []
+        self.variable_index: Dict[str, int] = {}
+        self.num_variables: int = 0
+        self._milp_lp: Union[MILP_LP, None] = None
         self.objective: Objective = Objective(
             vector={},
             direction=ObjectiveDirection.MAX,
@@ -311,7 +387,7 @@ class LinearProgram:
         else:
             multiplier = 1
         for var_name, coeff in self.objective.vector.items():
-            objective_vector[self.active_variables.index(var_name)] = multiplier * coeff
+            objective_vector[self.variable_index[var_name]] = multiplier * coeff
         return objective_vector
 
     def add_binary_variable(self, name: str) -> None:
@@ -335,11 +411,52 @@ class LinearProgram:
         )
         self.add_existing_constraint(constraint)
 
+    def add_constraint_block(
+        self,
+        name: str,
+        variable_names: List[str],
+        matrix: sparse.spmatrix,
+        rhs: List[float],
+        sense: ConstraintSense,
+    ) -> None:
+        self.constraint_blocks[name] = ConstraintBlock(
+            name=name,
+            variable_names=variable_names,
+            matrix=sparse.csr_matrix(matrix),
+            rhs=rhs,
+            sense=sense,
+        )
+
+    def add_indicator_constraint_block(
+        self,
+        name: str,
+        variable_names: List[str],
+        matrix: sparse.spmatrix,
+        rhs: List[float],
+        sense: ConstraintSense,
+        binary_names: List[str],
+        binary_value: BinaryValue,
+    ) -> None:
+        self.indicator_constraint_blocks[name] = IndicatorConstraintBlock(
+            name=name,
+            variable_names=variable_names,
+            matrix=sparse.csr_matrix(matrix),
+            rhs=rhs,
+            sense=sense,
+            binary_names=binary_names,
+            binary_value=binary_value,
+        )
+
     def add_existing_binary_variable(self, variable: BinaryVariable) -> None:
         self.binary_variables[variable.name] = variable
 
     def add_existing_constraint(self, constraint: Constraint) -> None:
+        if constraint.name in self.constraints:
+            self._replace_constraint(constraint)
+            return
         self.constraints[constraint.name] = constraint
+        if self._milp_lp is not None:
+            self._add_solver_row(constraint)
 
     def add_existing_float_variable(self, variable: FloatVariable) -> None:
         self.float_variables[variable.name] = variable
@@ -470,172 +587,519 @@ class LinearProgram:
     def replace_ineq_constraint_in_solver_object(
         self, ineq_name: str, lhs: Dict[str, float], sense: ConstraintSense, rhs: float
     ) -> None:
-        index = self.ineq_names.index(ineq_name)
-        constraint = self.constraints[ineq_name]
-        if sense == ConstraintSense.GEQ:
-            multiplier = -1.0
-        else:
-            multiplier = 1.0
-        a_ineq = [0.0 for _ in range(self.num_variables)]
-        for var_name, coeff in lhs.items():
-            column = self.active_variables.index(var_name)
-            a_ineq[column] = coeff * multiplier
-
-        b_ineq = rhs
-        self._milp_lp.set_ineq_constraint(
-            idx=index,
-            a_ineq=a_ineq,
-            b_ineq=b_ineq,
+        self._replace_constraint(
+            Constraint(
+                name=ineq_name,
+                lhs=lhs,
+                rhs=rhs,
+                sense=sense,
+            )
         )
 
-    def construct_solver_object(
+    def set_variable_bounds(self, name: str, lb: float, ub: float) -> None:
+        """
+        Sets the bounds of a float variable. If the solver object is already constructed,
+        only the bounds of the variable's column are changed in it.
+        """
+        self.float_variables[name] = FloatVariable(
+            name=name,
+            lb=lb,
+            ub=ub,
+        )
+        if self._milp_lp is not None and name in self.variable_index:
+            self._set_solver_bounds(self.variable_index[name], lb, ub)
+
+    def set_constraint_rhs(self, name: str, rhs: float) -> None:
+        """Sets the right hand side of a constraint, also in the solver object if it is already constructed."""
+        constraint = self.constraints[name]
+        self._replace_constraint(
+            Constraint(
+                name=name,
+                lhs=constraint.lhs,
+                rhs=rhs,
+                sense=constraint.sense,
+            )
+        )
+
+    def set_constraint_coefficients(self, name: str, coefficients: Dict[str, float]) -> None:
+        """
+        Sets the given coefficients of a constraint's left hand side, a coefficient of 0 removes
+        the variable from it. If the solver object is already constructed, only the changed
+        coefficients are updated in it.
+        """
+        constraint = self.constraints[name]
+        lhs = {**constraint.lhs, **coefficients}
+        self._replace_constraint(
+            Constraint(
+                name=name,
+                lhs={var_name: coeff for var_name, coeff in lhs.items() if coeff != 0.0},
+                rhs=constraint.rhs,
+                sense=constraint.sense,
+            )
+        )
+
+    def set_mip_start(self, values: Dict[str, float]) -> None:
+        """
+        Passes a solution (e.g., the one of a previous run_solve) to the solver object as start
+        for the next MILP solve. Variables that are not given are left to the solver. GLPK and
+        pure LPs have no MIP starts, the call is then ignored.
+        """
+        columns = [
+            (self.variable_index[name], value)
+            for name, value in values.items()
+            if name in self.variable_index
+        ]
+        backend = self._milp_lp.backend
+        if self._solver == Solver.GUROBI:
+            for column, value in columns:
+                self._solver_columns[column].Start = value
+            backend.update()
+        elif self._solver == Solver.CPLEX:
+            from cplex import SparsePair
+
+            backend.MIP_starts.delete()
+            backend.MIP_starts.add(
+                SparsePair(
+                    ind=[column for column, _ in columns],
+                    val=[value for _, value in columns],
+                ),
+                backend.MIP_starts.effort_level.auto,
+            )
+        elif self._solver == Solver.SCIP and not self._milp_lp.isLP:
+            backend.freeTransform()
+            solution = backend.createSol()
+            for column, value in columns:
+                backend.setSolVal(solution, self._solver_columns[column], value)
+            backend.addSol(solution)
+
+    def _replace_constraint(self, constraint: Constraint) -> None:
+        old_constraint = self.constraints[constraint.name]
+        self.constraints[constraint.name] = constraint
+        if self._milp_lp is None:
+            return
+        if (old_constraint.sense == ConstraintSense.EQ) != (constraint.sense == ConstraintSense.EQ):
+            # An inequality cannot be turned into an equality in place (and vice versa)
+            self._remove_solver_row(old_constraint)
+            self._add_solver_row(constraint)
+            return
+        old_row, _ = self._get_solver_row(old_constraint)
+        row, rhs = self._get_solver_row(constraint)
+        changed_columns = {
+            column: coeff for column, coeff in row.items() if old_row.get(column) != coeff
+        }
+        for column in old_row.keys() - row.keys():
+            changed_columns[column] = 0.0
+        self._set_solver_row(constraint, row, changed_columns, rhs)
+
+    def _get_solver_row(self, constraint: Constraint) -> Tuple[Dict[int, float], float]:
+        """
+        Returns the constraint as row of the solver object, i.e. as dictionary of the columns
+        and their coefficients and the right hand side. >= constraints are turned into <= constraints.
+        """
+        multiplier = -1.0 if constraint.sense == ConstraintSense.GEQ else 1.0
+        row: Dict[int, float] = {}
+        for var_name, coeff in constraint.lhs.items():
+            if var_name not in self.variable_index:
+                raise ValueError(
+                    f"Variable {var_name} of constraint {constraint.name} is not part of the "
+                    "solver object, construct_solver_object() must be called again."
+                )
+            row[self.variable_index[var_name]] = float(coeff) * multiplier
+        return row, float(constraint.rhs) * multiplier
+
+    def _set_solver_bounds(self, column: int, lb: float, ub: float) -> None:
+        backend = self._milp_lp.backend
+        if self._solver == Solver.GUROBI:
+            variable = self._solver_columns[column]
+            variable.lb = lb
+            variable.ub = ub
+            backend.update()
+        elif self._solver == Solver.CPLEX:
+            from cplex import infinity
+
+            backend.variables.set_lower_bounds(column, max(lb, -infinity))
+            backend.variables.set_upper_bounds(column, min(ub, infinity))
+        elif self._solver == Solver.SCIP and self._milp_lp.isLP:
+            backend.chgBound(
+                column, max(lb, -backend.infinity()), min(ub, backend.infinity())
+            )
+        elif self._solver == Solver.SCIP:
+            backend.freeTransform()
+            variable = self._solver_columns[column]
+            backend.chgVarLb(variable, None if isinf(lb) else lb)
+            backend.chgVarUb(variable, None if isinf(ub) else ub)
+        elif self._solver == Solver.GLPK:
+            from swiglpk import glp_set_col_bnds
+
+            glp_set_col_bnds(backend.glpk, column + 1, _glpk_bounds_type(lb, ub), lb, ub)
+
+    def _set_solver_row(
         self,
-        big_m_value: Union[None, float, int] = None,
-        skip_checks: bool = True,
-        timelimit: Union[int, None] = None,
-        solver: Solver = Solver.GLPK,
+        constraint: Constraint,
+        row: Dict[int, float],
+        changed_columns: Dict[int, float],
+        rhs: float,
     ) -> None:
-        # Pre-creation of data structures which will be used in the following steps
-        self.active_variables = []
-        eq_names: List[str] = []
+        backend = self._milp_lp.backend
+        solver_row = self._solver_rows[constraint.name]
+        is_eq = constraint.sense == ConstraintSense.EQ
+        if self._solver == Solver.GUROBI:
+            for column, coeff in changed_columns.items():
+                backend.chgCoeff(solver_row, self._solver_columns[column], coeff)
+            solver_row.rhs = rhs
+            backend.update()
+        elif self._solver == Solver.CPLEX:
+            from cplex import infinity
+
+            if changed_columns:
+                backend.linear_constraints.set_coefficients(
+                    [(solver_row, column, coeff) for column, coeff in changed_columns.items()]
+                )
+            backend.linear_constraints.set_rhs(solver_row, min(rhs, infinity))
+        elif self._solver == Solver.SCIP and self._milp_lp.isLP:
+            for column, coeff in changed_columns.items():
+                backend.chgCoef(solver_row, column, coeff)
+            backend.chgSide(
+                solver_row, rhs if is_eq else -backend.infinity(), min(rhs, backend.infinity())
+            )
+        elif self._solver == Solver.SCIP:
+            backend.freeTransform()
+            for column, coeff in changed_columns.items():
+                backend.chgCoefLinear(solver_row, self._solver_columns[column], coeff)
+            backend.chgRhs(solver_row, None if isinf(rhs) else rhs)
+            if is_eq:
+                backend.chgLhs(solver_row, rhs)
+        elif self._solver == Solver.GLPK:
+            from swiglpk import glp_set_mat_row
+
+            # GLPK replaces whole rows, which only needs the nonzero coefficients
+            columns, values = _glpk_arrays(row)
+            glp_set_mat_row(backend.glpk, solver_row, len(row), columns, values)
+            _set_glpk_row_bounds(backend.glpk, solver_row, is_eq, rhs)
+
+    def _add_solver_row(self, constraint: Constraint) -> None:
+        backend = self._milp_lp.backend
+        row, rhs = self._get_solver_row(constraint)
+        is_eq = constraint.sense == ConstraintSense.EQ
+        if self._solver == Solver.GUROBI:
+            from gurobipy import LinExpr
+
+            solver_row = backend.addLConstr(
+                LinExpr(list(row.values()), [self._solver_columns[column] for column in row.keys()]),
+                "=" if is_eq else "<",
+                rhs,
+            )
+            backend.update()
+        elif self._solver == Solver.CPLEX:
+            from cplex import infinity
+
+            solver_row = backend.linear_constraints.get_num()
+            backend.linear_constraints.add(
+                lin_expr=[[list(row.keys()), list(row.values())]],
+                senses="E" if is_eq else "L",
+                rhs=[min(rhs, infinity)],
+            )
+        elif self._solver == Solver.SCIP and self._milp_lp.isLP:
+            backend.addRow(
+                list(row.items()),
+                lhs=rhs if is_eq else -backend.infinity(),
+                rhs=min(rhs, backend.infinity()),
+            )
+            solver_row = backend.nrows() - 1
+        elif self._solver == Solver.SCIP:
+            from pyscipopt import quicksum
+
+            backend.freeTransform()
+            expression = quicksum(
+                coeff * self._solver_columns[column] for column, coeff in row.items()
+            )
+            solver_row = backend.addCons(
+                expression == rhs if is_eq else expression <= rhs, modifiable=True
+            )
+            backend.constr.append(solver_row)
+        elif self._solver == Solver.GLPK:
+            from swiglpk import glp_add_rows, glp_set_mat_row
+
+            solver_row = glp_add_rows(backend.glpk, 1)
+            columns, values = _glpk_arrays(row)
+            glp_set_mat_row(backend.glpk, solver_row, len(row), columns, values)
+            _set_glpk_row_bounds(backend.glpk, solver_row, is_eq, rhs)
+        self._solver_rows[constraint.name] = solver_row
+
+    def _remove_solver_row(self, constraint: Constraint) -> None:
+        """
+        Removes the constraint's row from the solver object. With CPLEX, GLPK and SCIP (MILP), the
+        row is made non-binding instead so that the positions of the other rows remain valid.
+        """
+        backend = self._milp_lp.backend
+        solver_row = self._solver_rows.pop(constraint.name)
+        if self._solver == Solver.GUROBI:
+            backend.remove(solver_row)
+            backend.update()
+        elif self._solver == Solver.CPLEX:
+            row, _ = self._get_solver_row(constraint)
+            if row:
+                backend.linear_constraints.set_coefficients(
+                    [(solver_row, column, 0.0) for column in row.keys()]
+                )
+            backend.linear_constraints.set_senses(solver_row, "L")
+            backend.linear_constraints.set_rhs(solver_row, 0.0)
+        elif self._solver == Solver.SCIP and self._milp_lp.isLP:
+            # SoPlex fails on rows without finite sides, so the row is deleted
+            backend.delRows(solver_row, solver_row)
+            for name, row in self._solver_rows.items():
+                if row > solver_row:
+                    self._solver_rows[name] = row - 1
+        elif self._solver == Solver.SCIP:
+            backend.freeTransform()
+            backend.chgLhs(solver_row, None)
+            backend.chgRhs(solver_row, None)
+        elif self._solver == Solver.GLPK:
+            from swiglpk import GLP_FR, glp_set_row_bnds
+
+            glp_set_row_bnds(backend.glpk, solver_row, GLP_FR, 0.0, 0.0)
+
+    def _build_indexes(self) -> None:
+        """
+        Collects the variables that occur in the constraints and the names of the equality
+        and inequality constraints. The variables are ordered by their first occurrence so
+        that the column order of the solver object does not change between runs. The name
+        to column dictionary makes the lookups during the matrix assembly O(1).
+        """
+        variable_index: Dict[str, int] = {}
+        self.eq_names = []
         self.ineq_names = []
-        num_equalities = 0
-        num_inequalities = 0
-        get_var_names = lambda constraint_dict: [
-            var_name for var_name in constraint_dict.keys()
-        ]
         for constraint in self.constraints.values():
-            self.active_variables += get_var_names(constraint.lhs)
+            for var_name in constraint.lhs.keys():
+                variable_index.setdefault(var_name, len(variable_index))
             if constraint.sense == ConstraintSense.EQ:
-                num_equalities += 1
-                eq_names.append(constraint.name)
+                self.eq_names.append(constraint.name)
             else:
-                num_inequalities += 1
                 self.ineq_names.append(constraint.name)
         for indicator_constraint in self.indicator_constraints.values():
-            self.active_variables += get_var_names(indicator_constraint.lhs)
-            self.active_variables += [indicator_constraint.binary_name]
-        self.active_variables = list(set(self.active_variables))
-        num_variables = len(self.active_variables)
-        self.num_variables = num_variables
-
-        # Build A and b
-        num_matrix_columns = num_variables
-        A_ineq = sparse.lil_matrix((num_inequalities, num_matrix_columns))
-        b_ineq: List[float] = [0.0 for _ in range(num_inequalities)]
-        ineq_index = 0
-        for ineq_name in self.ineq_names:
-            constraint = self.constraints[ineq_name]
-            row = self.ineq_names.index(constraint.name)
-            if constraint.sense == ConstraintSense.GEQ:
-                multiplier = -1.0
+            for var_name in indicator_constraint.lhs.keys():
+                variable_index.setdefault(var_name, len(variable_index))
+            variable_index.setdefault(indicator_constraint.binary_name, len(variable_index))
+        for block in self.constraint_blocks.values():
+            for var_name in block.variable_names:
+                variable_index.setdefault(var_name, len(variable_index))
+        for indicator_block in self.indicator_constraint_blocks.values():
+            for var_name in indicator_block.variable_names:
+                variable_index.setdefault(var_name, len(variable_index))
+            for var_name in indicator_block.binary_names:
+                variable_index.setdefault(var_name, len(variable_index))
+        self.variable_index = variable_index
+        self.active_variables = list(variable_index.keys())
+        self.num_variables = len(self.active_variables)
+
+    def _build_sparse_matrix(
+        self, lhs_list: List[Dict[str, float]], multipliers: List[float]
+    ) -> sparse.csr_matrix:
+        """
+        Builds the matrix whose rows are the given left hand sides (each multiplied with its
+        multiplier) at once from (row, column, value) triplets.
+        """
+        row_lengths = [len(lhs) for lhs in lhs_list]
+        num_entries = sum(row_lengths)
+        rows = repeat(arange(len(lhs_list)), row_lengths)
+        columns = fromiter(
+            (self.variable_index[var_name] for lhs in lhs_list for var_name in lhs.keys()),
+            dtype=int,
+            count=num_entries,
+        )
+        values = fromiter(
+            (coeff for lhs in lhs_list for coeff in lhs.values()),
+            dtype=float,
+            count=num_entries,
+        )
+        values *= repeat(asarray(multipliers, dtype=float), row_lengths)
+        return sparse.csr_matrix(
+            (values, (rows, columns)), shape=(len(lhs_list), self.num_variables)
+        )
+
+    def _build_block_matrix(self, block: ConstraintBlock, multiplier: float) -> sparse.csr_matrix:
+        """Moves the columns of the block's matrix to the columns of its variables."""
+        matrix = block.matrix.tocoo()
+        block_columns = fromiter(
+            (self.variable_index[var_name] for var_name in block.variable_names),
+            dtype=int,
+            count=len(block.variable_names),
+        )
+        return sparse.csr_matrix(
+            (matrix.data * multiplier, (matrix.row, block_columns[matrix.col])),
+            shape=(matrix.shape[0], self.num_variables),
+        )
+
+    def _assemble_solver_input(self) -> Dict[str, Any]:
+        """
+        Builds the matrices and vectors that define the MILP_LP solver object. The rows of
+        the constraint blocks follow the rows of the single constraints.
+        """
+        self._build_indexes()
+
+        # Build A and b; >= constraints are turned into <= constraints
+        ineq_constraints = [self.constraints[ineq_name] for ineq_name in self.ineq_names]
+        ineq_multipliers = [
+            -1.0 if constraint.sense == ConstraintSense.GEQ else 1.0
+            for constraint in ineq_constraints
+        ]
+        A_ineq_parts = [
+            self._build_sparse_matrix(
+                [constraint.lhs for constraint in ineq_constraints], ineq_multipliers
+            )
+        ]
+        b_ineq: List[float] = [
+            constraint.rhs * multiplier
+            for constraint, multiplier in zip(ineq_constraints, ineq_multipliers)
+        ]
+        eq_constraints = [self.constraints[eq_name] for eq_name in self.eq_names]
+        A_eq_parts = [
+            self._build_sparse_matrix(
+                [constraint.lhs for constraint in eq_constraints], [1.0] * len(eq_constraints)
+            )
+        ]
+        b_eq: List[float] = [constraint.rhs for constraint in eq_constraints]
+        for block in self.constraint_blocks.values():
+            if block.sense == ConstraintSense.EQ:
+                A_eq_parts.append(self._build_block_matrix(block, 1.0))
+                b_eq += [float(rhs) for rhs in block.rhs]
             else:
-                multiplier = 1.0
-            for var_name, coeff in constraint.lhs.items():
-                column = self.active_variables.index(var_name)
-                A_ineq[row, column] = coeff * multiplier
-            b_ineq[ineq_index] = self.constraints[ineq_name].rhs * multiplier
-            ineq_index += 1
-        A_ineq = sparse.csr_matrix(A_ineq)
-
-        A_eq = sparse.lil_matrix((num_equalities, num_matrix_columns))
-        for eq_name in eq_names:
-            constraint = self.constraints[eq_name]
-            row = eq_names.index(constraint.name)
-            for var_name, coeff in constraint.lhs.items():
-                column = self.active_variables.index(var_name)
-                A_eq[row, column] = coeff
-        A_eq = sparse.csr_matrix(A_eq)
-        b_eq: List[float] = [self.constraints[eq_name].rhs for eq_name in eq_names]
+                multiplier = -1.0 if block.sense == ConstraintSense.GEQ else 1.0
+                A_ineq_parts.append(self._build_block_matrix(block, multiplier))
+                b_ineq += [float(rhs) * multiplier for rhs in block.rhs]
+        A_ineq = sparse.vstack(A_ineq_parts, format="csr")
+        A_eq = sparse.vstack(A_eq_parts, format="csr")
+        self._num_ineq_rows = A_ineq.shape[0]
 
         # Build LB and UB vectors
-        num_bounded_variables = len(self.active_variables)
-        lower_bounds: List[float] = [0.0 for _ in range(num_bounded_variables)]
-        upper_bounds: List[float] = [0.0 for _ in range(num_bounded_variables)]
-        variable_types: str = ""
-        var_index = 0
+        lower_bounds: List[float] = []
+        upper_bounds: List[float] = []
+        variable_types: List[str] = []
         for var_name in self.active_variables:
-            if var_name in self.binary_variables.keys():
-                lb = 0.0
-                ub = 1.0
-                variable_types += "B"
+            if var_name in self.binary_variables:
+                lower_bounds.append(0.0)
+                upper_bounds.append(1.0)
+                variable_types.append("B")
             else:
                 float_var = self.float_variables[var_name]
-                lb = float_var.lb
-                ub = float_var.ub
-                variable_types += "C"
-            lower_bounds[var_index] = lb
-            upper_bounds[var_index] = ub
-            var_index += 1
+                lower_bounds.append(float_var.lb)
+                upper_bounds.append(float_var.ub)
+                variable_types.append("C")
 
         # Build objective vector
         objective_vector: List[float] = self._get_objective_vector()
 
-        # Create indicator constraints
-        binv: List[int] = []  # Binary variable indices
-        # Set coeffs of indicators; num_rows = number of indicator constraints,
-        # num_columns = number of variables
-        A_indic = sparse.lil_matrix(
-            (len(self.indicator_constraints), num_matrix_columns)
+        # Create indicator constraints, >= constraints are turned into <= constraints
+        indicator_constraints = list(self.indicator_constraints.values())
+        indic_multipliers = [
+            -1.0 if indicator_constraint.sense == ConstraintSense.GEQ else 1.0
+            for indicator_constraint in indicator_constraints
+        ]
+        # Binary variable indices
+        indic_binv: List[int] = [
+            self.variable_index[indicator_constraint.binary_name]
+            for indicator_constraint in indicator_constraints
+        ]
+        indic_A_parts = [
+            self._build_sparse_matrix(
+                [indicator_constraint.lhs for indicator_constraint in indicator_constraints],
+                indic_multipliers,
+            )
+        ]
+        # RHS of indicators
+        indic_b: List[float] = [
+            indicator_constraint.rhs * multiplier
+            for indicator_constraint, multiplier in zip(indicator_constraints, indic_multipliers)
+        ]
+        indic_sense = "".join(
+            "E" if indicator_constraint.sense == ConstraintSense.EQ else "L"
+            for indicator_constraint in indicator_constraints
         )
-        b_indic: List[float] = [
-            0.0 for _ in range(len(self.indicator_constraints.values()))
-        ]  # RHS of indicators
-        sense = ""
         # Indicval which binary value activates indicator constraint
-        indicval: List[int] = [
-            0 for _ in range(len(self.indicator_constraints.values()))
+        indic_indicval: List[int] = [
+            0 if indicator_constraint.binary_value == BinaryValue.ZERO else 1
+            for indicator_constraint in indicator_constraints
         ]
-        indic_index = 0
-        for indicator_constraint in self.indicator_constraints.values():
-            binary_name = indicator_constraint.binary_name
-            binv.append(self.active_variables.index(binary_name))
-
-            for var_name, coeff in indicator_constraint.lhs.items():
-                A_indic[indic_index, self.active_variables.index(var_name)] = coeff
-
-            b_indic[indic_index] = indicator_constraint.rhs
-
-            if sense == ConstraintSense.EQ:
-                sense += "E"
-            else:
-                sense += "L"
-
-            if indicator_constraint.binary_value == BinaryValue.ZERO:
-                indicval[indic_index] = 0
-            else:
-                indicval[indic_index] = 1
-
-            indic_index += 1
-        A_indic = sparse.csr_matrix(A_indic)
-
-        if len(indicval) > 0:
-            indicator_constraints = IndicatorConstraints(
-                binv=binv,
-                A=A_indic,
-                b=b_indic,
-                sense=sense,
-                indicval=indicval,
+        for indicator_block in self.indicator_constraint_blocks.values():
+            multiplier = -1.0 if indicator_block.sense == ConstraintSense.GEQ else 1.0
+            num_rows = indicator_block.matrix.shape[0]
+            indic_binv += [self.variable_index[var_name] for var_name in indicator_block.binary_names]
+            indic_A_parts.append(self._build_block_matrix(indicator_block, multiplier))
+            indic_b += [float(rhs) * multiplier for rhs in indicator_block.rhs]
+            indic_sense += ("E" if indicator_block.sense == ConstraintSense.EQ else "L") * num_rows
+            indic_indicval += [0 if indicator_block.binary_value == BinaryValue.ZERO else 1] * num_rows
+        if len(indic_binv) > 0:
+            indic_constr = IndicatorConstraints(
+                binv=indic_binv,
+                A=sparse.vstack(indic_A_parts, format="csr"),
+                b=indic_b,
+                sense=indic_sense,
+                indicval=indic_indicval,
             )
         else:
-            indicator_constraints = None
+            indic_constr = None
+
+        return {
+            "c": objective_vector,
+            "A_ineq": A_ineq,
+            "b_ineq": b_ineq,
+            "A_eq": A_eq,
+            "b_eq": b_eq,
+            "lb": lower_bounds,
+            "ub": upper_bounds,
+            "vtype": "".join(variable_types),
+            "indic_constr": indic_constr,
+        }
 
+    def construct_solver_object(
+        self,
+        big_m_value: Union[None, float, int] = None,
+        skip_checks: bool = True,
+        timelimit: Union[int, None] = None,
+        solver: Solver = Solver.GLPK,
+    ) -> None:
         # Generate StrainDesign object
         self._milp_lp = MILP_LP(
-            c=objective_vector,
-            A_ineq=A_ineq,
-            b_ineq=b_ineq,
-            A_eq=A_eq,
-            b_eq=b_eq,
-            lb=lower_bounds,
-            ub=upper_bounds,
-            vtype=variable_types,
-            indic_constr=indicator_constraints,
+            **self._assemble_solver_input(),
             M=big_m_value,
             solver=solver.value,
             skip_checks=skip_checks,
             tlim=timelimit,
         )
+        self._solver = solver
+        self._collect_solver_handles()
+
+    def _collect_solver_handles(self) -> None:
+        """
+        Remembers the columns and rows of the solver object that belong to the variables and
+        (in)equality constraints so that they can be changed later on without a reconstruction.
+        All solver interfaces add the inequalities first, followed by the equalities, and the
+        rows of the constraint blocks follow the single constraints of the same kind. Rows of
+        indicator constraints (e.g. the big-M rows of GLPK) and rows that are added later on
+        come after the equalities.
+        """
+        backend = self._milp_lp.backend
+        self._solver_columns: List[Any] = []
+        if self._solver == Solver.GUROBI:
+            self._solver_columns = backend.getVars()
+            solver_rows = backend.getConstrs()
+        elif self._solver == Solver.SCIP and not self._milp_lp.isLP:
+            self._solver_columns = backend.vars
+            solver_rows = backend.constr
+        elif self._solver == Solver.CPLEX:
+            solver_rows = range(backend.linear_constraints.get_num())
+        elif self._solver == Solver.SCIP:
+            solver_rows = range(backend.nrows())
+        elif self._solver == Solver.GLPK:
+            from swiglpk import glp_get_num_rows
+
+            solver_rows = range(1, glp_get_num_rows(backend.glpk) + 1)  # GLPK rows start at 1
+        names = self.ineq_names + self.eq_names
+        positions = list(range(len(self.ineq_names))) + list(
+            range(self._num_ineq_rows, self._num_ineq_rows + len(self.eq_names))
+        )
+        rows = [solver_rows[position] for position in positions]
+        self._solver_rows: Dict[str, Any] = dict(zip(names, rows))
 
     def delete_binary_variable(self, name: str) -> None:
         del self.binary_variables[name]
@@ -644,12 +1108,50 @@ class LinearProgram:
         del self.float_variables[name]
 
     def delete_constraint(self, name: str) -> None:
-        del self.constraints[name]
+        constraint = self.constraints.pop(name)
+        if self._milp_lp is not None:
+            self._remove_solver_row(constraint)
 
     def run_populate(self, num: int) -> Tuple[List[List[float]], List[float], float]:
         solvecs, optvals, optstatuses = self._milp_lp.populate(num)
         return solvecs, optvals, optstatuses
 
+    def has_solution_pool(self) -> bool:
+        """
+        Whether the solver of the constructed solver object has a native solution pool (CPLEX and
+        Gurobi). GLPK and SCIP also run_populate(), but only through repeated solves with
+        exclusion constraints which are all done before anything is returned.
+        """
+        return self._solver in (Solver.CPLEX, Solver.GUROBI)
+
+    def run_populate_results(self, num: int) -> List[Result]:
+        """
+        Like run_populate() but returns a Result for each solution in the solution pool,
+        sorted from the best to the worst objective value. If no solution was found, a
+        single Result without values that carries the solver status is returned.
+        """
+        solvecs, _, optstatus = self.run_populate(num)
+        status = self._get_status_enum(str(optstatus))
+        if status != Status.OPTIMAL or len(solvecs) == 0:
+            return [Result(status=status, objective_value=float("nan"), values={})]
+        results: List[Result] = []
+        for solvec in solvecs:
+            values = dict(zip(self.active_variables, solvec))
+            results.append(
+                Result(
+                    status=status,
+                    objective_value=sum(
+                        coeff * values[var_name] for var_name, coeff in self.objective.vector.items()
+                    ),
+                    values=values,
+                )
+            )
+        results.sort(
+            key=lambda result: result.objective_value,
+            reverse=self.objective.direction == ObjectiveDirection.MAX,
+        )
+        return results
+
     def run_slim_solve(self) -> float:
         optval = self._milp_lp.slim_solve()
         return self._set_optval_according_to_sense(optval)
@@ -720,45 +1222,87 @@ class LinearProgram:
     def get_all_constraint_name(self) -> List[str]:
         return list(self.constraints.keys()) + list(self.indicator_constraints.keys())
 
-    # def run_variability_analysis(
-    #     self, varnames: List[str] = []
-    # ) -> List[Tuple[str, float, float]]:
-    #     if varnames == []:
-    #         varnames = self.active_variables
-    #     del self._milp_lp
-    #     num_cpus = cpu_count()
-    #     if num_cpus is None:
-    #         num_cpus = 1
-    #     num_processes = min(len(varnames), num_cpus)
-    #     varname_chunks = [
-    #         [str(y) for y in x] for x in array_split(varnames, num_processes)
-    #     ]
-    #     futures = [
-    #         variability_calc.remote(self, varname_chunk)
-    #         for varname_chunk in varname_chunks
-    #     ]
-    #     results = ray.get(futures)
-    #     return results
-
-
-# @ray.remote
-# def variability_calc(
-#     lp_object: LinearProgram, varnames: List[str]
-# ) -> List[Tuple[str, float, float]]:
-#     ray.init(log_to_driver=False)
-#     lp_object.construct_solver_object(solver=Solver.CPLEX)
-#     result = []
-#     for varname in varnames:
-#         lp_object.set_single_variable_objective(
-#             varname, direction=ObjectiveDirection.MIN, warmstart=True
-#         )
-#         min_value = lp_object.run_slim_solve()
-#         lp_object.set_single_variable_objective(
-#             varname, direction=ObjectiveDirection.MAX, warmstart=True
-#         )
-#         max_value = lp_object.run_slim_solve()
-#         result.append((varname, min_value, max_value))
-#     return result
+    def __getstate__(self) -> Dict[str, Any]:
+        # The solver object cannot be pickled, e.g. for worker processes, where it is constructed again
+        state = self.__dict__.copy()
+        state["_milp_lp"] = None
+        state.pop("_solver_rows", None)
+        state.pop("_solver_columns", None)
+        return state
+
+    def run_variability_analysis(
+        self,
+        varnames: List[str] = [],
+        solver: Solver = Solver.GLPK,
+        max_workers: Union[int, None] = None,
+    ) -> List[Tuple[str, float, float]]:
+        """
+        Returns the minimal and maximal value of each given variable (default: all variables
+        that occur in the constraints) under the current constraints as (name, min, max).
+        """
+        if varnames == []:
+            self._build_indexes()
+            varnames = self.active_variables
+        results: Dict[str, Tuple[str, float, float]] = {}
+        for chunk_results in self.iterate_variability_analysis(varnames, solver, max_workers):
+            for result in chunk_results:
+                results[result[0]] = result
+        return [results[varname] for varname in varnames]
+
+    def iterate_variability_analysis(
+        self,
+        varnames: List[str],
+        solver: Solver = Solver.GLPK,
+        max_workers: Union[int, None] = None,
+    ) -> Iterator[List[Tuple[str, float, float]]]:
+        """
+        Computes the variability analysis in local worker processes. Each worker constructs its
+        solver object once and then only changes the objective for the variables it is given.
+        Yields lists of (name, min, max) as they are computed, stopping the iteration cancels
+        the variables that have not been started yet.
+        """
+        return map_chunks(
+            _variability_calc,
+            varnames,
+            max_workers,
+            initializer=_init_variability_worker,
+            initargs=(self, solver),
+        )
+
+
+# VARIABILITY ANALYSIS WORKER SECTION #
+# the LinearProgram of a worker process with its solver object, set up once by _init_variability_worker
+_variability_lp: Union[LinearProgram, None] = None
+
+
+def _init_variability_worker(lp_object: LinearProgram, solver: Solver) -> None:
+    global _variability_lp
+    lp_object.construct_solver_object(solver=solver)
+    _variability_lp = lp_object
+
+
+def _variability_calc(chunk: List[Tuple[int, str]]) -> List[Tuple[str, float, float]]:
+    lp_object = _variability_lp
+    result = []
+    for (_, varname) in chunk:
+        if varname not in lp_object.variable_index:
+            # The variable does not occur in any constraint so that only its bounds limit it
+            if varname in lp_object.float_variables:
+                variable = lp_object.float_variables[varname]
+                result.append((varname, variable.lb, variable.ub))
+            else:
+                result.append((varname, 0.0, 1.0))
+            continue
+        lp_object.set_single_variable_objective(
+            varname, direction=ObjectiveDirection.MIN, warmstart=True
+        )
+        min_value = lp_object.run_slim_solve()
+        lp_object.set_single_variable_objective(
+            varname, direction=ObjectiveDirection.MAX, warmstart=True
+        )
+        max_value = lp_object.run_slim_solve()
+        result.append((varname, min_value, max_value))
+    return result
 
 
 """
@@ -0,0 +1,27 @@
+"""Strain design results files (.sds) as they are saved and opened in CNApy"""
+import pickle
+from typing import Dict, Tuple
+
+
+def write_sd_results(filename: str, solutions, sd_setup: Dict, metadata: Dict = None):
+    '''
+    Writes the pickled (solutions, sd_setup) tuple that all versions of CNApy read. The metadata
+    (e.g. of a cnapy.sd_batch run or the validation) are an attribute of the solutions so that
+    versions which do not know them can still open the file. Without metadata those that are
+    already attached to the solutions are kept.
+    '''
+    if metadata is not None:
+        solutions.cnapy_metadata = metadata
+    with open(filename, 'wb') as fp:
+        pickle.dump((solutions, sd_setup), fp, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def read_sd_results(data: bytes) -> Tuple[object, Dict, Dict]:
+    '''
+    Unpickles the content of a results file, returns the solutions, the setup and the metadata;
+    the metadata stay attached to the solutions, files without them get an empty dictionary.
+    '''
+    (solutions, sd_setup) = pickle.loads(data)
+    if getattr(solutions, "cnapy_metadata", None) is None:
+        solutions.cnapy_metadata = {}
+    return (solutions, sd_setup, solutions.cnapy_metadata)
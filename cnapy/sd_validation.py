@@ -0,0 +1,67 @@
+"""Validation of strain designs with FBA and yield FVA, the designs are evaluated in parallel worker processes"""
+import math
+from typing import Dict, Iterator, List, Tuple
+
+from cnapy.model_snapshot import model_from_bytes
+from cnapy.worker_pool import map_chunks
+
+# the state of a worker process, set up once by init_worker
+_model = None
+_yield_function = None # (numerator, denominator, solver) or None
+
+
+def init_worker(model_bytes: bytes, yield_function):
+    global _model, _yield_function
+    _model = model_from_bytes(model_bytes)
+    _yield_function = yield_function
+
+
+def apply_design(model, design: Dict[str, Tuple[float, float]]):
+    '''restricts the model bounds to the bounds of the design, like they are shown in the map'''
+    for reac_id, (lb, ub) in design.items():
+        reaction = model.reactions.get_by_id(reac_id)
+        if math.isnan(lb) or math.isnan(ub):
+            reaction.bounds = (0.0, 0.0)
+        else:
+            reaction.bounds = (max(lb, reaction.lower_bound), min(ub, reaction.upper_bound))
+
+
+def validate_design(model, design: Dict[str, Tuple[float, float]], yield_function) -> Tuple[float, float, float]:
+    '''
+    Returns the optimal objective value and the minimal and maximal yield of the model
+    with the design applied, NaN where the problem is infeasible or no yield function is given.
+    '''
+    with model:
+        try:
+            apply_design(model, design)
+        except ValueError: # the design bounds contradict the scenario
+            return (math.nan, math.nan, math.nan)
+        objective = model.slim_optimize(error_value=math.nan)
+        if yield_function is None or math.isnan(objective):
+            return (objective, math.nan, math.nan)
+        from straindesign import yopt
+        from straindesign.names import OPTIMAL, UNBOUNDED
+        (numerator, denominator, solver) = yield_function
+        yield_range = []
+        for sense in ('minimize', 'maximize'):
+            sol = yopt(model, obj_num=numerator, obj_den=denominator, obj_sense=sense, solver=solver)
+            if sol.status == OPTIMAL or sol.status == UNBOUNDED: # unbounded gives +/-inf or NaN if undefined
+                yield_range.append(float(sol.objective_value))
+            else:
+                yield_range.append(math.nan)
+        return (objective, yield_range[0], yield_range[1])
+
+
+def validate_chunk(chunk: List[Tuple[int, Dict]]) -> List[Tuple[int, Tuple[float, float, float]]]:
+    return [(i, validate_design(_model, design, _yield_function)) for (i, design) in chunk]
+
+
+def validate_strain_designs(model_bytes: bytes, designs: List[Dict[str, Tuple[float, float]]],
+                            yield_function=None, max_workers: int = None,
+                            ) -> Iterator[List[Tuple[int, Tuple[float, float, float]]]]:
+    '''
+    Validates the designs in a pool of worker processes, the model already contains the scenario.
+    Yields lists of (design index, (objective, minimal yield, maximal yield)) as they are computed.
+    Stopping the iteration cancels the designs that have not been started yet.
+    '''
+    return map_chunks(validate_chunk, designs, max_workers, init_worker, (model_bytes, yield_function))
@@ -1,10 +1,501 @@
 ''' Tests '''
+import math
+
 import cobra
 
 import cnapy.core
 
 
+def small_network(reactions, objective=None) -> cobra.Model:
+    '''a model with the reactions given as ID: (stoichiometry, lower bound, upper bound)'''
+    model = cobra.Model()
+    metabolites = {}
+    model_reactions = []
+    for reac_id, (stoichiometry, lower_bound, upper_bound) in reactions.items():
+        reaction = cobra.Reaction(reac_id, lower_bound=lower_bound, upper_bound=upper_bound)
+        reaction.add_metabolites({metabolites.setdefault(met_id, cobra.Metabolite(met_id, compartment="c")): coeff
+                                  for met_id, coeff in stoichiometry.items()})
+        model_reactions.append(reaction)
+    model.add_reactions(model_reactions)
+    if objective is not None:
+        model.objective = objective
+    return model
+
+
 def test_efm_computation():
     model = cobra.Model()
     scen_values = {}
     cnapy.core.efm_computation(model, scen_values, True)
+
+
+def test_flux_value_store():
+    from cnapy.flux_value_store import FluxValueStore
+    store = FluxValueStore({"R1": (1.0, 2.0)})
+    store.set_values(["R1", "R2", "R3"], [0.0, -1.0, 3.0])
+    assert store["R1"] == (0.0, 0.0)
+    assert len(store) == 3
+    del store["R2"]
+    assert "R2" not in store and list(store) == ["R1", "R3"]
+    copy = store.copy()
+    store.clear()
+    assert len(store) == 0 and dict(copy) == {"R1": (0.0, 0.0), "R3": (3.0, 3.0)}
+    assert list(copy.means()) == [0.0, 3.0]
+
+
+def test_flux_color_mapper():
+    from types import SimpleNamespace
+    from cnapy.color_mapping import FluxColorMapper
+    from cnapy.flux_value_store import FluxValueStore
+    project = SimpleNamespace(comp_values=FluxValueStore({"R1": (4.0, 4.0), "R2": (-2.0, -2.0), "R3": (0.0, 0.0)}),
+                              scen_values={})
+    mapper = FluxColorMapper(SimpleNamespace(project=project, rounding=3))
+    assert mapper.value_range() == (-2.0, 4.0)
+    colors = mapper.heat_colors(["R1", "R2", "R3", "R4"])
+    assert "R4" not in colors # no value
+    assert colors["R1"].getRgb()[:3] == (0, 255, 0) and colors["R2"].getRgb()[:3] == (255, 0, 0)
+    assert colors["R3"].getRgb()[:3] == (255, 255, 255)
+    project.comp_values["R1"] = (3.0, 5.0) # the mean is half of the new range limit 8
+    project.comp_values["R5"] = (8.0, 8.0)
+    assert mapper.value_range() == (-2.0, 8.0) # the cached range has been invalidated by the version
+    assert mapper.heat_colors(["R1"])["R1"].getRgb()[:3] == (127, 255, 127)
+    project.comp_values = FluxValueStore({"R1": (-1.0, -1.0)})
+    assert mapper.value_range() == (-1.0, 0.0) # another store
+    project.scen_values["R2"] = (3.0, 3.0) # takes precedence over computed values
+    assert mapper.value_range() == (-1.0, 3.0)
+    assert mapper.onoff_colors(["R1", "R2", "R3"]) == {"R1": mapper.on_color, "R2": mapper.on_color}
+
+
+def test_model_snapshot(monkeypatch):
+    import os
+    from tempfile import TemporaryDirectory
+    from optlang_enumerator.cobra_cnapy import CNApyModel
+    import cnapy.model_snapshot
+    from cnapy.model_snapshot import file_hash, model_fingerprint, model_to_bytes, read_model_snapshot, \
+        write_model_snapshot
+    model = CNApyModel()
+    model.add_metabolites([cobra.Metabolite("A", compartment="c")])
+    model.add_reactions([cobra.Reaction("R1", upper_bound=10.0)])
+    model.reactions.R1.add_metabolites({"A": 1})
+    with TemporaryDirectory() as tmp_dir:
+        monkeypatch.setattr(cnapy.model_snapshot, "key_filename", os.path.join(tmp_dir, "snapshot-key"))
+        sbml = os.path.join(tmp_dir, "model.sbml")
+        snapshot = os.path.join(tmp_dir, "model.pickle")
+        cobra.io.write_sbml_model(model, sbml)
+        model_bytes = model_to_bytes(model)
+        assert model_to_bytes(model) == model_bytes
+        write_model_snapshot(model_bytes, file_hash(sbml), snapshot)
+        loaded = read_model_snapshot(snapshot, sbml)
+        assert loaded.reactions.R1.upper_bound == 10.0
+        assert loaded.stoichiometry_hash_object.digest() == \
+            CNApyModel.read_sbml_model(sbml).stoichiometry_hash_object.digest()
+        assert model_fingerprint(loaded) == model_fingerprint(model)
+        loaded.reactions.R1.upper_bound = 5.0
+        assert model_fingerprint(loaded) != model_fingerprint(model)
+        # snapshots signed with the key of another user are not unpickled
+        monkeypatch.setattr(cnapy.model_snapshot, "key_filename", os.path.join(tmp_dir, "other-key"))
+        assert read_model_snapshot(snapshot, sbml) is None
+        cnapy.model_snapshot.snapshot_key(create=True)
+        assert read_model_snapshot(snapshot, sbml) is None
+        write_model_snapshot(model_bytes, file_hash(sbml), snapshot)
+        assert read_model_snapshot(snapshot, sbml) is not None
+        with open(sbml, 'a') as fp: # SBML changed after the snapshot was made
+            fp.write(" ")
+        assert read_model_snapshot(snapshot, sbml) is None
+
+
+def test_project_save_thread(monkeypatch, tmp_path):
+    from tempfile import TemporaryDirectory
+    from zipfile import ZipFile
+    import cnapy.model_snapshot
+    from cnapy.model_snapshot import model_to_bytes
+    from cnapy.project_saver import ProjectSaveThread
+    monkeypatch.setattr(cnapy.model_snapshot, "key_filename", str(tmp_path / "snapshot-key"))
+    model = small_network({"In": ({"A": 1.0}, 0.0, 10.0)})
+    temp_dir = TemporaryDirectory()
+    def save(filename, previous_archive, model_in_previous_archive):
+        thread = ProjectSaveThread(filename, model_to_bytes(model), "{}", "{}", {}, temp_dir,
+                                   previous_archive, model_in_previous_archive)
+        thread.run() # in this thread
+        assert thread.error is None
+        with ZipFile(filename) as zip_obj:
+            return zip_obj.read("model.sbml")
+    first = str(tmp_path / "first.cna")
+    sbml = save(first, "", False)
+    model.reactions.In.name = "uptake" # the SBML file is copied when the model is said to be unchanged
+    assert save(str(tmp_path / "copied.cna"), first, True) == sbml
+    assert b"uptake" in save(str(tmp_path / "written.cna"), first, False)
+
+
+def test_checkpoint():
+    import os
+    from tempfile import TemporaryDirectory
+    from cnapy.checkpoint import Checkpoint, setup_fingerprint
+    fingerprint = setup_fingerprint("model", {"max_cost": 3})
+    assert fingerprint != setup_fingerprint("model", {"max_cost": 4})
+    with TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "project.mcs-checkpoint")
+        checkpoint = Checkpoint(filename, fingerprint, interval=3600)
+        checkpoint.add([(1, 2), (3,)], {"size lower bound": 2})
+        assert Checkpoint.load(filename, fingerprint) is None # not yet written
+        checkpoint.write()
+        loaded = Checkpoint.load(filename, fingerprint)
+        assert loaded.entries == [(1, 2), (3,)]
+        assert loaded.state["size lower bound"] == 2
+        assert Checkpoint.load(filename, setup_fingerprint("other model", {"max_cost": 3})) is None
+        checkpoint.remove()
+        assert not os.path.exists(filename)
+
+
+def test_enumeration_rounds():
+    from straindesign.names import MAX_COST, MODULES, MODULE_TYPE, OPTKNOCK, PROTECT, SUPPRESS
+    from cnapy.worker_process import mcs_sizes, strain_design_cost_levels
+    sd_setup = {MODULES: [{MODULE_TYPE: SUPPRESS}, {MODULE_TYPE: PROTECT}], MAX_COST: "3.5"}
+    assert strain_design_cost_levels(sd_setup, 0) == [1.0, 2.0, 3.0, 3.5]
+    assert strain_design_cost_levels(sd_setup, 2.0) == [3.0, 3.5]
+    assert strain_design_cost_levels(sd_setup, 4.0) == [3.5]
+    assert strain_design_cost_levels(dict(sd_setup, **{MAX_COST: "inf"}), 0) == [None]
+    assert strain_design_cost_levels({MODULES: [{MODULE_TYPE: OPTKNOCK}], MAX_COST: "3"}, 0) == [None]
+    assert mcs_sizes(4, 0) == [1, 2, 3, 4]
+    assert mcs_sizes(4, 2) == [3, 4]
+    assert mcs_sizes(4, 6) == [4]
+
+
+def test_strain_design_rounds(tmp_path):
+    import pickle
+    import threading
+    from multiprocessing import Pipe
+    from straindesign import SDModule
+    from straindesign.names import MAX_COST, MODULES, SOLVER, SUPPRESS
+    from cnapy.model_snapshot import model_to_bytes
+    from cnapy.worker_process import FAILED, FINISHED, PARTIAL_RESULT, compute_strain_designs_worker
+    model = small_network({"In": ({"A": 1.0}, 0.0, 10.0), "R1": ({"A": -1.0, "B": 1.0}, 0.0, 10.0),
+                           "R2": ({"A": -1.0, "B": 1.0}, 0.0, 10.0), "Out": ({"B": -1.0}, 0.0, 10.0)})
+    sd_setup = {MODULES: [SDModule(model, SUPPRESS, constraints="Out >= 1")], MAX_COST: "2", SOLVER: "glpk"}
+    results_file = str(tmp_path / "results.sds")
+    for completed_cost, expected_partial_results in ((0, [1.0]), (1.0, [])):
+        (receiver, sender) = Pipe(duplex=False)
+        worker = threading.Thread(target=compute_strain_designs_worker,
+                                  args=(model_to_bytes(model), sd_setup, results_file, completed_cost, sender))
+        worker.start()
+        messages = []
+        while len(messages) == 0 or messages[-1][0] not in (FINISHED, FAILED):
+            messages.append(receiver.recv())
+        worker.join()
+        assert messages[-1] == (FINISHED, results_file)
+        assert [content for (kind, content) in messages if kind == PARTIAL_RESULT] == expected_partial_results
+        with open(results_file, 'rb') as fp:
+            designs = pickle.load(fp).get_reaction_sd()
+        assert sorted(sorted(sd) for sd in designs) == [["In"], ["Out"], ["R1", "R2"]]
+
+
+def test_sd_batch_setup():
+    import os
+    from cnapy.sd_batch import results_filenames
+    from cnapy.worker_process import prepare_sd_setup
+    (sd_setup, use_scenario) = prepare_sd_setup({"model_id": "m", "advanced": False, "gene_kos": True,
+                                                 "use_scenario": True, "max_cost": 3})
+    assert sd_setup == {"max_cost": 3, "gko_cost": None} and use_scenario
+    assert results_filenames(["a/s.json", "b/s.json", "t.json"], "out") == \
+        [os.path.join("out", "s.sds"), os.path.join("out", "s-2.sds"), os.path.join("out", "t.sds")]
+
+
+def test_worker_pool():
+    from cnapy.worker_pool import iterate_pool, map_chunks, worker_count
+    results = {i: future.result() for (i, future) in iterate_pool(worker_count, [(4, 2), (None, 0), (1, 9)], 2)}
+    assert results == {0: 2, 1: 1, 2: 1}
+    chunks = list(map_chunks(len, list(range(20)), 2))
+    assert sum(chunks) == 20 and len(chunks) == 20
+    pool = map_chunks(len, list(range(100)), 1)
+    assert next(pool) == 12
+    pool.close() # cancels the remaining chunks
+
+
+def test_sd_validation():
+    from cnapy.sd_validation import validate_design
+    model = small_network({"Up": ({"A": 1.0}, 0.0, 10.0), "Out": ({"A": -1.0}, 0.0, 1000.0)}, objective="Out")
+    assert validate_design(model, {"Up": (0.0, 5.0)}, None)[0] == 5.0
+    assert math.isnan(validate_design(model, {"Out": (20.0, 30.0)}, None)[0]) # contradicts the bounds
+    assert model.reactions.Up.upper_bound == 10.0 and model.reactions.Out.lower_bound == 0.0
+
+
+def test_sd_results_file(tmp_path):
+    import pickle
+    from types import SimpleNamespace
+    from cnapy.sd_results import read_sd_results, write_sd_results
+    filename = str(tmp_path / "results.sds")
+    write_sd_results(filename, SimpleNamespace(status="optimal"), {"model_id": "m"}, {"validation": {"values": [1]}})
+    with open(filename, 'rb') as fp:
+        data = fp.read()
+    (solutions, sd_setup) = pickle.loads(data) # as in earlier versions of CNApy
+    assert solutions.status == "optimal" and sd_setup == {"model_id": "m"}
+    (solutions, sd_setup, metadata) = read_sd_results(data)
+    assert metadata == {"validation": {"values": [1]}}
+    metadata["validation"] = None # the metadata stay attached when the solutions are saved again
+    write_sd_results(filename, solutions, sd_setup)
+    with open(filename, 'rb') as fp:
+        assert read_sd_results(fp.read())[2] == {"validation": None}
+    assert read_sd_results(pickle.dumps((SimpleNamespace(), {})))[2] == {}
+
+
+def test_linear_program_assembly():
+    from scipy import sparse
+    from cnapy.sd_class_interface import LinearProgram, ConstraintSense
+    lp = LinearProgram()
+    for name in ("R1", "R2", "R3"):
+        lp.add_float_variable(name, 0.0, 10.0)
+    lp.add_constraint("A", {"R1": 1.0, "R2": -2.0}, ConstraintSense.EQ, 0.0)
+    lp.add_constraint("max R3", {"R3": 1.0}, ConstraintSense.LEQ, 5.0)
+    lp.add_constraint("min R2", {"R2": 1.0, "R3": 1.0}, ConstraintSense.GEQ, 1.0)
+    solver_input = lp._assemble_solver_input()
+    assert lp.active_variables == ["R1", "R2", "R3"] # order of first occurrence
+    assert solver_input["A_eq"].toarray().tolist() == [[1.0, -2.0, 0.0]]
+    assert solver_input["A_ineq"].toarray().tolist() == [[0.0, 0.0, 1.0], [0.0, -1.0, -1.0]]
+    assert solver_input["b_ineq"] == [5.0, -1.0]
+    lp.add_float_variable("R4", 0.0, 10.0)
+    lp.add_constraint_block("B", ["R4", "R1"], sparse.csr_matrix([[1.0, 0.0], [2.0, -1.0]]), [3.0, 0.0],
+                            ConstraintSense.GEQ)
+    solver_input = lp._assemble_solver_input()
+    assert lp.active_variables == ["R1", "R2", "R3", "R4"]
+    assert solver_input["A_ineq"].toarray().tolist() == [[0.0, 0.0, 1.0, 0.0], [0.0, -1.0, -1.0, 0.0],
+                                                         [0.0, 0.0, 0.0, -1.0], [1.0, 0.0, 0.0, -2.0]]
+    assert solver_input["b_ineq"] == [5.0, -1.0, -3.0, 0.0]
+
+
+def test_linear_program_incremental_edits():
+    from cnapy.sd_class_interface import LinearProgram, ConstraintSense, ObjectiveDirection, Solver
+    lp = LinearProgram()
+    for name in ("R1", "R2"):
+        lp.add_float_variable(name, 0.0, 10.0)
+    lp.add_constraint("sum", {"R1": 1.0, "R2": 1.0}, ConstraintSense.LEQ, 8.0)
+    lp.add_constraint("diff", {"R1": 1.0, "R2": -1.0}, ConstraintSense.GEQ, -2.0)
+    lp.set_objective({"R1": 1.0, "R2": 2.0}, ObjectiveDirection.MAX)
+    lp.construct_solver_object(solver=Solver.GLPK)
+    assert abs(lp.run_slim_solve() - 13.0) < 1e-9
+    lp.set_variable_bounds("R1", 0.0, 2.0)
+    assert abs(lp.run_slim_solve() - 10.0) < 1e-9
+    lp.set_constraint_rhs("diff", -1.0)
+    assert abs(lp.run_slim_solve() - 8.0) < 1e-9
+    lp.add_constraint("max R2", {"R2": 1.0}, ConstraintSense.LEQ, 1.5)
+    assert abs(lp.run_slim_solve() - 5.0) < 1e-9
+    lp.delete_constraint("max R2")
+    lp.set_constraint_coefficients("diff", {"R2": 0.0})
+    assert abs(lp.run_slim_solve() - 16.0) < 1e-9
+
+
+def test_linear_program_equality_edits_with_indicators():
+    from cnapy.sd_class_interface import BinaryValue, ConstraintSense, IndicatorConstraint, LinearProgram, \
+        ObjectiveDirection, Solver
+    lp = LinearProgram()
+    for name in ("R1", "R2"):
+        lp.add_float_variable(name, 0.0, 10.0)
+    lp.add_binary_variable("B1")
+    lp.add_constraint("max R1", {"R1": 1.0}, ConstraintSense.LEQ, 6.0)
+    lp.add_constraint("sum", {"R1": 1.0, "R2": 1.0}, ConstraintSense.EQ, 8.0)
+    # GLPK gets a big-M row for the indicator after the equalities
+    lp.add_existing_indicator_constraint(IndicatorConstraint(name="R1 off", lhs={"R1": 1.0}, rhs=2.0,
+        sense=ConstraintSense.LEQ, binary_name="B1", binary_value=BinaryValue.ONE))
+    lp.set_objective({"R1": 1.0, "R2": 1.0}, ObjectiveDirection.MAX)
+    lp.construct_solver_object(big_m_value=100, solver=Solver.GLPK)
+    assert abs(lp.run_slim_solve() - 8.0) < 1e-9
+    lp.set_constraint_coefficients("sum", {"R2": 2.0})
+    assert abs(lp.run_slim_solve() - 7.0) < 1e-9
+    lp.set_constraint_rhs("sum", 12.0)
+    assert abs(lp.run_slim_solve() - 9.0) < 1e-9
+
+
+def test_linear_program_variability_analysis():
+    from cnapy.sd_class_interface import LinearProgram, ConstraintSense, Solver
+    lp = LinearProgram()
+    for name in ("R1", "R2", "R3"):
+        lp.add_float_variable(name, 0.0, 10.0)
+    lp.add_constraint("A", {"R1": 1.0, "R2": -1.0, "R3": -1.0}, ConstraintSense.EQ, 0.0)
+    lp.add_constraint("min R3", {"R3": 1.0}, ConstraintSense.GEQ, 4.0)
+    results = lp.run_variability_analysis(["R1", "R2", "R3"], solver=Solver.GLPK, max_workers=1)
+    assert [name for (name, _, _) in results] == ["R1", "R2", "R3"]
+    assert all(abs(v - e) < 1e-9 for (_, *values), expected in zip(results, [(4, 10), (0, 6), (4, 10)])
+               for v, e in zip(values, expected))
+
+
+def test_split_reversible_reactions():
+    from cnapy.sd_ci_optmdfpathway import split_reversible_reactions
+    model = small_network({"EX_A": ({"A": -1.0}, -10.0, 0.0), "R1": ({"A": -1.0, "B": 1.0}, -5.0, 5.0),
+                           "EX_B": ({"B": -1.0}, 0.0, 10.0)})
+    irreversible = split_reversible_reactions(model, "_F", "_R")
+    assert irreversible.reaction_ids == ["EX_A_F", "EX_A_R", "R1_F", "R1_R", "EX_B_F", "EX_B_R"]
+    assert list(irreversible.lower_bounds) == [0.0] * 6
+    assert list(irreversible.upper_bounds) == [0.0, 10.0, 5.0, 5.0, 10.0, 0.0]
+    assert irreversible.stoichiometric_matrix[0, 1] == 1.0 and irreversible.stoichiometric_matrix[1, 3] == -1.0
+    assert list(irreversible.combine([0.0, 3.0, 0.0, 3.0, 0.0, 0.0])) == [-3.0, -3.0, 0.0]
+    assert irreversible.translate_lhs({"R1": 2.0, "x_A": 1.0}) == {"R1_F": 2.0, "R1_R": -2.0, "x_A": 1.0}
+
+
+def test_thermodynamic_data():
+    from cnapy.sd_ci_optmdfpathway import split_reversible_reactions
+    from cnapy.thermodynamic_data import ThermodynamicData
+    model = small_network({"R1": ({"A": -1.0, "B": 1.0}, -5.0, 5.0), "R2": ({"B": -1.0}, 0.0, 5.0)})
+    reactions = model.reactions
+    reactions[0].annotation["dG0"] = "-4.5"
+    model.metabolites.A.annotation["Cmax"] = "0.01"
+    data = ThermodynamicData()
+    data.update(model)
+    assert data.dG0[0] == -4.5 and math.isnan(data.dG0[1]) and data.invalid_entries == []
+    assert data.concentration_values(1e-6, 0.02)["A"] == {"min": 1e-6, "max": 0.01}
+    assert data.irreversible_dG0_values(split_reversible_reactions(model)) == {
+        "R1_FWD": {"dG0": -4.5, "uncertainty": 0.0}, "R1_REV": {"dG0": 4.5, "uncertainty": 0.0}}
+    data.set_dG0s(model, {"R2": {"dG0": 3.0, "uncertainty": 1.0}})
+    assert math.isnan(data.dG0[0]) and "dG0" not in reactions[0].annotation
+    assert (data.dG0[1], data.dG0_uncertainty[1]) == (3.0, 1.0) and reactions[1].annotation["dG0"] == 3.0
+    reactions[1].annotation["dG0"] = "n/a"
+    data.update(model) # still cached
+    assert data.dG0[1] == 3.0
+    data.invalidate()
+    data.update(model)
+    assert math.isnan(data.dG0[1]) and data.invalid_entries == [("dG0", "R2", "n/a")]
+
+
+def test_minimal_optmdf_sweep():
+    from cnapy.sd_class_interface import ObjectiveDirection, Solver, Status
+    from cnapy.sd_ci_optmdfpathway import create_optmdfpathway_milp, iterate_minimal_optmdf_sweep
+    model = small_network({"In": ({"A": 1.0}, 0.0, 10.0), "R1": ({"A": -1.0, "B": 1.0}, 0.0, 10.0),
+                           "Out": ({"B": -1.0}, 0.0, 10.0)})
+    lp = create_optmdfpathway_milp(model, {"R1": {"dG0": -10.0, "uncertainty": 0.0}},
+                                   {"DEFAULT": {"min": 1.0, "max": 1.0}}, extra_constraints=[{"Out": 1.0, "lb": 1.0}],
+                                   minimal_optmdf=20.0)
+    lp.set_objective({"var_B": 1}, direction=ObjectiveDirection.MAX)
+    lp.construct_solver_object(solver=Solver.GLPK)
+    results = list(iterate_minimal_optmdf_sweep(lp, [0.0, 20.0, 5.0]))
+    assert [minimal_optmdf for (minimal_optmdf, _) in results] == [20.0, 5.0, 0.0]
+    assert [result.status for (_, result) in results] == [Status.INFEASIBLE, Status.OPTIMAL, Status.OPTIMAL]
+    assert all(abs(result.objective_value - 10.0) < 1e-6 for (_, result) in results[1:])
+
+
+def test_optmdf_pathways():
+    from cnapy.sd_class_interface import ObjectiveDirection, Solver, Status
+    from cnapy.sd_ci_optmdfpathway import create_optmdfpathway_milp, iterate_optmdf_pathways
+    model = small_network({"In": ({"A": 1.0}, 0.0, 10.0), "R1": ({"A": -1.0, "B": 1.0}, 0.0, 10.0),
+                           "R2": ({"A": -1.0, "B": 1.0}, 0.0, 10.0), "Out": ({"B": -1.0}, 0.0, 10.0)})
+    lp = create_optmdfpathway_milp(model, {"R1": {"dG0": -10.0, "uncertainty": 0.0},
+                                           "R2": {"dG0": -5.0, "uncertainty": 0.0}},
+                                   {"DEFAULT": {"min": 1.0, "max": 1.0}}, extra_constraints=[{"Out": 1.0, "lb": 1.0}])
+    lp.set_objective({"var_B": 1}, direction=ObjectiveDirection.MAX)
+    lp.construct_solver_object(solver=Solver.GLPK)
+    results = list(iterate_optmdf_pathways(lp, 5))
+    assert [result.status for result in results] == [Status.OPTIMAL, Status.OPTIMAL]
+    assert [round(result.objective_value, 6) for result in results] == [10.0, 5.0]
+    assert results[0].values["R2"] < 1e-6 and results[1].values["R1"] < 1e-6
+
+
+def optmdfpathway_milp_per_row(model, dG0_values, concentration_values, extra_constraint,
+                               add_bottleneck_constraints=False, minimal_optmdf=-float("inf")):
+    '''the OptMDFpathway MILP with one constraint per row, as it was built before the sparse blocks'''
+    from cnapy.sd_class_interface import BinaryValue, ConstraintSense, LinearProgram
+    from cnapy.sd_ci_optmdfpathway import STANDARD_R, STANDARD_T
+    lp = LinearProgram()
+    for reaction in model.reactions:
+        lp.add_float_variable(reaction.id, reaction.lower_bound, reaction.upper_bound)
+    for metabolite in model.metabolites:
+        lp.add_constraint(f"Steady-state of {metabolite.id}", {reaction.id: reaction.metabolites[metabolite]
+                          for reaction in metabolite.reactions}, ConstraintSense.EQ, 0.0)
+        concentrations = concentration_values.get(metabolite.id, concentration_values["DEFAULT"])
+        lp.add_float_variable(f"x_{metabolite.id}", math.log(concentrations["min"]), math.log(concentrations["max"]))
+    lp.add_constraint("Extra_constraint_0_LB", {"Out": 1.0}, ConstraintSense.GEQ, extra_constraint)
+    lp.add_float_variable("var_B", -float("inf"), float("inf"))
+    if minimal_optmdf > -float("inf"):
+        lp.add_constraint("minimal_optmdf", {"var_B": 1.0}, ConstraintSense.GEQ, minimal_optmdf)
+    bottleneck_z_sum_lhs = {"bottleneck_z_sum": -1.0}
+    for reaction in model.reactions:
+        if reaction.id not in dG0_values:
+            continue
+        lp.add_float_variable(f"f_var_{reaction.id}", -float("inf"), float("inf"))
+        dG0 = dG0_values[reaction.id]
+        lp.add_float_variable(f"dG0_{reaction.id}", dG0["dG0"] - dG0["uncertainty"], dG0["dG0"] + dG0["uncertainty"])
+        f_lhs = {f"f_var_{reaction.id}": -1.0, f"dG0_{reaction.id}": -1.0}
+        for metabolite, stoichiometry in reaction.metabolites.items():
+            f_lhs[f"x_{metabolite.id}"] = -stoichiometry * STANDARD_R * STANDARD_T
+        lp.add_constraint(f"f_var_constraint_{reaction.id}", f_lhs, ConstraintSense.EQ, 0.0)
+        lp.add_binary_variable(f"z_var_{reaction.id}")
+        lp.add_indicator_constraint(f"indicator_0_{reaction.id}", {reaction.id: 1.0}, 0.0, ConstraintSense.EQ,
+                                    f"z_var_{reaction.id}", BinaryValue.ZERO)
+        indicator_1_lhs = {"var_B": 1.0, f"f_var_{reaction.id}": -1.0}
+        if add_bottleneck_constraints:
+            lp.add_binary_variable(f"bottleneck_z_{reaction.id}")
+            indicator_1_lhs[f"bottleneck_z_{reaction.id}"] = -10_000
+            bottleneck_z_sum_lhs[f"bottleneck_z_{reaction.id}"] = 1.0
+        lp.add_indicator_constraint(f"indicator_1_{reaction.id}", indicator_1_lhs, 0.0, ConstraintSense.LEQ,
+                                    f"z_var_{reaction.id}", BinaryValue.ONE)
+    if add_bottleneck_constraints:
+        lp.add_float_variable("bottleneck_z_sum", -float("inf"), float("inf"))
+        lp.add_constraint("bottleneck_z_sum_constraint", bottleneck_z_sum_lhs, ConstraintSense.EQ, 0.0)
+    return lp
+
+
+def test_optmdfpathway_milp_blocks():
+    from cnapy.sd_class_interface import ObjectiveDirection, Solver, Status
+    from cnapy.sd_ci_optmdfpathway import create_optmdfpathway_milp
+    model = small_network({"In": ({"A": 1.0}, 0.0, 10.0), "R1": ({"A": -1.0, "B": 1.0}, 0.0, 6.0),
+                           "R2": ({"B": -1.0, "C": 1.0}, 0.0, 10.0), "R3": ({"A": -2.0, "C": 1.0}, 0.0, 3.0),
+                           "Out": ({"C": -1.0}, 0.0, 10.0)})
+    dG0_values = {"R1": {"dG0": -6.0, "uncertainty": 1.0}, "R2": {"dG0": 3.0, "uncertainty": 0.0},
+                  "R3": {"dG0": 8.0, "uncertainty": 0.5}}
+    concentration_values = {"DEFAULT": {"min": 1e-6, "max": 1e-2}, "A": {"min": 1e-3, "max": 1e-1}}
+    for (add_bottleneck_constraints, minimal_optmdf, objective, direction) in [
+            (False, -float("inf"), {"var_B": 1}, ObjectiveDirection.MAX), # OptMDF
+            (True, 40.0, {"bottleneck_z_sum": 1}, ObjectiveDirection.MIN), # bottleneck analysis
+            (False, 16.0, {"Out": 1}, ObjectiveDirection.MAX)]: # thermodynamic FBA
+        objective_values = []
+        for lp in (optmdfpathway_milp_per_row(model, dG0_values, concentration_values, 4.0,
+                                              add_bottleneck_constraints, minimal_optmdf),
+                   create_optmdfpathway_milp(model, dG0_values, concentration_values,
+                                             extra_constraints=[{"Out": 1.0, "lb": 4.0}],
+                                             add_bottleneck_constraints=add_bottleneck_constraints,
+                                             minimal_optmdf=minimal_optmdf)):
+            lp.set_objective(objective, direction=direction)
+            lp.construct_solver_object(solver=Solver.GLPK)
+            result = lp.run_solve()
+            assert result.status == Status.OPTIMAL
+            objective_values.append(result.objective_value)
+        assert abs(objective_values[0] - objective_values[1]) < 1e-6
+
+
+def test_problem_export(tmp_path):
+    from cnapy.lp_replay import replay
+    from cnapy.problem_export import linear_program_from_cobra_model, read_name_map, write_problem
+    model = small_network({"In-1": ({"A": 1.0}, 0.0, 10.0), "Out": ({"A": -1.0}, 0.0, 6.0)}, objective="Out")
+    lp = linear_program_from_cobra_model(model)
+    for filename in (str(tmp_path / "fba.mps"), str(tmp_path / "fba.lp")):
+        write_problem(lp, filename)
+        assert "In-1" in read_name_map(filename)["columns"].values()
+        result = replay(filename, "glpk")
+        assert result["status"] == "optimal" and abs(result["objective value"] - 6.0) < 1e-9
+
+
+def test_scenario_batch(tmp_path):
+    import json
+    from cnapy.model_snapshot import model_from_bytes, model_to_bytes
+    from cnapy.scenario_batch import ScenarioResultTable, evaluate_scenario, evaluate_scenarios, read_scenario_file, \
+        table_columns
+    model = small_network({"In": ({"A": 1.0}, 0.0, 10.0), "Out": ({"A": -1.0}, 0.0, 10.0)}, objective="Out")
+    model = model_from_bytes(model_to_bytes(model))
+    with open(tmp_path / "s.scen", 'w') as fp:
+        json.dump({'fluxes': {'In': [0.0, 4.0], 'X': [1.0, 1.0]}, 'pinned_reactions': [], 'description': '',
+                   'objective_direction': 'max', 'objective_coefficients': {}, 'use_scenario_objective': False,
+                   'reactions': {'Leak': [{'A': -1.0}, 1.0, 1.0]}, 'constraints': [], 'version': 2}, fp)
+    with open(tmp_path / "s.val", 'w') as fp:
+        fp.write("R_Out 20\n")
+    scenarios = [read_scenario_file(str(tmp_path / name), {"In", "Out"}) for name in ("s.scen", "s.val")]
+    assert scenarios[0].unknown_ids == ["X"] and scenarios[1] == {"Out": (20.0, 20.0)}
+    reac_id = table_columns(model, scenarios)
+    assert reac_id == ["In", "Out", "Leak"]
+    table = ScenarioResultTable([s.name for s in scenarios], reac_id, "fba")
+    column_index = {r: i for i, r in enumerate(reac_id)}
+    for i, scenario in enumerate(scenarios):
+        table.set_result(i, evaluate_scenario(model, scenario, "fba", column_index))
+    assert table.status == ["optimal", "infeasible"] and len(model.reactions) == 2
+    assert table.fluxes[0].tolist() == [4.0, 3.0, 1.0] and all(math.isnan(v) for v in table.fluxes[1])
+    pool_table = ScenarioResultTable([s.name for s in scenarios], reac_id, "fba")
+    for part in evaluate_scenarios(model_to_bytes(model), scenarios, reac_id, "fba", max_workers=2):
+        for (i, result) in part:
+            pool_table.set_result(i, result)
+    assert pool_table.status == table.status and pool_table.fluxes[0].tolist() == [4.0, 3.0, 1.0]
+    table.save(str(tmp_path / "results.npz"))
+    assert ScenarioResultTable.load(str(tmp_path / "results.npz")).status == table.status
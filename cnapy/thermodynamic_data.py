@@ -0,0 +1,133 @@
+"""Parsed thermodynamic parameters of the model for the thermodynamic analyses"""
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+import cobra
+import numpy
+
+if TYPE_CHECKING: # the solver interfaces are only imported when a thermodynamic analysis is run
+    from cnapy.sd_ci_optmdfpathway import IrreversibleModel
+
+
+class ThermodynamicData:
+    '''
+    dG'° values with their uncertainties and concentration ranges as float64 arrays
+    that are aligned with the reactions and metabolites of the model. They are read
+    once from the annotations "dG0", "dG0_uncertainty", "Cmin" and "Cmax", which remain
+    the form in which the values are saved with the project, and are kept until
+    invalidate() is called after the model has been edited. NaN marks a missing value.
+    '''
+
+    def __init__(self):
+        self.invalidate()
+
+    def invalidate(self):
+        self._model = None
+        self.reaction_ids: List[str] = []
+        self.reaction_index: Dict[str, int] = {}
+        self.dG0 = numpy.zeros(0)
+        self.dG0_uncertainty = numpy.zeros(0)
+        self.metabolite_ids: List[str] = []
+        self.metabolite_index: Dict[str, int] = {}
+        self.cmin = numpy.zeros(0)
+        self.cmax = numpy.zeros(0)
+        # (annotation, model item ID, annotation value) of the values that are not numbers
+        self.invalid_entries: List[Tuple[str, str, str]] = []
+
+    def is_valid_for(self, model: cobra.Model) -> bool:
+        return self._model is model and len(self.reaction_ids) == len(model.reactions) \
+            and len(self.metabolite_ids) == len(model.metabolites)
+
+    def update(self, model: cobra.Model):
+        '''reads the values from the annotations unless they are already available for this model'''
+        if self.is_valid_for(model):
+            return
+        self.invalidate()
+        self.reaction_ids = [reaction.id for reaction in model.reactions]
+        self.reaction_index = {reac_id: i for i, reac_id in enumerate(self.reaction_ids)}
+        self.dG0 = self._read_annotations(model.reactions, "dG0", numpy.nan)
+        # the uncertainty is only used together with a dG'°
+        self.dG0_uncertainty = self._read_annotations(model.reactions, "dG0_uncertainty", 0.0)
+        self.metabolite_ids = [metabolite.id for metabolite in model.metabolites]
+        self.metabolite_index = {met_id: i for i, met_id in enumerate(self.metabolite_ids)}
+        self.cmin = self._read_annotations(model.metabolites, "Cmin", numpy.nan)
+        self.cmax = self._read_annotations(model.metabolites, "Cmax", numpy.nan)
+        self._model = model
+
+    def _read_annotations(self, items, key: str, missing: float) -> numpy.ndarray:
+        values = numpy.full(len(items), missing)
+        for i, item in enumerate(items):
+            values[i] = self._to_float(key, item.id, item.annotation.get(key, None), missing)
+        return values
+
+    def _to_float(self, key: str, item_id: str, value, missing: float) -> float:
+        if value is None:
+            return missing
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            self.invalid_entries.append((key, item_id, str(value)))
+            return missing
+
+    def set_dG0s(self, model: cobra.Model, dG0s: Dict[str, Dict[str, float]]):
+        '''replaces all dG'° values of the model, dG0s as loaded from JSON or XLSX'''
+        self.update(model)
+        self.invalid_entries = [entry for entry in self.invalid_entries if not entry[0].startswith("dG0")]
+        self.dG0[:] = numpy.nan
+        self.dG0_uncertainty[:] = 0.0
+        for reaction in model.reactions:
+            reaction.annotation.pop("dG0", None)
+            reaction.annotation.pop("dG0_uncertainty", None)
+        for reac_id, values in dG0s.items():
+            i = self.reaction_index.get(reac_id, None)
+            if i is None:
+                continue
+            reaction = model.reactions[i]
+            reaction.annotation["dG0"] = values["dG0"]
+            self.dG0[i] = self._to_float("dG0", reac_id, values["dG0"], numpy.nan)
+            if "uncertainty" in values.keys():
+                reaction.annotation["dG0_uncertainty"] = values["uncertainty"]
+                self.dG0_uncertainty[i] = self._to_float("dG0_uncertainty", reac_id, values["uncertainty"], 0.0)
+
+    def set_concentrations(self, model: cobra.Model, concentrations: Dict[str, Dict[str, float]]):
+        '''
+        replaces all concentration ranges of the model, concentrations as loaded from JSON or XLSX,
+        a "DEFAULT" entry is used for the metabolites that are not listed
+        '''
+        self.update(model)
+        self.invalid_entries = [entry for entry in self.invalid_entries if not entry[0].startswith("C")]
+        default = concentrations.get("DEFAULT", None)
+        for i, metabolite in enumerate(model.metabolites):
+            metabolite.annotation.pop("Cmin", None)
+            metabolite.annotation.pop("Cmax", None)
+            values = concentrations.get(metabolite.id, default)
+            if values is None:
+                self.cmin[i] = numpy.nan
+                self.cmax[i] = numpy.nan
+                continue
+            metabolite.annotation["Cmin"] = values["min"]
+            metabolite.annotation["Cmax"] = values["max"]
+            self.cmin[i] = self._to_float("Cmin", metabolite.id, values["min"], numpy.nan)
+            self.cmax[i] = self._to_float("Cmax", metabolite.id, values["max"], numpy.nan)
+
+    def irreversible_dG0_values(self, irreversible: "IrreversibleModel") -> Dict[str, Dict[str, float]]:
+        '''
+        dG'° values of the irreversible reactions of the split model as used by
+        create_optmdfpathway_milp, the reverse parts get the negated dG'°
+        '''
+        positions = numpy.fromiter((self.reaction_index.get(reac_id, -1) for reac_id in irreversible.original_reaction_ids),
+                                   dtype=int, count=len(irreversible.original_reaction_ids))
+        dG0 = numpy.append(self.dG0, numpy.nan)[positions] # reactions that are not in the model, e.g. from the scenario, have none
+        uncertainty = numpy.append(self.dG0_uncertainty, 0.0)[positions]
+        dG0_values: Dict[str, Dict[str, float]] = {}
+        for (index, sign) in ((irreversible.forward_index, 1.0), (irreversible.reverse_index, -1.0)):
+            for i in numpy.flatnonzero((index >= 0) & ~numpy.isnan(dG0)):
+                dG0_values[irreversible.reaction_ids[index[i]]] = {"dG0": sign*dG0[i], "uncertainty": uncertainty[i]}
+        return dG0_values
+
+    def concentration_values(self, default_min: float, default_max: float) -> Dict[str, Dict[str, float]]:
+        '''concentration ranges of all metabolites as used by create_optmdfpathway_milp, missing bounds are set to the defaults'''
+        cmin = numpy.where(numpy.isnan(self.cmin), default_min, self.cmin)
+        cmax = numpy.where(numpy.isnan(self.cmax), default_max, self.cmax)
+        values = {met_id: {"min": float(lb), "max": float(ub)} for met_id, lb, ub in zip(self.metabolite_ids, cmin, cmax)}
+        values["DEFAULT"] = {"min": default_min, "max": default_max}
+        return values
@@ -1,13 +1,16 @@
 ''' CNApy utilities '''
 from qtpy.QtCore import QObject, Qt, Signal, Slot, QTimer, QStringListModel
 from qtpy.QtWidgets import QMessageBox, QLineEdit, QTableWidget, QTableWidgetItem, \
-    QCompleter, QApplication, QFrame, QSizePolicy
-from straindesign import lineq2list, linexpr2dict, linexprdict2str
+    QCompleter, QApplication, QFrame, QSizePolicy, QTableView
+from enum import IntFlag
 import fnmatch
 import re
+from cnapy.lazy_import import lazy_import
+
+straindesign = lazy_import("straindesign")
 
 def format_scenario_constraint(constraint):
-    return linexprdict2str(constraint[0])+" "+constraint[1]+" "+str(constraint[2])
+    return straindesign.linexprdict2str(constraint[0])+" "+constraint[1]+" "+str(constraint[2])
 
 
 def update_selected(string: str, with_annotations: bool, model_elements, element_list):
@@ -124,6 +127,59 @@ class SignalThrottler(QObject):
     timerTypeChanged = Signal(Qt.TimerType)
 
 
+class UpdateScope(IntFlag):
+    Modes = 1 # show/hide and update of the mode navigator
+    Lists = 2 # the active model tab
+    Maps = 4 # the active map including recoloring
+    Values = Lists | Maps # computed or scenario values changed, the modes are not affected
+    All = Modes | Lists | Maps
+
+
+class UpdateScheduler(SignalThrottler):
+    '''
+    Collects update requests (a bit field of what needs to be updated) and
+    flushes them at most once per interval (default: one frame at 60 Hz).
+    Requests arriving while a flush is pending are merged into it and counted as coalesced.
+    '''
+    def __init__(self, interval=16):
+        SignalThrottler.__init__(self, interval)
+        self.timer.setSingleShot(True)
+        self.pending_scope = 0
+        self.request_count = 0
+        self.flush_count = 0
+        self.coalesced_count = 0
+
+    @Slot(int)
+    def request(self, scope: int):
+        self.request_count += 1
+        if self.hasPendingEmission:
+            self.coalesced_count += 1
+        self.pending_scope |= int(scope)
+        self.throttle()
+
+    def take_pending(self) -> int:
+        '''cancels a pending flush and returns its scope, e.g. because an immediate update covers it'''
+        self.timer.stop()
+        scope = self.pending_scope
+        if self.hasPendingEmission:
+            self.coalesced_count += 1
+            self.hasPendingEmission = False
+        self.pending_scope = 0
+        return scope
+
+    def emit_triggered(self):
+        scope = self.pending_scope
+        self.pending_scope = 0
+        self.flush_count += 1
+        super().emit_triggered()
+        self.flushed.emit(scope)
+
+    def statistics(self):
+        return {"requested": self.request_count, "flushed": self.flush_count, "coalesced": self.coalesced_count}
+
+    flushed = Signal(int)
+
+
 class QComplReceivLineEdit(QLineEdit):
     '''# does new completion after SPACE'''
 
@@ -190,9 +246,9 @@ class QComplReceivLineEdit(QLineEdit):
             else:
                 try:
                     if self.is_constr:
-                        lineq2list([self.text()], self.wordlist)
+                        straindesign.lineq2list([self.text()], self.wordlist)
                     else:
-                        linexpr2dict(self.text(), self.wordlist)
+                        straindesign.linexpr2dict(self.text(), self.wordlist)
                     if final:
                         self.setStyleSheet(BACKGROUND_COLOR(
                             "#ffffff", self.objectName()))
@@ -236,6 +292,25 @@ class QTableCopyable(QTableWidget):
             QApplication.clipboard().setText(copy_text)
 
 
+class QTableViewCopyable(QTableView):
+    '''like QTableCopyable but for a table that gets its content from a model'''
+    def keyPressEvent(self, event):
+        super().keyPressEvent(event)
+        if event.key() == Qt.Key_C and (event.modifiers() & Qt.ControlModifier):
+            copied_cells = sorted(self.selectedIndexes(), key=lambda c: (c.row(), c.column()))
+            if len(copied_cells) == 0:
+                return
+            copy_text = ''
+            max_column = max(c.column() for c in copied_cells)
+            for c in copied_cells:
+                copy_text += str(self.model().data(c, Qt.DisplayRole))
+                if c.column() == max_column:
+                    copy_text += '\n'
+                else:
+                    copy_text += '\t'
+            QApplication.clipboard().setText(copy_text)
+
+
 class QTableItem(QTableWidgetItem):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -0,0 +1,55 @@
+"""Pools of spawned worker processes for the parallel computations; the modules used there must not import Qt"""
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from typing import Any, Callable, Iterator, List, Sequence, Tuple
+
+
+def worker_count(max_workers: int, num_jobs: int) -> int:
+    '''at least one and at most one worker per job, max_workers=None means one per CPU'''
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    return max(1, min(max_workers, num_jobs))
+
+
+def iterate_pool(function: Callable, arguments: List[Tuple], max_workers: int = None,
+                 initializer: Callable = None, initargs: Tuple = ()) -> Iterator[Tuple[int, Future]]:
+    '''
+    Calls function(*arguments[i]) in a pool of spawned worker processes, spawn so that the
+    workers behave the same on all platforms. Yields (i, future) as the calls complete.
+    Stopping the iteration cancels the calls that have not been started yet
+    and waits for those that are running.
+    '''
+    executor = ProcessPoolExecutor(max_workers=worker_count(max_workers, len(arguments)),
+                                   mp_context=get_context("spawn"), initializer=initializer, initargs=initargs)
+    futures = {}
+    try:
+        futures = {executor.submit(function, *args): i for i, args in enumerate(arguments)}
+        for future in as_completed(futures):
+            yield (futures[future], future)
+    finally:
+        # shutdown(cancel_futures=True) needs Python 3.9 and shutdown(wait=False) breaks the
+        # pool in Python 3.8, therefore only the calls that already run are waited for
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def map_chunks(function: Callable, items: Sequence, max_workers: int = None,
+               initializer: Callable = None, initargs: Tuple = ()) -> Iterator[Any]:
+    '''
+    Calls function(chunk) in a pool of worker processes for chunks of the items where a chunk
+    is a list of (index of the item, item). Yields the results of these calls as they complete.
+    The worker state, e.g. the model, is set up once per process by initializer(*initargs).
+    '''
+    max_workers = worker_count(max_workers, len(items))
+    # several chunks per worker so that the load is balanced and progress can be shown
+    chunk_size = max(1, len(items) // (8 * max_workers))
+    indexed_items = list(enumerate(items))
+    chunks = [(indexed_items[i:i+chunk_size],) for i in range(0, len(indexed_items), chunk_size)]
+    pool = iterate_pool(function, chunks, max_workers, initializer, initargs)
+    try:
+        for (_, future) in pool:
+            yield future.result()
+    finally:
+        pool.close()
@@ -0,0 +1,166 @@
+"""Computations that run in a separate process; the modules used there must not import Qt"""
+from contextlib import contextmanager, redirect_stdout, redirect_stderr
+import copy
+import logging
+from math import ceil, isinf
+import pickle
+import time
+import traceback
+from multiprocessing.connection import Connection
+from typing import Dict, List, Optional, Tuple
+
+from cnapy.model_snapshot import model_from_bytes
+
+# message types sent from the worker process to the GUI, each message is a (type, content) tuple
+OUTPUT = "output" # text that the computation printed
+PARTIAL_RESULT = "partial result" # results that are available before the computation has finished
+FINISHED = "finished" # the final results
+FAILED = "failed" # (exception type name, error message, traceback)
+
+
+class PipeWriter:
+    '''file-like object that sends everything written to it through the pipe'''
+
+    def __init__(self, connection: Connection):
+        self.connection = connection
+
+    def write(self, text):
+        if not isinstance(text, str):
+            text = str(text)
+        if len(text) > 0:
+            self.connection.send((OUTPUT, text))
+
+    def flush(self):
+        pass
+
+
+def send_exception(connection: Connection, exception: Exception):
+    connection.send((FAILED, (type(exception).__name__, str(exception), traceback.format_exc())))
+
+
+@contextmanager
+def redirect_output(connection: Connection):
+    '''sends stdout, stderr and the messages of the root logger through the pipe'''
+    writer = PipeWriter(connection)
+    with redirect_stdout(writer), redirect_stderr(writer):
+        logger = logging.getLogger()
+        handler = logging.StreamHandler(stream=writer)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel('INFO')
+        try:
+            yield writer
+        finally:
+            logger.removeHandler(handler)
+
+
+def prepare_sd_setup(sd_setup: Dict) -> Tuple[Dict, bool]:
+    '''
+    Turns a setup from the strain design dialog (as it is saved in a JSON file) into the
+    arguments of compute_strain_designs; also returns whether the scenario is to be used.
+    '''
+    from straindesign.names import MODEL_ID, GKOCOST
+    sd_setup = dict(sd_setup)
+    sd_setup.pop(MODEL_ID, None)
+    adv = sd_setup.pop('advanced', False)
+    gkos = sd_setup.pop('gene_kos', False)
+    if not adv and gkos: # ensure that gene-kos are computed, even when the
+        sd_setup[GKOCOST] = None # advanced-button wasn't clicked
+    use_scenario = sd_setup.pop('use_scenario', False)
+    return (sd_setup, use_scenario)
+
+
+def strain_design_cost_levels(sd_setup: Dict, completed_cost: float) -> List[Optional[float]]:
+    '''
+    The intervention costs up to which the strain design computation runs in rounds,
+    the designs up to completed_cost have already been found. Only the enumeration of
+    protect/suppress modules up to a finite maximal cost is split, otherwise the
+    computation runs once with the original setup (the level is then None).
+    '''
+    from straindesign.names import MAX_COST, MODULES, MODULE_TYPE, PROTECT, SUPPRESS
+    max_cost = float(sd_setup.get(MAX_COST, float('inf')))
+    if isinf(max_cost) or any(m[MODULE_TYPE] not in (PROTECT, SUPPRESS) for m in sd_setup[MODULES]):
+        return [None]
+    return [float(c) for c in range(int(completed_cost) + 1, ceil(max_cost))] + [max_cost]
+
+
+def compute_strain_designs_worker(model_bytes: bytes, sd_setup: Dict, results_file: str,
+                                  completed_cost: float, connection: Connection):
+    '''
+    Strain design computation; the model already contains the scenario.
+    The computation runs in rounds with increasing maximal cost (see strain_design_cost_levels),
+    after every round but the last its cost is sent as PARTIAL_RESULT because all designs up
+    to this cost have then been found and can be checkpointed. The pickled SDSolutions of the
+    last round are written to results_file, afterwards FINISHED is sent.
+    '''
+    try:
+        with redirect_output(connection):
+            from straindesign import compute_strain_designs # only needed in the worker
+            from straindesign.names import MAX_COST, MAX_SOLUTIONS, T_LIMIT, TIME_LIMIT, TIME_LIMIT_W_SOL
+            levels = strain_design_cost_levels(sd_setup, completed_cost)
+            if completed_cost > 0:
+                print("Resumed with the strain designs up to cost "+str(completed_cost)+" from the checkpoint.")
+            max_solutions = float(sd_setup.get(MAX_SOLUTIONS, float('inf')))
+            time_limit = float(sd_setup.get(T_LIMIT, float('inf')))
+            deadline = time.monotonic() + time_limit
+            for level in levels:
+                setup = dict(sd_setup)
+                if level is not None:
+                    setup[MAX_COST] = level
+                    setup[T_LIMIT] = max(deadline - time.monotonic(), 0.0)
+                sd_solutions = compute_strain_designs(model_from_bytes(model_bytes), **setup)
+                if level == levels[-1] or sd_solutions.status in (TIME_LIMIT, TIME_LIMIT_W_SOL) \
+                    or sd_solutions.get_num_sols() >= max_solutions:
+                    break
+                connection.send((PARTIAL_RESULT, level))
+            with open(results_file, 'wb') as fp:
+                pickle.dump(sd_solutions, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        connection.send((FINISHED, results_file))
+    except Exception as e:
+        send_exception(connection, e)
+    finally:
+        connection.close()
+
+
+def mcs_sizes(max_mcs_size: int, size_lower_bound: int) -> List[int]:
+    '''the maximal cut set sizes of the enumeration rounds, the cut sets up to size_lower_bound are known'''
+    return list(range(min(size_lower_bound, max_mcs_size - 1) + 1, max_mcs_size + 1))
+
+
+def compute_mcs_worker(model_bytes: bytes, mcs_setup: Dict, resume_cut_sets: List, size_lower_bound: int,
+                       connection: Connection):
+    '''
+    MCS computation with compute_mcs; the model already contains the scenario.
+    The enumeration runs in rounds with increasing maximal cut set size (see mcs_sizes).
+    After every round but the last the cut sets that are not in resume_cut_sets and have
+    not been sent yet are sent as PARTIAL_RESULT together with the size up to which the
+    enumeration is complete, the (mcs, err_val) of the last round as FINISHED.
+    '''
+    try:
+        with redirect_output(connection):
+            from cnapy import jvm
+            jvm.start_jvm()
+            import optlang_enumerator.mcs_computation as mcs_computation
+            known_cut_sets = {tuple(sorted(m)) for m in resume_cut_sets}
+            if len(known_cut_sets) > 0:
+                print("Resumed with "+str(len(known_cut_sets))+" cut sets from the checkpoint.")
+            sizes = mcs_sizes(mcs_setup["max_mcs_size"], size_lower_bound)
+            timeout = mcs_setup.get("timeout")
+            deadline = None if timeout is None else time.monotonic() + timeout
+            for size in sizes:
+                setup = copy.deepcopy(mcs_setup) # compute_mcs changes the targets and desired regions
+                setup["max_mcs_size"] = size
+                if deadline is not None:
+                    setup["timeout"] = max(deadline - time.monotonic(), 0.0)
+                (mcs, err_val) = mcs_computation.compute_mcs(model_from_bytes(model_bytes), **setup)
+                if size == sizes[-1] or err_val != 0 or len(mcs) >= mcs_setup["max_mcs_num"] \
+                    or (deadline is not None and time.monotonic() >= deadline):
+                    break
+                new_cut_sets = {tuple(sorted(m)) for m in mcs} - known_cut_sets
+                known_cut_sets |= new_cut_sets
+                connection.send((PARTIAL_RESULT, (sorted(new_cut_sets), size)))
+        connection.send((FINISHED, (mcs, err_val)))
+    except Exception as e:
+        send_exception(connection, e)
+    finally:
+        connection.close()